@@ -0,0 +1,157 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Helpers shared by the benchmarks. These are plain binaries (`harness =
+//! false`) so that they run on the stable toolchain without extra
+//! dependencies: `cargo bench --bench <name>`.
+#![allow(dead_code)]
+
+use serde_json::json;
+use std::alloc::{GlobalAlloc, Layout, System};
+use std::fs;
+use std::hint::black_box;
+use std::path::Path;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::time::{Duration, Instant};
+
+/// The minimum time spent running each measured function.
+const MEASUREMENT_TIME: Duration = Duration::from_millis(500);
+
+/// The minimum number of runs of each measured function.
+const MIN_ITERATIONS: u32 = 10;
+
+/// A template from the snapshot test cases.
+pub struct Case {
+    pub name: String,
+    pub template: Vec<u8>,
+}
+
+/// Loads `template.json` from every directory of `cdk-from-cfn-testing/cases`,
+/// sorted by name.
+pub fn cases() -> Vec<Case> {
+    let dir = Path::new(env!("CARGO_MANIFEST_DIR")).join("cdk-from-cfn-testing/cases");
+    let mut cases: Vec<Case> = fs::read_dir(dir)
+        .expect("test cases are readable")
+        .filter_map(|entry| {
+            let path = entry.ok()?.path();
+            let template = fs::read(path.join("template.json")).ok()?;
+            Some(Case {
+                name: path.file_name()?.to_string_lossy().into_owned(),
+                template,
+            })
+        })
+        .collect();
+    cases.sort_by(|a, b| a.name.cmp(&b.name));
+    cases
+}
+
+/// Generates a JSON template with `resources` resources, alternating S3
+/// buckets and SNS topics that reference the bucket before them through
+/// `Ref`, `Fn::GetAtt`, `Fn::Join` and `Fn::Sub`.
+pub fn synthetic_template(resources: usize) -> Vec<u8> {
+    let mut map = serde_json::Map::new();
+    for index in 0..resources {
+        let resource = if index % 2 == 0 {
+            json!({
+                "Type": "AWS::S3::Bucket",
+                "Properties": {
+                    "BucketName": { "Fn::Sub": format!("${{AWS::StackName}}-bucket-{index}") },
+                    "Tags": [{ "Key": "Index", "Value": index.to_string() }],
+                    "VersioningConfiguration": { "Status": "Enabled" },
+                },
+            })
+        } else {
+            let bucket = format!("Resource{}", index - 1);
+            json!({
+                "Type": "AWS::SNS::Topic",
+                "Properties": {
+                    "TopicName": { "Fn::Join": ["-", [{ "Ref": bucket }, "topic"]] },
+                    "DisplayName": { "Fn::GetAtt": [bucket, "Arn"] },
+                },
+            })
+        };
+        map.insert(format!("Resource{index}"), resource);
+    }
+    serde_json::to_vec_pretty(&json!({
+        "AWSTemplateFormatVersion": "2010-09-09",
+        "Resources": map,
+    }))
+    .expect("synthetic templates are serializable")
+}
+
+/// Returns the mean wall time of a run of `f`, after a warm-up run.
+pub fn measure<T>(mut f: impl FnMut() -> T) -> Duration {
+    black_box(f());
+    let start = Instant::now();
+    let mut iterations = 0;
+    while iterations < MIN_ITERATIONS || start.elapsed() < MEASUREMENT_TIME {
+        black_box(f());
+        iterations += 1;
+    }
+    start.elapsed() / iterations
+}
+
+/// Formats the ratio between a baseline and an improved measurement.
+pub fn speedup(baseline: Duration, improved: Duration) -> String {
+    format!(
+        "{:.2}x",
+        baseline.as_secs_f64() / improved.as_secs_f64().max(f64::EPSILON)
+    )
+}
+
+/// Counts the allocations made through the system allocator, and tracks the
+/// peak number of bytes allocated at once. Benchmarks reporting allocations
+/// install it as their `#[global_allocator]`.
+pub struct Counting;
+
+static ALLOCATIONS: AtomicUsize = AtomicUsize::new(0);
+static LIVE: AtomicUsize = AtomicUsize::new(0);
+static PEAK: AtomicUsize = AtomicUsize::new(0);
+
+unsafe impl GlobalAlloc for Counting {
+    unsafe fn alloc(&self, layout: Layout) -> *mut u8 {
+        let ptr = System.alloc(layout);
+        if !ptr.is_null() {
+            allocated(layout.size());
+        }
+        ptr
+    }
+
+    unsafe fn dealloc(&self, ptr: *mut u8, layout: Layout) {
+        System.dealloc(ptr, layout);
+        LIVE.fetch_sub(layout.size(), Ordering::Relaxed);
+    }
+
+    unsafe fn realloc(&self, ptr: *mut u8, layout: Layout, new_size: usize) -> *mut u8 {
+        let new = System.realloc(ptr, layout, new_size);
+        if !new.is_null() {
+            LIVE.fetch_sub(layout.size(), Ordering::Relaxed);
+            allocated(new_size);
+        }
+        new
+    }
+}
+
+fn allocated(size: usize) {
+    ALLOCATIONS.fetch_add(1, Ordering::Relaxed);
+    let live = LIVE.fetch_add(size, Ordering::Relaxed) + size;
+    PEAK.fetch_max(live, Ordering::Relaxed);
+}
+
+/// The allocations made by a run, and the peak heap above what was live when
+/// it started. Only meaningful when [`Counting`] is the global allocator.
+pub struct Usage {
+    pub allocations: usize,
+    pub peak: usize,
+}
+
+pub fn usage<T>(f: impl FnOnce() -> T) -> Usage {
+    let live = LIVE.load(Ordering::Relaxed);
+    PEAK.store(live, Ordering::Relaxed);
+    let allocations = ALLOCATIONS.load(Ordering::Relaxed);
+    drop(f());
+    Usage {
+        allocations: ALLOCATIONS.load(Ordering::Relaxed) - allocations,
+        peak: PEAK.load(Ordering::Relaxed) - live,
+    }
+}
@@ -0,0 +1,69 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Measures rebuilding the IR of synthetic templates with `IncrementalIr`
+//! after one of their resources was edited, against translating the edited
+//! template from scratch, and checks that both produce the same IR. Templates
+//! are parsed again for every run, so the parse time is measured and
+//! subtracted.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::incremental::IncrementalIr;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::CloudformationParseTree;
+
+fn parse(template: &[u8]) -> CloudformationParseTree<'_> {
+    CloudformationParseTree::from_slice(template).unwrap()
+}
+
+fn main() {
+    let schema = Schema::builtin();
+
+    println!(
+        "{:>9} {:>12} {:>12} {:>12} {:>11} {:>8}",
+        "resources", "parse", "from", "update", "translated", "speedup"
+    );
+    for resources in [1_000, 5_000, 20_000] {
+        let template = common::synthetic_template(resources);
+        let edited = String::from_utf8(template.clone())
+            .unwrap()
+            .replace("-bucket-0\"", "-first-bucket\"")
+            .into_bytes();
+        assert_ne!(template, edited);
+
+        let parse_time = common::measure(|| parse(&template));
+        let full =
+            common::measure(|| CloudformationProgramIr::from(parse(&edited), schema).unwrap())
+                .saturating_sub(parse_time);
+
+        // Every update edits the one resource the previous one edited back.
+        let mut incremental = IncrementalIr::new();
+        incremental.update(parse(&template), schema).unwrap();
+        let mut versions = [&edited, &template].into_iter().cycle();
+        let update = common::measure(|| {
+            incremental
+                .update(parse(versions.next().unwrap()), schema)
+                .map(|_| ())
+                .unwrap()
+        })
+        .saturating_sub(parse_time);
+
+        let expected = CloudformationProgramIr::from(parse(&edited), schema).unwrap();
+        incremental.update(parse(&template), schema).unwrap();
+        let actual = incremental.update(parse(&edited), schema).unwrap();
+        assert_eq!(format!("{actual:?}"), format!("{expected:?}"));
+        assert_eq!(incremental.translated_resources(), 1);
+
+        println!(
+            "{:>9} {:>12.2?} {:>12.2?} {:>12.2?} {:>11} {:>8}",
+            resources,
+            parse_time,
+            full,
+            update,
+            incremental.translated_resources(),
+            common::speedup(full, update)
+        );
+    }
+}
@@ -0,0 +1,98 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Compares handing `serde_yaml::from_reader` an unbuffered file (the former
+//! CLI input path) against reading the template into a buffer sized from the
+//! file's metadata and parsing it from that slice, on large synthetic
+//! templates. Also counts the `read` calls made on the file.
+//!
+//! The parse tree borrows from the template buffer, so it can no longer be
+//! deserialized from a reader; the former path is reproduced by what
+//! `serde_yaml::from_reader` does internally: `read_to_end` into an empty
+//! buffer, then parse that.
+
+mod common;
+
+use cdk_from_cfn::CloudformationParseTree;
+use std::fs;
+use std::io::{self, Read};
+use std::path::Path;
+
+/// A reader counting the calls made to it.
+struct CountingReader<R> {
+    inner: R,
+    reads: usize,
+}
+
+impl<R: Read> Read for CountingReader<R> {
+    fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+        self.reads += 1;
+        self.inner.read(buf)
+    }
+}
+
+fn open(path: &Path) -> CountingReader<fs::File> {
+    CountingReader {
+        inner: fs::File::open(path).unwrap(),
+        reads: 0,
+    }
+}
+
+/// Reads the whole file the way `cli::input::read` does.
+fn read(path: &Path) -> (Vec<u8>, usize) {
+    let mut file = open(path);
+    let size = file.inner.metadata().unwrap().len() as usize;
+    let mut template = Vec::with_capacity(size + 1);
+    file.read_to_end(&mut template).unwrap();
+    (template, file.reads)
+}
+
+fn main() {
+    let path = std::env::temp_dir().join(format!("cdk-from-cfn-input-{}.json", std::process::id()));
+
+    println!(
+        "{:>9} {:>8} {:>14} {:>6} {:>14} {:>6} {:>14}",
+        "resources", "size", "from_reader", "reads", "read+yaml", "reads", "read+from_slice"
+    );
+    for resources in [1_000, 5_000, 20_000] {
+        let template = common::synthetic_template(resources);
+        fs::write(&path, &template).unwrap();
+
+        let mut reader_reads = 0;
+        let reader = common::measure(|| {
+            let mut file = open(&path);
+            let mut template = Vec::new();
+            file.read_to_end(&mut template).unwrap();
+            reader_reads = file.reads;
+            let tree: CloudformationParseTree = serde_yaml::from_slice(&template).unwrap();
+            tree.resources.len()
+        });
+
+        let mut slice_reads = 0;
+        let slice = common::measure(|| {
+            let (template, reads) = read(&path);
+            slice_reads = reads;
+            let tree: CloudformationParseTree = serde_yaml::from_slice(&template).unwrap();
+            tree.resources.len()
+        });
+
+        let fast = common::measure(|| {
+            let (template, _) = read(&path);
+            let tree = CloudformationParseTree::from_slice(&template).unwrap();
+            tree.resources.len()
+        });
+
+        println!(
+            "{:>9} {:>7}K {:>14.2?} {:>6} {:>14.2?} {:>6} {:>14.2?}",
+            resources,
+            template.len() / 1024,
+            reader,
+            reader_reads,
+            slice,
+            slice_reads,
+            fast,
+        );
+    }
+
+    let _ = fs::remove_file(&path);
+}
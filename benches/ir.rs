@@ -0,0 +1,54 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Measures loading the IR of synthetic templates from the binary and JSON IR
+//! formats, against parsing and translating the templates, and checks that
+//! the loaded IR is the translated one.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::CloudformationParseTree;
+
+fn translate(template: &[u8]) -> CloudformationProgramIr {
+    CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        Schema::builtin(),
+    )
+    .unwrap()
+}
+
+fn main() {
+    println!(
+        "{:>9} {:>12} {:>10} {:>12} {:>10} {:>12} {:>8}",
+        "resources", "translate", "json size", "from_json", "size", "from_binary", "speedup"
+    );
+    for resources in [1_000, 5_000, 20_000] {
+        let template = common::synthetic_template(resources);
+        let ir = translate(&template);
+        let binary = ir.to_binary().unwrap();
+        let json = ir.to_json().unwrap();
+
+        let expected = format!("{ir:?}");
+        for bytes in [&binary, &json] {
+            let decoded = CloudformationProgramIr::decode(bytes).unwrap();
+            assert_eq!(format!("{decoded:?}"), expected);
+        }
+
+        let translate = common::measure(|| translate(&template));
+        let from_json = common::measure(|| CloudformationProgramIr::decode(&json).unwrap());
+        let from_binary = common::measure(|| CloudformationProgramIr::decode(&binary).unwrap());
+
+        println!(
+            "{:>9} {:>12.2?} {:>10} {:>12.2?} {:>10} {:>12.2?} {:>8}",
+            resources,
+            translate,
+            json.len(),
+            from_json,
+            binary.len(),
+            from_binary,
+            common::speedup(translate, from_binary)
+        );
+    }
+}
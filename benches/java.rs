@@ -0,0 +1,55 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Measures the allocations and time of synthesizing Java for the `efs` and
+//! `groundstation` test cases, whose resources nest property structs deeply,
+//! next to TypeScript for the same IR.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::synthesizer::ClassType;
+use cdk_from_cfn::CloudformationParseTree;
+use std::io;
+
+#[global_allocator]
+static ALLOCATOR: common::Counting = common::Counting;
+
+const CASES: [&str; 2] = ["efs", "groundstation"];
+
+const LANGUAGES: [&str; 2] = ["java", "typescript"];
+
+fn main() {
+    let schema = Schema::builtin();
+
+    println!(
+        "{:<16} {:<10} {:>8} {:>10} {:>12}",
+        "case", "language", "allocs", "peak heap", "synthesize"
+    );
+    for case in common::cases()
+        .into_iter()
+        .filter(|case| CASES.contains(&case.name.as_str()))
+    {
+        let cfn_tree = CloudformationParseTree::from_slice(&case.template).unwrap();
+        let ir = CloudformationProgramIr::from(cfn_tree, schema).unwrap();
+
+        for language in LANGUAGES {
+            let synthesize = || {
+                ir.synthesize(language, &mut io::sink(), "Stack", ClassType::Stack)
+                    .unwrap()
+            };
+            let usage = common::usage(synthesize);
+            let elapsed = common::measure(synthesize);
+
+            println!(
+                "{:<16} {:<10} {:>8} {:>9}K {:>12.2?}",
+                case.name,
+                language,
+                usage.allocations,
+                usage.peak / 1024,
+                elapsed,
+            );
+        }
+    }
+}
@@ -0,0 +1,110 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Compares the allocations and peak memory of parsing large synthetic
+//! templates and translating them to the IR, with the parse tree borrowing its
+//! strings from the template buffer (`CloudformationParseTree::from_slice`)
+//! against owning them. The owned tree is produced by the same `serde_json`
+//! front-end reading the template through `io::Read`, which cannot lend out
+//! slices of its input.
+//!
+//! Allocations and peak heap are counted by a global allocator. Peak RSS is
+//! read from `/proc/self/status` in a child process per variant, so it is only
+//! reported on Linux. The size of an IR node is printed first, as it accounts
+//! for most of the memory of the IR.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::resources::ResourceIr;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::CloudformationParseTree;
+use serde::Deserialize;
+use std::process::Command;
+
+#[global_allocator]
+static ALLOCATOR: common::Counting = common::Counting;
+
+fn parse(template: &[u8], borrowed: bool) -> CloudformationParseTree<'_> {
+    if borrowed {
+        CloudformationParseTree::from_slice(template).unwrap()
+    } else {
+        let mut deserializer = serde_json::Deserializer::from_reader(template);
+        CloudformationParseTree::deserialize(&mut deserializer).unwrap()
+    }
+}
+
+fn translate(template: &[u8], borrowed: bool) -> CloudformationProgramIr {
+    CloudformationProgramIr::from(parse(template, borrowed), Schema::builtin()).unwrap()
+}
+
+/// The peak RSS of a child process translating a template of `resources`
+/// resources, in KiB.
+fn peak_rss(resources: usize, borrowed: bool) -> Option<usize> {
+    let output = Command::new(std::env::current_exe().ok()?)
+        .args(["--peak-rss", &resources.to_string(), &borrowed.to_string()])
+        .output()
+        .ok()?;
+    String::from_utf8(output.stdout).ok()?.trim().parse().ok()
+}
+
+/// Translates a template in this process, and prints the peak RSS.
+fn report_peak_rss(resources: &str, borrowed: &str) {
+    let template = common::synthetic_template(resources.parse().unwrap());
+    drop(translate(&template, borrowed.parse().unwrap()));
+
+    let status = std::fs::read_to_string("/proc/self/status").unwrap_or_default();
+    if let Some(kib) = status
+        .lines()
+        .find_map(|line| line.strip_prefix("VmHWM:"))
+        .and_then(|value| value.trim().strip_suffix("kB"))
+    {
+        println!("{}", kib.trim());
+    }
+}
+
+fn main() {
+    let args: Vec<String> = std::env::args().collect();
+    if let [_, flag, resources, borrowed] = args.as_slice() {
+        if flag == "--peak-rss" {
+            return report_peak_rss(resources, borrowed);
+        }
+    }
+
+    println!(
+        "size_of::<ResourceIr>() = {}",
+        std::mem::size_of::<ResourceIr>()
+    );
+    println!(
+        "{:>9} {:>8} {:>9} | {:>13} {:>10} | {:>13} {:>10} | {:>10}",
+        "resources",
+        "size",
+        "tree",
+        "parse allocs",
+        "peak heap",
+        "+IR allocs",
+        "peak heap",
+        "peak RSS"
+    );
+    for resources in [1_000, 10_000, 20_000] {
+        let template = common::synthetic_template(resources);
+        for (variant, borrowed) in [("owned", false), ("borrowed", true)] {
+            let parsed = common::usage(|| parse(&template, borrowed));
+            let translated = common::usage(|| translate(&template, borrowed));
+            let rss = peak_rss(resources, borrowed)
+                .map_or_else(|| "n/a".to_string(), |kib| format!("{kib}K"));
+
+            println!(
+                "{:>9} {:>7}K {:>9} | {:>13} {:>9}K | {:>13} {:>9}K | {:>10}",
+                resources,
+                template.len() / 1024,
+                variant,
+                parsed.allocations,
+                parsed.peak / 1024,
+                translated.allocations,
+                translated.peak / 1024,
+                rss,
+            );
+        }
+    }
+}
@@ -0,0 +1,138 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Measures the allocations, peak heap and wall time of translating templates
+//! to the IR and of synthesizing TypeScript from it, on the test cases and on
+//! large synthetic templates: the ones of the other benchmarks, and ones made
+//! of custom resources whose properties nest the intrinsic functions that have
+//! operands (`Fn::If`, `Fn::Select`, `Fn::Base64`, `Fn::Cidr`, ...) in arrays
+//! and objects. Freeing the IR is part of both measurements of translation.
+//!
+//! The templates are parsed again for every run of the translation, which is
+//! included in its time but not in its allocations. Arguments select the
+//! templates whose name contains one of them: `cargo bench --bench nodes --
+//! intrinsics`.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::synthesizer::ClassType;
+use cdk_from_cfn::CloudformationParseTree;
+use serde_json::json;
+use std::io;
+
+#[global_allocator]
+static ALLOCATOR: common::Counting = common::Counting;
+
+fn parse(template: &[u8]) -> CloudformationParseTree<'_> {
+    CloudformationParseTree::from_slice(template).unwrap()
+}
+
+fn translate(parse_tree: CloudformationParseTree<'_>) -> CloudformationProgramIr {
+    CloudformationProgramIr::from_sequential(parse_tree, Schema::builtin()).unwrap()
+}
+
+/// Generates a JSON template with `resources` custom resources, each of which
+/// uses every intrinsic function with operands, nested in arrays and objects.
+fn intrinsics_template(resources: usize) -> Vec<u8> {
+    let mut map = serde_json::Map::new();
+    for index in 0..resources {
+        let name = format!("widget-{index}");
+        map.insert(
+            format!("Widget{index}"),
+            json!({
+                "Type": "Custom::Widget",
+                "Properties": {
+                    "ServiceToken": { "Fn::ImportValue": "WidgetProvider" },
+                    "Name": {
+                        "Fn::If": [
+                            "IsProd",
+                            { "Fn::Sub": ["${Name}-${AWS::Region}", { "Name": name }] },
+                            { "Fn::Join": ["-", [name, { "Ref": "AWS::Region" }]] },
+                        ],
+                    },
+                    "Size": { "Fn::FindInMap": ["Sizes", { "Ref": "AWS::Region" }, "Size"] },
+                    "Zone": { "Fn::Select": [index % 2, { "Fn::GetAZs": "" }] },
+                    "Subnets": { "Fn::Cidr": ["10.0.0.0/16", 4, { "Fn::If": ["IsProd", 8, 4] }] },
+                    "UserData": { "Fn::Base64": { "Fn::Sub": "echo ${AWS::StackName}" } },
+                    "Settings": {
+                        "Index": index,
+                        "Enabled": true,
+                        "Ports": [80, 443, { "Fn::If": ["IsProd", 8443, 8080] }],
+                        "Tags": [
+                            { "Key": "Index", "Value": index.to_string() },
+                            { "Key": "Stage", "Value": { "Fn::If": ["IsProd", "prod", "dev"] } },
+                        ],
+                    },
+                },
+            }),
+        );
+    }
+    serde_json::to_vec_pretty(&json!({
+        "AWSTemplateFormatVersion": "2010-09-09",
+        "Conditions": {
+            "IsProd": { "Fn::Equals": [{ "Ref": "AWS::Region" }, "us-east-1"] },
+        },
+        "Mappings": {
+            "Sizes": { "us-east-1": { "Size": "large" } },
+        },
+        "Resources": map,
+    }))
+    .expect("synthetic templates are serializable")
+}
+
+fn main() {
+    let filters: Vec<String> = std::env::args()
+        .skip(1)
+        .filter(|arg| arg != "--bench")
+        .collect();
+
+    let mut templates: Vec<_> = common::cases()
+        .into_iter()
+        .map(|case| (case.name, case.template))
+        .collect();
+    for resources in [1_000, 10_000] {
+        templates.push((
+            format!("synthetic x {resources}"),
+            common::synthetic_template(resources),
+        ));
+        templates.push((
+            format!("intrinsics x {resources}"),
+            intrinsics_template(resources),
+        ));
+    }
+    templates.retain(|(name, _)| {
+        filters.is_empty() || filters.iter().any(|filter| name.contains(filter.as_str()))
+    });
+
+    println!(
+        "{:<24} | {:>9} {:>10} {:>12} | {:>9} {:>12}",
+        "template", "allocs", "peak heap", "translate", "allocs", "synthesize"
+    );
+    for (name, template) in &templates {
+        let translated = {
+            let parse_tree = parse(template);
+            common::usage(|| translate(parse_tree))
+        };
+        let translate_time = common::measure(|| translate(parse(template)));
+
+        let ir = translate(parse(template));
+        let synthesize = || {
+            ir.synthesize("typescript", &mut io::sink(), "Stack", ClassType::Stack)
+                .unwrap()
+        };
+        let synthesized = common::usage(synthesize);
+        let synthesize_time = common::measure(synthesize);
+
+        println!(
+            "{:<24} | {:>9} {:>9}K {:>12.2?} | {:>9} {:>12.2?}",
+            name,
+            translated.allocations,
+            translated.peak / 1024,
+            translate_time,
+            synthesized.allocations,
+            synthesize_time,
+        );
+    }
+}
@@ -0,0 +1,83 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Synthesizes the test cases with the largest templates in every language,
+//! counting the `write` calls that reach the output and the bytes they carry,
+//! and timing synthesis into a file.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::synthesizer::ClassType;
+use cdk_from_cfn::CloudformationParseTree;
+use std::fs;
+use std::io::{self, Write};
+
+/// The number of test cases synthesized, picked by template size.
+const LARGEST_CASES: usize = 5;
+
+const LANGUAGES: [&str; 5] = ["typescript", "go", "python", "java", "csharp"];
+
+/// A writer discarding its input, counting the calls made to it.
+#[derive(Default)]
+struct CountingWriter {
+    writes: usize,
+    bytes: usize,
+}
+
+impl Write for CountingWriter {
+    fn write(&mut self, buf: &[u8]) -> io::Result<usize> {
+        self.writes += 1;
+        self.bytes += buf.len();
+        Ok(buf.len())
+    }
+
+    fn flush(&mut self) -> io::Result<()> {
+        Ok(())
+    }
+}
+
+fn main() {
+    let path = std::env::temp_dir().join(format!("cdk-from-cfn-output-{}", std::process::id()));
+    let schema = Schema::builtin();
+    let mut cases = common::cases();
+    cases.sort_by(|a, b| b.template.len().cmp(&a.template.len()));
+
+    println!(
+        "{:<32} {:<10} {:>8} {:>6} {:>12}",
+        "case", "language", "output", "writes", "to file"
+    );
+    for case in cases.iter().take(LARGEST_CASES) {
+        let cfn_tree = CloudformationParseTree::from_slice(&case.template).unwrap();
+        let ir = CloudformationProgramIr::from(cfn_tree, schema).unwrap();
+
+        for language in LANGUAGES {
+            let mut counter = CountingWriter::default();
+            if ir
+                .synthesize(language, &mut counter, "Stack", ClassType::Stack)
+                .is_err()
+            {
+                // Not every case can be expressed in every language.
+                continue;
+            }
+
+            let elapsed = common::measure(|| {
+                let mut file = fs::File::create(&path).unwrap();
+                ir.synthesize(language, &mut file, "Stack", ClassType::Stack)
+                    .unwrap();
+            });
+
+            println!(
+                "{:<32} {:<10} {:>7}K {:>6} {:>12.2?}",
+                case.name,
+                language,
+                counter.bytes / 1024,
+                counter.writes,
+                elapsed,
+            );
+        }
+    }
+
+    let _ = fs::remove_file(&path);
+}
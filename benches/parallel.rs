@@ -0,0 +1,76 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Measures how translating synthetic templates to the IR scales with the
+//! number of threads `CloudformationProgramIr::from_parallel` uses, against
+//! the sequential translation, and checks that both produce the same IR. The
+//! templates are parsed again for every run (translation consumes the parse
+//! tree), so the parse time is measured and subtracted.
+//!
+//! Requires the `parallel` feature: `cargo bench --bench parallel --features
+//! parallel`.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::CloudformationParseTree;
+use std::num::NonZeroUsize;
+use std::thread;
+
+fn parse(template: &[u8]) -> CloudformationParseTree<'_> {
+    CloudformationParseTree::from_slice(template).unwrap()
+}
+
+fn sequential(template: &[u8]) -> CloudformationProgramIr {
+    CloudformationProgramIr::from_sequential(parse(template), Schema::builtin()).unwrap()
+}
+
+fn parallel(template: &[u8], threads: NonZeroUsize) -> CloudformationProgramIr {
+    CloudformationProgramIr::from_parallel(parse(template), Schema::builtin(), threads).unwrap()
+}
+
+fn main() {
+    let available = thread::available_parallelism().map_or(1, NonZeroUsize::get);
+    let mut thread_counts: Vec<usize> = [2, 4, 8, 16]
+        .into_iter()
+        .filter(|&threads| threads <= available)
+        .collect();
+    if !thread_counts.contains(&available) {
+        thread_counts.push(available);
+    }
+
+    println!(
+        "{:>9} {:>8} {:>12} {:>12} {:>8}",
+        "resources", "threads", "parse", "translate", "speedup"
+    );
+    for resources in [1_000, 5_000, 20_000] {
+        let template = common::synthetic_template(resources);
+        let parse_time = common::measure(|| parse(&template));
+        let baseline = common::measure(|| sequential(&template)).saturating_sub(parse_time);
+        println!(
+            "{:>9} {:>8} {:>12.2?} {:>12.2?} {:>8}",
+            resources, "-", parse_time, baseline, "1.00x"
+        );
+
+        let expected = format!("{:?}", sequential(&template));
+        for &threads in &thread_counts {
+            let threads = NonZeroUsize::new(threads).unwrap();
+            assert_eq!(
+                format!("{:?}", parallel(&template, threads)),
+                expected,
+                "{threads} threads produce a different IR"
+            );
+
+            let time = common::measure(|| parallel(&template, threads)).saturating_sub(parse_time);
+            println!(
+                "{:>9} {:>8} {:>12.2?} {:>12.2?} {:>8}",
+                resources,
+                threads,
+                parse_time,
+                time,
+                common::speedup(baseline, time)
+            );
+        }
+    }
+}
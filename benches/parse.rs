@@ -0,0 +1,61 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Compares parsing the test case templates with `serde_yaml` against
+//! `CloudformationParseTree::from_slice`, which routes JSON templates to
+//! `serde_json`, and checks that both produce the same IR.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::CloudformationParseTree;
+use std::time::Duration;
+
+fn main() {
+    let mut yaml_total = Duration::ZERO;
+    let mut json_total = Duration::ZERO;
+
+    println!(
+        "{:<36} {:>12} {:>12} {:>8}",
+        "case", "serde_yaml", "from_slice", "speedup"
+    );
+    for case in common::cases() {
+        let yaml = common::measure(|| {
+            serde_yaml::from_slice::<CloudformationParseTree>(&case.template).unwrap()
+        });
+        let json = common::measure(|| CloudformationParseTree::from_slice(&case.template).unwrap());
+
+        let from_yaml: CloudformationParseTree = serde_yaml::from_slice(&case.template).unwrap();
+        let from_json = CloudformationParseTree::from_slice(&case.template).unwrap();
+        assert_eq!(
+            format!(
+                "{:?}",
+                CloudformationProgramIr::from(from_yaml, Schema::builtin()).unwrap()
+            ),
+            format!(
+                "{:?}",
+                CloudformationProgramIr::from(from_json, Schema::builtin()).unwrap()
+            ),
+            "{} produces a different IR when parsed as JSON",
+            case.name
+        );
+
+        println!(
+            "{:<36} {:>12.2?} {:>12.2?} {:>8}",
+            case.name,
+            yaml,
+            json,
+            common::speedup(yaml, json)
+        );
+        yaml_total += yaml;
+        json_total += json;
+    }
+    println!(
+        "{:<36} {:>12.2?} {:>12.2?} {:>8}",
+        "total",
+        yaml_total,
+        json_total,
+        common::speedup(yaml_total, json_total)
+    );
+}
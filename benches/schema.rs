@@ -0,0 +1,98 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Measures `Schema::type_named` over the property types referenced by the
+//! `batch`, `ecs` and `groundstation` test cases, whose resources nest property
+//! structs deeply, and the translation of those templates to the IR, which
+//! looks up the type of every object it translates.
+
+mod common;
+
+use cdk_from_cfn::cdk::{Schema, TypeReference};
+use cdk_from_cfn::ir::nodes::NodeTable;
+use cdk_from_cfn::ir::resources::ResourceIr;
+use cdk_from_cfn::ir::types::TypeTable;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::CloudformationParseTree;
+use std::hint::black_box;
+
+#[global_allocator]
+static ALLOCATOR: common::Counting = common::Counting;
+
+const CASES: [&str; 3] = ["batch", "ecs", "groundstation"];
+
+fn translate(template: &[u8], schema: &Schema) -> CloudformationProgramIr {
+    CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        schema,
+    )
+    .unwrap()
+}
+
+/// Collects the name of every named type `ir` contains an object of.
+fn named_types<'a>(
+    ir: &ResourceIr,
+    types: &'a TypeTable,
+    nodes: &NodeTable,
+    into: &mut Vec<&'a str>,
+) {
+    match ir {
+        ResourceIr::Object(value_type, properties) => {
+            if let TypeReference::Named(name) = &types[*value_type] {
+                into.push(name);
+            }
+            for (_, value) in nodes.entries(*properties) {
+                named_types(value, types, nodes, into);
+            }
+        }
+        ResourceIr::Array(_, items) => {
+            for item in nodes.list(*items) {
+                named_types(item, types, nodes, into);
+            }
+        }
+        _ => {}
+    }
+}
+
+fn main() {
+    let schema = Schema::builtin();
+
+    println!(
+        "{:<16} {:>8} {:>12} {:>14} {:>12}",
+        "case", "lookups", "per lookup", "lookup allocs", "translate"
+    );
+    for case in common::cases()
+        .into_iter()
+        .filter(|case| CASES.contains(&case.name.as_str()))
+    {
+        let ir = translate(&case.template, schema);
+        let mut names = Vec::new();
+        for resource in &ir.resources {
+            for value in resource.properties.values() {
+                named_types(value, &ir.types, &ir.nodes, &mut names);
+            }
+        }
+
+        let lookups = common::measure(|| {
+            for name in &names {
+                black_box(schema.type_named(black_box(name)));
+            }
+        });
+        let allocations = common::usage(|| {
+            for name in &names {
+                black_box(schema.type_named(black_box(name)));
+            }
+        })
+        .allocations;
+        let translation = common::measure(|| translate(&case.template, schema));
+
+        println!(
+            "{:<16} {:>8} {:>12.2?} {:>14} {:>12.2?}",
+            case.name,
+            names.len(),
+            lookups / names.len().max(1) as u32,
+            allocations,
+            translation,
+        );
+    }
+}
@@ -0,0 +1,92 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Measures splitting `Fn::Sub` strings with `sub_parse_tree`, and translating
+//! templates in which every resource uses the same few `Fn::Sub` strings (as
+//! ARNs and names tend to be), as well as the test case templates.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::sub::sub_parse_tree;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::CloudformationParseTree;
+use serde_json::json;
+use std::hint::black_box;
+use std::time::Duration;
+
+const STRINGS: [&str; 6] = [
+    "arn:${AWS::Partition}:s3:::${AWS::StackName}-logs/*",
+    "arn:${AWS::Partition}:logs:${AWS::Region}:${AWS::AccountId}:log-group:/aws/lambda/${AWS::StackName}-*",
+    "${AWS::StackName}-${AWS::Region}-alerts",
+    "/aws/lambda/${AWS::StackName}-handler",
+    "#!/bin/bash\necho ${!HOME} > /tmp/${AWS::StackName}.log\nexport REGION=${AWS::Region}\n",
+    "NoSubstitution",
+];
+
+/// Generates a template with `resources` S3 buckets and SNS topics, whose
+/// properties cycle through `STRINGS`.
+fn sub_template(resources: usize) -> Vec<u8> {
+    let mut map = serde_json::Map::new();
+    for index in 0..resources {
+        let sub = |offset: usize| json!({ "Fn::Sub": STRINGS[(index + offset) % STRINGS.len()] });
+        let resource = if index % 2 == 0 {
+            json!({
+                "Type": "AWS::S3::Bucket",
+                "Properties": {
+                    "BucketName": sub(0),
+                    "Tags": [
+                        { "Key": "Arn", "Value": sub(1) },
+                        { "Key": "Name", "Value": sub(2) },
+                    ],
+                },
+            })
+        } else {
+            json!({
+                "Type": "AWS::SNS::Topic",
+                "Properties": { "TopicName": sub(3), "DisplayName": sub(4) },
+            })
+        };
+        map.insert(format!("Resource{index}"), resource);
+    }
+    serde_json::to_vec(&json!({ "Resources": map })).expect("templates are serializable")
+}
+
+fn translate(template: &[u8]) -> CloudformationProgramIr {
+    CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        Schema::builtin(),
+    )
+    .unwrap()
+}
+
+fn main() {
+    let scan = common::measure(|| {
+        for string in STRINGS {
+            black_box(sub_parse_tree(black_box(string)).unwrap());
+        }
+    });
+    println!(
+        "sub_parse_tree: {:.2?} per string",
+        scan / STRINGS.len() as u32
+    );
+
+    println!("{:<24} {:>12} {:>12}", "template", "parse", "translate");
+    for resources in [1_000, 10_000] {
+        let template = sub_template(resources);
+        let parse = common::measure(|| CloudformationParseTree::from_slice(&template).unwrap());
+        let total = common::measure(|| translate(&template));
+        println!(
+            "{:<24} {:>12.2?} {:>12.2?}",
+            format!("sub x {resources}"),
+            parse,
+            total.saturating_sub(parse)
+        );
+    }
+
+    let mut cases = Duration::ZERO;
+    for case in common::cases() {
+        cases += common::measure(|| translate(&case.template));
+    }
+    println!("{:<24} {:>12} {:>12.2?}", "cases", "", cases);
+}
@@ -0,0 +1,61 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Measures the allocations, peak memory and time of synthesizing large
+//! synthetic templates in every language, which is dominated by building the
+//! `CodeBuffer` and writing it out. Allocations are also reported per line of
+//! synthesized code.
+
+mod common;
+
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::synthesizer::ClassType;
+use cdk_from_cfn::CloudformationParseTree;
+use std::io;
+
+#[global_allocator]
+static ALLOCATOR: common::Counting = common::Counting;
+
+const SIZES: [usize; 2] = [1_000, 10_000];
+
+const LANGUAGES: [&str; 5] = ["typescript", "go", "python", "java", "csharp"];
+
+fn main() {
+    let schema = Schema::builtin();
+
+    println!(
+        "{:>9} {:<10} {:>8} {:>9} {:>11} {:>10} {:>12}",
+        "resources", "language", "lines", "allocs", "allocs/line", "peak heap", "synthesize"
+    );
+    for size in SIZES {
+        let template = common::synthetic_template(size);
+        let cfn_tree = CloudformationParseTree::from_slice(&template).unwrap();
+        let ir = CloudformationProgramIr::from(cfn_tree, schema).unwrap();
+
+        for language in LANGUAGES {
+            let mut output = Vec::new();
+            ir.synthesize(language, &mut output, "Stack", ClassType::Stack)
+                .unwrap();
+            let lines = output.iter().filter(|&&byte| byte == b'\n').count();
+
+            let synthesize = || {
+                ir.synthesize(language, &mut io::sink(), "Stack", ClassType::Stack)
+                    .unwrap()
+            };
+            let usage = common::usage(synthesize);
+            let elapsed = common::measure(synthesize);
+
+            println!(
+                "{:>9} {:<10} {:>8} {:>9} {:>11.2} {:>9}K {:>12.2?}",
+                size,
+                language,
+                lines,
+                usage.allocations,
+                usage.allocations as f64 / lines as f64,
+                usage.peak / 1024,
+                elapsed,
+            );
+        }
+    }
+}
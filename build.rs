@@ -72,6 +72,11 @@ mod cdk {
 
         let mut types = phf_codegen::Map::new();
         for (cfn_name, named_type) in &types_schema {
+            // Types are indexed by the name `TypeReference::Named` carries, so
+            // that `Schema::type_named` can look them up without allocating.
+            let Some(type_name) = type_reference_name(cfn_name) else {
+                continue;
+            };
             let mut properties = phf_codegen::Map::new();
             for (name, prop) in &named_type.properties {
                 properties.entry(name, format!("&{prop:#?}"));
@@ -92,7 +97,7 @@ mod cdk {
             )?;
             writeln!(file)?;
 
-            types.entry(cfn_name, format!("&{name}"));
+            types.entry(type_name, format!("&{name}"));
         }
 
         writeln!(
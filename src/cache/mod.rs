@@ -0,0 +1,257 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! A content-addressed, size-bounded cache of generated code on disk.
+//!
+//! Entries are keyed by a SHA-256 digest of everything that determines the
+//! generated code: the template bytes, the target language, the class name and
+//! type, and the version of this crate (which pins the builtin schema). A hit
+//! returns the stored code without parsing the template, building the IR or
+//! synthesizing anything. When the entries exceed the configured size, the
+//! least recently used ones are evicted.
+
+use sha2::{Digest, Sha256};
+use std::collections::{BTreeMap, HashMap};
+use std::fmt::Write as _;
+use std::fs;
+use std::io;
+use std::path::PathBuf;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::Mutex;
+use std::time::SystemTime;
+
+use crate::cdk::Schema;
+use crate::ir::CloudformationProgramIr;
+use crate::synthesizer::ClassType;
+use crate::{CloudformationParseTree, Error};
+
+/// The file extension of cache entries.
+const ENTRY_EXTENSION: &str = "out";
+
+/// Identifies the generated code of a conversion.
+#[derive(Clone, Debug, PartialEq, Eq, Hash)]
+pub struct Key(String);
+
+impl Key {
+    pub fn new(template: &[u8], language: &str, class_name: &str, class_type: ClassType) -> Self {
+        let class_type = match class_type {
+            ClassType::Stack => "stack",
+            ClassType::Construct => "construct",
+        };
+
+        let mut hasher = Sha256::new();
+        for part in [
+            env!("CARGO_PKG_NAME").as_bytes(),
+            env!("CARGO_PKG_VERSION").as_bytes(),
+            language.as_bytes(),
+            class_name.as_bytes(),
+            class_type.as_bytes(),
+            template,
+        ] {
+            // Length prefixes keep the parts from running into each other.
+            hasher.update((part.len() as u64).to_le_bytes());
+            hasher.update(part);
+        }
+
+        let mut hex = String::with_capacity(64);
+        for byte in hasher.finalize() {
+            let _ = write!(hex, "{byte:02x}");
+        }
+        Self(hex)
+    }
+
+    pub fn as_str(&self) -> &str {
+        &self.0
+    }
+}
+
+pub struct Cache {
+    dir: PathBuf,
+    max_bytes: u64,
+    index: Mutex<Index>,
+}
+
+/// The entries known to be in the cache directory, with their recency.
+#[derive(Default)]
+struct Index {
+    entries: HashMap<String, Entry>,
+    // The names of the entries, by their `last_used` time.
+    by_recency: BTreeMap<u64, String>,
+    total_bytes: u64,
+    clock: u64,
+}
+
+struct Entry {
+    size: u64,
+    last_used: u64,
+}
+
+/// Distinguishes the temporary files written concurrently by one process.
+static TEMPORARY_FILES: AtomicU64 = AtomicU64::new(0);
+
+impl Cache {
+    /// Opens (creating it if needed) the cache stored in `dir`, which is kept
+    /// under `max_bytes` by evicting the least recently used entries. Entries
+    /// left by previous runs are ranked by modification time.
+    pub fn open(dir: impl Into<PathBuf>, max_bytes: u64) -> io::Result<Self> {
+        let dir = dir.into();
+        fs::create_dir_all(&dir)?;
+
+        let mut found = Vec::new();
+        for entry in fs::read_dir(&dir)? {
+            let entry = entry?;
+            let path = entry.path();
+            if path.extension().and_then(|ext| ext.to_str()) != Some(ENTRY_EXTENSION) {
+                continue;
+            }
+            let Some(name) = path.file_stem().and_then(|stem| stem.to_str()) else {
+                continue;
+            };
+            let metadata = entry.metadata()?;
+            let modified = metadata.modified().unwrap_or(SystemTime::UNIX_EPOCH);
+            found.push((modified, name.to_string(), metadata.len()));
+        }
+        found.sort();
+
+        let mut index = Index::default();
+        for (_, name, size) in found {
+            index.insert(name, size);
+        }
+
+        let cache = Self {
+            dir,
+            max_bytes,
+            index: Mutex::new(index),
+        };
+        cache.evict(&mut cache.index.lock().expect("cache index poisoned"));
+        Ok(cache)
+    }
+
+    /// Returns the code stored for `key`, marking it as recently used.
+    pub fn get(&self, key: &Key) -> Option<Vec<u8>> {
+        let path = self.path(key);
+        let Ok(code) = fs::read(&path) else {
+            self.index
+                .lock()
+                .expect("cache index poisoned")
+                .remove(key.as_str());
+            return None;
+        };
+
+        // The modification time carries the recency over to later runs.
+        let _ = fs::File::options()
+            .write(true)
+            .open(&path)
+            .and_then(|file| file.set_modified(SystemTime::now()));
+        let mut index = self.index.lock().expect("cache index poisoned");
+        index.insert(key.as_str().to_string(), code.len() as u64);
+        Some(code)
+    }
+
+    /// Stores `code` under `key`, evicting older entries if the cache grows
+    /// past its size bound.
+    pub fn put(&self, key: &Key, code: &[u8]) -> io::Result<()> {
+        // Write to a temporary file first, so that concurrent readers (possibly
+        // in other processes) never observe a partially written entry.
+        let temporary = self.dir.join(format!(
+            "{}.{}-{}.tmp",
+            key.as_str(),
+            std::process::id(),
+            TEMPORARY_FILES.fetch_add(1, Ordering::Relaxed),
+        ));
+        fs::write(&temporary, code)?;
+        if let Err(err) = fs::rename(&temporary, self.path(key)) {
+            let _ = fs::remove_file(&temporary);
+            return Err(err);
+        }
+
+        let mut index = self.index.lock().expect("cache index poisoned");
+        index.insert(key.as_str().to_string(), code.len() as u64);
+        self.evict(&mut index);
+        Ok(())
+    }
+
+    /// Converts `template`, returning the cached code when there is some.
+    /// Conversions using a schema other than the builtin one are not cached,
+    /// as the key cannot identify such a schema. The template is translated on
+    /// the calling thread, as the cache is shared by concurrent conversions.
+    pub fn convert(
+        &self,
+        template: &[u8],
+        schema: &Schema,
+        language: &str,
+        class_name: &str,
+        class_type: ClassType,
+    ) -> Result<Vec<u8>, Error> {
+        let key = std::ptr::eq(schema, Schema::builtin())
+            .then(|| Key::new(template, language, class_name, class_type));
+        if let Some(code) = key.as_ref().and_then(|key| self.get(key)) {
+            return Ok(code);
+        }
+
+        let cfn_tree = CloudformationParseTree::from_slice(template)?;
+        let ir = CloudformationProgramIr::from_sequential(cfn_tree, schema)?;
+        let mut code = Vec::new();
+        ir.synthesize(language, &mut code, class_name, class_type)?;
+
+        if let Some(key) = key {
+            // Failing to store the code must not fail the conversion.
+            let _ = self.put(&key, &code);
+        }
+        Ok(code)
+    }
+
+    /// The number of entries and their total size, in bytes.
+    pub fn usage(&self) -> (usize, u64) {
+        let index = self.index.lock().expect("cache index poisoned");
+        (index.entries.len(), index.total_bytes)
+    }
+
+    fn path(&self, key: &Key) -> PathBuf {
+        self.dir.join(format!("{}.{ENTRY_EXTENSION}", key.as_str()))
+    }
+
+    fn evict(&self, index: &mut Index) {
+        while index.total_bytes > self.max_bytes {
+            let Some(oldest) = index.remove_oldest() else {
+                break;
+            };
+            let _ = fs::remove_file(self.path(&Key(oldest)));
+        }
+    }
+}
+
+impl Index {
+    fn insert(&mut self, name: String, size: u64) {
+        self.clock += 1;
+        let entry = Entry {
+            size,
+            last_used: self.clock,
+        };
+        self.by_recency.insert(self.clock, name.clone());
+        if let Some(previous) = self.entries.insert(name, entry) {
+            self.by_recency.remove(&previous.last_used);
+            self.total_bytes -= previous.size;
+        }
+        self.total_bytes += size;
+    }
+
+    fn remove(&mut self, name: &str) {
+        if let Some(entry) = self.entries.remove(name) {
+            self.by_recency.remove(&entry.last_used);
+            self.total_bytes -= entry.size;
+        }
+    }
+
+    /// Removes the least recently used entry, returning its name.
+    fn remove_oldest(&mut self) -> Option<String> {
+        let (_, name) = self.by_recency.pop_first()?;
+        if let Some(entry) = self.entries.remove(&name) {
+            self.total_bytes -= entry.size;
+        }
+        Some(name)
+    }
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,142 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+
+/// A cache directory removed when the test ends.
+struct TempDir(PathBuf);
+
+impl TempDir {
+    fn new(name: &str) -> Self {
+        let dir = std::env::temp_dir().join(format!("cdk-from-cfn-{name}-{}", std::process::id()));
+        let _ = fs::remove_dir_all(&dir);
+        Self(dir)
+    }
+}
+
+impl Drop for TempDir {
+    fn drop(&mut self) {
+        let _ = fs::remove_dir_all(&self.0);
+    }
+}
+
+#[test]
+fn test_key_covers_every_input() {
+    let key = Key::new(b"{}", "python", "Stack", ClassType::Stack);
+
+    assert_eq!(key, Key::new(b"{}", "python", "Stack", ClassType::Stack));
+    assert_eq!(key.as_str().len(), 64);
+    assert_ne!(key, Key::new(b"{ }", "python", "Stack", ClassType::Stack));
+    assert_ne!(key, Key::new(b"{}", "java", "Stack", ClassType::Stack));
+    assert_ne!(key, Key::new(b"{}", "python", "Other", ClassType::Stack));
+    assert_ne!(
+        key,
+        Key::new(b"{}", "python", "Stack", ClassType::Construct)
+    );
+    // Parts cannot bleed into one another.
+    assert_ne!(
+        Key::new(b"", "python", "Stack", ClassType::Stack),
+        Key::new(b"", "pytho", "nStack", ClassType::Stack)
+    );
+}
+
+#[test]
+fn test_put_then_get() {
+    let dir = TempDir::new("cache-get");
+    let cache = Cache::open(&dir.0, 1024).unwrap();
+    let key = Key::new(b"template", "typescript", "Stack", ClassType::Stack);
+
+    assert_eq!(cache.get(&key), None);
+    cache.put(&key, b"generated code").unwrap();
+    assert_eq!(cache.get(&key), Some(b"generated code".to_vec()));
+    assert_eq!(cache.usage(), (1, 14));
+
+    // Entries survive reopening the cache.
+    let reopened = Cache::open(&dir.0, 1024).unwrap();
+    assert_eq!(reopened.get(&key), Some(b"generated code".to_vec()));
+}
+
+#[test]
+fn test_evicts_least_recently_used() {
+    let dir = TempDir::new("cache-evict");
+    let cache = Cache::open(&dir.0, 25).unwrap();
+    let keys: Vec<Key> = ["a", "b", "c"]
+        .iter()
+        .map(|name| Key::new(name.as_bytes(), "go", "Stack", ClassType::Stack))
+        .collect();
+
+    cache.put(&keys[0], &[b'a'; 10]).unwrap();
+    cache.put(&keys[1], &[b'b'; 10]).unwrap();
+    // Using the first entry makes the second the least recently used one.
+    assert!(cache.get(&keys[0]).is_some());
+    cache.put(&keys[2], &[b'c'; 10]).unwrap();
+
+    assert!(cache.get(&keys[0]).is_some());
+    assert_eq!(cache.get(&keys[1]), None);
+    assert!(cache.get(&keys[2]).is_some());
+    assert_eq!(cache.usage(), (2, 20));
+}
+
+#[test]
+fn test_evicts_in_order_of_use() {
+    let dir = TempDir::new("cache-evict-many");
+    let cache = Cache::open(&dir.0, 25).unwrap();
+    let keys: Vec<Key> = ["a", "b", "c", "d", "e"]
+        .iter()
+        .map(|name| Key::new(name.as_bytes(), "go", "Stack", ClassType::Stack))
+        .collect();
+    for key in &keys {
+        cache.put(key, &[b'x'; 5]).unwrap();
+    }
+    assert!(cache.get(&keys[1]).is_some());
+    assert!(cache.get(&keys[0]).is_some());
+
+    // Making room for this entry evicts the three least recently used ones.
+    let large = Key::new(b"large", "go", "Stack", ClassType::Stack);
+    cache.put(&large, &[b'x'; 15]).unwrap();
+
+    assert_eq!(cache.usage(), (3, 25));
+    for key in &keys[2..] {
+        assert_eq!(cache.get(key), None);
+    }
+    assert!(cache.get(&keys[0]).is_some());
+    assert!(cache.get(&keys[1]).is_some());
+    assert!(cache.get(&large).is_some());
+}
+
+#[test]
+#[cfg(feature = "typescript")]
+fn test_convert_returns_cached_code() {
+    let dir = TempDir::new("cache-convert");
+    let cache = Cache::open(&dir.0, 1 << 20).unwrap();
+    let template = br#"{"Resources": {"Bucket": {"Type": "AWS::S3::Bucket"}}}"#;
+    let language = "typescript";
+
+    let code = cache
+        .convert(
+            template,
+            Schema::builtin(),
+            language,
+            "Stack",
+            ClassType::Stack,
+        )
+        .unwrap();
+    assert!(!code.is_empty());
+    assert_eq!(cache.usage().0, 1);
+
+    // A hit does not look at the template again, so planting different code
+    // under the key shows it is served from the cache.
+    let key = Key::new(template, language, "Stack", ClassType::Stack);
+    cache.put(&key, b"cached").unwrap();
+    assert_eq!(
+        cache
+            .convert(
+                template,
+                Schema::builtin(),
+                language,
+                "Stack",
+                ClassType::Stack
+            )
+            .unwrap(),
+        b"cached"
+    );
+}
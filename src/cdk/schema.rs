@@ -2,6 +2,7 @@
 // SPDX-License-Identifier: Apache-2.0 OR MIT
 use std::borrow::Cow;
 use std::collections::HashMap;
+use std::hash::Hash;
 use std::marker::PhantomData;
 use std::ops::Deref;
 
@@ -18,9 +19,11 @@ pub struct Schema {
     // their CloudFormation resource type name (e.g: `"AWS::S3::Bucket"`).
     pub(super) resources: Map<CfnResource>,
 
-    // The AWS CDK data structures present in this schema, indexed by their
-    // jsii fully qualified name (e.g:
-    // `"aws-cdk-lib.aws_s3.CfnBucket.DataExportProperty"`).
+    // The AWS CDK data structures present in this schema, indexed by the name
+    // `TypeReference::Named` refers to them with, which is their jsii fully
+    // qualified name without the `Property` suffix (e.g:
+    // `"aws-cdk-lib.aws_s3.CfnBucket.DataExport"`).
+    #[serde(deserialize_with = "named_types")]
     pub(super) types: Map<DataType>,
 }
 
@@ -37,8 +40,8 @@ impl Schema {
         self.resources.get(type_name)
     }
 
-    // Attempts to retrieve the AWS CDK struct for the provided fully-qualified
-    // type name.
+    // Attempts to retrieve the AWS CDK struct for the provided type name, as
+    // carried by `TypeReference::Named`. The lookup does not allocate.
     pub fn type_named(&self, fqn: &str) -> Option<&DataType> {
         if fqn == "CfnTag" {
             const NAME: Cow<str> = Cow::Borrowed("CfnTag");
@@ -90,11 +93,30 @@ impl Schema {
             };
             return Some(&CFN_TAG);
         }
-        let property_name = format!("{fqn}Property");
-        self.types.get(&property_name)
+        self.types.get(fqn)
     }
 }
 
+// Returns the name `TypeReference::Named` carries for the data type with the
+// provided jsii fully qualified name, if the type can be referenced at all.
+fn type_reference_name(fqn: &str) -> Option<&str> {
+    fqn.strip_suffix("Property")
+}
+
+// Deserializes data types indexed by their jsii fully qualified name, indexing
+// them by their `TypeReference::Named` name instead so that lookups do not
+// need to build the fully qualified name.
+fn named_types<'de, D: serde::Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Map<DataType>, D::Error> {
+    let types: HashMap<String, DataType, Hasher> = serde::Deserialize::deserialize(deserializer)?;
+    let types: HashMap<String, DataType, Hasher> = types
+        .into_iter()
+        .filter_map(|(fqn, data_type)| Some((type_reference_name(&fqn)?.to_string(), data_type)))
+        .collect();
+    Ok(types.into())
+}
+
 impl ToOwned for Schema {
     type Owned = Schema;
 
@@ -183,8 +205,10 @@ impl<V> From<HashMap<String, V, Hasher>> for Map<V> {
 }
 
 pub trait PropertyBag {
-    // Retrieves the property with the provided CloudFormation name, if any.
-    fn property(&self, name: &str) -> Option<Property>;
+    // Retrieves the declared type of the property with the provided
+    // CloudFormation name, if any. The type is borrowed from the bag, so
+    // looking it up does not allocate.
+    fn property_type(&self, name: &str) -> Option<&TypeReference>;
 }
 
 // Information about an AWS CDK construct class.
@@ -218,6 +242,11 @@ impl CfnResource {
         }
     }
 
+    // Retrieves the property with the provided CloudFormation name, if any.
+    pub fn property(&self, name: &str) -> Option<&Property> {
+        self.properties.get(name)
+    }
+
     // Retrieves the attribute with the provided CloudFormation name, if any.
     pub fn attribute(&self, name: &str) -> Option<&Property> {
         self.attributes.get(name)
@@ -225,8 +254,8 @@ impl CfnResource {
 }
 
 impl PropertyBag for CfnResource {
-    fn property(&self, name: &str) -> Option<Property> {
-        self.properties.get(name).cloned()
+    fn property_type(&self, name: &str) -> Option<&TypeReference> {
+        self.property(name).map(|property| &property.value_type)
     }
 }
 
@@ -251,11 +280,16 @@ impl DataType {
     pub const fn new(name: TypeName, properties: Map<Property>) -> Self {
         Self { name, properties }
     }
+
+    // Retrieves the property with the provided CloudFormation name, if any.
+    pub fn property(&self, name: &str) -> Option<&Property> {
+        self.properties.get(name)
+    }
 }
 
 impl PropertyBag for DataType {
-    fn property(&self, name: &str) -> Option<Property> {
-        self.properties.get(name).cloned()
+    fn property_type(&self, name: &str) -> Option<&TypeReference> {
+        self.property(name).map(|property| &property.value_type)
     }
 }
 
@@ -384,7 +418,7 @@ pub struct Property {
 }
 
 // Possible types of property values.
-#[derive(Clone, Debug, PartialEq, Eq)]
+#[derive(Clone, Debug, PartialEq, Eq, Hash)]
 pub enum TypeReference {
     // A list of the specified values.
     List(ItemType),
@@ -409,6 +443,23 @@ impl Default for TypeReference {
     }
 }
 
+// Serializes to the form the schema uses, which `Deserialize` reads back.
+impl serde::Serialize for TypeReference {
+    fn serialize<S: serde::Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        use serde::ser::SerializeMap;
+
+        let mut map = serializer.serialize_map(Some(1))?;
+        match self {
+            Self::List(item_type) => map.serialize_entry("listOf", &**item_type)?,
+            Self::Map(item_type) => map.serialize_entry("mapOf", &**item_type)?,
+            Self::Primitive(primitive) => map.serialize_entry("primitive", primitive)?,
+            Self::Named(name) => map.serialize_entry("named", name)?,
+            Self::Union(types) => map.serialize_entry("unionOf", &**types)?,
+        }
+        map.end()
+    }
+}
+
 impl<'de> serde::Deserialize<'de> for TypeReference {
     fn deserialize<D: serde::Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
         struct ValueTypeVisitor;
@@ -510,6 +561,13 @@ impl PartialEq for ItemType {
     }
 }
 
+impl Hash for ItemType {
+    #[inline]
+    fn hash<H: std::hash::Hasher>(&self, state: &mut H) {
+        (**self).hash(state)
+    }
+}
+
 #[derive(Debug, Eq)]
 pub enum TypeUnion {
     Static(&'static [TypeReference]),
@@ -557,8 +615,24 @@ impl PartialEq for TypeUnion {
     }
 }
 
+impl Hash for TypeUnion {
+    #[inline]
+    fn hash<H: std::hash::Hasher>(&self, state: &mut H) {
+        (**self).hash(state)
+    }
+}
+
 // A jsii primitive data type.
-#[derive(Clone, Copy, Debug, PartialEq, Eq, serde_enum_str::Deserialize_enum_str)]
+#[derive(
+    Clone,
+    Copy,
+    Debug,
+    PartialEq,
+    Eq,
+    Hash,
+    serde_enum_str::Deserialize_enum_str,
+    serde_enum_str::Serialize_enum_str,
+)]
 #[serde(rename_all = "lowercase")]
 pub enum Primitive {
     // The "unknown" type.
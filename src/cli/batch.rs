@@ -0,0 +1,254 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Converts many templates from a single process, spreading the work across
+//! a bounded pool of worker threads that share the builtin schema.
+
+use cdk_from_cfn::cache::Cache;
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::synthesizer::ClassType;
+use cdk_from_cfn::Error;
+use std::collections::hash_map::{Entry, HashMap};
+use std::io;
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::time::{Duration, Instant};
+use std::{fs, thread};
+
+/// File extensions recognized as CloudFormation templates when walking a
+/// directory. Files named explicitly on the command line are always included.
+const TEMPLATE_EXTENSIONS: [&str; 4] = ["json", "template", "yaml", "yml"];
+
+/// Settings shared by every template of a batch.
+pub struct Options<'a> {
+    pub out_dir: &'a Path,
+    pub language: &'a str,
+    pub class_name: &'a str,
+    pub class_type: ClassType,
+    /// The maximum number of templates converted concurrently.
+    pub jobs: usize,
+    /// Where generated code is looked up before converting a template.
+    pub cache: Option<&'a Cache>,
+}
+
+/// The result of converting a single template.
+pub struct Outcome {
+    pub input: PathBuf,
+    pub error: Option<String>,
+}
+
+/// The summary of a batch run.
+pub struct Report {
+    pub outcomes: Vec<Outcome>,
+    pub elapsed: Duration,
+}
+
+impl Report {
+    pub fn failures(&self) -> impl Iterator<Item = &Outcome> {
+        self.outcomes
+            .iter()
+            .filter(|outcome| outcome.error.is_some())
+    }
+
+    pub fn write(&self, into: &mut dyn io::Write) -> io::Result<()> {
+        let total = self.outcomes.len();
+        let failed = self.failures().count();
+        writeln!(
+            into,
+            "Converted {} of {total} templates in {:.2?} ({failed} failed)",
+            total - failed,
+            self.elapsed,
+        )?;
+        for outcome in self.failures() {
+            if let Some(error) = &outcome.error {
+                writeln!(into, "  {}: {error}", outcome.input.display())?;
+            }
+        }
+        Ok(())
+    }
+}
+
+/// A single template to convert, and where to write the generated code.
+#[derive(Clone)]
+pub(super) struct Job {
+    pub input: PathBuf,
+    pub output: PathBuf,
+    pub size: u64,
+    /// Another template whose code would be written to the same file.
+    pub conflict: Option<PathBuf>,
+}
+
+impl Job {
+    /// Fails if the code of another template would be written to the same
+    /// file, so that neither silently overwrites the other.
+    pub(super) fn check_output(&self) -> io::Result<()> {
+        match &self.conflict {
+            Some(other) => Err(io::Error::new(
+                io::ErrorKind::AlreadyExists,
+                format!(
+                    "{} would also be generated from {}",
+                    self.output.display(),
+                    other.display()
+                ),
+            )),
+            None => Ok(()),
+        }
+    }
+}
+
+/// Converts every template found in `inputs` (files, or directories that are
+/// searched recursively) into `options.out_dir`. Failures are recorded in the
+/// returned report rather than aborting the run; only errors enumerating the
+/// inputs are returned as `Err`.
+pub fn run(inputs: &[PathBuf], options: &Options) -> Result<Report, Error> {
+    let mut jobs = collect(inputs, options.out_dir, options.language)?.jobs;
+    // Largest templates first, so a big template picked up late does not keep
+    // a single worker busy long after all others have finished.
+    jobs.sort_by(|a, b| b.size.cmp(&a.size).then_with(|| a.input.cmp(&b.input)));
+
+    let start = Instant::now();
+    let schema = Schema::builtin();
+    let workers = options.jobs.clamp(1, jobs.len().max(1));
+    let next = &AtomicUsize::new(0);
+    let jobs = &jobs;
+
+    let mut outcomes: Vec<Outcome> = thread::scope(|scope| {
+        let handles: Vec<_> = (0..workers)
+            .map(|_| {
+                scope.spawn(move || {
+                    let mut outcomes = Vec::new();
+                    while let Some(job) = jobs.get(next.fetch_add(1, Ordering::Relaxed)) {
+                        outcomes.push(Outcome {
+                            input: job.input.clone(),
+                            error: super::catch_panic(|| convert(job, schema, options)).err(),
+                        });
+                    }
+                    outcomes
+                })
+            })
+            .collect();
+        handles
+            .into_iter()
+            .flat_map(|handle| handle.join().expect("batch worker panicked"))
+            .collect()
+    });
+    outcomes.sort_by(|a, b| a.input.cmp(&b.input));
+
+    Ok(Report {
+        outcomes,
+        elapsed: start.elapsed(),
+    })
+}
+
+fn convert(job: &Job, schema: &Schema, options: &Options) -> Result<(), Error> {
+    job.check_output()?;
+    let template = super::input::read(&job.input)?;
+    super::convert_to_file(
+        &template,
+        schema,
+        options.language,
+        options.class_name,
+        options.class_type,
+        options.cache,
+        &job.output,
+    )
+}
+
+/// The templates found in the inputs of a run, and the directories that were
+/// searched for them.
+pub(super) struct Listing {
+    pub jobs: Vec<Job>,
+    pub dirs: Vec<PathBuf>,
+}
+
+/// Lists the templates found in `inputs`, along with the path of the code
+/// generated for each of them in `out_dir`. Templates that disappear while
+/// the directories are searched are left out, while inputs named explicitly
+/// are always listed (and fail to convert if they do not exist). Templates
+/// listed more than once are listed once, and different templates whose code
+/// would be written to the same file are marked as conflicting.
+pub(super) fn collect(inputs: &[PathBuf], out_dir: &Path, language: &str) -> io::Result<Listing> {
+    let extension = super::extension(language);
+    let mut listing = Listing {
+        jobs: Vec::new(),
+        dirs: Vec::new(),
+    };
+    for input in inputs {
+        if input.is_dir() {
+            let mut templates = Vec::new();
+            walk(input, &mut templates, &mut listing.dirs)?;
+            for template in templates {
+                let Ok(metadata) = fs::metadata(&template) else {
+                    // The template was removed or renamed since it was listed.
+                    continue;
+                };
+                let relative = template.strip_prefix(input).unwrap_or(&template);
+                let output = out_dir.join(relative).with_extension(extension);
+                listing.jobs.push(Job {
+                    size: metadata.len(),
+                    input: template,
+                    output,
+                    conflict: None,
+                });
+            }
+        } else {
+            let name = input.file_name().map(Path::new).unwrap_or(input.as_path());
+            listing.jobs.push(Job {
+                size: fs::metadata(input).map_or(0, |metadata| metadata.len()),
+                input: input.clone(),
+                output: out_dir.join(name).with_extension(extension),
+                conflict: None,
+            });
+        }
+    }
+
+    // `stack.json` and `stack.yaml` in one directory, or two inputs of the
+    // same name, are generated into the same file.
+    let mut first_by_output: HashMap<PathBuf, usize> = HashMap::new();
+    let mut index = 0;
+    while index < listing.jobs.len() {
+        let job = &listing.jobs[index];
+        match first_by_output.entry(job.output.clone()) {
+            Entry::Vacant(entry) => {
+                entry.insert(index);
+            }
+            Entry::Occupied(entry) => {
+                let first = *entry.get();
+                if listing.jobs[first].input == job.input {
+                    listing.jobs.remove(index);
+                    continue;
+                }
+                let input = job.input.clone();
+                listing.jobs[index].conflict = Some(listing.jobs[first].input.clone());
+                listing.jobs[first].conflict.get_or_insert(input);
+            }
+        }
+        index += 1;
+    }
+    Ok(listing)
+}
+
+/// Adds the templates found in `dir` and its subdirectories to `into`, and
+/// the directories searched to `dirs`. Directories that disappear before they
+/// are searched are skipped.
+fn walk(dir: &Path, into: &mut Vec<PathBuf>, dirs: &mut Vec<PathBuf>) -> io::Result<()> {
+    dirs.push(dir.to_path_buf());
+    let entries = match fs::read_dir(dir) {
+        Ok(entries) => entries,
+        Err(err) if err.kind() == io::ErrorKind::NotFound => return Ok(()),
+        Err(err) => return Err(err),
+    };
+    for entry in entries {
+        let path = entry?.path();
+        if path.is_dir() {
+            walk(&path, into, dirs)?;
+        } else if path
+            .extension()
+            .and_then(|extension| extension.to_str())
+            .is_some_and(|extension| TEMPLATE_EXTENSIONS.contains(&extension))
+        {
+            into.push(path);
+        }
+    }
+    Ok(())
+}
@@ -0,0 +1,28 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Reads templates fully into memory up front, so that they are parsed from a
+//! single borrowed slice instead of through a stream of small reads.
+
+use std::io::{self, Read};
+use std::path::Path;
+
+/// The initial buffer capacity for inputs of unknown size, such as pipes.
+const UNKNOWN_SIZE_CAPACITY: usize = 64 * 1024;
+
+/// Reads the whole template at `path`, or from STDIN if `path` is `-`.
+///
+/// Regular files are read into a buffer sized from their metadata, typically
+/// in a single `read` call. Memory-mapping them would save one copy, but the
+/// parsers need the complete template before they can start, so that copy is
+/// small next to parsing, and a mapping turns a file truncated while it is
+/// read into a crash instead of an error.
+pub fn read(path: &Path) -> io::Result<Vec<u8>> {
+    if path == Path::new("-") {
+        let mut template = Vec::with_capacity(UNKNOWN_SIZE_CAPACITY);
+        io::stdin().lock().read_to_end(&mut template)?;
+        Ok(template)
+    } else {
+        std::fs::read(path)
+    }
+}
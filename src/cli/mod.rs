@@ -0,0 +1,103 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Supporting code for the additional modes of operation of the
+//! `cdk-from-cfn` command line interface.
+
+use cdk_from_cfn::cache::Cache;
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::ir::CloudformationProgramIr;
+use cdk_from_cfn::synthesizer::ClassType;
+use cdk_from_cfn::{CloudformationParseTree, Error};
+use std::panic::{self, AssertUnwindSafe};
+use std::path::Path;
+use std::{fs, io};
+
+pub mod batch;
+pub mod input;
+pub mod serve;
+pub mod watch;
+
+/// Returns the file extension used for source files of the given target
+/// language.
+pub fn extension(language: &str) -> &'static str {
+    match language {
+        "csharp" => "cs",
+        "go" => "go",
+        "java" => "java",
+        "python" => "py",
+        _ => "ts",
+    }
+}
+
+/// Runs a single conversion, turning both errors and panics into a message so
+/// that one malformed template cannot take down the rest of the work.
+pub fn catch_panic<T>(convert: impl FnOnce() -> Result<T, Error>) -> Result<T, String> {
+    match panic::catch_unwind(AssertUnwindSafe(convert)) {
+        Ok(Ok(value)) => Ok(value),
+        Ok(Err(err)) => Err(err.to_string()),
+        Err(payload) => Err(if let Some(message) = payload.downcast_ref::<&str>() {
+            format!("panicked: {message}")
+        } else if let Some(message) = payload.downcast_ref::<String>() {
+            format!("panicked: {message}")
+        } else {
+            "panicked".into()
+        }),
+    }
+}
+
+/// Converts a template into generated code, going through `cache` when there
+/// is one. The template is translated on the calling thread, as batch and
+/// serve mode already run several conversions at once.
+pub fn convert(
+    template: &[u8],
+    schema: &Schema,
+    language: &str,
+    class_name: &str,
+    class_type: ClassType,
+    cache: Option<&Cache>,
+) -> Result<Vec<u8>, Error> {
+    if let Some(cache) = cache {
+        return cache.convert(template, schema, language, class_name, class_type);
+    }
+    let cfn_tree = CloudformationParseTree::from_slice(template)?;
+    let ir = CloudformationProgramIr::from_sequential(cfn_tree, schema)?;
+    let mut code = Vec::new();
+    ir.synthesize(language, &mut code, class_name, class_type)?;
+    Ok(code)
+}
+
+/// Converts a template and writes the generated code to `path`, creating its
+/// directory. Without a cache, the code is written out as it is synthesized,
+/// so it is never held in memory as a whole.
+pub fn convert_to_file(
+    template: &[u8],
+    schema: &Schema,
+    language: &str,
+    class_name: &str,
+    class_type: ClassType,
+    cache: Option<&Cache>,
+    path: &Path,
+) -> Result<(), Error> {
+    if cache.is_some() {
+        let code = convert(template, schema, language, class_name, class_type, cache)?;
+        if let Some(parent) = path.parent() {
+            fs::create_dir_all(parent)?;
+        }
+        return Ok(fs::write(path, code)?);
+    }
+
+    let cfn_tree = CloudformationParseTree::from_slice(template)?;
+    let ir = CloudformationProgramIr::from_sequential(cfn_tree, schema)?;
+    if let Some(parent) = path.parent() {
+        fs::create_dir_all(parent)?;
+    }
+    let mut output = io::BufWriter::new(fs::File::create(path)?);
+    let result = ir.synthesize(language, &mut output, class_name, class_type);
+    if result.is_err() {
+        // Do not leave partly generated code behind.
+        drop(output);
+        let _ = fs::remove_file(path);
+    }
+    result
+}
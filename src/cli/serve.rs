@@ -0,0 +1,338 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Serves conversion requests read as newline-delimited JSON, either from
+//! STDIN or from connections to a Unix domain socket.
+//!
+//! Each request line is an object such as:
+//!
+//! ```json
+//! {"id": 1, "template": "...", "language": "python", "class_name": "MyStack", "class_type": "construct"}
+//! ```
+//!
+//! Only `template` is required. Responses are written as they complete, so
+//! they may be out of order; each carries the `id` of its request along with
+//! either the generated `output` or an `error`. A `{"stats": true}` request
+//! returns the server's counters.
+
+use cdk_from_cfn::cache::Cache;
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::synthesizer::ClassType;
+use serde::Deserialize;
+use serde_json::{json, Value};
+use std::collections::BTreeMap;
+use std::io::{self, BufRead, Write};
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::mpsc::{self, RecvTimeoutError};
+use std::sync::{Arc, Mutex};
+use std::thread;
+use std::time::{Duration, Instant};
+
+pub struct Options {
+    /// The number of conversions run concurrently.
+    pub workers: usize,
+    /// How long a request may take, including the time spent queued, before
+    /// it is answered with an error.
+    pub timeout: Duration,
+    /// The language used for requests that do not specify one.
+    pub default_language: &'static str,
+    /// Where generated code is looked up before converting a template.
+    pub cache: Option<Cache>,
+}
+
+/// Request counters, shared by every connection of a server.
+#[derive(Default)]
+pub struct Counters {
+    requests: AtomicU64,
+    completed: AtomicU64,
+    errors: AtomicU64,
+    timeouts: AtomicU64,
+    latency_micros: AtomicU64,
+}
+
+impl Counters {
+    pub fn to_json(&self) -> Value {
+        let completed = self.completed.load(Ordering::Relaxed);
+        let latency_micros = self.latency_micros.load(Ordering::Relaxed);
+        json!({
+            "requests": self.requests.load(Ordering::Relaxed),
+            "completed": completed,
+            "errors": self.errors.load(Ordering::Relaxed),
+            "timeouts": self.timeouts.load(Ordering::Relaxed),
+            "mean_latency_ms": if completed == 0 {
+                0.0
+            } else {
+                latency_micros as f64 / completed as f64 / 1000.0
+            },
+        })
+    }
+}
+
+#[derive(Deserialize)]
+struct Request {
+    #[serde(default)]
+    id: Value,
+    template: Option<String>,
+    language: Option<String>,
+    class_name: Option<String>,
+    class_type: Option<String>,
+    #[serde(default)]
+    stats: bool,
+}
+
+/// A validated conversion request, queued for the worker pool.
+struct Job {
+    seq: u64,
+    deadline: Instant,
+    template: String,
+    language: String,
+    class_name: String,
+    class_type: ClassType,
+    events: mpsc::Sender<Event>,
+}
+
+/// Messages received by the thread writing the responses of a connection.
+enum Event {
+    /// A request was queued; it must be answered by its deadline.
+    Submitted {
+        seq: u64,
+        id: Value,
+        received: Instant,
+    },
+    /// A worker finished converting a request.
+    Finished {
+        seq: u64,
+        result: Result<Vec<u8>, String>,
+    },
+    /// A response that does not involve the worker pool.
+    Reply(Value),
+}
+
+pub struct Server {
+    jobs: mpsc::Sender<Job>,
+    counters: Counters,
+    options: Options,
+}
+
+impl Server {
+    pub fn new(mut options: Options) -> Self {
+        let (jobs, receiver) = mpsc::channel();
+        let receiver = Arc::new(Mutex::new(receiver));
+        let cache = options.cache.take().map(Arc::new);
+        for _ in 0..options.workers.max(1) {
+            let receiver = Arc::clone(&receiver);
+            let cache = cache.clone();
+            thread::spawn(move || work(&receiver, cache.as_deref()));
+        }
+
+        Self {
+            jobs,
+            counters: Counters::default(),
+            options,
+        }
+    }
+
+    pub fn counters(&self) -> &Counters {
+        &self.counters
+    }
+
+    /// Serves the requests read from `input` until it is exhausted, writing
+    /// responses to `output` as they complete.
+    pub fn serve(&self, input: impl BufRead, output: impl Write + Send) -> io::Result<()> {
+        let (events, receiver) = mpsc::channel();
+        thread::scope(|scope| {
+            let writer = scope.spawn(move || self.write_responses(receiver, output));
+            let read = self.read_requests(input, events);
+            let written = writer.join().expect("response writer panicked");
+            read.and(written)
+        })
+    }
+
+    /// Accepts connections on a Unix domain socket, serving each of them on its
+    /// own thread with the shared worker pool.
+    #[cfg(unix)]
+    pub fn serve_socket(&self, path: &std::path::Path) -> io::Result<()> {
+        let listener = std::os::unix::net::UnixListener::bind(path)?;
+        thread::scope(|scope| {
+            for stream in listener.incoming() {
+                let stream = stream?;
+                scope.spawn(move || {
+                    let served = stream.try_clone().and_then(|output| {
+                        self.serve(io::BufReader::new(stream), io::BufWriter::new(output))
+                    });
+                    if let Err(err) = served {
+                        eprintln!("connection closed: {err}");
+                    }
+                });
+            }
+            Ok(())
+        })
+    }
+
+    fn read_requests(&self, input: impl BufRead, events: mpsc::Sender<Event>) -> io::Result<()> {
+        for (seq, line) in (0u64..).zip(input.lines()) {
+            let line = line?;
+            if line.trim().is_empty() {
+                continue;
+            }
+            let received = Instant::now();
+            self.counters.requests.fetch_add(1, Ordering::Relaxed);
+
+            let request: Request = match serde_json::from_str(&line) {
+                Ok(request) => request,
+                Err(err) => {
+                    self.reject(&events, Value::Null, format!("invalid request: {err}"));
+                    continue;
+                }
+            };
+            if request.stats {
+                let stats = json!({ "id": request.id, "stats": self.counters.to_json() });
+                let _ = events.send(Event::Reply(stats));
+                continue;
+            }
+            let Some(template) = request.template else {
+                self.reject(
+                    &events,
+                    request.id,
+                    "invalid request: missing template".into(),
+                );
+                continue;
+            };
+            let class_type = match request.class_type.as_deref().unwrap_or("stack").parse() {
+                Ok(class_type) => class_type,
+                Err(err) => {
+                    self.reject(&events, request.id, err);
+                    continue;
+                }
+            };
+
+            let submitted = Event::Submitted {
+                seq,
+                id: request.id,
+                received,
+            };
+            if events.send(submitted).is_err() {
+                // The response writer failed, so nobody would read the result.
+                break;
+            }
+            let _ = self.jobs.send(Job {
+                seq,
+                deadline: received + self.options.timeout,
+                template,
+                language: request
+                    .language
+                    .unwrap_or_else(|| self.options.default_language.into()),
+                class_name: request.class_name.unwrap_or_else(|| "NoctStack".into()),
+                class_type,
+                events: events.clone(),
+            });
+        }
+        Ok(())
+    }
+
+    fn reject(&self, events: &mpsc::Sender<Event>, id: Value, error: String) {
+        self.counters.errors.fetch_add(1, Ordering::Relaxed);
+        let _ = events.send(Event::Reply(json!({ "id": id, "error": error })));
+    }
+
+    fn write_responses(
+        &self,
+        events: mpsc::Receiver<Event>,
+        mut output: impl Write,
+    ) -> io::Result<()> {
+        let timeout = self.options.timeout;
+        // Requests are submitted in order with the same timeout, so the first
+        // pending request always has the earliest deadline.
+        let mut pending: BTreeMap<u64, (Value, Instant)> = BTreeMap::new();
+        loop {
+            let event = match pending.first_key_value() {
+                Some((_, (_, received))) => {
+                    let wait = (*received + timeout).saturating_duration_since(Instant::now());
+                    match events.recv_timeout(wait) {
+                        Ok(event) => event,
+                        Err(RecvTimeoutError::Timeout) => {
+                            let (_, (id, _)) = pending.pop_first().expect("pending is not empty");
+                            self.time_out(&mut output, id)?;
+                            continue;
+                        }
+                        Err(RecvTimeoutError::Disconnected) => break,
+                    }
+                }
+                None => match events.recv() {
+                    Ok(event) => event,
+                    Err(_) => break,
+                },
+            };
+
+            let response = match event {
+                Event::Submitted { seq, id, received } => {
+                    pending.insert(seq, (id, received));
+                    continue;
+                }
+                Event::Finished { seq, result } => {
+                    // Requests that timed out have already been answered.
+                    let Some((id, received)) = pending.remove(&seq) else {
+                        continue;
+                    };
+                    let latency = received.elapsed().as_micros() as u64;
+                    self.counters.completed.fetch_add(1, Ordering::Relaxed);
+                    self.counters
+                        .latency_micros
+                        .fetch_add(latency, Ordering::Relaxed);
+                    match result {
+                        Ok(code) => json!({ "id": id, "output": String::from_utf8_lossy(&code) }),
+                        Err(error) => {
+                            self.counters.errors.fetch_add(1, Ordering::Relaxed);
+                            json!({ "id": id, "error": error })
+                        }
+                    }
+                }
+                Event::Reply(response) => response,
+            };
+            writeln!(output, "{response}")?;
+            output.flush()?;
+        }
+
+        // Workers skip requests whose deadline passed while they were queued.
+        for (_, (id, _)) in pending {
+            self.time_out(&mut output, id)?;
+        }
+        Ok(())
+    }
+
+    fn time_out(&self, output: &mut impl Write, id: Value) -> io::Result<()> {
+        self.counters.timeouts.fetch_add(1, Ordering::Relaxed);
+        let error = format!("conversion timed out after {:?}", self.options.timeout);
+        writeln!(output, "{}", json!({ "id": id, "error": error }))?;
+        output.flush()
+    }
+}
+
+fn work(jobs: &Mutex<mpsc::Receiver<Job>>, cache: Option<&Cache>) {
+    let schema = Schema::builtin();
+    loop {
+        let Ok(job) = jobs.lock().expect("job queue poisoned").recv() else {
+            // The server was dropped.
+            break;
+        };
+        // Conversions cannot be interrupted, but there is no point starting one
+        // whose request has already been answered with a timeout.
+        if Instant::now() >= job.deadline {
+            continue;
+        }
+        let result = super::catch_panic(|| {
+            super::convert(
+                job.template.as_bytes(),
+                schema,
+                &job.language,
+                &job.class_name,
+                job.class_type,
+                cache,
+            )
+        });
+        let _ = job.events.send(Event::Finished {
+            seq: job.seq,
+            result,
+        });
+    }
+}
@@ -0,0 +1,226 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Watches templates and regenerates the code of those that change.
+//!
+//! Changes are detected by polling the modification time and size of every
+//! template, which works the same on every platform and needs no dependency;
+//! stat-ing a few hundred files every few milliseconds is cheap compared to a
+//! conversion. The input directories are only searched again once the
+//! modification time of one of them changes, which happens when templates are
+//! added, removed or renamed. A template is converted once it has not changed
+//! for the debounce period, so that editors writing a file in several steps
+//! trigger a single regeneration.
+
+use super::batch::{self, Job};
+use cdk_from_cfn::cache::Cache;
+use cdk_from_cfn::cdk::Schema;
+use cdk_from_cfn::synthesizer::ClassType;
+use std::collections::HashMap;
+use std::fs;
+use std::io;
+use std::path::{Path, PathBuf};
+use std::thread;
+use std::time::{Duration, Instant, SystemTime};
+
+/// Settings shared by every watched template.
+pub struct Options<'a> {
+    pub out_dir: &'a Path,
+    pub language: &'a str,
+    pub class_name: &'a str,
+    pub class_type: ClassType,
+    /// How often templates are checked for changes.
+    pub interval: Duration,
+    /// How long a template must remain unchanged before it is converted.
+    pub debounce: Duration,
+    pub cache: Option<&'a Cache>,
+}
+
+/// What a template looked like when it was last checked.
+#[derive(Clone, Copy, PartialEq)]
+struct Stamp {
+    modified: SystemTime,
+    len: u64,
+}
+
+impl Stamp {
+    fn of(path: &Path) -> io::Result<Self> {
+        let metadata = fs::metadata(path)?;
+        Ok(Self {
+            modified: metadata.modified()?,
+            len: metadata.len(),
+        })
+    }
+}
+
+/// A template that changed and has not been converted since.
+struct Pending {
+    job: Job,
+    stamp: Stamp,
+    changed: Instant,
+}
+
+pub struct Watcher<'a> {
+    inputs: &'a [PathBuf],
+    options: Options<'a>,
+    /// The templates found when the directories were last searched.
+    jobs: Vec<Job>,
+    /// The directories searched, and when they were last modified.
+    dirs: Vec<(PathBuf, Option<SystemTime>)>,
+    stamps: HashMap<PathBuf, Stamp>,
+    pending: HashMap<PathBuf, Pending>,
+}
+
+impl<'a> Watcher<'a> {
+    /// Creates a watcher for the templates found in `inputs`. Templates whose
+    /// generated code is missing or older than the template are converted by
+    /// the first poll; the others only once they change.
+    pub fn new(inputs: &'a [PathBuf], options: Options<'a>) -> io::Result<Self> {
+        let mut watcher = Self {
+            inputs,
+            options,
+            jobs: Vec::new(),
+            dirs: Vec::new(),
+            stamps: HashMap::new(),
+            pending: HashMap::new(),
+        };
+        watcher.list()?;
+
+        for job in &watcher.jobs {
+            let Ok(stamp) = Stamp::of(&job.input) else {
+                continue;
+            };
+            let up_to_date = fs::metadata(&job.output)
+                .and_then(|output| output.modified())
+                .is_ok_and(|generated| generated >= stamp.modified);
+            if up_to_date {
+                watcher.stamps.insert(job.input.clone(), stamp);
+            }
+        }
+        Ok(watcher)
+    }
+
+    /// Polls the templates forever, reporting each regeneration to `report`.
+    pub fn run(&mut self, report: &mut dyn io::Write) -> io::Result<()> {
+        loop {
+            self.poll(report)?;
+            thread::sleep(self.options.interval);
+        }
+    }
+
+    /// Checks every template once, and converts those that changed and have
+    /// since settled. Returns the number of templates converted.
+    pub fn poll(&mut self, report: &mut dyn io::Write) -> io::Result<usize> {
+        // Directories are searched again when their entries changed, so that
+        // new templates are picked up.
+        if self
+            .dirs
+            .iter()
+            .any(|(dir, modified)| modified_time(dir) != *modified)
+        {
+            self.list()?;
+        }
+
+        for job in &self.jobs {
+            let Ok(stamp) = Stamp::of(&job.input) else {
+                // The template was removed or replaced since it was listed.
+                continue;
+            };
+            if self.stamps.get(&job.input) == Some(&stamp) {
+                continue;
+            }
+            match self.pending.get_mut(&job.input) {
+                Some(pending) if pending.stamp == stamp => {}
+                Some(pending) => {
+                    pending.stamp = stamp;
+                    pending.changed = Instant::now();
+                }
+                None => {
+                    self.pending.insert(
+                        job.input.clone(),
+                        Pending {
+                            job: job.clone(),
+                            stamp,
+                            changed: Instant::now(),
+                        },
+                    );
+                }
+            }
+        }
+
+        let settled: Vec<PathBuf> = self
+            .pending
+            .iter()
+            .filter(|(_, pending)| pending.changed.elapsed() >= self.options.debounce)
+            .map(|(input, _)| input.clone())
+            .collect();
+        for input in &settled {
+            let pending = self
+                .pending
+                .remove(input)
+                .expect("settled templates are pending");
+            self.regenerate(&pending, report)?;
+            self.stamps.insert(pending.job.input, pending.stamp);
+        }
+        Ok(settled.len())
+    }
+
+    /// Searches the inputs for templates, remembering when each directory
+    /// searched was last modified.
+    fn list(&mut self) -> io::Result<()> {
+        let listing = batch::collect(self.inputs, self.options.out_dir, self.options.language)?;
+        self.jobs = listing.jobs;
+        self.dirs = listing
+            .dirs
+            .into_iter()
+            .map(|dir| {
+                let modified = modified_time(&dir);
+                (dir, modified)
+            })
+            .collect();
+        Ok(())
+    }
+
+    fn regenerate(&self, pending: &Pending, report: &mut dyn io::Write) -> io::Result<()> {
+        let start = Instant::now();
+        let result = super::catch_panic(|| {
+            pending.job.check_output()?;
+            let template = super::input::read(&pending.job.input)?;
+            super::convert_to_file(
+                &template,
+                Schema::builtin(),
+                self.options.language,
+                self.options.class_name,
+                self.options.class_type,
+                self.options.cache,
+                &pending.job.output,
+            )
+        });
+        let conversion = start.elapsed();
+        // The time elapsed since the template was written, as far as the file
+        // system can tell.
+        let latency = SystemTime::now()
+            .duration_since(pending.stamp.modified)
+            .unwrap_or_default();
+
+        match result {
+            Ok(()) => writeln!(
+                report,
+                "Regenerated {} in {conversion:.2?} ({latency:.2?} after the edit)",
+                pending.job.output.display(),
+            ),
+            Err(error) => writeln!(
+                report,
+                "Failed to convert {}: {error}",
+                pending.job.input.display()
+            ),
+        }
+    }
+}
+
+/// When `path` was last modified, if it still exists.
+fn modified_time(path: &Path) -> Option<SystemTime> {
+    fs::metadata(path)
+        .and_then(|metadata| metadata.modified())
+        .ok()
+}
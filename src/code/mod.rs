@@ -1,43 +1,88 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Generation of indented source code.
+//!
+//! Every [`CodeBuffer`] created from the same root shares a single
+//! [`Document`]: the text of all buffers is appended to one contiguous byte
+//! vector, and the order in which it is rendered is kept in a linked list of
+//! pieces, each naming a range of those bytes and the indentation it is
+//! rendered with. A buffer only remembers the last piece it owns, so text can
+//! still be added to a section created earlier (such as imports discovered
+//! late), while consecutive writes to the same buffer grow a single piece.
+//! Indentation is applied when the document is written out, either at once
+//! or streamed as the code preceding a buffer becomes final.
+
 use std::borrow::Cow;
-use std::cell::RefCell;
+use std::cell::{Cell, RefCell};
+use std::fmt;
 use std::io;
-use std::io::Write;
 use std::rc::Rc;
 
+/// The size of the chunks in which rendered code is handed to the writer.
+const OUTPUT_CHUNK_SIZE: usize = 64 * 1024;
+
+/// Marks the end of the list of pieces.
+const END: u32 = u32::MAX;
+
 /// A `CodeBuffer` is a buffer that can be used to generate code without having
 /// to keep track of identation. A `CodeBuffer` contains either plain text which
 /// will be indented accoridng to the buffer's own indent, or nested
 /// `CodeBuffer`s which will be intended according to their own indent, on top
 /// of the containing buffer's indent.
 pub struct CodeBuffer {
-    indent: Cow<'static, str>,
-    content: RefCell<Vec<CodeBufferContent>>,
+    document: Rc<RefCell<Document>>,
+    indent: u32,
+    /// The last piece of this buffer, after which its text is added.
+    cursor: Cell<u32>,
+    /// The generation of `cursor` when it became the last piece of this
+    /// buffer, which changes once the piece is streamed out.
+    generation: Cell<u32>,
 }
 
 impl CodeBuffer {
     /// Creates a new `CodeBuffer` with no identation.
-    pub const fn new() -> Self {
-        Self::with_indent(Cow::Borrowed(""))
+    pub fn new() -> Self {
+        Self {
+            document: Rc::default(),
+            indent: 0,
+            cursor: Cell::new(0),
+            generation: Cell::new(0),
+        }
     }
 
     /// Adds a single newline character to this code buffer.
     #[inline]
     pub fn newline(&self) {
-        self.line(Cow::Borrowed(""))
+        self.push(b"\n");
     }
 
     /// Adds text into the buffer, followed by a new line.
     pub fn line(&self, text: impl Into<Cow<'static, str>>) {
-        let mut content = self.content.borrow_mut();
-        content.push(CodeBufferContent::String(text.into(), true));
+        let mut document = self.document.borrow_mut();
+        let cursor = self.cursor(&document);
+        let cursor = document.append(cursor, self.indent, text.into().as_bytes());
+        let cursor = document.append(cursor, self.indent, b"\n");
+        self.set_cursor(&document, cursor);
     }
 
     /// Adds text into the buffer, as-is.
     pub fn text(&self, text: impl Into<Cow<'static, str>>) {
-        let mut content = self.content.borrow_mut();
-        content.push(CodeBufferContent::String(text.into(), false));
+        self.push(text.into().as_bytes());
+    }
+
+    /// Adds formatted text into the buffer, followed by a new line. Unlike
+    /// `line(format!(...))`, the text is formatted straight into the buffer,
+    /// without allocating a `String` for it first.
+    pub fn line_fmt(&self, args: fmt::Arguments<'_>) {
+        self.push_fmt(args, true);
+    }
+
+    /// Adds formatted text into the buffer, as-is. Unlike
+    /// `text(format!(...))`, the text is formatted straight into the buffer,
+    /// without allocating a `String` for it first.
+    pub fn text_fmt(&self, args: fmt::Arguments<'_>) {
+        self.push_fmt(args, false);
     }
 
     /// Creates a new indented sub-buffer at the current position.
@@ -53,26 +98,32 @@ impl CodeBuffer {
 
     /// Creates a new indented sub-buffer at the current position.
     pub fn indent_with_options(&self, options: IndentOptions) -> Rc<CodeBuffer> {
-        let mut content = self.content.borrow_mut();
         if let Some(leading) = options.leading {
-            content.push(CodeBufferContent::String(leading, true));
+            self.line(leading);
         }
 
-        let idx = content.len();
-        content.push(CodeBufferContent::Buffer(Rc::new(CodeBuffer::with_indent(
-            Cow::Owned(format!("{}{}", self.indent, options.indent)),
-        ))));
+        let mut document = self.document.borrow_mut();
+        let indent = document.indent(self.indent, options.indent);
+        let cursor = self.cursor(&document);
+        let start = document.insert(cursor, indent);
+        let cursor = document.insert(start, self.indent);
+        self.set_cursor(&document, cursor);
+        let generation = document.pieces[start as usize].generation;
+        drop(document);
 
         if let Some(trailing) = options.trailing {
-            content.push(CodeBufferContent::String(
-                trailing,
-                options.trailing_newline,
-            ));
-        } else if options.trailing_newline {
-            content.push(CodeBufferContent::String(Cow::Borrowed(""), true));
+            self.text(trailing);
+        }
+        if options.trailing_newline {
+            self.newline();
         }
 
-        content[idx].as_buffer()
+        Rc::new(CodeBuffer {
+            document: Rc::clone(&self.document),
+            indent,
+            cursor: Cell::new(start),
+            generation: Cell::new(generation),
+        })
     }
 
     /// Creates a new un-indented sub-buffer at the current position.
@@ -86,27 +137,72 @@ impl CodeBuffer {
         })
     }
 
-    /// Writes the content of this `CodeBuffer` into the provided writer.
+    /// Writes the content of this `CodeBuffer` into the provided writer, and
+    /// flushes it. The rendered code is gathered into large chunks, so the
+    /// writer sees a few large writes instead of one per indentation prefix
+    /// and line fragment.
     pub fn write(self, writer: &mut dyn io::Write) -> io::Result<()> {
-        self.inner_write(&mut IndentedWriter::new(writer))
+        let mut document = self.document.borrow_mut();
+        document.render(END, writer)?;
+        writer.write_all(&document.output)?;
+        document.output.clear();
+        writer.flush()
+    }
+
+    /// Writes the code that comes before the current position of this buffer
+    /// into the provided writer, and forgets it, so the memory held by the
+    /// document stays bounded by the code added since. The code is handed to
+    /// the writer in large chunks, the last of which is only written by
+    /// [`CodeBuffer::write`].
+    ///
+    /// Nothing may be added to the buffers positioned before this one once
+    /// it has been streamed: their text has already been written, so adding
+    /// to them panics.
+    pub fn stream(&self, writer: &mut dyn io::Write) -> io::Result<()> {
+        let mut document = self.document.borrow_mut();
+        let cursor = self.cursor(&document);
+        document.stream(cursor, writer)
+    }
+
+    /// Returns the last piece of this buffer, checking that it was not
+    /// streamed out (and possibly reused by another buffer).
+    #[inline]
+    fn cursor(&self, document: &Document) -> u32 {
+        let cursor = self.cursor.get();
+        assert_eq!(
+            document.pieces[cursor as usize].generation,
+            self.generation.get(),
+            "code added to a buffer positioned before a streamed buffer",
+        );
+        cursor
+    }
+
+    #[inline]
+    fn set_cursor(&self, document: &Document, cursor: u32) {
+        self.cursor.set(cursor);
+        self.generation
+            .set(document.pieces[cursor as usize].generation);
     }
 
-    fn inner_write(&self, writer: &mut IndentedWriter) -> io::Result<()> {
-        writer.with_indent(&self.indent, move |writer| {
-            for item in self.content.borrow().iter() {
-                item.write(writer)?;
+    fn push_fmt(&self, args: fmt::Arguments<'_>, newline: bool) {
+        let mut document = self.document.borrow_mut();
+        let cursor = self.cursor(&document);
+        let cursor = document.append_with(cursor, self.indent, |bytes| {
+            // Like `format!`, which panics when a formatting trait fails.
+            io::Write::write_fmt(bytes, args)
+                .expect("a formatting trait implementation returned an error");
+            if newline {
+                bytes.push(b'\n');
             }
-            Ok(())
-        })
+        });
+        self.set_cursor(&document, cursor);
     }
-}
 
-impl CodeBuffer {
-    const fn with_indent(indent: Cow<'static, str>) -> Self {
-        Self {
-            indent,
-            content: RefCell::new(Vec::new()),
-        }
+    fn push(&self, bytes: &[u8]) {
+        let mut document = self.document.borrow_mut();
+        let cursor = self.cursor(&document);
+        let cursor = document.append(cursor, self.indent, bytes);
+        self.set_cursor(&document, cursor);
     }
 }
 
@@ -131,104 +227,214 @@ pub struct IndentOptions {
     pub trailing_newline: bool,
 }
 
-enum CodeBufferContent {
-    String(Cow<'static, str>, bool),
-    Buffer(Rc<CodeBuffer>),
+/// The text shared by a root [`CodeBuffer`] and all of its sub-buffers.
+struct Document {
+    /// The text of every buffer that is yet to be written out.
+    bytes: Vec<u8>,
+    /// The pieces of the document, linked in the order they are rendered,
+    /// starting with `head`.
+    pieces: Vec<Piece>,
+    head: u32,
+    /// The pieces already written out, available for reuse.
+    free: Vec<u32>,
+    /// The distinct indentations of the buffers, starting with none.
+    indents: Vec<Indent>,
+    /// Rendered code waiting to be handed to the writer in a large chunk.
+    output: Vec<u8>,
+    /// Whether the last rendered byte ended a line.
+    after_newline: bool,
+    /// Spare storage for compacting `bytes` when streaming.
+    scratch: Vec<u8>,
 }
 
-impl CodeBufferContent {
-    fn as_buffer(&self) -> Rc<CodeBuffer> {
-        match self {
-            Self::Buffer(buffer) => buffer.clone(),
-            _ => unreachable!("expected a buffer"),
-        }
-    }
-
-    fn write(&self, writer: &mut IndentedWriter) -> io::Result<()> {
-        match self {
-            Self::String(string, newline) => {
-                if *newline {
-                    writeln!(writer, "{string}")
-                } else {
-                    write!(writer, "{string}")
-                }
-            }
-            Self::Buffer(buffer) => buffer.inner_write(writer),
+impl Default for Document {
+    fn default() -> Self {
+        Self {
+            bytes: Vec::new(),
+            pieces: vec![Piece {
+                start: 0,
+                end: 0,
+                indent: 0,
+                next: END,
+                generation: 0,
+            }],
+            head: 0,
+            free: Vec::new(),
+            indents: vec![Indent {
+                parent: 0,
+                own: Cow::Borrowed(""),
+                text: String::new(),
+            }],
+            output: Vec::new(),
+            after_newline: true,
+            scratch: Vec::new(),
         }
     }
 }
 
-struct IndentedWriter<'a> {
-    indent: &'a [u8],
-    writer: &'a mut dyn io::Write,
+/// A range of the bytes of a [`Document`], rendered with an indentation.
+struct Piece {
+    start: usize,
+    end: usize,
+    indent: u32,
+    next: u32,
+    /// Incremented whenever the piece is streamed out, so that buffers still
+    /// pointing at it can be told apart from the one reusing it.
+    generation: u32,
+}
 
-    after_newline: bool,
+/// The indentation of a buffer: the one of its parent, followed by its own.
+struct Indent {
+    parent: u32,
+    own: Cow<'static, str>,
+    text: String,
 }
 
-impl<'a> IndentedWriter<'a> {
-    fn new(writer: &'a mut dyn io::Write) -> Self {
-        Self {
-            indent: &[],
-            writer,
-            after_newline: true,
-        }
+impl Document {
+    /// Adds `bytes` after the piece `after`, returning the piece that ends
+    /// with them. The piece grows in place when its bytes are the last ones
+    /// added, so consecutive writes to a buffer share a single piece.
+    fn append(&mut self, after: u32, indent: u32, bytes: &[u8]) -> u32 {
+        self.append_with(after, indent, |text| text.extend_from_slice(bytes))
     }
 
-    fn with_indent(
-        &mut self,
-        indent: &str,
-        cb: impl FnOnce(&mut IndentedWriter<'_>) -> io::Result<()>,
-    ) -> io::Result<()> {
-        let mut delegate = IndentedWriter {
-            indent: indent.as_bytes(),
-            writer: self.writer,
-            after_newline: self.after_newline,
+    /// Like [`Document::append`], with the bytes added by `write`.
+    fn append_with(&mut self, after: u32, indent: u32, write: impl FnOnce(&mut Vec<u8>)) -> u32 {
+        let piece = if self.pieces[after as usize].end == self.bytes.len() {
+            after
+        } else {
+            self.insert(after, indent)
         };
+        write(&mut self.bytes);
+        self.pieces[piece as usize].end = self.bytes.len();
+        piece
+    }
 
-        let result = cb(&mut delegate);
-        self.after_newline = delegate.after_newline;
-        result
+    /// Inserts an empty piece after the piece `after`, returning it.
+    fn insert(&mut self, after: u32, indent: u32) -> u32 {
+        let mut piece = Piece {
+            start: self.bytes.len(),
+            end: self.bytes.len(),
+            indent,
+            next: self.pieces[after as usize].next,
+            generation: 0,
+        };
+        let id = match self.free.pop() {
+            Some(id) => {
+                piece.generation = self.pieces[id as usize].generation;
+                self.pieces[id as usize] = piece;
+                id
+            }
+            None => {
+                self.pieces.push(piece);
+                u32::try_from(self.pieces.len() - 1).expect("too many pieces")
+            }
+        };
+        self.pieces[after as usize].next = id;
+        id
     }
-}
 
-impl io::Write for IndentedWriter<'_> {
-    fn write(&mut self, mut buf: &[u8]) -> io::Result<usize> {
-        // Short-circuit to the raw writer if there is no indentation.
-        if self.indent.is_empty() {
-            return self.writer.write(buf);
+    /// Returns the indentation made of `own` nested in `parent`.
+    fn indent(&mut self, parent: u32, own: Cow<'static, str>) -> u32 {
+        if own.is_empty() {
+            return parent;
         }
+        if let Some(id) = self
+            .indents
+            .iter()
+            .position(|indent| indent.parent == parent && indent.own == own)
+        {
+            return id as u32;
+        }
+        let text = format!("{}{}", self.indents[parent as usize].text, own);
+        self.indents.push(Indent { parent, own, text });
+        (self.indents.len() - 1) as u32
+    }
 
-        let mut written = 0;
-        while !buf.is_empty() {
-            let (slice, nl) = match buf.iter().position(|&b| b == b'\n') {
-                None => (buf, false),
-                Some(idx) => (&buf[..=idx], true),
-            };
-            debug_assert!(!slice.is_empty(), "the slice cannot be empty");
-
-            if self.after_newline && (slice.len() > 1 || !nl) {
-                // Note: this does not count as written output here...
-                self.writer.write_all(self.indent)?;
-                self.after_newline = false;
-            }
+    /// Writes out the pieces up to and including `last`, then reuses them
+    /// and drops their text, leaving `last` empty at the head of the list.
+    fn stream(&mut self, last: u32, writer: &mut dyn io::Write) -> io::Result<()> {
+        self.render(last, writer)?;
+
+        let mut id = self.head;
+        while id != last {
+            self.free.push(id);
+            let piece = &mut self.pieces[id as usize];
+            piece.generation = piece.generation.wrapping_add(1);
+            id = piece.next;
+        }
+        self.head = last;
+
+        // Only the text of the pieces after `last` is left to render.
+        self.scratch.clear();
+        let mut id = self.pieces[last as usize].next;
+        while id != END {
+            let piece = &mut self.pieces[id as usize];
+            let start = self.scratch.len();
+            self.scratch
+                .extend_from_slice(&self.bytes[piece.start..piece.end]);
+            piece.start = start;
+            piece.end = self.scratch.len();
+            id = piece.next;
+        }
+        std::mem::swap(&mut self.bytes, &mut self.scratch);
 
-            let out = self.writer.write(slice)?;
-            written += out;
+        let last = &mut self.pieces[last as usize];
+        last.start = self.bytes.len();
+        last.end = self.bytes.len();
+        Ok(())
+    }
 
-            if out < slice.len() {
-                // We couldn't write it all, so we'll return here...
+    /// Renders the pieces from the head up to and including `last` (or all
+    /// of them, given [`END`]), indenting every line that is not empty.
+    /// Rendered code is handed to `writer` in chunks of at least
+    /// [`OUTPUT_CHUNK_SIZE`] bytes.
+    fn render(&mut self, last: u32, writer: &mut dyn io::Write) -> io::Result<()> {
+        let Self {
+            bytes,
+            pieces,
+            head,
+            indents,
+            output,
+            after_newline,
+            ..
+        } = self;
+
+        let mut id = *head;
+        while id != END {
+            let piece = &pieces[id as usize];
+            let indent = indents[piece.indent as usize].text.as_bytes();
+            let mut bytes = &bytes[piece.start..piece.end];
+            if indent.is_empty() {
+                // Unindented code does not change whether the next indented
+                // line starts with its indentation.
+                output.extend_from_slice(bytes);
+                bytes = &[];
+            }
+            while !bytes.is_empty() {
+                let line = match memchr::memchr(b'\n', bytes) {
+                    Some(index) => &bytes[..=index],
+                    None => bytes,
+                };
+                if *after_newline && line != b"\n" {
+                    output.extend_from_slice(indent);
+                }
+                output.extend_from_slice(line);
+                *after_newline = line.ends_with(b"\n");
+                bytes = &bytes[line.len()..];
+            }
+            if output.len() >= OUTPUT_CHUNK_SIZE {
+                writer.write_all(output)?;
+                output.clear();
+            }
+            if id == last {
                 break;
             }
-
-            self.after_newline = nl;
-            buf = &buf[slice.len()..];
+            id = piece.next;
         }
-
-        Ok(written)
-    }
-
-    #[inline]
-    fn flush(&mut self) -> io::Result<()> {
-        self.writer.flush()
+        Ok(())
     }
 }
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,229 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+
+/// A writer recording how many times it is written to.
+#[derive(Default)]
+struct CountingWriter {
+    output: Vec<u8>,
+    writes: usize,
+    flushes: usize,
+}
+
+impl io::Write for CountingWriter {
+    fn write(&mut self, buf: &[u8]) -> io::Result<usize> {
+        self.writes += 1;
+        self.output.extend_from_slice(buf);
+        Ok(buf.len())
+    }
+
+    fn flush(&mut self) -> io::Result<()> {
+        self.flushes += 1;
+        Ok(())
+    }
+}
+
+#[test]
+fn test_write_indents_nested_buffers() {
+    let code = CodeBuffer::default();
+    code.line("class Foo {");
+    let body = code.indent_with_options(IndentOptions {
+        indent: "  ".into(),
+        leading: None,
+        trailing: Some("}".into()),
+        trailing_newline: true,
+    });
+    body.text("bar(");
+    body.text("baz");
+    body.line(");");
+    body.newline();
+    let nested = body.indent("  ".into());
+    nested.line("qux\nquux");
+
+    let mut output = Vec::new();
+    code.write(&mut output).unwrap();
+
+    assert_eq!(
+        String::from_utf8(output).unwrap(),
+        "class Foo {\n  bar(baz);\n\n    qux\n    quux\n}\n"
+    );
+}
+
+#[test]
+fn test_write_indents_after_unindented_text() {
+    let code = CodeBuffer::default();
+    code.text("root = ");
+    let block = code.indent("  ".into());
+    block.line("child");
+    code.text("tail");
+    block.line("late");
+
+    let mut output = Vec::new();
+    code.write(&mut output).unwrap();
+
+    // Unindented text does not end the line for indented text that follows.
+    assert_eq!(
+        String::from_utf8(output).unwrap(),
+        "root =   child\n  late\ntail"
+    );
+}
+
+#[test]
+fn test_write_gathers_output_into_chunks() {
+    let code = CodeBuffer::default();
+    let body = code.indent("    ".into());
+    for index in 0..1_000 {
+        body.text("let value = ");
+        body.text(index.to_string());
+        body.line(";");
+    }
+
+    let mut writer = CountingWriter::default();
+    code.write(&mut writer).unwrap();
+
+    assert!(writer.output.len() > OUTPUT_CHUNK_SIZE / 4);
+    assert_eq!(writer.writes, 1);
+    assert_eq!(writer.flushes, 1);
+}
+
+#[test]
+fn test_sections_take_text_added_later() {
+    let code = CodeBuffer::default();
+    let imports = code.section(true);
+    imports.line("import a;");
+    let body = code.indent_with_options(IndentOptions {
+        indent: "  ".into(),
+        leading: Some("class Foo {".into()),
+        trailing: Some("}".into()),
+        trailing_newline: true,
+    });
+    code.line("// end");
+    body.line("a();");
+    imports.line("import b;");
+    body.line("b();");
+
+    let mut output = Vec::new();
+    code.write(&mut output).unwrap();
+
+    assert_eq!(
+        String::from_utf8(output).unwrap(),
+        "import a;\nimport b;\n\nclass Foo {\n  a();\n  b();\n}\n// end\n"
+    );
+}
+
+#[test]
+fn test_consecutive_writes_share_a_piece() {
+    let code = CodeBuffer::default();
+    let body = code.indent("    ".into());
+    let nested = body.indent("    ".into());
+    for index in 0..100 {
+        body.text("let value = ");
+        body.text(index.to_string());
+        body.line(";");
+    }
+    nested.line("nested");
+    // Indentations are shared by the buffers nested the same way.
+    assert_eq!(
+        code.section(false).indent("    ".into()).indent,
+        body.indent
+    );
+
+    let document = code.document.borrow();
+    // The root, the sub-buffers, the anchors after them and the text added
+    // to `nested` once `body` had been written to.
+    assert_eq!(document.pieces.len(), 10);
+    assert_eq!(document.indents.len(), 3);
+}
+
+#[test]
+fn test_stream_writes_code_that_is_final() {
+    fn generate(stream: bool) -> (Vec<u8>, usize) {
+        let code = CodeBuffer::default();
+        let imports = code.section(true);
+        imports.line("import a;");
+        let body = code.indent_with_options(IndentOptions {
+            indent: "  ".into(),
+            leading: Some("class Foo {".into()),
+            trailing: Some("}".into()),
+            trailing_newline: true,
+        });
+        code.line("// end");
+
+        let mut output = Vec::new();
+        let mut held = 0;
+        for index in 0..100 {
+            let call = body.indent_with_options(IndentOptions {
+                indent: "  ".into(),
+                leading: Some(format!("call{index}(").into()),
+                trailing: Some(");".into()),
+                trailing_newline: true,
+            });
+            call.line("first,");
+            call.line("second,");
+            if stream {
+                body.stream(&mut output).unwrap();
+            }
+            held = held.max(code.document.borrow().bytes.len());
+        }
+        code.write(&mut output).unwrap();
+        (output, held)
+    }
+
+    let (written, held_written) = generate(false);
+    let (streamed, held_streamed) = generate(true);
+
+    assert_eq!(streamed, written);
+    assert!(held_written > 2_000);
+    // Only the code of one call and the closing lines are held at a time.
+    assert!(held_streamed < 64, "{held_streamed}");
+}
+
+#[test]
+fn test_stream_reuses_pieces() {
+    let code = CodeBuffer::default();
+    let body = code.indent("  ".into());
+    let mut output = Vec::new();
+    for _ in 0..100 {
+        body.indent("  ".into()).line("nested");
+        body.line("line");
+        body.stream(&mut output).unwrap();
+    }
+    assert!(code.document.borrow().pieces.len() < 10);
+
+    code.write(&mut output).unwrap();
+    assert_eq!(output, "    nested\n  line\n".repeat(100).into_bytes());
+}
+
+#[test]
+#[should_panic(expected = "code added to a buffer positioned before a streamed buffer")]
+fn test_stream_rejects_code_added_before_it() {
+    let code = CodeBuffer::default();
+    let header = code.section(false);
+    header.line("header");
+    let body = code.indent("  ".into());
+    body.line("line");
+    body.stream(&mut Vec::new()).unwrap();
+
+    // The piece of `header` was written out, and may be reused by `body`.
+    body.indent("  ".into()).line("nested");
+    header.line("late");
+}
+
+#[test]
+fn test_fmt_formats_into_the_buffer() {
+    let code = CodeBuffer::default();
+    let body = code.indent("  ".into());
+    let name = "bucket";
+    body.text_fmt(format_args!("let {name} = "));
+    body.text_fmt(format_args!("{:?}", "a\"b"));
+    body.line_fmt(format_args!(";{}", ""));
+    body.line_fmt(format_args!("{name}.go();\nreturn {name};"));
+
+    let mut output = Vec::new();
+    code.write(&mut output).unwrap();
+
+    assert_eq!(
+        String::from_utf8(output).unwrap(),
+        "  let bucket = \"a\\\"b\";\n  bucket.go();\n  return bucket;\n"
+    );
+}
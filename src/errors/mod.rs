@@ -19,6 +19,11 @@ pub enum Error {
         #[from]
         err: serde_yaml::Error,
     },
+    #[error(transparent)]
+    JsonParseError {
+        #[from]
+        err: serde_json::Error,
+    },
     #[error("{language} is not a supported language")]
     UnsupportedLanguageError { language: String },
     #[error(transparent)]
@@ -30,6 +35,8 @@ pub enum Error {
     TypeReferenceError { message: String },
     #[error("{message}")]
     PrimitiveError { message: String },
+    #[error("invalid IR: {message}")]
+    IrFormatError { message: String },
 
     #[error("Template format error: {details}")]
     TemplateFormatError { details: String },
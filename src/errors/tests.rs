@@ -49,6 +49,13 @@ fn test_yaml_parse_error() {
     assert_eq!(error.to_string(), "YAML parsing error");
 }
 
+#[test]
+fn test_json_parse_error() {
+    let json_error = serde_json::Error::custom("JSON parsing error");
+    let error: crate::Error = json_error.into();
+    assert_eq!(error.to_string(), "JSON parsing error");
+}
+
 #[test]
 fn test_unsupported_language_error() {
     let error = crate::Error::UnsupportedLanguageError {
@@ -1,9 +1,11 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
+use std::hash::BuildHasher;
+
 use indexmap::IndexMap;
-use topological_sort::TopologicalSort;
 
-use super::reference::PseudoParameter;
+use super::graph::{describe_cycle, DependencyGraph};
+use super::{Declaration, ReferenceOrigins};
 
 use crate::ir::reference::{Origin, Reference};
 use crate::parser::condition::{ConditionFunction, ConditionValue};
@@ -15,7 +17,7 @@ use crate::{CFCResult, Error};
 // It may have made more sense to copy completely to the parse tree
 // but for now we will keep ConditionInstruction + ConditionIr
 // as a single entity.
-#[derive(Debug, Clone, PartialEq)]
+#[derive(Debug, Clone, PartialEq, serde::Serialize, serde::Deserialize)]
 pub struct ConditionInstruction {
     pub name: String,
     pub value: ConditionIr,
@@ -23,24 +25,25 @@ pub struct ConditionInstruction {
 
 impl ConditionInstruction {
     pub(super) fn from(
-        mut parse_tree: IndexMap<String, ConditionFunction, Hasher>,
+        parse_tree: IndexMap<String, ConditionFunction, Hasher>,
+        origins: &ReferenceOrigins,
     ) -> CFCResult<Vec<Self>> {
-        let order: Vec<String> = determine_order(&parse_tree)?
-            .into_iter()
-            .map(ToString::to_string)
-            .collect();
+        let order = order(&parse_tree)?;
 
+        let mut parse_tree: Vec<Option<(String, ConditionFunction)>> =
+            parse_tree.into_iter().map(Some).collect();
         Ok(order
             .into_iter()
-            .map(|name| {
-                let value = parse_tree.shift_remove(&name).unwrap().into_ir();
-                ConditionInstruction { name, value }
+            .filter_map(|index| parse_tree[index].take())
+            .map(|(name, function)| ConditionInstruction {
+                value: function.into_ir(origins),
+                name,
             })
             .collect())
     }
 }
 
-#[derive(Debug, Clone, PartialEq)]
+#[derive(Debug, Clone, PartialEq, serde::Serialize, serde::Deserialize)]
 pub enum ConditionIr {
     // Higher level boolean operators
     And(Vec<ConditionIr>),
@@ -67,24 +70,24 @@ impl ConditionIr {
 }
 
 impl ConditionFunction {
-    fn into_ir(self) -> ConditionIr {
+    fn into_ir(self, origins: &ReferenceOrigins) -> ConditionIr {
         match self {
             Self::And(x) => {
-                let and_list = x.into_iter().map(ConditionValue::into_ir).collect();
+                let and_list = x.into_iter().map(|x| x.into_ir(origins)).collect();
                 ConditionIr::And(and_list)
             }
             Self::Equals(x, y) => {
-                let x = x.into_ir();
-                let y = y.into_ir();
+                let x = x.into_ir(origins);
+                let y = y.into_ir(origins);
 
                 ConditionIr::Equals(Box::new(x), Box::new(y))
             }
             Self::Not(x) => {
-                let x = x.into_ir();
+                let x = x.into_ir(origins);
                 ConditionIr::Not(Box::new(x))
             }
             Self::Or(x) => {
-                let or_list = x.into_iter().map(ConditionValue::into_ir).collect();
+                let or_list = x.into_iter().map(|x| x.into_ir(origins)).collect();
                 ConditionIr::Or(or_list)
             }
             Self::Condition(x) => ConditionIr::Condition(x),
@@ -94,37 +97,37 @@ impl ConditionFunction {
 }
 
 impl ConditionValue {
-    fn into_ir(self) -> ConditionIr {
+    fn into_ir(self, origins: &ReferenceOrigins) -> ConditionIr {
         match self {
-            Self::Function(function) => function.into_ir(),
+            Self::Function(function) => function.into_ir(origins),
             Self::FindInMap(name, x, y) => {
-                let x = x.into_ir();
-                let y = y.into_ir();
+                let x = x.into_ir(origins);
+                let y = y.into_ir(origins);
 
                 ConditionIr::Map(name, Box::new(x), Box::new(y))
             }
             Self::Split(delimiter, x) => {
-                let x = x.into_ir();
+                let x = x.into_ir(origins);
                 ConditionIr::Split(delimiter, Box::new(x))
             }
             Self::Select(index, x) => {
-                let x = x.into_ir();
+                let x = x.into_ir(origins);
                 ConditionIr::Select(index, Box::new(x))
             }
             Self::String(x) => ConditionIr::Str(x),
             Self::Ref(name) => {
                 // The only 2 references allowed in conditions is parameters or pseudo parameters.
                 // so assume it's a parameter and check for pseudo fill-ins
-                let mut origin = Origin::Parameter;
-                if let Option::Some(s) = PseudoParameter::try_from(&name) {
-                    origin = Origin::PseudoParameter(s);
-                }
-                ConditionIr::Ref(Reference { origin, name })
+                let symbol = origins.symbol(&name);
+                let origin = match origins.declaration(symbol) {
+                    Some(Declaration::PseudoParameter(pseudo)) => Origin::PseudoParameter(pseudo),
+                    _ => Origin::Parameter,
+                };
+                ConditionIr::Ref(Reference::new(symbol, origin))
+            }
+            Self::Condition(name) => {
+                ConditionIr::Ref(Reference::new(origins.symbol(&name), Origin::Condition))
             }
-            Self::Condition(name) => ConditionIr::Ref(Reference {
-                origin: Origin::Condition,
-                name,
-            }),
         }
     }
 }
@@ -132,85 +135,91 @@ impl ConditionValue {
 /**
  * Provides an ordering of conditions contained in the tree based on relative dependencies.
  */
-pub fn determine_order<S>(
+pub fn determine_order<S: BuildHasher>(
     conditions: &indexmap::IndexMap<String, ConditionFunction, S>,
 ) -> CFCResult<Vec<&str>> {
-    let mut topo: TopologicalSort<&str> = TopologicalSort::new();
-    // Identify condition dependencies
-    for (name, value) in conditions {
-        topo.insert(name.as_str());
-        value.find_dependencies(name, &mut topo);
-    }
+    Ok(order(conditions)?
+        .into_iter()
+        .map(|index| conditions.get_index(index).unwrap().0.as_str())
+        .collect())
+}
 
-    let mut sorted = Vec::with_capacity(conditions.len());
-    while !topo.is_empty() {
-        let mut list = topo.pop_all();
-        if list.is_empty() {
-            return Err(Error::TemplateFormatError {
-                details: "cyclic references in the Conditions section".into(),
-            });
-        }
-        // Ensure consistent ordering in generated code...
-        list.sort();
-        sorted.extend(list);
+// Orders the conditions by dependencies, returning their indices in
+// `conditions`.
+fn order<S: BuildHasher>(
+    conditions: &indexmap::IndexMap<String, ConditionFunction, S>,
+) -> CFCResult<Vec<usize>> {
+    let mut graph = DependencyGraph::new(conditions.len());
+    // Identify condition dependencies
+    for (node, value) in conditions.values().enumerate() {
+        let mut result = Ok(());
+        value.find_dependencies(
+            &mut |dependency| match conditions.get_index_of(dependency) {
+                Some(dependency) => graph.add_dependency(dependency, node),
+                None if result.is_ok() => {
+                    result = Err(Error::TemplateFormatError {
+                        details: format!("reference to an unknown condition: {dependency}"),
+                    })
+                }
+                None => {}
+            },
+        );
+        result?;
     }
 
-    Ok(sorted)
+    // Ensure consistent ordering in generated code...
+    let names: Vec<&str> = conditions.keys().map(String::as_str).collect();
+    graph
+        .order(&names)
+        .map_err(|cycle| Error::TemplateFormatError {
+            details: format!(
+                "cyclic references in the Conditions section: {}",
+                describe_cycle(cycle.iter().map(|&node| names[node]))
+            ),
+        })
 }
 
 impl ConditionFunction {
-    fn find_dependencies<'a>(
-        &'a self,
-        logical_id: &'a str,
-        topo_sort: &'_ mut TopologicalSort<&'a str>,
-    ) {
+    fn find_dependencies<'a>(&'a self, dependency: &mut impl FnMut(&'a str)) {
         match self {
             Self::And(list) | Self::Or(list) => list
                 .iter()
-                .for_each(|val| val.find_dependencies(logical_id, topo_sort)),
+                .for_each(|val| val.find_dependencies(dependency)),
             Self::Equals(a, b) => {
-                a.find_dependencies(logical_id, topo_sort);
-                b.find_dependencies(logical_id, topo_sort);
-            }
-            Self::Condition(x) => {
-                topo_sort.add_dependency(x.as_str(), logical_id);
+                a.find_dependencies(dependency);
+                b.find_dependencies(dependency);
             }
-            Self::Not(cond) => cond.find_dependencies(logical_id, topo_sort),
+            Self::Condition(x) => dependency(x),
+            Self::Not(cond) => cond.find_dependencies(dependency),
             Self::If {
                 condition_name,
                 if_true,
                 if_false,
                 ..
             } => {
-                topo_sort.add_dependency(condition_name.as_str(), logical_id);
-                if_true.find_dependencies(logical_id, topo_sort);
-                if_false.find_dependencies(logical_id, topo_sort);
+                dependency(condition_name);
+                if_true.find_dependencies(dependency);
+                if_false.find_dependencies(dependency);
             }
         }
     }
 }
 
 impl ConditionValue {
-    fn find_dependencies<'a>(
-        &'a self,
-        logical_id: &'a str,
-        topo_sort: &'_ mut TopologicalSort<&'a str>,
-    ) {
+    fn find_dependencies<'a>(&'a self, dependency: &mut impl FnMut(&'a str)) {
         match self {
-            Self::Condition(cond) => {
-                topo_sort.add_dependency(cond.as_str(), logical_id);
-            }
+            Self::Condition(cond) => dependency(cond),
             Self::FindInMap(_, key1, key2) => {
-                key1.find_dependencies(logical_id, topo_sort);
-                key2.find_dependencies(logical_id, topo_sort);
+                key1.find_dependencies(dependency);
+                key2.find_dependencies(dependency);
             }
             Self::Split(_, key1) => {
-                key1.find_dependencies(logical_id, topo_sort);
+                key1.find_dependencies(dependency);
             }
             Self::Select(_, key1) => {
-                key1.find_dependencies(logical_id, topo_sort);
+                key1.find_dependencies(dependency);
             }
-            Self::Function(func) => func.find_dependencies(logical_id, topo_sort),
+            Self::Function(func) => func.find_dependencies(dependency),
             Self::Ref(_) | Self::String(_) => {}
         }
     }
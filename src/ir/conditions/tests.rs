@@ -3,7 +3,8 @@
 use indexmap::IndexMap;
 
 use crate::ir::conditions::{determine_order, ConditionIr};
-use crate::ir::reference::{Origin, PseudoParameter, Reference};
+use crate::ir::reference::{Origin, PseudoParameter};
+use crate::ir::ReferenceOrigins;
 use crate::parser::condition::{ConditionFunction, ConditionValue};
 
 #[test]
@@ -13,16 +14,22 @@ fn test_eq_translation() {
         ConditionValue::Ref("AWS::Region".into()),
     );
 
-    let condition_ir = condition_structure.into_ir();
+    let origins = ReferenceOrigins::default();
+    let condition_ir = condition_structure.into_ir(&origins);
+    let ConditionIr::Equals(left, right) = condition_ir else {
+        panic!("expected an equality, got {condition_ir:?}");
+    };
+    assert_eq!(ConditionIr::Str("us-west-2".into()), *left);
+    let ConditionIr::Ref(reference) = *right else {
+        panic!("expected a reference, got {right:?}");
+    };
     assert_eq!(
-        ConditionIr::Equals(
-            Box::new(ConditionIr::Str("us-west-2".into())),
-            Box::new(ConditionIr::Ref(Reference::new(
-                "AWS::Region",
-                Origin::PseudoParameter(PseudoParameter::Region)
-            )))
-        ),
-        condition_ir
+        Origin::PseudoParameter(PseudoParameter::Region),
+        reference.origin
+    );
+    assert_eq!(
+        "AWS::Region",
+        origins.into_symbols().resolve(reference.symbol)
     );
 }
 
@@ -42,19 +49,51 @@ fn test_sorting() {
 }
 
 #[test]
-fn test_condition_translation() {
-    let condition_structure: ConditionValue = ConditionValue::Condition("other".into());
-    let condition_ir = condition_structure.into_ir();
+fn test_sorting_unknown_condition() {
+    let a = ConditionFunction::Condition("Other".into());
+
+    let hash = IndexMap::from([("A".into(), a)]);
+    let error = determine_order(&hash).unwrap_err();
+
+    assert_eq!(
+        "Template format error: reference to an unknown condition: Other",
+        error.to_string(),
+    );
+}
+
+#[test]
+fn test_sorting_names_cycle_members() {
+    let a = ConditionFunction::Not(ConditionValue::Condition("B".into()));
+    let b = ConditionFunction::And(vec![
+        ConditionValue::Condition("A".into()),
+        ConditionValue::String("true".into()),
+    ]);
+
+    let hash = IndexMap::from([("B".into(), b), ("A".into(), a)]);
+    let error = determine_order(&hash).unwrap_err();
+
     assert_eq!(
-        (ConditionIr::Ref(Reference::new("other", Origin::Condition))),
-        condition_ir
+        "Template format error: cyclic references in the Conditions section: A -> B -> A",
+        error.to_string(),
     );
 }
 
+#[test]
+fn test_condition_translation() {
+    let condition_structure: ConditionValue = ConditionValue::Condition("other".into());
+    let origins = ReferenceOrigins::default();
+    let condition_ir = condition_structure.into_ir(&origins);
+    let ConditionIr::Ref(reference) = condition_ir else {
+        panic!("expected a reference, got {condition_ir:?}");
+    };
+    assert_eq!(Origin::Condition, reference.origin);
+    assert_eq!("other", origins.into_symbols().resolve(reference.symbol));
+}
+
 #[test]
 fn test_simple() {
     assert_eq!(
         ConditionIr::Str("hi".into()),
-        ConditionValue::String("hi".into()).into_ir()
+        ConditionValue::String("hi".into()).into_ir(&ReferenceOrigins::default())
     );
 }
@@ -4,7 +4,7 @@ use crate::{parser::parameters::Parameter, Hasher};
 use indexmap::IndexMap;
 use voca_rs::case::camel_case;
 
-#[derive(Debug, Default)]
+#[derive(Debug, Default, serde::Serialize, serde::Deserialize)]
 pub struct Constructor {
     pub inputs: Vec<ConstructorParameter>,
 }
@@ -49,7 +49,7 @@ impl Constructor {
     }
 }
 
-#[derive(Debug, Default)]
+#[derive(Debug, Default, serde::Serialize, serde::Deserialize)]
 pub struct ConstructorParameter {
     pub name: String,
     pub description: Option<String>,
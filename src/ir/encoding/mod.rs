@@ -0,0 +1,789 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Storage formats for the IR, so that a template can be parsed and translated
+//! once, and the IR synthesized later, possibly by another process.
+//!
+//! The binary format is compact and fast to read. It starts with a header
+//! (`MAGIC`, the format version and the version of this crate, which the IR
+//! types are tied to), followed by the IR encoded with the `serde` data model:
+//! every value is a one byte tag followed by its payload, integers and lengths
+//! are LEB128 varints, structs are sequences of their fields (without names),
+//! and enum variants are identified by their index. Values describe their own
+//! type, so types deserialized with `deserialize_any` (such as untagged enums)
+//! round-trip as well.
+//!
+//! The JSON format is meant for debugging, and is the IR as serialized by
+//! `serde_json`.
+//!
+//! IR read in either format is checked to only use the symbols and types of
+//! its own tables, so that a damaged file fails to decode rather than making
+//! synthesis panic.
+//!
+//! The formats only exist for the `--emit-ir` and `--from-ir` options of the
+//! command line tool, and change between versions, so they are not part of the
+//! library API: the methods the tool uses are hidden from the documentation.
+
+use std::fmt;
+
+use serde::de::{self, DeserializeSeed, IntoDeserializer, Visitor};
+use serde::ser::{self, Serialize};
+use serde::Deserialize;
+
+use super::reference::Reference;
+use super::symbols::Symbol;
+use super::types::TypeId;
+use super::visit::Visitor as IrVisitor;
+use super::CloudformationProgramIr;
+use crate::Error;
+
+/// The bytes binary IR files start with.
+const MAGIC: &[u8; 6] = b"CFNIR\0";
+
+/// The version of the binary format, to be bumped whenever the encoding of
+/// values changes.
+const FORMAT_VERSION: u64 = 3;
+
+impl CloudformationProgramIr {
+    /// Encodes the IR in the binary format, which [`from_binary`] reads back.
+    ///
+    /// [`from_binary`]: CloudformationProgramIr::from_binary
+    #[doc(hidden)]
+    pub fn to_binary(&self) -> Result<Vec<u8>, Error> {
+        let mut encoder = Encoder {
+            output: Vec::with_capacity(64 * 1024),
+        };
+        encoder.output.extend_from_slice(MAGIC);
+        encoder.write_varint(FORMAT_VERSION);
+        encoder.write_str(env!("CARGO_PKG_VERSION"));
+        self.serialize(&mut encoder)?;
+        Ok(encoder.output)
+    }
+
+    /// Decodes IR encoded by [`to_binary`], which must have been produced by
+    /// the same version of this crate.
+    ///
+    /// [`to_binary`]: CloudformationProgramIr::to_binary
+    fn from_binary(bytes: &[u8]) -> Result<Self, Error> {
+        let Some(input) = bytes.strip_prefix(MAGIC) else {
+            return Err(EncodingError::new("not a binary IR file").into());
+        };
+        let mut decoder = Decoder { input };
+
+        let version = decoder.read_varint()?;
+        if version != FORMAT_VERSION {
+            return Err(EncodingError(format!(
+                "unsupported format version {version} (expected {FORMAT_VERSION})"
+            ))
+            .into());
+        }
+        let crate_version = decoder.read_str()?;
+        if crate_version != env!("CARGO_PKG_VERSION") {
+            return Err(EncodingError(format!(
+                "produced by version {crate_version} of {}, this is version {}",
+                env!("CARGO_PKG_NAME"),
+                env!("CARGO_PKG_VERSION")
+            ))
+            .into());
+        }
+
+        let ir = Self::deserialize(&mut decoder)?;
+        if !decoder.input.is_empty() {
+            return Err(EncodingError::new("trailing bytes after the IR").into());
+        }
+        ir.validate()?;
+        Ok(ir)
+    }
+
+    /// Encodes the IR as (pretty-printed) JSON.
+    #[doc(hidden)]
+    pub fn to_json(&self) -> Result<Vec<u8>, Error> {
+        Ok(serde_json::to_vec_pretty(self)?)
+    }
+
+    /// Decodes IR encoded by [`to_json`].
+    ///
+    /// [`to_json`]: CloudformationProgramIr::to_json
+    fn from_json(bytes: &[u8]) -> Result<Self, Error> {
+        let ir: Self = serde_json::from_slice(bytes)?;
+        ir.validate()?;
+        Ok(ir)
+    }
+
+    /// Decodes IR in either format, telling them apart by the header of the
+    /// binary format.
+    #[doc(hidden)]
+    pub fn decode(bytes: &[u8]) -> Result<Self, Error> {
+        if bytes.starts_with(MAGIC) {
+            Self::from_binary(bytes)
+        } else {
+            Self::from_json(bytes)
+        }
+    }
+}
+
+impl CloudformationProgramIr {
+    /// Checks that every symbol, type ID and node of decoded IR was handed out
+    /// by its tables, and that the nodes form trees, which synthesis relies
+    /// on.
+    fn validate(&self) -> Result<(), EncodingError> {
+        let resource_values = self.resources.iter().flat_map(|resource| {
+            let values = resource.properties.values();
+            values
+                .chain(&resource.metadata)
+                .chain(&resource.update_policy)
+        });
+        let output_values = self
+            .outputs
+            .iter()
+            .flat_map(|output| std::iter::once(&output.value).chain(&output.export));
+        self.nodes
+            .check(resource_values.chain(output_values))
+            .map_err(EncodingError)?;
+
+        let mut check = CheckIds {
+            ir: self,
+            invalid: None,
+        };
+        for condition in &self.conditions {
+            check.visit_condition_ir(&condition.value);
+        }
+        for resource in &self.resources {
+            for &symbol in resource.dependencies.iter().chain(&resource.references) {
+                check.symbol(symbol);
+            }
+            let values = resource.properties.values();
+            for value in values
+                .chain(&resource.metadata)
+                .chain(&resource.update_policy)
+            {
+                check.visit_resource_ir(&self.nodes, value);
+            }
+        }
+        for output in &self.outputs {
+            check.visit_resource_ir(&self.nodes, &output.value);
+            if let Some(export) = &output.export {
+                check.visit_resource_ir(&self.nodes, export);
+            }
+        }
+        check.invalid.map_or(Ok(()), Err)
+    }
+}
+
+/// Records the first symbol or type ID that is not in the tables of `ir`.
+struct CheckIds<'a> {
+    ir: &'a CloudformationProgramIr,
+    invalid: Option<EncodingError>,
+}
+
+impl CheckIds<'_> {
+    fn symbol(&mut self, symbol: Symbol) {
+        if self.invalid.is_none() && self.ir.symbols.try_resolve(symbol).is_none() {
+            self.invalid = Some(EncodingError(format!(
+                "symbol {} is not in the symbol table ({} symbols)",
+                symbol.index(),
+                self.ir.symbols.len()
+            )));
+        }
+    }
+}
+
+impl<'ir> IrVisitor<'ir> for CheckIds<'_> {
+    fn visit_reference(&mut self, reference: &'ir Reference) {
+        self.symbol(reference.symbol);
+    }
+
+    fn visit_type(&mut self, id: TypeId) {
+        if self.invalid.is_none() && self.ir.types.get(id).is_none() {
+            self.invalid = Some(EncodingError(format!(
+                "type {} is not in the type table ({} types)",
+                id.index(),
+                self.ir.types.len()
+            )));
+        }
+    }
+}
+
+// The tag byte that starts every encoded value.
+mod tag {
+    pub const NONE: u8 = 0;
+    pub const SOME: u8 = 1;
+    pub const UNIT: u8 = 2;
+    pub const FALSE: u8 = 3;
+    pub const TRUE: u8 = 4;
+    pub const UNSIGNED: u8 = 5;
+    pub const SIGNED: u8 = 6;
+    pub const FLOAT: u8 = 7;
+    pub const STRING: u8 = 8;
+    pub const BYTES: u8 = 9;
+    pub const SEQ: u8 = 10;
+    pub const MAP: u8 = 11;
+    pub const VARIANT: u8 = 12;
+}
+
+#[derive(Debug)]
+struct EncodingError(String);
+
+impl EncodingError {
+    fn new(message: &str) -> Self {
+        Self(message.into())
+    }
+}
+
+impl fmt::Display for EncodingError {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.write_str(&self.0)
+    }
+}
+
+impl std::error::Error for EncodingError {}
+
+impl ser::Error for EncodingError {
+    fn custom<T: fmt::Display>(msg: T) -> Self {
+        Self(msg.to_string())
+    }
+}
+
+impl de::Error for EncodingError {
+    fn custom<T: fmt::Display>(msg: T) -> Self {
+        Self(msg.to_string())
+    }
+}
+
+impl From<EncodingError> for Error {
+    fn from(EncodingError(message): EncodingError) -> Self {
+        Error::IrFormatError { message }
+    }
+}
+
+struct Encoder {
+    output: Vec<u8>,
+}
+
+impl Encoder {
+    #[inline]
+    fn write_varint(&mut self, mut value: u64) {
+        while value >= 0x80 {
+            self.output.push(value as u8 | 0x80);
+            value >>= 7;
+        }
+        self.output.push(value as u8);
+    }
+
+    #[inline]
+    fn write_str(&mut self, value: &str) {
+        self.write_varint(value.len() as u64);
+        self.output.extend_from_slice(value.as_bytes());
+    }
+
+    #[inline]
+    fn write_len(&mut self, tag: u8, len: Option<usize>) -> Result<(), EncodingError> {
+        let len = len.ok_or_else(|| EncodingError::new("lengths must be known up front"))?;
+        self.output.push(tag);
+        self.write_varint(len as u64);
+        Ok(())
+    }
+
+    #[inline]
+    fn write_variant(&mut self, variant_index: u32) {
+        self.output.push(tag::VARIANT);
+        self.write_varint(variant_index.into());
+    }
+}
+
+impl ser::Serializer for &mut Encoder {
+    type Ok = ();
+    type Error = EncodingError;
+
+    type SerializeSeq = Self;
+    type SerializeTuple = Self;
+    type SerializeTupleStruct = Self;
+    type SerializeTupleVariant = Self;
+    type SerializeMap = Self;
+    type SerializeStruct = Self;
+    type SerializeStructVariant = Self;
+
+    fn serialize_bool(self, v: bool) -> Result<(), EncodingError> {
+        self.output.push(if v { tag::TRUE } else { tag::FALSE });
+        Ok(())
+    }
+
+    fn serialize_i8(self, v: i8) -> Result<(), EncodingError> {
+        self.serialize_i64(v.into())
+    }
+
+    fn serialize_i16(self, v: i16) -> Result<(), EncodingError> {
+        self.serialize_i64(v.into())
+    }
+
+    fn serialize_i32(self, v: i32) -> Result<(), EncodingError> {
+        self.serialize_i64(v.into())
+    }
+
+    fn serialize_i64(self, v: i64) -> Result<(), EncodingError> {
+        self.output.push(tag::SIGNED);
+        // Zig-zag encoding keeps small negative numbers short.
+        self.write_varint(((v << 1) ^ (v >> 63)) as u64);
+        Ok(())
+    }
+
+    fn serialize_u8(self, v: u8) -> Result<(), EncodingError> {
+        self.serialize_u64(v.into())
+    }
+
+    fn serialize_u16(self, v: u16) -> Result<(), EncodingError> {
+        self.serialize_u64(v.into())
+    }
+
+    fn serialize_u32(self, v: u32) -> Result<(), EncodingError> {
+        self.serialize_u64(v.into())
+    }
+
+    fn serialize_u64(self, v: u64) -> Result<(), EncodingError> {
+        self.output.push(tag::UNSIGNED);
+        self.write_varint(v);
+        Ok(())
+    }
+
+    fn serialize_f32(self, v: f32) -> Result<(), EncodingError> {
+        self.serialize_f64(v.into())
+    }
+
+    fn serialize_f64(self, v: f64) -> Result<(), EncodingError> {
+        self.output.push(tag::FLOAT);
+        self.output.extend_from_slice(&v.to_le_bytes());
+        Ok(())
+    }
+
+    fn serialize_char(self, v: char) -> Result<(), EncodingError> {
+        self.serialize_str(v.encode_utf8(&mut [0; 4]))
+    }
+
+    fn serialize_str(self, v: &str) -> Result<(), EncodingError> {
+        self.output.push(tag::STRING);
+        self.write_str(v);
+        Ok(())
+    }
+
+    fn serialize_bytes(self, v: &[u8]) -> Result<(), EncodingError> {
+        self.output.push(tag::BYTES);
+        self.write_varint(v.len() as u64);
+        self.output.extend_from_slice(v);
+        Ok(())
+    }
+
+    fn serialize_none(self) -> Result<(), EncodingError> {
+        self.output.push(tag::NONE);
+        Ok(())
+    }
+
+    fn serialize_some<T: ?Sized + Serialize>(self, value: &T) -> Result<(), EncodingError> {
+        self.output.push(tag::SOME);
+        value.serialize(self)
+    }
+
+    fn serialize_unit(self) -> Result<(), EncodingError> {
+        self.output.push(tag::UNIT);
+        Ok(())
+    }
+
+    fn serialize_unit_struct(self, _name: &'static str) -> Result<(), EncodingError> {
+        self.serialize_unit()
+    }
+
+    fn serialize_unit_variant(
+        self,
+        _name: &'static str,
+        variant_index: u32,
+        _variant: &'static str,
+    ) -> Result<(), EncodingError> {
+        self.write_variant(variant_index);
+        Ok(())
+    }
+
+    fn serialize_newtype_struct<T: ?Sized + Serialize>(
+        self,
+        _name: &'static str,
+        value: &T,
+    ) -> Result<(), EncodingError> {
+        value.serialize(self)
+    }
+
+    fn serialize_newtype_variant<T: ?Sized + Serialize>(
+        self,
+        _name: &'static str,
+        variant_index: u32,
+        _variant: &'static str,
+        value: &T,
+    ) -> Result<(), EncodingError> {
+        self.write_variant(variant_index);
+        value.serialize(self)
+    }
+
+    fn serialize_seq(self, len: Option<usize>) -> Result<Self, EncodingError> {
+        self.write_len(tag::SEQ, len)?;
+        Ok(self)
+    }
+
+    fn serialize_tuple(self, len: usize) -> Result<Self, EncodingError> {
+        self.serialize_seq(Some(len))
+    }
+
+    fn serialize_tuple_struct(
+        self,
+        _name: &'static str,
+        len: usize,
+    ) -> Result<Self, EncodingError> {
+        self.serialize_seq(Some(len))
+    }
+
+    fn serialize_tuple_variant(
+        self,
+        _name: &'static str,
+        variant_index: u32,
+        _variant: &'static str,
+        len: usize,
+    ) -> Result<Self, EncodingError> {
+        self.write_variant(variant_index);
+        self.serialize_seq(Some(len))
+    }
+
+    fn serialize_map(self, len: Option<usize>) -> Result<Self, EncodingError> {
+        self.write_len(tag::MAP, len)?;
+        Ok(self)
+    }
+
+    fn serialize_struct(self, _name: &'static str, len: usize) -> Result<Self, EncodingError> {
+        self.serialize_seq(Some(len))
+    }
+
+    fn serialize_struct_variant(
+        self,
+        _name: &'static str,
+        variant_index: u32,
+        _variant: &'static str,
+        len: usize,
+    ) -> Result<Self, EncodingError> {
+        self.write_variant(variant_index);
+        self.serialize_seq(Some(len))
+    }
+
+    fn is_human_readable(&self) -> bool {
+        false
+    }
+}
+
+// Elements of sequences, tuples and structs are encoded one after the other,
+// the length having been written up front.
+macro_rules! serialize_elements {
+    ($($trait:ident :: $method:ident($($name:ident),*)),* $(,)?) => {$(
+        impl ser::$trait for &mut Encoder {
+            type Ok = ();
+            type Error = EncodingError;
+
+            #[inline]
+            fn $method<T: ?Sized + Serialize>(
+                &mut self,
+                $($name: &'static str,)*
+                value: &T,
+            ) -> Result<(), EncodingError> {
+                value.serialize(&mut **self)
+            }
+
+            #[inline]
+            fn end(self) -> Result<(), EncodingError> {
+                Ok(())
+            }
+        }
+    )*};
+}
+
+serialize_elements! {
+    SerializeSeq::serialize_element(),
+    SerializeTuple::serialize_element(),
+    SerializeTupleStruct::serialize_field(),
+    SerializeTupleVariant::serialize_field(),
+    SerializeStruct::serialize_field(_key),
+    SerializeStructVariant::serialize_field(_key),
+}
+
+impl ser::SerializeMap for &mut Encoder {
+    type Ok = ();
+    type Error = EncodingError;
+
+    #[inline]
+    fn serialize_key<T: ?Sized + Serialize>(&mut self, key: &T) -> Result<(), EncodingError> {
+        key.serialize(&mut **self)
+    }
+
+    #[inline]
+    fn serialize_value<T: ?Sized + Serialize>(&mut self, value: &T) -> Result<(), EncodingError> {
+        value.serialize(&mut **self)
+    }
+
+    #[inline]
+    fn end(self) -> Result<(), EncodingError> {
+        Ok(())
+    }
+}
+
+struct Decoder<'de> {
+    input: &'de [u8],
+}
+
+impl<'de> Decoder<'de> {
+    #[inline]
+    fn read_byte(&mut self) -> Result<u8, EncodingError> {
+        let (&byte, rest) = self.input.split_first().ok_or_else(truncated)?;
+        self.input = rest;
+        Ok(byte)
+    }
+
+    #[inline]
+    fn read_bytes(&mut self, len: usize) -> Result<&'de [u8], EncodingError> {
+        if self.input.len() < len {
+            return Err(truncated());
+        }
+        let (bytes, rest) = self.input.split_at(len);
+        self.input = rest;
+        Ok(bytes)
+    }
+
+    #[inline]
+    fn read_varint(&mut self) -> Result<u64, EncodingError> {
+        let mut value = 0u64;
+        for shift in (0..64).step_by(7) {
+            let byte = self.read_byte()?;
+            value |= u64::from(byte & 0x7f) << shift;
+            if byte & 0x80 == 0 {
+                return Ok(value);
+            }
+        }
+        Err(EncodingError::new("integer out of range"))
+    }
+
+    #[inline]
+    fn read_len(&mut self) -> Result<usize, EncodingError> {
+        let len = self.read_varint()?;
+        // Every element takes at least one byte, which bounds what callers
+        // pre-allocate for corrupted lengths.
+        match usize::try_from(len) {
+            Ok(len) if len <= self.input.len() => Ok(len),
+            _ => Err(truncated()),
+        }
+    }
+
+    #[inline]
+    fn read_str(&mut self) -> Result<&'de str, EncodingError> {
+        let len = self.read_len()?;
+        std::str::from_utf8(self.read_bytes(len)?)
+            .map_err(|err| EncodingError(format!("invalid string: {err}")))
+    }
+
+    #[inline]
+    fn peek_byte(&self) -> Result<u8, EncodingError> {
+        self.input.first().copied().ok_or_else(truncated)
+    }
+}
+
+fn truncated() -> EncodingError {
+    EncodingError::new("unexpected end of input")
+}
+
+impl<'de> de::Deserializer<'de> for &mut Decoder<'de> {
+    type Error = EncodingError;
+
+    fn deserialize_any<V: Visitor<'de>>(self, visitor: V) -> Result<V::Value, EncodingError> {
+        match self.read_byte()? {
+            tag::NONE => visitor.visit_none(),
+            tag::SOME => visitor.visit_some(self),
+            tag::UNIT => visitor.visit_unit(),
+            tag::FALSE => visitor.visit_bool(false),
+            tag::TRUE => visitor.visit_bool(true),
+            tag::UNSIGNED => visitor.visit_u64(self.read_varint()?),
+            tag::SIGNED => {
+                let value = self.read_varint()?;
+                visitor.visit_i64((value >> 1) as i64 ^ -((value & 1) as i64))
+            }
+            tag::FLOAT => {
+                let bytes = self.read_bytes(8)?;
+                visitor.visit_f64(f64::from_le_bytes(bytes.try_into().unwrap()))
+            }
+            tag::STRING => visitor.visit_borrowed_str(self.read_str()?),
+            tag::BYTES => {
+                let len = self.read_len()?;
+                visitor.visit_borrowed_bytes(self.read_bytes(len)?)
+            }
+            tag::SEQ => {
+                let remaining = self.read_len()?;
+                let mut elements = Elements {
+                    decoder: self,
+                    remaining,
+                };
+                let value = visitor.visit_seq(&mut elements)?;
+                elements.finish(value)
+            }
+            tag::MAP => {
+                let remaining = self.read_len()?;
+                let mut entries = Elements {
+                    decoder: self,
+                    remaining,
+                };
+                let value = visitor.visit_map(&mut entries)?;
+                entries.finish(value)
+            }
+            tag::VARIANT => visitor.visit_enum(self),
+            tag => Err(EncodingError(format!("unknown tag {tag}"))),
+        }
+    }
+
+    fn deserialize_option<V: Visitor<'de>>(self, visitor: V) -> Result<V::Value, EncodingError> {
+        match self.peek_byte()? {
+            tag::NONE | tag::SOME => self.deserialize_any(visitor),
+            tag => Err(EncodingError(format!(
+                "expected an option, found tag {tag}"
+            ))),
+        }
+    }
+
+    fn deserialize_newtype_struct<V: Visitor<'de>>(
+        self,
+        _name: &'static str,
+        visitor: V,
+    ) -> Result<V::Value, EncodingError> {
+        visitor.visit_newtype_struct(self)
+    }
+
+    fn deserialize_enum<V: Visitor<'de>>(
+        self,
+        _name: &'static str,
+        _variants: &'static [&'static str],
+        visitor: V,
+    ) -> Result<V::Value, EncodingError> {
+        match self.read_byte()? {
+            tag::VARIANT => visitor.visit_enum(self),
+            tag => Err(EncodingError(format!("expected an enum, found tag {tag}"))),
+        }
+    }
+
+    fn is_human_readable(&self) -> bool {
+        false
+    }
+
+    serde::forward_to_deserialize_any! {
+        bool i8 i16 i32 i64 i128 u8 u16 u32 u64 u128 f32 f64 char str string
+        bytes byte_buf unit unit_struct seq tuple tuple_struct map struct
+        identifier ignored_any
+    }
+}
+
+// The elements of a sequence, or the entries of a map.
+struct Elements<'a, 'de> {
+    decoder: &'a mut Decoder<'de>,
+    remaining: usize,
+}
+
+impl Elements<'_, '_> {
+    // Checks that the visitor consumed every element, as the next value would
+    // be decoded from the wrong place otherwise.
+    fn finish<T>(self, value: T) -> Result<T, EncodingError> {
+        match self.remaining {
+            0 => Ok(value),
+            remaining => Err(EncodingError(format!("{remaining} unexpected elements"))),
+        }
+    }
+}
+
+impl<'de> de::SeqAccess<'de> for Elements<'_, 'de> {
+    type Error = EncodingError;
+
+    fn next_element_seed<T: DeserializeSeed<'de>>(
+        &mut self,
+        seed: T,
+    ) -> Result<Option<T::Value>, EncodingError> {
+        if self.remaining == 0 {
+            return Ok(None);
+        }
+        self.remaining -= 1;
+        seed.deserialize(&mut *self.decoder).map(Some)
+    }
+
+    fn size_hint(&self) -> Option<usize> {
+        Some(self.remaining)
+    }
+}
+
+impl<'de> de::MapAccess<'de> for Elements<'_, 'de> {
+    type Error = EncodingError;
+
+    fn next_key_seed<K: DeserializeSeed<'de>>(
+        &mut self,
+        seed: K,
+    ) -> Result<Option<K::Value>, EncodingError> {
+        if self.remaining == 0 {
+            return Ok(None);
+        }
+        self.remaining -= 1;
+        seed.deserialize(&mut *self.decoder).map(Some)
+    }
+
+    fn next_value_seed<V: DeserializeSeed<'de>>(
+        &mut self,
+        seed: V,
+    ) -> Result<V::Value, EncodingError> {
+        seed.deserialize(&mut *self.decoder)
+    }
+
+    fn size_hint(&self) -> Option<usize> {
+        Some(self.remaining)
+    }
+}
+
+impl<'de> de::EnumAccess<'de> for &mut Decoder<'de> {
+    type Error = EncodingError;
+    type Variant = Self;
+
+    fn variant_seed<V: DeserializeSeed<'de>>(
+        self,
+        seed: V,
+    ) -> Result<(V::Value, Self), EncodingError> {
+        let index = u32::try_from(self.read_varint()?)
+            .map_err(|_| EncodingError::new("variant index out of range"))?;
+        let variant = seed.deserialize(index.into_deserializer())?;
+        Ok((variant, self))
+    }
+}
+
+impl<'de> de::VariantAccess<'de> for &mut Decoder<'de> {
+    type Error = EncodingError;
+
+    fn unit_variant(self) -> Result<(), EncodingError> {
+        Ok(())
+    }
+
+    fn newtype_variant_seed<T: DeserializeSeed<'de>>(
+        self,
+        seed: T,
+    ) -> Result<T::Value, EncodingError> {
+        seed.deserialize(self)
+    }
+
+    fn tuple_variant<V: Visitor<'de>>(
+        self,
+        _len: usize,
+        visitor: V,
+    ) -> Result<V::Value, EncodingError> {
+        de::Deserializer::deserialize_any(self, visitor)
+    }
+
+    fn struct_variant<V: Visitor<'de>>(
+        self,
+        _fields: &'static [&'static str],
+        visitor: V,
+    ) -> Result<V::Value, EncodingError> {
+        de::Deserializer::deserialize_any(self, visitor)
+    }
+}
+
+#[cfg(test)]
+mod tests;
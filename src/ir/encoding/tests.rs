@@ -0,0 +1,404 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use std::fs;
+use std::path::Path;
+
+use super::*;
+use crate::cdk::Schema;
+use crate::CloudformationParseTree;
+
+const TEMPLATE: &str = r#"{
+    "Description": "Round trips",
+    "Parameters": {
+        "Stage": { "Type": "String", "AllowedValues": ["dev", "prod"], "Default": "dev" }
+    },
+    "Conditions": {
+        "IsProd": { "Fn::Equals": [{ "Ref": "Stage" }, "prod"] }
+    },
+    "Mappings": {
+        "Sizes": {
+            "dev": { "Count": 1, "Ratio": 0.5, "Enabled": false, "Name": "small", "Zones": ["a"] },
+            "prod": { "Count": -3, "Ratio": 1.5, "Enabled": true, "Name": "large", "Zones": [] }
+        }
+    },
+    "Resources": {
+        "Queue": {
+            "Type": "Custom::Queue",
+            "DeletionPolicy": "Retain",
+            "Properties": {
+                "ServiceToken": "arn:aws:lambda:token",
+                "Size": { "Fn::FindInMap": ["Sizes", { "Ref": "Stage" }, "Name"] }
+            }
+        },
+        "Topic": {
+            "Type": "Custom::Topic",
+            "Condition": "IsProd",
+            "DependsOn": "Queue",
+            "Properties": {
+                "ServiceToken": "arn:aws:lambda:token",
+                "Target": { "Fn::If": ["IsProd", { "Fn::GetAtt": ["Queue", "Arn"] }, { "Ref": "AWS::NoValue" }] },
+                "Name": { "Fn::Sub": "${AWS::StackName}-${Stage}-topic" },
+                "Limits": [1, 2.5, true, null]
+            }
+        }
+    },
+    "Outputs": {
+        "TopicArn": {
+            "Value": { "Fn::GetAtt": ["Topic", "Arn"] },
+            "Export": { "Name": { "Fn::Join": ["-", [{ "Ref": "AWS::Region" }, "topic"]] } }
+        }
+    }
+}"#;
+
+fn translate(template: &[u8]) -> CloudformationProgramIr {
+    CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        Schema::builtin(),
+    )
+    .unwrap()
+}
+
+#[test]
+fn test_binary_round_trip() {
+    let ir = translate(TEMPLATE.as_bytes());
+    let binary = ir.to_binary().unwrap();
+    assert!(binary.starts_with(MAGIC));
+
+    let decoded = CloudformationProgramIr::from_binary(&binary).unwrap();
+    assert_eq!(format!("{decoded:?}"), format!("{ir:?}"));
+    assert_eq!(decoded.to_binary().unwrap(), binary);
+}
+
+#[test]
+fn test_json_round_trip() {
+    let ir = translate(TEMPLATE.as_bytes());
+    let json = ir.to_json().unwrap();
+    assert!(json.starts_with(b"{"));
+
+    let decoded = CloudformationProgramIr::decode(&json).unwrap();
+    assert_eq!(format!("{decoded:?}"), format!("{ir:?}"));
+}
+
+#[test]
+fn test_binary_is_smaller_than_json() {
+    let ir = translate(TEMPLATE.as_bytes());
+    assert!(ir.to_binary().unwrap().len() * 2 < ir.to_json().unwrap().len());
+}
+
+#[test]
+fn test_round_trips_every_case() {
+    let cases = Path::new(env!("CARGO_MANIFEST_DIR")).join("cdk-from-cfn-testing/cases");
+    for case in fs::read_dir(cases).unwrap() {
+        let path = case.unwrap().path();
+        let Ok(template) = fs::read(path.join("template.json")) else {
+            continue;
+        };
+        let ir = translate(&template);
+        let decoded = CloudformationProgramIr::decode(&ir.to_binary().unwrap()).unwrap();
+        assert_eq!(
+            format!("{decoded:?}"),
+            format!("{ir:?}"),
+            "{}",
+            path.display()
+        );
+    }
+}
+
+#[test]
+fn test_rejects_invalid_input() {
+    let binary = translate(TEMPLATE.as_bytes()).to_binary().unwrap();
+    let error = |bytes: &[u8]| {
+        CloudformationProgramIr::from_binary(bytes)
+            .unwrap_err()
+            .to_string()
+    };
+
+    assert_eq!(error(b"{}"), "invalid IR: not a binary IR file");
+    assert_eq!(
+        error(&binary[..binary.len() - 1]),
+        "invalid IR: unexpected end of input"
+    );
+    assert_eq!(
+        error(&[&binary[..], &[0]].concat()),
+        "invalid IR: trailing bytes after the IR"
+    );
+}
+
+#[test]
+fn test_rejects_other_versions() {
+    let binary = translate(TEMPLATE.as_bytes()).to_binary().unwrap();
+    let error = |bytes: &[u8]| {
+        CloudformationProgramIr::decode(bytes)
+            .unwrap_err()
+            .to_string()
+    };
+
+    let mut other_version = binary.clone();
+    other_version[MAGIC.len()] = FORMAT_VERSION as u8 + 1;
+    assert_eq!(
+        error(&other_version),
+        format!(
+            "invalid IR: unsupported format version {} (expected {FORMAT_VERSION})",
+            FORMAT_VERSION + 1
+        )
+    );
+
+    let mut encoder = Encoder {
+        output: MAGIC.to_vec(),
+    };
+    encoder.write_varint(FORMAT_VERSION);
+    encoder.write_str("0.0.0");
+    encoder
+        .output
+        .extend_from_slice(&binary[encoder.output.len()..]);
+    assert!(error(&encoder.output).starts_with("invalid IR: produced by version 0.0.0"));
+}
+
+#[test]
+fn test_rejects_truncated_files() {
+    let binary = translate(TEMPLATE.as_bytes()).to_binary().unwrap();
+    for len in MAGIC.len()..binary.len() {
+        assert_eq!(
+            CloudformationProgramIr::from_binary(&binary[..len])
+                .unwrap_err()
+                .to_string(),
+            "invalid IR: unexpected end of input",
+            "truncated to {len} bytes"
+        );
+    }
+}
+
+#[test]
+fn test_survives_corrupted_files() {
+    let ir = translate(TEMPLATE.as_bytes());
+    let binary = ir.to_binary().unwrap();
+    for index in MAGIC.len()..binary.len() {
+        for byte in (tag::NONE..=tag::VARIANT).chain([0x7f, 0x80, 0xff]) {
+            let mut corrupted = binary.clone();
+            corrupted[index] = byte;
+            // Either the corruption is detected, or the file decodes to IR
+            // that only uses IDs of its own tables.
+            let _ = CloudformationProgramIr::from_binary(&corrupted);
+        }
+    }
+}
+
+/// Encodes a single value, without the header of IR files.
+fn encode<T: Serialize>(value: &T) -> Vec<u8> {
+    let mut encoder = Encoder { output: Vec::new() };
+    value.serialize(&mut encoder).unwrap();
+    encoder.output
+}
+
+/// Decodes a single value encoded by `encode`.
+fn decode<'de, T: Deserialize<'de>>(bytes: &'de [u8]) -> Result<T, String> {
+    let mut decoder = Decoder { input: bytes };
+    let value = T::deserialize(&mut decoder).map_err(|err| err.to_string())?;
+    match decoder.input {
+        [] => Ok(value),
+        _ => Err("trailing bytes".into()),
+    }
+}
+
+/// A byte string, which serde encodes as a sequence otherwise.
+#[derive(Debug, PartialEq)]
+struct Bytes(Vec<u8>);
+
+impl Serialize for Bytes {
+    fn serialize<S: ser::Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        serializer.serialize_bytes(&self.0)
+    }
+}
+
+impl<'de> Deserialize<'de> for Bytes {
+    fn deserialize<D: de::Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
+        struct BytesVisitor;
+        impl<'de> Visitor<'de> for BytesVisitor {
+            type Value = Bytes;
+
+            fn expecting(&self, f: &mut fmt::Formatter) -> fmt::Result {
+                f.write_str("bytes")
+            }
+
+            fn visit_bytes<E: de::Error>(self, bytes: &[u8]) -> Result<Bytes, E> {
+                Ok(Bytes(bytes.to_vec()))
+            }
+        }
+        deserializer.deserialize_bytes(BytesVisitor)
+    }
+}
+
+#[derive(Debug, PartialEq, serde::Serialize, serde::Deserialize)]
+enum Sample {
+    Unit,
+    Newtype(u8),
+    Tuple(u8, i8),
+    Struct { name: String },
+}
+
+/// Checks that `value` is encoded starting with `tag` and round-trips, that
+/// every truncation of its encoding fails to decode, and that so does its
+/// encoding starting with an unknown tag.
+fn check_tag<T>(tag: u8, value: T)
+where
+    T: Serialize + de::DeserializeOwned + PartialEq + fmt::Debug,
+{
+    let bytes = encode(&value);
+    assert_eq!(bytes[0], tag, "{value:?}");
+    assert_eq!(decode::<T>(&bytes).as_ref(), Ok(&value));
+
+    for len in 0..bytes.len() {
+        assert_eq!(
+            decode::<T>(&bytes[..len]),
+            Err("unexpected end of input".into()),
+            "{value:?} truncated to {len} bytes"
+        );
+    }
+
+    let mut unknown = bytes;
+    unknown[0] = 0xff;
+    let error = decode::<T>(&unknown).unwrap_err();
+    assert!(error.ends_with("tag 255"), "{value:?}: {error}");
+}
+
+#[test]
+fn test_every_tag_rejects_truncation() {
+    check_tag(tag::NONE, None::<u8>);
+    check_tag(tag::SOME, Some(7u8));
+    check_tag(tag::UNIT, ());
+    check_tag(tag::FALSE, false);
+    check_tag(tag::TRUE, true);
+    check_tag(tag::UNSIGNED, 300u64);
+    check_tag(tag::SIGNED, -300i64);
+    check_tag(tag::FLOAT, 1.5f64);
+    check_tag(tag::STRING, "text".to_string());
+    check_tag(tag::BYTES, Bytes(vec![0, 1, 2]));
+    check_tag(tag::SEQ, vec![1u8, 2]);
+    check_tag(
+        tag::MAP,
+        std::collections::BTreeMap::from([("key".to_string(), 1u8)]),
+    );
+    check_tag(tag::VARIANT, Sample::Unit);
+    check_tag(tag::VARIANT, Sample::Newtype(1));
+    check_tag(tag::VARIANT, Sample::Tuple(1, -1));
+    check_tag(
+        tag::VARIANT,
+        Sample::Struct {
+            name: "name".into(),
+        },
+    );
+}
+
+#[test]
+fn test_every_tag_rejects_corrupted_payloads() {
+    // Varints longer than 64 bits.
+    let overlong = |tag| [&[tag][..], &[0xff; 10], &[1]].concat();
+    assert_eq!(
+        decode::<u64>(&overlong(tag::UNSIGNED)),
+        Err("integer out of range".into())
+    );
+    assert_eq!(
+        decode::<i64>(&overlong(tag::SIGNED)),
+        Err("integer out of range".into())
+    );
+    assert_eq!(
+        decode::<Sample>(&overlong(tag::VARIANT)),
+        Err("integer out of range".into())
+    );
+
+    // Lengths past the end of the input.
+    for tag in [tag::STRING, tag::BYTES, tag::SEQ, tag::MAP] {
+        assert_eq!(
+            decode::<de::IgnoredAny>(&[tag, 3, 0]),
+            Err("unexpected end of input".into()),
+            "tag {tag}"
+        );
+    }
+
+    // Strings that are not UTF-8.
+    let error = decode::<String>(&[tag::STRING, 2, 0xc3, 0x28]).unwrap_err();
+    assert!(error.starts_with("invalid string: "), "{error}");
+
+    // More elements or entries than the value has.
+    assert_eq!(
+        decode::<(u8,)>(&[tag::SEQ, 2, tag::UNSIGNED, 1, tag::UNSIGNED, 2]),
+        Err("1 unexpected elements".into())
+    );
+    assert_eq!(
+        decode::<Sample>(&[tag::VARIANT, 3, tag::SEQ, 2, tag::STRING, 0, tag::UNIT]),
+        Err("1 unexpected elements".into())
+    );
+
+    // Variants the enum does not have.
+    let error = decode::<Sample>(&[tag::VARIANT, 9]).unwrap_err();
+    assert!(error.contains("variant index"), "{error}");
+
+    // Tags of other types.
+    assert_eq!(
+        decode::<Option<u8>>(&[tag::UNIT]),
+        Err(format!("expected an option, found tag {}", tag::UNIT))
+    );
+    assert_eq!(
+        decode::<Sample>(&[tag::SOME, tag::UNIT]),
+        Err(format!("expected an enum, found tag {}", tag::SOME))
+    );
+    for (bytes, expected) in [
+        (&[tag::NONE][..], "bool"),
+        (&[tag::UNIT], "u8"),
+        (&[tag::TRUE], "f64"),
+        (&[tag::FALSE], "string"),
+        (&[tag::UNSIGNED, 1], "bool"),
+        (&[tag::SIGNED, 1], "string"),
+        (&[tag::FLOAT, 0, 0, 0, 0, 0, 0, 0, 0], "u8"),
+        (&[tag::STRING, 0], "bool"),
+        (&[tag::BYTES, 0], "u8"),
+        (&[tag::SEQ, 0], "string"),
+        (&[tag::MAP, 0], "u8"),
+    ] {
+        let error = match expected {
+            "bool" => decode::<bool>(bytes).map(|_| ()),
+            "u8" => decode::<u8>(bytes).map(|_| ()),
+            "f64" => decode::<f64>(bytes).map(|_| ()),
+            _ => decode::<String>(bytes).map(|_| ()),
+        }
+        .unwrap_err();
+        assert!(error.starts_with("invalid type: "), "{bytes:?}: {error}");
+    }
+}
+
+#[test]
+fn test_rejects_ids_outside_their_tables() {
+    let ir = translate(TEMPLATE.as_bytes());
+    let json: serde_json::Value = serde_json::from_slice(&ir.to_json().unwrap()).unwrap();
+
+    let mut no_symbols = json.clone();
+    no_symbols["symbols"]["names"] = serde_json::json!([]);
+    let error = CloudformationProgramIr::from_json(&serde_json::to_vec(&no_symbols).unwrap())
+        .unwrap_err()
+        .to_string();
+    assert!(error.starts_with("invalid IR: symbol "), "{error}");
+
+    let mut no_types = json.clone();
+    no_types["types"]["types"] = serde_json::json!([]);
+    let no_types: CloudformationProgramIr = serde_json::from_value(no_types).unwrap();
+    let error = CloudformationProgramIr::from_binary(&no_types.to_binary().unwrap())
+        .unwrap_err()
+        .to_string();
+    assert!(error.starts_with("invalid IR: type "), "{error}");
+
+    let mut no_nodes = json.clone();
+    no_nodes["nodes"]["nodes"] = serde_json::json!([]);
+    let error = CloudformationProgramIr::from_json(&serde_json::to_vec(&no_nodes).unwrap())
+        .unwrap_err()
+        .to_string();
+    assert!(error.starts_with("invalid IR: node"), "{error}");
+
+    // Both branches of the `Fn::If` of the topic are the same node.
+    let mut shared = json;
+    let target = &mut shared["resources"][1]["properties"]["Target"]["If"];
+    target[2] = target[1].clone();
+    let error = CloudformationProgramIr::from_json(&serde_json::to_vec(&shared).unwrap())
+        .unwrap_err()
+        .to_string();
+    assert!(error.ends_with(" is used twice"), "{error}");
+}
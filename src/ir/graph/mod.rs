@@ -0,0 +1,153 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+// A dependency graph over dense node indices (`0..len`), used to order the
+// resources and conditions of a template so that every entity is declared
+// after the entities it depends on.
+//
+// Edges are collected into a flat list, then turned into a compressed sparse
+// row adjacency (`offsets` + `targets`) when the graph is ordered, so that
+// ordering runs in O((V + E) log V) without hashing any names.
+#[derive(Debug, Default)]
+pub(super) struct DependencyGraph {
+    len: usize,
+    edges: Vec<(u32, u32)>,
+}
+
+impl DependencyGraph {
+    pub fn new(len: usize) -> Self {
+        Self {
+            len,
+            edges: Vec::new(),
+        }
+    }
+
+    // Records that `dependent` must be ordered after `dependency`.
+    #[inline]
+    pub fn add_dependency(&mut self, dependency: usize, dependent: usize) {
+        debug_assert!(dependency < self.len && dependent < self.len);
+        self.edges.push((dependency as u32, dependent as u32));
+    }
+
+    // Orders the nodes with Kahn's algorithm. Nodes are released in layers:
+    // each layer holds every node whose dependencies were all released by the
+    // previous layers, and is sorted by `keys` (indexed by node) so the result
+    // does not depend on the order the nodes were declared in.
+    //
+    // If the graph has a cycle, returns the nodes of one of the cycles
+    // instead, starting with the node that has the smallest key, and each
+    // depending on the next one (the last one depends on the first).
+    pub fn order<K: Ord>(&self, keys: &[K]) -> Result<Vec<usize>, Vec<usize>> {
+        debug_assert_eq!(keys.len(), self.len);
+        let (offsets, targets) = self.successors();
+
+        let mut in_degree = vec![0u32; self.len];
+        for &(_, dependent) in &self.edges {
+            in_degree[dependent as usize] += 1;
+        }
+
+        let mut sorted = Vec::with_capacity(self.len);
+        let mut layer: Vec<usize> = (0..self.len).filter(|&node| in_degree[node] == 0).collect();
+        while !layer.is_empty() {
+            layer.sort_unstable_by(|&lhs, &rhs| keys[lhs].cmp(&keys[rhs]));
+
+            let start = sorted.len();
+            sorted.append(&mut layer);
+            for &node in &sorted[start..] {
+                for &successor in &targets[offsets[node] as usize..offsets[node + 1] as usize] {
+                    let successor = successor as usize;
+                    in_degree[successor] -= 1;
+                    if in_degree[successor] == 0 {
+                        layer.push(successor);
+                    }
+                }
+            }
+        }
+
+        if sorted.len() == self.len {
+            Ok(sorted)
+        } else {
+            Err(self.find_cycle(&in_degree, keys))
+        }
+    }
+
+    // Builds the CSR adjacency of the graph: the successors of node `n` are
+    // `targets[offsets[n]..offsets[n + 1]]`.
+    fn successors(&self) -> (Vec<u32>, Vec<u32>) {
+        let mut offsets = vec![0u32; self.len + 1];
+        for &(dependency, _) in &self.edges {
+            offsets[dependency as usize + 1] += 1;
+        }
+        for node in 0..self.len {
+            offsets[node + 1] += offsets[node];
+        }
+
+        let mut next = offsets.clone();
+        let mut targets = vec![0u32; self.edges.len()];
+        for &(dependency, dependent) in &self.edges {
+            let slot = &mut next[dependency as usize];
+            targets[*slot as usize] = dependent;
+            *slot += 1;
+        }
+
+        (offsets, targets)
+    }
+
+    // Finds a cycle among the nodes Kahn's algorithm could not release (those
+    // with a non-zero `in_degree`). Each of them has at least one unreleased
+    // dependency, so following dependencies from any of them must loop.
+    fn find_cycle<K: Ord>(&self, in_degree: &[u32], keys: &[K]) -> Vec<usize> {
+        let blocked = |node: usize| in_degree[node] > 0;
+        let start = (0..self.len)
+            .filter(|&node| blocked(node))
+            .min_by(|&lhs, &rhs| keys[lhs].cmp(&keys[rhs]))
+            .expect("a cycle has at least one node");
+
+        // The first blocked dependency (by key) of every blocked node.
+        let mut dependency: Vec<Option<usize>> = vec![None; self.len];
+        for &(from, to) in &self.edges {
+            let (from, to) = (from as usize, to as usize);
+            if blocked(from) && blocked(to) {
+                match dependency[to] {
+                    Some(current) if keys[current] <= keys[from] => {}
+                    _ => dependency[to] = Some(from),
+                }
+            }
+        }
+
+        let mut position = vec![usize::MAX; self.len];
+        let mut path = Vec::new();
+        let mut node = start;
+        while position[node] == usize::MAX {
+            position[node] = path.len();
+            path.push(node);
+            node = dependency[node].expect("blocked nodes have a blocked dependency");
+        }
+        let mut cycle = path.split_off(position[node]);
+
+        let first = (0..cycle.len())
+            .min_by(|&lhs, &rhs| keys[cycle[lhs]].cmp(&keys[cycle[rhs]]))
+            .unwrap_or_default();
+        cycle.rotate_left(first);
+        cycle
+    }
+}
+
+// Renders the members of a cycle (as returned by `DependencyGraph::order`) for
+// error messages, e.g: `"A -> B -> A"`, where each entity depends on the next.
+pub(super) fn describe_cycle<'a>(mut members: impl Iterator<Item = &'a str>) -> String {
+    let Some(first) = members.next() else {
+        return String::new();
+    };
+    let mut description = first.to_string();
+    for member in members {
+        description.push_str(" -> ");
+        description.push_str(member);
+    }
+    description.push_str(" -> ");
+    description.push_str(first);
+    description
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,50 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+
+#[test]
+fn test_order_sorts_each_layer_by_key() {
+    // C depends on B, which depends on A; D has no dependencies.
+    let keys = ["C", "D", "B", "A"];
+    let mut graph = DependencyGraph::new(keys.len());
+    graph.add_dependency(2, 0);
+    graph.add_dependency(3, 2);
+    graph.add_dependency(3, 2);
+
+    let sorted = graph.order(&keys).unwrap();
+    let sorted: Vec<&str> = sorted.into_iter().map(|node| keys[node]).collect();
+
+    assert_eq!(sorted, vec!["A", "D", "B", "C"]);
+}
+
+#[test]
+fn test_order_reports_cycle_members() {
+    // A -> B -> C -> A is a cycle, D depends on it, and E stands alone.
+    let keys = ["B", "D", "C", "A", "E"];
+    let mut graph = DependencyGraph::new(keys.len());
+    graph.add_dependency(0, 3);
+    graph.add_dependency(2, 0);
+    graph.add_dependency(3, 2);
+    graph.add_dependency(3, 1);
+
+    let cycle = graph.order(&keys).unwrap_err();
+
+    assert_eq!(
+        describe_cycle(cycle.into_iter().map(|node| keys[node])),
+        "A -> B -> C -> A"
+    );
+}
+
+#[test]
+fn test_order_reports_self_reference() {
+    let keys = ["A"];
+    let mut graph = DependencyGraph::new(keys.len());
+    graph.add_dependency(0, 0);
+
+    let cycle = graph.order(&keys).unwrap_err();
+
+    assert_eq!(
+        describe_cycle(cycle.into_iter().map(|node| keys[node])),
+        "A -> A"
+    );
+}
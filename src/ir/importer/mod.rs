@@ -10,7 +10,7 @@ use crate::{Error, Hasher};
 // ImportInstruction look something like:
 // import * as $name from '$path[0]/$path[1]...';
 // which should account for many import styles.
-#[derive(Clone, Debug, PartialEq, PartialOrd)]
+#[derive(Clone, Debug, PartialEq, PartialOrd, serde::Serialize, serde::Deserialize)]
 pub struct ImportInstruction {
     pub organization: String,
     pub service: Option<String>,
@@ -18,7 +18,7 @@ pub struct ImportInstruction {
 
 impl ImportInstruction {
     pub(super) fn from(
-        parse_tree: &IndexMap<String, ResourceAttributes, Hasher>,
+        parse_tree: &IndexMap<String, ResourceAttributes<'_>, Hasher>,
     ) -> Result<Vec<Self>, Error> {
         let mut type_names = HashSet::new();
         for (_, resource) in parse_tree {
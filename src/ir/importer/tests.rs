@@ -9,7 +9,7 @@ use super::ImportInstruction;
 #[test]
 fn test_invalid_resource_type_name() {
     let resource_attributes = ResourceAttributes {
-        resource_type: "AWS:Invalid:Resource:Type".to_string(),
+        resource_type: "AWS:Invalid:Resource:Type".into(),
         condition: Option::None,
         metadata: Option::None,
         depends_on: vec![],
@@ -0,0 +1,390 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Rebuilding the IR of a template that is converted again after small edits,
+//! such as the live preview of an editor.
+//!
+//! [`IncrementalIr`] keeps the previous version of the template and its IR.
+//! When the next version declares the same parameters, conditions and
+//! resources (in the same order, with the same resource types, conditional or
+//! not), every name keeps its symbol and every reference resolves as it did
+//! before. Only the resources that changed are then translated again, along
+//! with the outputs and mappings if their section changed, and everything else
+//! (including the resource order, unless the references of a changed resource
+//! moved) is reused. Any other edit rebuilds the IR from scratch.
+
+use std::cell::RefCell;
+use std::hash::BuildHasher;
+use std::mem;
+use std::sync::Arc;
+
+use indexmap::IndexMap;
+
+use super::mappings::MappingInstruction;
+use super::nodes::NodeBuilder;
+use super::outputs::OutputInstruction;
+use super::resources::{self, ResourceInstruction};
+use super::symbols::SymbolTable;
+use super::{CloudformationProgramIr, DeclaredNames, ReferenceOrigins};
+use crate::cdk::Schema;
+use crate::parser::output::Output;
+use crate::parser::resource::{IntrinsicFunction, ResourceAttributes, ResourceValue};
+use crate::timings::Timings;
+use crate::{CloudformationParseTree, Error};
+
+/// Builds the IR of successive versions of a template, translating again only
+/// what changed from one version to the next. The IR is the same as the one
+/// [`CloudformationProgramIr::from`] builds for each version.
+#[derive(Debug, Default)]
+pub struct IncrementalIr {
+    state: Option<State>,
+    translated: usize,
+}
+
+impl IncrementalIr {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Builds the IR of `parse_tree`, the next version of the template. If
+    /// this fails, the next update builds the IR from scratch.
+    pub fn update(
+        &mut self,
+        parse_tree: CloudformationParseTree<'_>,
+        schema: &Schema,
+    ) -> Result<&CloudformationProgramIr, Error> {
+        let state = match self.state.take() {
+            Some(state) if state.same_declarations(&parse_tree) => {
+                state.update(parse_tree, schema, &mut self.translated)?
+            }
+            _ => {
+                self.translated = parse_tree.resources.len();
+                State::build(parse_tree.into_owned(), schema)?
+            }
+        };
+        Ok(&self.state.insert(state).program)
+    }
+
+    /// The IR built by the last update, if it succeeded.
+    pub fn ir(&self) -> Option<&CloudformationProgramIr> {
+        self.state.as_ref().map(|state| &state.program)
+    }
+
+    /// The number of resources the last update translated.
+    pub fn translated_resources(&self) -> usize {
+        self.translated
+    }
+}
+
+#[derive(Debug)]
+struct State {
+    template: CloudformationParseTree<'static>,
+    program: CloudformationProgramIr,
+    declared: Arc<DeclaredNames>,
+    // The undeclared names interned by the conditions. Those are the only ones
+    // the outputs are translated after, as resources that reference a name the
+    // template does not declare fail to be ordered.
+    undeclared: SymbolTable,
+    // The position of each resource in `program.resources`, indexed by the
+    // symbol of its name.
+    positions: Vec<usize>,
+}
+
+impl State {
+    fn build(template: CloudformationParseTree<'static>, schema: &Schema) -> Result<Self, Error> {
+        let mut names = None;
+        let program = super::translate(template.clone(), schema, &mut Timings::new(), |origins| {
+            let undeclared = origins.undeclared.borrow().clone();
+            names = Some((Arc::clone(&origins.declared), undeclared));
+        })?;
+        let (declared, undeclared) = names.expect("conditions are translated first");
+        let positions = positions(&program.resources, &declared.symbols);
+
+        Ok(Self {
+            template,
+            program,
+            declared,
+            undeclared,
+            positions,
+        })
+    }
+
+    /// Whether `next` declares the same names as the previous version of the
+    /// template, and declares them as the same things.
+    fn same_declarations(&self, next: &CloudformationParseTree<'_>) -> bool {
+        let previous = &self.template;
+        same_entries(&previous.parameters, &next.parameters, PartialEq::eq)
+            && same_entries(&previous.conditions, &next.conditions, PartialEq::eq)
+            && same_entries(&previous.resources, &next.resources, |previous, next| {
+                previous.resource_type == next.resource_type
+                    && previous.condition.is_some() == next.condition.is_some()
+            })
+    }
+
+    fn update(
+        mut self,
+        next: CloudformationParseTree<'_>,
+        schema: &Schema,
+        translated: &mut usize,
+    ) -> Result<Self, Error> {
+        let CloudformationParseTree {
+            description,
+            transforms,
+            mappings,
+            outputs,
+            resources,
+            ..
+        } = next;
+
+        self.program.description.clone_from(&description);
+        self.template.description = description;
+        self.program.transforms.clone_from(&transforms);
+        self.template.transforms = transforms;
+
+        if !same_entries(&self.template.mappings, &mappings, |previous, next| {
+            same_entries(&previous.mappings, &next.mappings, |previous, next| {
+                same_entries(previous, next, PartialEq::eq)
+            })
+        }) {
+            self.program.mappings = MappingInstruction::from(mappings.clone());
+            self.template.mappings = mappings;
+        }
+
+        let mut changed = Vec::new();
+        for ((name, previous), (_, next)) in self.template.resources.iter_mut().zip(resources) {
+            if !same_resource(previous, &next) {
+                *previous = next.into_owned();
+                changed.push((name.clone(), previous.clone()));
+            }
+        }
+        *translated = changed.len();
+
+        let outputs_changed = !same_entries(&self.template.outputs, &outputs, same_output);
+        if outputs_changed {
+            self.template.outputs = outputs
+                .into_iter()
+                .map(|(name, output)| (name, output.into_owned()))
+                .collect();
+        }
+
+        // Types are interned, and nodes pushed, after those of the previous
+        // IR, whose trees keep their IDs until the tables are compacted.
+        let origins = ReferenceOrigins {
+            declared: Arc::clone(&self.declared),
+            undeclared: RefCell::new(self.undeclared.clone()),
+            substitutions: RefCell::default(),
+            types: RefCell::new(mem::take(&mut self.program.types)),
+            nodes: RefCell::new(NodeBuilder::new(mem::take(&mut self.program.nodes))),
+        };
+        let changed = ResourceInstruction::translate(changed, schema, &origins)?;
+        if origins.undeclared.borrow().len() > self.undeclared.len() {
+            // A changed resource references a name the template does not
+            // declare, which fails the resource ordering. Building from
+            // scratch reports it as it would have been otherwise.
+            *translated = self.template.resources.len();
+            return Self::build(self.template, schema);
+        }
+
+        let mut reorder = false;
+        for instruction in changed {
+            let symbol = self.declared.symbols.get(&instruction.name);
+            let position = self.positions[symbol.expect("resources are declared").index()];
+            let previous = &mut self.program.resources[position];
+            reorder |= previous.references != instruction.references;
+            *previous = instruction;
+        }
+
+        if outputs_changed {
+            let outputs = self.template.outputs.clone();
+            self.program.outputs = OutputInstruction::from(outputs, schema, &origins)?;
+            self.program.symbols.truncate(self.declared.symbols.len());
+            self.program.symbols.append(origins.undeclared.into_inner());
+        }
+
+        self.program.types = origins.types.into_inner();
+        self.program.nodes = origins.nodes.into_inner().into_table();
+
+        if reorder {
+            let resources = mem::take(&mut self.program.resources);
+            self.program.resources = resources::order(resources, &mut self.program.symbols)?;
+            self.positions = positions(&self.program.resources, &self.declared.symbols);
+        }
+
+        if *translated > 0 || outputs_changed {
+            self.program.compact_nodes();
+            self.program.compact_types();
+        }
+
+        Ok(self)
+    }
+}
+
+fn positions(resources: &[ResourceInstruction], symbols: &SymbolTable) -> Vec<usize> {
+    let mut positions = vec![usize::MAX; symbols.len()];
+    for (position, resource) in resources.iter().enumerate() {
+        let symbol = symbols.get(&resource.name).expect("resources are declared");
+        positions[symbol.index()] = position;
+    }
+    positions
+}
+
+// The `PartialEq` implementations of the parse tree compare maps regardless of
+// the order of their entries, which the IR preserves. The functions below
+// compare them in order.
+
+fn same_entries<K1, K2, V1, V2, S1, S2>(
+    previous: &IndexMap<K1, V1, S1>,
+    next: &IndexMap<K2, V2, S2>,
+    same: impl Fn(&V1, &V2) -> bool,
+) -> bool
+where
+    K1: PartialEq<K2>,
+    S1: BuildHasher,
+    S2: BuildHasher,
+{
+    previous.len() == next.len()
+        && previous
+            .iter()
+            .zip(next)
+            .all(|((previous_key, previous), (next_key, next))| {
+                previous_key == next_key && same(previous, next)
+            })
+}
+
+fn same_resource(previous: &ResourceAttributes<'_>, next: &ResourceAttributes<'_>) -> bool {
+    previous.resource_type == next.resource_type
+        && previous.condition == next.condition
+        && same_optional_value(&previous.metadata, &next.metadata)
+        && previous.depends_on == next.depends_on
+        && same_optional_value(&previous.update_policy, &next.update_policy)
+        && previous.deletion_policy == next.deletion_policy
+        && same_entries(&previous.properties, &next.properties, same_value)
+}
+
+fn same_output(previous: &Output<'_>, next: &Output<'_>) -> bool {
+    same_value(&previous.value, &next.value)
+        && same_optional_value(&previous.export, &next.export)
+        && previous.condition == next.condition
+        && previous.description == next.description
+}
+
+fn same_optional_value(
+    previous: &Option<ResourceValue<'_>>,
+    next: &Option<ResourceValue<'_>>,
+) -> bool {
+    match (previous, next) {
+        (Some(previous), Some(next)) => same_value(previous, next),
+        (previous, next) => previous.is_none() && next.is_none(),
+    }
+}
+
+fn same_value(previous: &ResourceValue<'_>, next: &ResourceValue<'_>) -> bool {
+    match (previous, next) {
+        (ResourceValue::Array(previous), ResourceValue::Array(next)) => {
+            previous.len() == next.len()
+                && previous
+                    .iter()
+                    .zip(next)
+                    .all(|(previous, next)| same_value(previous, next))
+        }
+        (ResourceValue::Object(previous), ResourceValue::Object(next)) => {
+            same_entries(previous, next, same_value)
+        }
+        (ResourceValue::IntrinsicFunction(previous), ResourceValue::IntrinsicFunction(next)) => {
+            same_intrinsic(previous, next)
+        }
+        (previous, next) => previous == next,
+    }
+}
+
+fn same_intrinsic(previous: &IntrinsicFunction<'_>, next: &IntrinsicFunction<'_>) -> bool {
+    use IntrinsicFunction::{
+        Base64, Cidr, FindInMap, GetAZs, If, ImportValue, Join, Select, Split, Sub,
+    };
+
+    match (previous, next) {
+        (Base64(previous), Base64(next))
+        | (GetAZs(previous), GetAZs(next))
+        | (ImportValue(previous), ImportValue(next)) => same_value(previous, next),
+        (
+            Cidr {
+                ip_block,
+                count,
+                cidr_bits,
+            },
+            Cidr {
+                ip_block: next_ip_block,
+                count: next_count,
+                cidr_bits: next_cidr_bits,
+            },
+        ) => {
+            same_value(ip_block, next_ip_block)
+                && same_value(count, next_count)
+                && same_value(cidr_bits, next_cidr_bits)
+        }
+        (
+            FindInMap {
+                map_name,
+                top_level_key,
+                second_level_key,
+            },
+            FindInMap {
+                map_name: next_map_name,
+                top_level_key: next_top_level_key,
+                second_level_key: next_second_level_key,
+            },
+        ) => {
+            map_name == next_map_name
+                && same_value(top_level_key, next_top_level_key)
+                && same_value(second_level_key, next_second_level_key)
+        }
+        (
+            If {
+                condition_name,
+                value_if_true,
+                value_if_false,
+            },
+            If {
+                condition_name: next_condition_name,
+                value_if_true: next_value_if_true,
+                value_if_false: next_value_if_false,
+            },
+        ) => {
+            condition_name == next_condition_name
+                && same_value(value_if_true, next_value_if_true)
+                && same_value(value_if_false, next_value_if_false)
+        }
+        (
+            Join { sep, list },
+            Join {
+                sep: next_sep,
+                list: next_list,
+            },
+        )
+        | (
+            Split { sep, string: list },
+            Split {
+                sep: next_sep,
+                string: next_list,
+            },
+        ) => sep == next_sep && same_value(list, next_list),
+        (
+            Select { index, list },
+            Select {
+                index: next_index,
+                list: next_list,
+            },
+        ) => same_value(index, next_index) && same_value(list, next_list),
+        (
+            Sub { string, replaces },
+            Sub {
+                string: next_string,
+                replaces: next_replaces,
+            },
+        ) => string == next_string && same_optional_value(replaces, next_replaces),
+        (previous, next) => previous == next,
+    }
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,153 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+
+const TEMPLATE: &str = r#"{
+    "Parameters": {
+        "Stage": { "Type": "String" }
+    },
+    "Conditions": {
+        "IsProd": { "Fn::Equals": [{ "Ref": "Stage" }, "prod"] }
+    },
+    "Mappings": {
+        "Sizes": { "prod": { "Size": "large" } }
+    },
+    "Resources": {
+        "Queue": {
+            "Type": "Custom::Queue",
+            "Properties": { "ServiceToken": "arn:aws:lambda:token", "Size": "small" }
+        },
+        "Topic": {
+            "Type": "Custom::Topic",
+            "Properties": { "ServiceToken": "arn:aws:lambda:token", "Target": { "Ref": "Queue" } }
+        },
+        "Bucket": {
+            "Type": "Custom::Bucket",
+            "Properties": { "ServiceToken": "arn:aws:lambda:token", "Name": "bucket" }
+        }
+    },
+    "Outputs": {
+        "TopicArn": { "Value": { "Fn::GetAtt": ["Topic", "Arn"] } }
+    }
+}"#;
+
+// Updates `incremental` with `template`, and checks that the IR is the one a
+// full translation builds.
+fn update(incremental: &mut IncrementalIr, template: &str) -> Result<String, String> {
+    let schema = Schema::builtin();
+    let expected = CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(template.as_bytes()).unwrap(),
+        schema,
+    )
+    .map(|ir| format!("{ir:?}"))
+    .map_err(|err| err.to_string());
+
+    let actual = incremental
+        .update(
+            CloudformationParseTree::from_slice(template.as_bytes()).unwrap(),
+            schema,
+        )
+        .map(|ir| format!("{ir:?}"))
+        .map_err(|err| err.to_string());
+
+    assert_eq!(actual, expected);
+    actual
+}
+
+fn order(incremental: &IncrementalIr) -> Vec<&str> {
+    let ir = incremental.ir().unwrap();
+    ir.resources.iter().map(|r| r.name.as_str()).collect()
+}
+
+#[test]
+fn test_unchanged_template_translates_nothing() {
+    let mut incremental = IncrementalIr::new();
+    update(&mut incremental, TEMPLATE).unwrap();
+    assert_eq!(incremental.translated_resources(), 3);
+
+    update(&mut incremental, TEMPLATE).unwrap();
+    assert_eq!(incremental.translated_resources(), 0);
+}
+
+#[test]
+fn test_changed_resource_is_translated_alone() {
+    let mut incremental = IncrementalIr::new();
+    update(&mut incremental, TEMPLATE).unwrap();
+
+    update(
+        &mut incremental,
+        &TEMPLATE.replace(r#""Size": "small""#, r#""Size": "medium""#),
+    )
+    .unwrap();
+    assert_eq!(incremental.translated_resources(), 1);
+    assert_eq!(order(&incremental), ["Bucket", "Queue", "Topic"]);
+}
+
+#[test]
+fn test_changed_references_reorder_resources() {
+    let mut incremental = IncrementalIr::new();
+    update(&mut incremental, TEMPLATE).unwrap();
+
+    let template = TEMPLATE.replace(r#""Name": "bucket""#, r#""Name": { "Ref": "Topic" }"#);
+    update(&mut incremental, &template).unwrap();
+    assert_eq!(incremental.translated_resources(), 1);
+    assert_eq!(order(&incremental), ["Queue", "Topic", "Bucket"]);
+}
+
+#[test]
+fn test_reordered_properties_are_a_change() {
+    let mut incremental = IncrementalIr::new();
+    update(&mut incremental, TEMPLATE).unwrap();
+
+    let template = TEMPLATE.replace(
+        r#"{ "ServiceToken": "arn:aws:lambda:token", "Name": "bucket" }"#,
+        r#"{ "Name": "bucket", "ServiceToken": "arn:aws:lambda:token" }"#,
+    );
+    update(&mut incremental, &template).unwrap();
+    assert_eq!(incremental.translated_resources(), 1);
+}
+
+#[test]
+fn test_new_declarations_rebuild_from_scratch() {
+    let mut incremental = IncrementalIr::new();
+    update(&mut incremental, TEMPLATE).unwrap();
+
+    let template = TEMPLATE.replace(
+        r#""Bucket": {"#,
+        r#""Table": { "Type": "Custom::Table", "Properties": { "ServiceToken": "arn" } },
+        "Bucket": {"#,
+    );
+    update(&mut incremental, &template).unwrap();
+    assert_eq!(incremental.translated_resources(), 4);
+}
+
+#[test]
+fn test_changed_outputs_keep_symbols_in_template_order() {
+    let mut incremental = IncrementalIr::new();
+    let template = TEMPLATE.replace(r#"{ "Ref": "Stage" }"#, r#"{ "Ref": "Region" }"#);
+    update(&mut incremental, &template).unwrap();
+
+    let template = template.replace(
+        r#"{ "Fn::GetAtt": ["Topic", "Arn"] }"#,
+        r#"{ "Fn::GetAtt": ["Elsewhere", "Arn"] }"#,
+    );
+    update(&mut incremental, &template).unwrap();
+    assert_eq!(incremental.translated_resources(), 0);
+
+    let symbols = &incremental.ir().unwrap().symbols;
+    assert_eq!(symbols.get("Elsewhere").unwrap().index(), symbols.len() - 1);
+}
+
+#[test]
+fn test_failed_update_rebuilds_next_time() {
+    let mut incremental = IncrementalIr::new();
+    update(&mut incremental, TEMPLATE).unwrap();
+
+    let template = TEMPLATE.replace(r#""Ref": "Queue""#, r#""Ref": "Missing""#);
+    let err = update(&mut incremental, &template).unwrap_err();
+    assert!(err.contains("unknown logical id: Missing"), "{err}");
+    assert!(incremental.ir().is_none());
+
+    update(&mut incremental, TEMPLATE).unwrap();
+    assert_eq!(incremental.translated_resources(), 3);
+}
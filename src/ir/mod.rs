@@ -1,28 +1,44 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
+use std::cell::RefCell;
 use std::collections::HashMap;
+use std::mem;
+use std::sync::Arc;
 
-use crate::cdk::Schema;
+use crate::cdk::{Schema, TypeReference};
 use crate::ir::conditions::ConditionInstruction;
 use crate::ir::constructor::Constructor;
 use crate::ir::importer::ImportInstruction;
 use crate::ir::mappings::MappingInstruction;
 use crate::ir::outputs::OutputInstruction;
-use crate::ir::resources::ResourceInstruction;
-use crate::{CloudformationParseTree, Error};
+use crate::ir::resources::{ResourceInstruction, ResourceIr};
+use crate::timings::Timings;
+use crate::{CloudformationParseTree, Error, Hasher};
 
-use self::reference::{Origin, PseudoParameter};
+use self::nodes::{NodeBuilder, NodeTable};
+use self::reference::{Origin, PseudoParameter, Reference};
+use self::symbols::{Symbol, SymbolTable};
+use self::types::{TypeId, TypeTable};
 
 pub mod conditions;
 pub mod constructor;
+mod encoding;
+mod graph;
 pub mod importer;
+pub mod incremental;
 pub mod mappings;
+pub mod nodes;
 pub mod outputs;
+#[cfg(feature = "parallel")]
+mod parallel;
 pub mod reference;
 pub mod resources;
 pub mod sub;
+pub mod symbols;
+pub mod types;
+pub mod visit;
 
-#[derive(Debug, Default)]
+#[derive(Debug, Default, serde::Serialize, serde::Deserialize)]
 pub struct CloudformationProgramIr {
     pub description: Option<String>,
     pub transforms: Vec<String>,
@@ -33,6 +49,13 @@ pub struct CloudformationProgramIr {
     pub mappings: Vec<MappingInstruction>,
     pub resources: Vec<ResourceInstruction>,
     pub outputs: Vec<OutputInstruction>,
+
+    /// The names that references of the IR stand for.
+    pub symbols: SymbolTable,
+    /// The types of the arrays and objects of the IR.
+    pub types: TypeTable,
+    /// The values the trees of the resources and outputs are made of.
+    pub nodes: NodeTable,
 }
 
 impl CloudformationProgramIr {
@@ -40,85 +63,341 @@ impl CloudformationProgramIr {
     // because there could be incorrect semantics, Result::Error can only happen on semantic error,
     // not parsing errors.
     pub fn from(
-        parse_tree: CloudformationParseTree,
+        parse_tree: CloudformationParseTree<'_>,
         schema: &Schema,
     ) -> Result<CloudformationProgramIr, Error> {
-        let origins = ReferenceOrigins::new(&parse_tree);
-
-        Ok(CloudformationProgramIr {
-            description: parse_tree.description,
-            transforms: parse_tree.transforms,
-            conditions: ConditionInstruction::from(parse_tree.conditions)?,
-            imports: ImportInstruction::from(&parse_tree.resources)?,
-            constructor: Constructor::from(parse_tree.parameters),
-            mappings: MappingInstruction::from(parse_tree.mappings),
-            resources: ResourceInstruction::from(parse_tree.resources, schema, &origins)?,
-            outputs: OutputInstruction::from(parse_tree.outputs, schema, &origins)?,
-        })
+        Self::from_timed(parse_tree, schema, &mut Timings::new())
+    }
+
+    /// Like [`CloudformationProgramIr::from`], additionally recording the wall
+    /// time and item count of each translation phase into `timings`.
+    ///
+    /// With the `parallel` feature, templates with enough resources are
+    /// translated on every available core, as by
+    /// [`CloudformationProgramIr::from_parallel`].
+    pub fn from_timed(
+        parse_tree: CloudformationParseTree<'_>,
+        schema: &Schema,
+        timings: &mut Timings,
+    ) -> Result<CloudformationProgramIr, Error> {
+        #[cfg(feature = "parallel")]
+        if parse_tree.resources.len() >= 2 * parallel::MIN_CHUNK_LEN {
+            if let Ok(threads) = std::thread::available_parallelism() {
+                return parallel::translate(
+                    parse_tree,
+                    schema,
+                    threads,
+                    parallel::MIN_CHUNK_LEN,
+                    timings,
+                );
+            }
+        }
+
+        translate(parse_tree, schema, timings, |_| {})
+    }
+
+    /// Like [`CloudformationProgramIr::from`], always translating on the
+    /// calling thread. Callers that already run conversions concurrently use
+    /// it, so that they do not start more threads than there are cores.
+    pub fn from_sequential(
+        parse_tree: CloudformationParseTree<'_>,
+        schema: &Schema,
+    ) -> Result<CloudformationProgramIr, Error> {
+        translate(parse_tree, schema, &mut Timings::new(), |_| {})
+    }
+}
+
+/// The sections of a template translated into instructions, before the
+/// resources are ordered.
+struct Sections {
+    conditions: Vec<ConditionInstruction>,
+    imports: Vec<ImportInstruction>,
+    resources: Vec<ResourceInstruction>,
+    outputs: Vec<OutputInstruction>,
+}
+
+/// Translates `parse_tree` into the IR on the calling thread, recording each
+/// phase into `timings`. `conditions_translated` is called with the reference
+/// origins once the conditions are translated, before the resources intern
+/// any undeclared name.
+fn translate(
+    mut parse_tree: CloudformationParseTree<'_>,
+    schema: &Schema,
+    timings: &mut Timings,
+    conditions_translated: impl FnOnce(&ReferenceOrigins),
+) -> Result<CloudformationProgramIr, Error> {
+    let origins = timings.time(
+        "ReferenceOrigins::new",
+        || ReferenceOrigins::new(&parse_tree),
+        |origins| origins.declared.declarations.len(),
+    );
+    let conditions = timings.time(
+        "ConditionInstruction::from",
+        || ConditionInstruction::from(mem::take(&mut parse_tree.conditions), &origins),
+        count,
+    )?;
+    conditions_translated(&origins);
+    let imports = timings.time(
+        "ImportInstruction::from",
+        || ImportInstruction::from(&parse_tree.resources),
+        count,
+    )?;
+    let resources = timings.time(
+        "ResourceInstruction::from",
+        || ResourceInstruction::translate(mem::take(&mut parse_tree.resources), schema, &origins),
+        count,
+    )?;
+    let outputs = timings.time(
+        "OutputInstruction::from",
+        || OutputInstruction::from(mem::take(&mut parse_tree.outputs), schema, &origins),
+        count,
+    )?;
+
+    let sections = Sections {
+        conditions,
+        imports,
+        resources,
+        outputs,
+    };
+    assemble(parse_tree, sections, origins, timings)
+}
+
+/// Builds the IR out of the translated `sections` of `parse_tree` and of the
+/// names and types `origins` interned while translating them. The resources
+/// are ordered, and the sections were taken out of `parse_tree`, of which only
+/// the remaining parts are used.
+fn assemble(
+    parse_tree: CloudformationParseTree<'_>,
+    sections: Sections,
+    origins: ReferenceOrigins,
+    timings: &mut Timings,
+) -> Result<CloudformationProgramIr, Error> {
+    let types = origins.types.take();
+    let nodes = origins.nodes.take().into_table();
+    let mut symbols = origins.into_symbols();
+    let resources = timings.time(
+        "order",
+        || resources::order(sections.resources, &mut symbols),
+        count,
+    )?;
+
+    let mut ir = CloudformationProgramIr {
+        description: parse_tree.description,
+        transforms: parse_tree.transforms,
+        conditions: sections.conditions,
+        imports: sections.imports,
+        constructor: Constructor::from(parse_tree.parameters),
+        mappings: MappingInstruction::from(parse_tree.mappings),
+        resources,
+        outputs: sections.outputs,
+        symbols,
+        types,
+        nodes,
+    };
+    timings.time("NodeTable::compact", || ir.compact_nodes(), |len| *len);
+    timings.time("TypeTable::compact", || ir.compact_types(), |len| *len);
+    Ok(ir)
+}
+
+/// The number of instructions produced by a translation phase.
+fn count<T>(result: &Result<Vec<T>, Error>) -> usize {
+    result.as_ref().map_or(0, Vec::len)
+}
+
+/// What a name of the template was declared as, as far as references to it
+/// are concerned.
+#[derive(Debug, Clone, Copy, PartialEq)]
+enum Declaration {
+    Parameter {
+        no_echo: bool,
+    },
+    Resource {
+        conditional: bool,
+        is_custom_resource: bool,
+    },
+    PseudoParameter(PseudoParameter),
+}
+
+impl Declaration {
+    #[inline]
+    const fn origin(self) -> Origin {
+        match self {
+            Self::Parameter { no_echo: true } => Origin::CfnParameter,
+            Self::Parameter { no_echo: false } => Origin::Parameter,
+            Self::Resource {
+                conditional,
+                is_custom_resource,
+            } => Origin::LogicalId {
+                conditional,
+                is_custom_resource,
+            },
+            Self::PseudoParameter(pseudo) => Origin::PseudoParameter(pseudo),
+        }
     }
 }
 
+/// Interns the names of the template, and records what each of them was
+/// declared as. Names that are referenced without being declared (which is an
+/// error the resource ordering reports) are interned as translation finds them,
+/// into a table of their own that follows the declared names.
+///
+/// It also remembers the translation of the `Fn::Sub` strings that have no
+/// replacements, which only depends on these names, interns the types of the
+/// arrays and objects translation produces, and holds the nodes of the trees it
+/// produces.
 #[derive(Debug)]
 struct ReferenceOrigins {
-    origins: HashMap<String, Origin>,
+    declared: Arc<DeclaredNames>,
+    undeclared: RefCell<SymbolTable>,
+    substitutions: RefCell<HashMap<Box<str>, Vec<ResourceIr>, Hasher>>,
+    types: RefCell<TypeTable>,
+    nodes: RefCell<NodeBuilder>,
+}
+
+/// The names declared by the template. They do not change once the template
+/// was read, so they can be shared by concurrent translations.
+#[derive(Debug, Clone, Default)]
+struct DeclaredNames {
+    symbols: SymbolTable,
+    // Indexed by symbol. Symbols past the end, and conditions, cannot be the
+    // target of a `Ref`.
+    declarations: Vec<Option<Declaration>>,
+}
+
+impl Default for ReferenceOrigins {
+    fn default() -> Self {
+        Self::with_capacity(0)
+    }
 }
 
 impl ReferenceOrigins {
-    fn new(parse_tree: &CloudformationParseTree) -> Self {
-        let mut origins = HashMap::default();
+    /// Creates a table in which only the pseudo parameters are declared.
+    fn with_capacity(capacity: usize) -> Self {
+        let capacity = capacity + PseudoParameter::ALL.len();
+        let mut origins = Self {
+            declared: Arc::new(DeclaredNames {
+                symbols: SymbolTable::with_capacity(capacity),
+                declarations: Vec::with_capacity(capacity),
+            }),
+            undeclared: RefCell::default(),
+            substitutions: RefCell::default(),
+            types: RefCell::default(),
+            nodes: RefCell::default(),
+        };
+        for (name, pseudo) in PseudoParameter::ALL {
+            origins.declare(name, Some(Declaration::PseudoParameter(pseudo)));
+        }
+        origins
+    }
 
-        origins.extend(parse_tree.parameters.iter().map(|(name, param)| {
-            if param
+    fn new(parse_tree: &CloudformationParseTree<'_>) -> Self {
+        let mut origins = Self::with_capacity(
+            parse_tree.parameters.len() + parse_tree.resources.len() + parse_tree.conditions.len(),
+        );
+
+        for (name, param) in &parse_tree.parameters {
+            let no_echo = param
                 .no_echo
                 .as_ref()
-                .is_some_and(|x| x.to_lowercase() == "true")
-            {
-                (name.clone(), Origin::CfnParameter)
-            } else {
-                (name.clone(), Origin::Parameter)
-            }
-        }));
+                .is_some_and(|x| x.to_lowercase() == "true");
+            origins.declare(name, Some(Declaration::Parameter { no_echo }));
+        }
 
-        origins.extend(parse_tree.resources.iter().map(|(name, res)| {
+        for (name, res) in &parse_tree.resources {
             let is_custom_resource = res.resource_type.starts_with("Custom::")
                 || res.resource_type == "AWS::CloudFormation::CustomResource";
-            (
-                name.clone(),
-                Origin::LogicalId {
+            origins.declare(
+                name,
+                Some(Declaration::Resource {
                     conditional: res.condition.is_some(),
                     is_custom_resource,
-                },
-            )
-        }));
+                }),
+            );
+        }
+
+        // Conditions live in a namespace of their own, so they only get a symbol.
+        for name in parse_tree.conditions.keys() {
+            origins.declare(name, None);
+        }
 
-        Self { origins }
+        origins
     }
 
-    fn for_ref(&self, ref_name: &str) -> Option<Origin> {
-        if let Some(pseudo) = PseudoParameter::try_from(ref_name) {
-            Some(Origin::PseudoParameter(pseudo))
-        } else {
-            self.origins.get(ref_name).cloned()
+    /// Records what `name` was declared as. Later declarations of a name
+    /// replace earlier ones, except that pseudo parameters cannot be shadowed.
+    fn declare(&mut self, name: &str, declaration: Option<Declaration>) {
+        debug_assert!(self.undeclared.get_mut().is_empty());
+        let declared = Arc::make_mut(&mut self.declared);
+        let symbol = declared.symbols.intern(name);
+        match declared.declarations.get_mut(symbol.index()) {
+            None => declared.declarations.push(declaration),
+            Some(Some(Declaration::PseudoParameter(_))) => {}
+            Some(previous) => {
+                if declaration.is_some() {
+                    *previous = declaration;
+                }
+            }
         }
+        *self.undeclared.get_mut() = declared.symbols.following();
+    }
+
+    /// Returns the symbol for `name`, interning it if the template does not
+    /// declare it.
+    fn symbol(&self, name: &str) -> Symbol {
+        let declared = self.declared.symbols.get(name);
+        declared.unwrap_or_else(|| self.undeclared.borrow_mut().intern(name))
+    }
+
+    #[inline]
+    fn declaration(&self, symbol: Symbol) -> Option<Declaration> {
+        self.declared
+            .declarations
+            .get(symbol.index())
+            .copied()
+            .flatten()
+    }
+
+    /// Resolves a `Ref` to a parameter, resource or pseudo parameter declared
+    /// by the template.
+    fn for_ref(&self, ref_name: &str) -> Option<Reference> {
+        let symbol = self.declared.symbols.get(ref_name)?;
+        let declaration = self.declaration(symbol)?;
+        Some(Reference::new(symbol, declaration.origin()))
+    }
+
+    /// Resolves a `Fn::GetAtt` of `attribute` on the resource `logical_id`.
+    fn get_attribute(&self, logical_id: &str, attribute: String) -> Reference {
+        let symbol = self.symbol(logical_id);
+        let (conditional, is_custom_resource) = match self.declaration(symbol) {
+            Some(Declaration::Resource {
+                conditional,
+                is_custom_resource,
+            }) => (conditional, is_custom_resource),
+            _ => (false, false),
+        };
+        Reference::new(
+            symbol,
+            Origin::GetAttribute {
+                attribute,
+                conditional,
+                is_custom_resource,
+            },
+        )
     }
 
-    fn is_conditional(&self, logical_id: &str) -> bool {
-        self.for_ref(logical_id)
-            .map(|orig| match orig {
-                Origin::LogicalId { conditional, .. } => conditional,
-                _ => false,
-            })
-            .unwrap_or(false)
+    /// Returns the ID of `type_reference`, interning it.
+    #[inline]
+    fn type_id(&self, type_reference: &TypeReference) -> TypeId {
+        self.types.borrow_mut().intern(type_reference)
     }
 
-    fn is_custom_resource(&self, logical_id: &str) -> bool {
-        self.for_ref(logical_id)
-            .map(|orig| match orig {
-                Origin::LogicalId {
-                    is_custom_resource, ..
-                } => is_custom_resource,
-                _ => false,
-            })
-            .unwrap_or(false)
+    /// Returns every name interned so far. Undeclared names keep their symbol,
+    /// as their table follows the declared names.
+    fn into_symbols(self) -> SymbolTable {
+        let mut symbols = Arc::try_unwrap(self.declared)
+            .unwrap_or_else(|shared| (*shared).clone())
+            .symbols;
+        symbols.append(self.undeclared.into_inner());
+        symbols
     }
 }
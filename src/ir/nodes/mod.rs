@@ -0,0 +1,709 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Storage of the values `ResourceIr` trees are made of.
+//!
+//! Translating a template produces a great many small values: the operands of
+//! intrinsic functions, the items of arrays and the entries of objects. Rather
+//! than allocating each of them on its own, the IR pushes them into a
+//! [`NodeTable`] it owns, and the values that contain them only carry a
+//! [`NodeId`], or a [`NodeList`] or [`EntryList`] for items and entries, which
+//! are stored next to each other. The table is freed at once with the IR.
+//!
+//! Trees are built bottom-up: the children of a value are pushed before it,
+//! and the items of an array (or the entries of an object) are staged by a
+//! [`NodeBuilder`] while their own children are pushed, then moved into the
+//! table together.
+
+use std::fmt;
+use std::mem;
+use std::ops::{Index, Range};
+
+use super::resources::{ResourceInstruction, ResourceIr};
+use super::CloudformationProgramIr;
+
+/// A dense integer standing for a [`ResourceIr`] of a [`NodeTable`].
+#[derive(
+    Debug, Clone, Copy, PartialEq, Eq, Hash, PartialOrd, Ord, serde::Serialize, serde::Deserialize,
+)]
+pub struct NodeId(u32);
+
+impl NodeId {
+    /// The position of the node in its table, for use as a vector index.
+    #[inline]
+    pub const fn index(self) -> usize {
+        self.0 as usize
+    }
+}
+
+/// The items of an array (or the operands of `Fn::Join` and `Fn::Sub`),
+/// stored next to each other in a [`NodeTable`].
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Hash, serde::Serialize, serde::Deserialize)]
+pub struct NodeList {
+    start: u32,
+    len: u32,
+}
+
+/// The entries of an object, stored next to each other in a [`NodeTable`].
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Hash, serde::Serialize, serde::Deserialize)]
+pub struct EntryList {
+    start: u32,
+    len: u32,
+}
+
+macro_rules! impl_range {
+    ($list:ident) => {
+        impl $list {
+            /// The number of items of the list.
+            #[inline]
+            pub const fn len(self) -> usize {
+                self.len as usize
+            }
+
+            #[inline]
+            pub const fn is_empty(self) -> bool {
+                self.len == 0
+            }
+
+            /// The positions of the items in their table.
+            #[inline]
+            fn range(self) -> Range<usize> {
+                self.start as usize..self.start as usize + self.len as usize
+            }
+
+            #[inline]
+            fn offset(self, by: usize) -> Self {
+                Self {
+                    start: self.start + by as u32,
+                    len: self.len,
+                }
+            }
+        }
+    };
+}
+
+impl_range!(NodeList);
+impl_range!(EntryList);
+
+/// The nodes of the `ResourceIr` trees of an IR.
+#[derive(Debug, Clone, Default, PartialEq, serde::Serialize, serde::Deserialize)]
+pub struct NodeTable {
+    nodes: Vec<ResourceIr>,
+    entries: Vec<(String, ResourceIr)>,
+}
+
+impl NodeTable {
+    /// Creates a table with room for `nodes` nodes and `entries` entries.
+    pub(super) fn with_capacity(nodes: usize, entries: usize) -> Self {
+        Self {
+            nodes: Vec::with_capacity(nodes),
+            entries: Vec::with_capacity(entries),
+        }
+    }
+
+    /// Adds `node` to the table.
+    #[inline]
+    pub fn push(&mut self, node: ResourceIr) -> NodeId {
+        self.nodes.push(node);
+        NodeId(self.nodes.len() as u32 - 1)
+    }
+
+    /// Adds `items` to the table, next to each other.
+    pub fn push_list(&mut self, items: impl IntoIterator<Item = ResourceIr>) -> NodeList {
+        let start = self.nodes.len();
+        self.nodes.extend(items);
+        NodeList {
+            start: start as u32,
+            len: (self.nodes.len() - start) as u32,
+        }
+    }
+
+    /// Adds `entries` to the table, next to each other, in order.
+    pub fn push_entries(
+        &mut self,
+        entries: impl IntoIterator<Item = (String, ResourceIr)>,
+    ) -> EntryList {
+        let start = self.entries.len();
+        self.entries.extend(entries);
+        EntryList {
+            start: start as u32,
+            len: (self.entries.len() - start) as u32,
+        }
+    }
+
+    /// Returns the node `id` stands for, if it was handed out by this table.
+    #[inline]
+    pub fn get(&self, id: NodeId) -> Option<&ResourceIr> {
+        self.nodes.get(id.index())
+    }
+
+    /// Returns the items of `list`.
+    ///
+    /// # Panics
+    ///
+    /// If `list` was not handed out by this table.
+    #[inline]
+    pub fn list(&self, list: NodeList) -> &[ResourceIr] {
+        &self.nodes[list.range()]
+    }
+
+    /// Returns the entries of `list`, in order.
+    ///
+    /// # Panics
+    ///
+    /// If `list` was not handed out by this table.
+    #[inline]
+    pub fn entries(&self, list: EntryList) -> &[(String, ResourceIr)] {
+        &self.entries[list.range()]
+    }
+
+    /// The number of nodes (items and entries included) in the table.
+    #[inline]
+    pub fn len(&self) -> usize {
+        self.nodes.len() + self.entries.len()
+    }
+
+    #[inline]
+    pub fn is_empty(&self) -> bool {
+        self.nodes.is_empty() && self.entries.is_empty()
+    }
+
+    /// Returns a value that formats `node` the way the `Debug` implementation
+    /// of a tree would, showing its children instead of their IDs.
+    pub fn resolve<'a>(&'a self, node: &'a ResourceIr) -> Resolved<'a> {
+        Resolved { nodes: self, node }
+    }
+
+    /// Moves the nodes of `other` after those of `self`, and returns how to
+    /// renumber the IDs and lists `other` handed out.
+    pub fn append(&mut self, mut other: NodeTable) -> Offsets {
+        let offsets = Offsets {
+            nodes: self.nodes.len(),
+            entries: self.entries.len(),
+        };
+        self.nodes.append(&mut other.nodes);
+        self.entries.append(&mut other.entries);
+        offsets
+    }
+
+    /// Moves the node `id` out of the table, leaving `ResourceIr::Null` in
+    /// its place.
+    #[inline]
+    pub(super) fn take(&mut self, id: NodeId) -> ResourceIr {
+        mem::take(&mut self.nodes[id.index()])
+    }
+
+    #[inline]
+    pub(super) fn put(&mut self, id: NodeId, node: ResourceIr) {
+        self.nodes[id.index()] = node;
+    }
+
+    #[inline]
+    pub(super) fn list_mut(&mut self, list: NodeList) -> &mut [ResourceIr] {
+        &mut self.nodes[list.range()]
+    }
+
+    #[inline]
+    pub(super) fn entries_mut(&mut self, list: EntryList) -> &mut [(String, ResourceIr)] {
+        &mut self.entries[list.range()]
+    }
+
+    /// Checks that the trees under `roots` only use nodes of the table, and
+    /// that no node is used twice, which also rules out cycles. Decoded IR is
+    /// checked before anything walks its trees.
+    pub(super) fn check<'a>(
+        &self,
+        roots: impl IntoIterator<Item = &'a ResourceIr>,
+    ) -> Result<(), String> {
+        let mut check = Check {
+            nodes: self,
+            used_nodes: vec![false; self.nodes.len()],
+            used_entries: vec![false; self.entries.len()],
+        };
+        roots.into_iter().try_for_each(|root| check.children(root))
+    }
+}
+
+impl Index<NodeId> for NodeTable {
+    type Output = ResourceIr;
+
+    /// # Panics
+    ///
+    /// If `id` was not handed out by this table.
+    #[inline]
+    fn index(&self, id: NodeId) -> &ResourceIr {
+        self.get(id).expect("node from another table")
+    }
+}
+
+/// How to renumber the IDs and lists of a table appended to another.
+#[derive(Debug, Clone, Copy)]
+pub struct Offsets {
+    nodes: usize,
+    entries: usize,
+}
+
+impl Offsets {
+    #[inline]
+    pub fn is_zero(self) -> bool {
+        self.nodes == 0 && self.entries == 0
+    }
+
+    #[inline]
+    pub fn node(self, id: NodeId) -> NodeId {
+        NodeId(id.0 + self.nodes as u32)
+    }
+
+    #[inline]
+    pub fn list(self, list: NodeList) -> NodeList {
+        list.offset(self.nodes)
+    }
+
+    #[inline]
+    pub fn entries(self, list: EntryList) -> EntryList {
+        list.offset(self.entries)
+    }
+}
+
+/// Builds a [`NodeTable`] bottom-up. The items of the arrays and the entries
+/// of the objects being built are staged until they are all known, as their
+/// own children are pushed in the meantime, and then moved into the table next
+/// to each other. The staging areas are reused by every list, so building a
+/// tree does not allocate beyond the table itself.
+#[derive(Debug, Default)]
+pub(super) struct NodeBuilder {
+    table: NodeTable,
+    items: Vec<ResourceIr>,
+    entries: Vec<(String, ResourceIr)>,
+}
+
+impl NodeBuilder {
+    /// Creates a builder adding nodes after those of `table`.
+    pub fn new(table: NodeTable) -> Self {
+        Self {
+            table,
+            items: Vec::new(),
+            entries: Vec::new(),
+        }
+    }
+
+    #[inline]
+    pub fn push(&mut self, node: ResourceIr) -> NodeId {
+        self.table.push(node)
+    }
+
+    /// Adds `items` to the table, next to each other. They may not have
+    /// children that are still staged.
+    #[inline]
+    pub fn push_list(&mut self, items: impl IntoIterator<Item = ResourceIr>) -> NodeList {
+        self.table.push_list(items)
+    }
+
+    /// The number of items staged, which starts the next list.
+    #[inline]
+    pub fn items_staged(&self) -> usize {
+        self.items.len()
+    }
+
+    #[inline]
+    pub fn stage_item(&mut self, item: ResourceIr) {
+        self.items.push(item);
+    }
+
+    /// Moves the items staged since `start` into the table.
+    #[inline]
+    pub fn push_items(&mut self, start: usize) -> NodeList {
+        self.table.push_list(self.items.drain(start..))
+    }
+
+    /// The number of entries staged, which starts the next object.
+    #[inline]
+    pub fn entries_staged(&self) -> usize {
+        self.entries.len()
+    }
+
+    #[inline]
+    pub fn stage_entry(&mut self, key: String, value: ResourceIr) {
+        self.entries.push((key, value));
+    }
+
+    /// Moves the entries staged since `start` into the table.
+    #[inline]
+    pub fn push_entries(&mut self, start: usize) -> EntryList {
+        self.table.push_entries(self.entries.drain(start..))
+    }
+
+    #[inline]
+    pub fn table(&self) -> &NodeTable {
+        &self.table
+    }
+
+    #[cfg(feature = "parallel")]
+    #[inline]
+    pub fn table_mut(&mut self) -> &mut NodeTable {
+        &mut self.table
+    }
+
+    pub fn into_table(self) -> NodeTable {
+        debug_assert!(self.items.is_empty() && self.entries.is_empty());
+        self.table
+    }
+
+    /// Returns a copy of `node` whose children are copies of its children,
+    /// so that no node is shared by two trees.
+    pub fn copy(&mut self, node: &ResourceIr) -> ResourceIr {
+        let mut node = node.clone();
+        self.copy_children(&mut node);
+        node
+    }
+
+    fn copy_children(&mut self, node: &mut ResourceIr) {
+        match node {
+            ResourceIr::Null
+            | ResourceIr::Bool(_)
+            | ResourceIr::Number(_)
+            | ResourceIr::Double(_)
+            | ResourceIr::String(_)
+            | ResourceIr::Ref(_) => {}
+
+            ResourceIr::Array(_, list) | ResourceIr::Join(_, list) | ResourceIr::Sub(list) => {
+                let start = self.items_staged();
+                for index in list.range() {
+                    let mut item = self.table.nodes[index].clone();
+                    self.copy_children(&mut item);
+                    self.stage_item(item);
+                }
+                *list = self.push_items(start);
+            }
+            ResourceIr::Object(_, list) => {
+                let start = self.entries_staged();
+                for index in list.range() {
+                    let (key, mut value) = self.table.entries[index].clone();
+                    self.copy_children(&mut value);
+                    self.stage_entry(key, value);
+                }
+                *list = self.push_entries(start);
+            }
+            ResourceIr::If(_, first, second) | ResourceIr::Map(_, first, second) => {
+                *first = self.copy_node(*first);
+                *second = self.copy_node(*second);
+            }
+            ResourceIr::Split(_, child)
+            | ResourceIr::Base64(child)
+            | ResourceIr::ImportValue(child)
+            | ResourceIr::GetAZs(child)
+            | ResourceIr::Select(_, child) => *child = self.copy_node(*child),
+            ResourceIr::Cidr(ip_block, count, cidr_bits) => {
+                *ip_block = self.copy_node(*ip_block);
+                *count = self.copy_node(*count);
+                *cidr_bits = self.copy_node(*cidr_bits);
+            }
+        }
+    }
+
+    fn copy_node(&mut self, id: NodeId) -> NodeId {
+        let mut node = self.table[id].clone();
+        self.copy_children(&mut node);
+        self.push(node)
+    }
+}
+
+impl CloudformationProgramIr {
+    /// Moves the nodes of the IR into a new table, in the order the resources
+    /// (in their final order) and then the outputs use them, and drops the
+    /// nodes nothing uses any more (such as those of the resources an
+    /// incremental update translated again). This makes the table independent
+    /// of how the IR was built. Returns the number of nodes left.
+    pub(super) fn compact_nodes(&mut self) -> usize {
+        let old = mem::take(&mut self.nodes);
+        // The table only shrinks, so the new one never grows.
+        let new = NodeTable::with_capacity(old.nodes.len(), old.entries.len());
+        let mut compact = Compact {
+            old,
+            new: NodeBuilder::new(new),
+        };
+
+        for resource in &mut self.resources {
+            compact.resource(resource);
+        }
+        for output in &mut self.outputs {
+            compact.children(&mut output.value);
+            if let Some(export) = &mut output.export {
+                compact.children(export);
+            }
+        }
+
+        self.nodes = compact.new.into_table();
+        self.nodes.len()
+    }
+}
+
+/// Moves the nodes an IR uses from `old` into `new`, children first.
+struct Compact {
+    old: NodeTable,
+    new: NodeBuilder,
+}
+
+impl Compact {
+    fn resource(&mut self, resource: &mut ResourceInstruction) {
+        let values = resource
+            .metadata
+            .iter_mut()
+            .chain(&mut resource.update_policy);
+        for value in values.chain(resource.properties.values_mut()) {
+            self.children(value);
+        }
+    }
+
+    /// Moves the children of `node`, and points it at their new IDs.
+    fn children(&mut self, node: &mut ResourceIr) {
+        match node {
+            ResourceIr::Null
+            | ResourceIr::Bool(_)
+            | ResourceIr::Number(_)
+            | ResourceIr::Double(_)
+            | ResourceIr::String(_)
+            | ResourceIr::Ref(_) => {}
+
+            ResourceIr::Array(_, list) | ResourceIr::Join(_, list) | ResourceIr::Sub(list) => {
+                let start = self.new.items_staged();
+                for index in list.range() {
+                    let mut item = mem::take(&mut self.old.nodes[index]);
+                    self.children(&mut item);
+                    self.new.stage_item(item);
+                }
+                *list = self.new.push_items(start);
+            }
+            ResourceIr::Object(_, list) => {
+                let start = self.new.entries_staged();
+                for index in list.range() {
+                    let (key, mut value) = mem::take(&mut self.old.entries[index]);
+                    self.children(&mut value);
+                    self.new.stage_entry(key, value);
+                }
+                *list = self.new.push_entries(start);
+            }
+            ResourceIr::If(_, first, second) | ResourceIr::Map(_, first, second) => {
+                *first = self.node(*first);
+                *second = self.node(*second);
+            }
+            ResourceIr::Split(_, child)
+            | ResourceIr::Base64(child)
+            | ResourceIr::ImportValue(child)
+            | ResourceIr::GetAZs(child)
+            | ResourceIr::Select(_, child) => *child = self.node(*child),
+            ResourceIr::Cidr(ip_block, count, cidr_bits) => {
+                *ip_block = self.node(*ip_block);
+                *count = self.node(*count);
+                *cidr_bits = self.node(*cidr_bits);
+            }
+        }
+    }
+
+    fn node(&mut self, id: NodeId) -> NodeId {
+        let mut node = self.old.take(id);
+        self.children(&mut node);
+        self.new.push(node)
+    }
+}
+
+/// Records the nodes and entries the trees checked so far use.
+struct Check<'a> {
+    nodes: &'a NodeTable,
+    used_nodes: Vec<bool>,
+    used_entries: Vec<bool>,
+}
+
+impl Check<'_> {
+    fn children(&mut self, node: &ResourceIr) -> Result<(), String> {
+        match node {
+            ResourceIr::Null
+            | ResourceIr::Bool(_)
+            | ResourceIr::Number(_)
+            | ResourceIr::Double(_)
+            | ResourceIr::String(_)
+            | ResourceIr::Ref(_) => Ok(()),
+
+            ResourceIr::Array(_, list) | ResourceIr::Join(_, list) | ResourceIr::Sub(list) => {
+                let range = list.range();
+                if range.end > self.nodes.nodes.len() {
+                    return Err(format!(
+                        "nodes {}..{} are not in the node table ({} nodes)",
+                        range.start,
+                        range.end,
+                        self.nodes.nodes.len()
+                    ));
+                }
+                for index in range {
+                    self.use_node(index)?;
+                }
+                Ok(())
+            }
+            ResourceIr::Object(_, list) => {
+                let range = list.range();
+                if range.end > self.nodes.entries.len() {
+                    return Err(format!(
+                        "entries {}..{} are not in the node table ({} entries)",
+                        range.start,
+                        range.end,
+                        self.nodes.entries.len()
+                    ));
+                }
+                for index in range {
+                    if mem::replace(&mut self.used_entries[index], true) {
+                        return Err(format!("entry {index} is used twice"));
+                    }
+                    self.children(&self.nodes.entries[index].1)?;
+                }
+                Ok(())
+            }
+            ResourceIr::If(_, first, second) | ResourceIr::Map(_, first, second) => {
+                self.use_node(first.index())?;
+                self.use_node(second.index())
+            }
+            ResourceIr::Split(_, child)
+            | ResourceIr::Base64(child)
+            | ResourceIr::ImportValue(child)
+            | ResourceIr::GetAZs(child)
+            | ResourceIr::Select(_, child) => self.use_node(child.index()),
+            ResourceIr::Cidr(ip_block, count, cidr_bits) => {
+                self.use_node(ip_block.index())?;
+                self.use_node(count.index())?;
+                self.use_node(cidr_bits.index())
+            }
+        }
+    }
+
+    fn use_node(&mut self, index: usize) -> Result<(), String> {
+        match self.used_nodes.get_mut(index) {
+            None => Err(format!(
+                "node {index} is not in the node table ({} nodes)",
+                self.nodes.nodes.len()
+            )),
+            Some(true) => Err(format!("node {index} is used twice")),
+            Some(used) => {
+                *used = true;
+                self.children(&self.nodes.nodes[index])
+            }
+        }
+    }
+}
+
+/// Formats a node with its children, as returned by [`NodeTable::resolve`].
+pub struct Resolved<'a> {
+    nodes: &'a NodeTable,
+    node: &'a ResourceIr,
+}
+
+impl Resolved<'_> {
+    fn with<'b>(&'b self, node: &'b ResourceIr) -> Resolved<'b> {
+        Resolved {
+            nodes: self.nodes,
+            node,
+        }
+    }
+
+    fn child(&self, id: NodeId) -> Resolved<'_> {
+        self.with(&self.nodes[id])
+    }
+}
+
+impl fmt::Debug for Resolved<'_> {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        match self.node {
+            ResourceIr::Null
+            | ResourceIr::Bool(_)
+            | ResourceIr::Number(_)
+            | ResourceIr::Double(_)
+            | ResourceIr::String(_)
+            | ResourceIr::Ref(_) => self.node.fmt(f),
+
+            ResourceIr::Array(id, list) => {
+                let items = self.nodes.list(*list).iter().map(|item| self.with(item));
+                let items = DebugList(items);
+                f.debug_tuple("Array").field(id).field(&items).finish()
+            }
+            ResourceIr::Object(id, list) => {
+                let entries = self.nodes.entries(*list);
+                let entries = DebugMap(entries.iter().map(|(k, v)| (k, self.with(v))));
+                f.debug_tuple("Object").field(id).field(&entries).finish()
+            }
+            ResourceIr::If(condition, when_true, when_false) => f
+                .debug_tuple("If")
+                .field(condition)
+                .field(&self.child(*when_true))
+                .field(&self.child(*when_false))
+                .finish(),
+            ResourceIr::Join(separator, list) => {
+                let items = self.nodes.list(*list).iter().map(|item| self.with(item));
+                let items = DebugList(items);
+                f.debug_tuple("Join")
+                    .field(separator)
+                    .field(&items)
+                    .finish()
+            }
+            ResourceIr::Split(separator, child) => f
+                .debug_tuple("Split")
+                .field(separator)
+                .field(&self.child(*child))
+                .finish(),
+            ResourceIr::Sub(list) => {
+                let items = self.nodes.list(*list).iter().map(|item| self.with(item));
+                f.debug_tuple("Sub").field(&DebugList(items)).finish()
+            }
+            ResourceIr::Map(name, top_level_key, second_level_key) => f
+                .debug_tuple("Map")
+                .field(name)
+                .field(&self.child(*top_level_key))
+                .field(&self.child(*second_level_key))
+                .finish(),
+            ResourceIr::Base64(child) => {
+                f.debug_tuple("Base64").field(&self.child(*child)).finish()
+            }
+            ResourceIr::ImportValue(child) => f
+                .debug_tuple("ImportValue")
+                .field(&self.child(*child))
+                .finish(),
+            ResourceIr::GetAZs(child) => {
+                f.debug_tuple("GetAZs").field(&self.child(*child)).finish()
+            }
+            ResourceIr::Select(index, child) => f
+                .debug_tuple("Select")
+                .field(index)
+                .field(&self.child(*child))
+                .finish(),
+            ResourceIr::Cidr(ip_block, count, cidr_bits) => f
+                .debug_tuple("Cidr")
+                .field(&self.child(*ip_block))
+                .field(&self.child(*count))
+                .field(&self.child(*cidr_bits))
+                .finish(),
+        }
+    }
+}
+
+/// Formats the items of an iterator as a list, without collecting them.
+struct DebugList<I>(I);
+
+impl<I: Iterator<Item = T> + Clone, T: fmt::Debug> fmt::Debug for DebugList<I> {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_list().entries(self.0.clone()).finish()
+    }
+}
+
+/// Formats the pairs of an iterator as a map, without collecting them.
+struct DebugMap<I>(I);
+
+impl<I, K, V> fmt::Debug for DebugMap<I>
+where
+    I: Iterator<Item = (K, V)> + Clone,
+    K: fmt::Debug,
+    V: fmt::Debug,
+{
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_map().entries(self.0.clone()).finish()
+    }
+}
+
+#[cfg(test)]
+mod tests;
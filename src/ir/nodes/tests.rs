@@ -0,0 +1,225 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+use crate::cdk::Schema;
+use crate::CloudformationParseTree;
+
+fn translate(template: &[u8]) -> CloudformationProgramIr {
+    CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        Schema::builtin(),
+    )
+    .unwrap()
+}
+
+/// The values of the trees of `ir`, whose children are in `ir.nodes`.
+fn roots(ir: &CloudformationProgramIr) -> impl Iterator<Item = &ResourceIr> {
+    let resources = ir.resources.iter().flat_map(|resource| {
+        let values = resource.metadata.iter().chain(&resource.update_policy);
+        values.chain(resource.properties.values())
+    });
+    let outputs = ir.outputs.iter().flat_map(|output| {
+        let values = std::iter::once(&output.value);
+        values.chain(&output.export)
+    });
+    resources.chain(outputs)
+}
+
+const TEMPLATE: &[u8] = br#"{
+    "Resources": {
+        "Widget": {
+            "Type": "Custom::Widget",
+            "Properties": {
+                "ServiceToken": "arn:aws:lambda:us-east-1:123456789012:function:widgets",
+                "Name": {
+                    "Fn::Sub": [
+                        "${Part}-${Part}",
+                        { "Part": { "Fn::Join": ["-", ["a", "b"]] } }
+                    ]
+                },
+                "Zone": { "Fn::If": ["IsProd", { "Fn::Base64": "prod" }, "dev"] }
+            }
+        }
+    },
+    "Conditions": {
+        "IsProd": { "Fn::Equals": ["prod", "prod"] }
+    },
+    "Outputs": {
+        "Name": {
+            "Value": { "Fn::Select": [0, ["first", "second"]] },
+            "Export": { "Name": { "Fn::Join": [":", ["widget", "name"]] } }
+        }
+    }
+}"#;
+
+#[test]
+fn test_trees_do_not_share_nodes() {
+    let ir = translate(TEMPLATE);
+
+    // The replacement of `Part` is copied for each of its uses.
+    let name = &ir.resources[0].properties["Name"];
+    assert_eq!(
+        format!("{:?}", ir.nodes.resolve(name)),
+        r#"Sub([Join("-", [String("a"), String("b")]), String("-"), Join("-", [String("a"), String("b")])])"#,
+    );
+    ir.nodes.check(roots(&ir)).unwrap();
+}
+
+#[test]
+fn test_resolve_formats_children() {
+    let mut nodes = NodeTable::default();
+    let when_true = nodes.push(ResourceIr::String("prod".into()));
+    let when_false = nodes.push(ResourceIr::Null);
+    let items = nodes.push_list([
+        ResourceIr::If("IsProd".into(), when_true, when_false),
+        ResourceIr::Number(1),
+    ]);
+
+    assert_eq!(
+        format!("{:?}", nodes.resolve(&ResourceIr::Join(",".into(), items))),
+        r#"Join(",", [If("IsProd", String("prod"), Null), Number(1)])"#,
+    );
+}
+
+#[test]
+fn test_copy_does_not_share_nodes() {
+    let mut builder = NodeBuilder::default();
+    let items = builder.push_list([ResourceIr::String("a".into())]);
+    let when_true = builder.push(ResourceIr::Join("-".into(), items));
+    let when_false = builder.push(ResourceIr::Null);
+    let node = ResourceIr::If("IsProd".into(), when_true, when_false);
+
+    let copy = builder.copy(&node);
+    let nodes = builder.into_table();
+    assert_ne!(copy, node);
+    assert_eq!(
+        format!("{:?}", nodes.resolve(&copy)),
+        format!("{:?}", nodes.resolve(&node)),
+    );
+    nodes.check([&node, &copy]).unwrap();
+}
+
+#[test]
+fn test_check_rejects_foreign_and_shared_nodes() {
+    let mut nodes = NodeTable::default();
+    let id = nodes.push(ResourceIr::Null);
+    let items = nodes.push_list([ResourceIr::Bool(true)]);
+
+    assert_eq!(
+        nodes.check([&ResourceIr::Base64(NodeId(5))]),
+        Err("node 5 is not in the node table (2 nodes)".into()),
+    );
+    assert_eq!(
+        nodes.check([&ResourceIr::If("IsProd".into(), id, id)]),
+        Err("node 0 is used twice".into()),
+    );
+    assert_eq!(
+        nodes.check([&ResourceIr::Sub(items), &ResourceIr::Sub(items)]),
+        Err("node 1 is used twice".into()),
+    );
+    let shifted = Offsets {
+        nodes: 1,
+        entries: 0,
+    }
+    .list(items);
+    assert_eq!(
+        nodes.check([&ResourceIr::Sub(shifted)]),
+        Err("nodes 2..3 are not in the node table (2 nodes)".into()),
+    );
+
+    // A node that contains itself is used twice.
+    let mut nodes = NodeTable::default();
+    let id = nodes.push(ResourceIr::Null);
+    nodes.put(id, ResourceIr::Base64(id));
+    assert_eq!(
+        nodes.check([&ResourceIr::Base64(id)]),
+        Err("node 0 is used twice".into()),
+    );
+}
+
+#[test]
+fn test_compact_drops_unused_nodes() {
+    let mut ir = translate(TEMPLATE);
+    let nodes = ir.nodes.clone();
+
+    // Translation already leaves the table compact.
+    assert_eq!(ir.compact_nodes(), nodes.len());
+    assert_eq!(ir.nodes, nodes);
+
+    ir.nodes.push(ResourceIr::String("unused".into()));
+    ir.nodes
+        .push_entries([("Unused".into(), ResourceIr::Bool(false))]);
+    assert_eq!(ir.compact_nodes(), nodes.len());
+    assert_eq!(ir.nodes, nodes);
+}
+
+#[test]
+fn test_compact_moves_children_first() {
+    let mut ir = translate(TEMPLATE);
+
+    // Move the trees after nodes nothing uses.
+    let mut nodes = NodeTable::default();
+    nodes.push_list(std::iter::repeat(ResourceIr::Null).take(3));
+    let offsets = nodes.append(mem::take(&mut ir.nodes));
+    assert!(!offsets.is_zero());
+    ir.nodes = nodes;
+    let before: Vec<_> = roots(&ir)
+        .map(|root| format!("{:?}", ir.nodes.resolve(root)))
+        .collect();
+
+    ir.compact_nodes();
+    let after: Vec<_> = roots(&ir)
+        .map(|root| format!("{:?}", ir.nodes.resolve(root)))
+        .collect();
+    assert_eq!(after, before);
+
+    // Every child comes before its parent, and the trees follow each other.
+    let mut next = 0;
+    for root in roots(&ir) {
+        let mut ids = Vec::new();
+        children(&ir.nodes, root, None, &mut ids);
+        ids.sort_unstable();
+        assert_eq!(ids, (next..next + ids.len()).collect::<Vec<_>>());
+        next += ids.len();
+    }
+    assert_eq!(next, ir.nodes.nodes.len());
+}
+
+/// Collects the IDs of the descendants of `node`, checking that they come
+/// before the node `parent` they are in.
+fn children(nodes: &NodeTable, node: &ResourceIr, parent: Option<NodeId>, into: &mut Vec<usize>) {
+    let child = |id: NodeId, into: &mut Vec<usize>| {
+        if let Some(parent) = parent {
+            assert!(id < parent, "{id:?} comes after {parent:?}");
+        }
+        into.push(id.index());
+        children(nodes, &nodes[id], Some(id), into);
+    };
+    match node {
+        ResourceIr::Array(_, list) | ResourceIr::Join(_, list) | ResourceIr::Sub(list) => {
+            for index in list.range() {
+                child(NodeId(index as u32), into);
+            }
+        }
+        ResourceIr::Object(_, list) => {
+            for (_, value) in nodes.entries(*list) {
+                children(nodes, value, parent, into);
+            }
+        }
+        ResourceIr::If(_, first, second) | ResourceIr::Map(_, first, second) => {
+            child(*first, into);
+            child(*second, into);
+        }
+        ResourceIr::Split(_, id)
+        | ResourceIr::Base64(id)
+        | ResourceIr::ImportValue(id)
+        | ResourceIr::GetAZs(id)
+        | ResourceIr::Select(_, id) => child(*id, into),
+        ResourceIr::Cidr(ip_block, count, cidr_bits) => {
+            child(*ip_block, into);
+            child(*count, into);
+            child(*cidr_bits, into);
+        }
+        _ => {}
+    }
+}
@@ -11,7 +11,7 @@ use crate::Error;
 
 use super::ReferenceOrigins;
 
-#[derive(Debug, PartialEq)]
+#[derive(Debug, PartialEq, serde::Serialize, serde::Deserialize)]
 pub struct OutputInstruction {
     pub name: String,
     pub export: Option<ResourceIr>,
@@ -22,7 +22,7 @@ pub struct OutputInstruction {
 
 impl OutputInstruction {
     pub(super) fn from(
-        parse_tree: IndexMap<String, Output, Hasher>,
+        parse_tree: IndexMap<String, Output<'_>, Hasher>,
         schema: &Schema,
         origins: &ReferenceOrigins,
     ) -> Result<Vec<Self>, Error> {
@@ -32,7 +32,7 @@ impl OutputInstruction {
             let resource_translator = ResourceTranslator {
                 schema,
                 origins,
-                value_type: Some(TypeReference::Primitive(Primitive::Json)),
+                value_type: Some(&TypeReference::Primitive(Primitive::Json)),
             };
 
             let value = resource_translator.translate(output.value)?;
@@ -0,0 +1,291 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Translation of a parse tree to the IR across threads, available with the
+//! `parallel` feature.
+//!
+//! The resources of the template are split into contiguous chunks translated
+//! on scoped threads, while the conditions and outputs are translated on
+//! threads of their own. Each thread works on a [`ReferenceOrigins::fork`],
+//! which shares the names declared by the template and interns undeclared ones
+//! into a table of its own. Once every thread is done, the forks are joined
+//! back in template order (conditions, resources, outputs), and the symbols
+//! they handed out are renumbered to match the ones a sequential translation
+//! would have produced, so the IR does not depend on thread scheduling. The
+//! types the forks interned are merged the same way, and the nodes they pushed
+//! are moved after those of the forks joined before them.
+
+use std::cell::RefCell;
+use std::collections::BTreeSet;
+use std::mem;
+use std::num::NonZeroUsize;
+use std::panic;
+use std::sync::Arc;
+use std::thread::{self, ScopedJoinHandle};
+
+use super::conditions::ConditionInstruction;
+use super::importer::ImportInstruction;
+use super::nodes::{EntryList, NodeId, NodeList, NodeTable, Offsets};
+use super::outputs::OutputInstruction;
+use super::reference::Reference;
+use super::resources::ResourceInstruction;
+use super::symbols::Symbol;
+use super::types::TypeId;
+use super::visit::VisitorMut;
+use super::{assemble, CloudformationProgramIr, ReferenceOrigins, Sections};
+use crate::cdk::Schema;
+use crate::timings::Timings;
+use crate::{CloudformationParseTree, Error};
+
+/// The fewest resources worth handing to a thread of their own.
+pub(super) const MIN_CHUNK_LEN: usize = 128;
+
+impl CloudformationProgramIr {
+    /// Like [`CloudformationProgramIr::from`], translating the resources of
+    /// the template on up to `threads` threads, and the conditions and outputs
+    /// alongside them. The result is the same as that of a sequential
+    /// translation.
+    pub fn from_parallel(
+        parse_tree: CloudformationParseTree<'_>,
+        schema: &Schema,
+        threads: NonZeroUsize,
+    ) -> Result<CloudformationProgramIr, Error> {
+        translate(
+            parse_tree,
+            schema,
+            threads,
+            MIN_CHUNK_LEN,
+            &mut Timings::new(),
+        )
+    }
+}
+
+pub(super) fn translate(
+    mut parse_tree: CloudformationParseTree<'_>,
+    schema: &Schema,
+    threads: NonZeroUsize,
+    min_chunk_len: usize,
+    timings: &mut Timings,
+) -> Result<CloudformationProgramIr, Error> {
+    let mut origins = timings.time(
+        "ReferenceOrigins::new",
+        || ReferenceOrigins::new(&parse_tree),
+        |origins| origins.declared.declarations.len(),
+    );
+    let conditions = mem::take(&mut parse_tree.conditions);
+    let outputs = mem::take(&mut parse_tree.outputs);
+    let resources = mem::take(&mut parse_tree.resources);
+
+    let resource_count = resources.len();
+    let chunk_len = resource_count
+        .div_ceil(threads.get())
+        .max(min_chunk_len)
+        .max(1);
+
+    let translate_all = || {
+        thread::scope(|scope| {
+            let conditions = {
+                let origins = origins.fork();
+                scope.spawn(move || {
+                    let conditions = ConditionInstruction::from(conditions, &origins);
+                    (conditions, origins)
+                })
+            };
+            let outputs = {
+                let origins = origins.fork();
+                scope.spawn(move || {
+                    let outputs = OutputInstruction::from(outputs, schema, &origins);
+                    (outputs, origins)
+                })
+            };
+
+            let imports = ImportInstruction::from(&resources);
+
+            let mut entries = resources.into_iter();
+            let mut chunks = Vec::with_capacity(entries.len().div_ceil(chunk_len));
+            while entries.len() > 0 {
+                let chunk: Vec<_> = entries.by_ref().take(chunk_len).collect();
+                let origins = origins.fork();
+                chunks.push(scope.spawn(move || {
+                    let resources = ResourceInstruction::translate(chunk, schema, &origins);
+                    (resources, origins)
+                }));
+            }
+
+            (
+                join(conditions),
+                chunks.into_iter().map(join).collect::<Vec<_>>(),
+                join(outputs),
+                imports,
+            )
+        })
+    };
+    let (conditions, resources, outputs, imports) =
+        timings.time("translate", translate_all, |_| resource_count);
+
+    // Forks are joined in the order a sequential translation would have
+    // interned their undeclared names.
+    let (conditions, fork) = conditions;
+    let mut renumber = origins.join(fork);
+    let mut conditions = conditions?;
+    if !renumber.is_identity() {
+        for condition in &mut conditions {
+            renumber.visit_condition_ir_mut(&mut condition.value);
+        }
+    }
+
+    let imports = imports?;
+
+    let mut translated = Vec::with_capacity(resource_count);
+    for (chunk, fork) in resources {
+        let mut renumber = origins.join(fork);
+        let mut chunk = chunk?;
+        if !renumber.is_identity() {
+            let nodes = origins.nodes.get_mut().table_mut();
+            chunk
+                .iter_mut()
+                .for_each(|resource| renumber.resource(nodes, resource));
+        }
+        translated.append(&mut chunk);
+    }
+
+    let (outputs, fork) = outputs;
+    let mut renumber = origins.join(fork);
+    let mut outputs = outputs?;
+    if !renumber.is_identity() {
+        let nodes = origins.nodes.get_mut().table_mut();
+        for output in &mut outputs {
+            renumber.visit_resource_ir_mut(nodes, &mut output.value);
+            if let Some(export) = &mut output.export {
+                renumber.visit_resource_ir_mut(nodes, export);
+            }
+        }
+    }
+
+    let sections = Sections {
+        conditions,
+        imports,
+        resources: translated,
+        outputs,
+    };
+    assemble(parse_tree, sections, origins, timings)
+}
+
+/// Waits for a translation thread, resuming its panic if it had one.
+fn join<T>(handle: ScopedJoinHandle<'_, T>) -> T {
+    handle
+        .join()
+        .unwrap_or_else(|payload| panic::resume_unwind(payload))
+}
+
+impl ReferenceOrigins {
+    /// Creates a table sharing the declared names of `self`, with an empty
+    /// table of undeclared names, for use by another thread.
+    fn fork(&self) -> Self {
+        Self {
+            declared: Arc::clone(&self.declared),
+            undeclared: RefCell::new(self.declared.symbols.following()),
+            substitutions: RefCell::default(),
+            types: RefCell::default(),
+            nodes: RefCell::default(),
+        }
+    }
+
+    /// Adds the undeclared names, the types and the nodes of `fork` to
+    /// `self`, and returns how to renumber the symbols, type IDs and nodes
+    /// `fork` handed out for them.
+    fn join(&mut self, fork: Self) -> Renumber {
+        let nodes = fork.nodes.into_inner().into_table();
+        Renumber {
+            first: self.declared.symbols.len(),
+            symbols: self
+                .undeclared
+                .get_mut()
+                .append(fork.undeclared.into_inner()),
+            types: self.types.get_mut().append(fork.types.into_inner()),
+            nodes: self.nodes.get_mut().table_mut().append(nodes),
+        }
+    }
+}
+
+/// Maps the symbols a fork handed out for undeclared names (numbered from
+/// `first`), and the type IDs and nodes it handed out, to the ones they
+/// received when the fork was joined.
+struct Renumber {
+    first: usize,
+    symbols: Vec<Symbol>,
+    types: Vec<TypeId>,
+    nodes: Offsets,
+}
+
+impl Renumber {
+    fn is_identity(&self) -> bool {
+        self.symbols
+            .iter()
+            .enumerate()
+            .all(|(index, symbol)| symbol.index() == self.first + index)
+            && self
+                .types
+                .iter()
+                .enumerate()
+                .all(|(index, id)| id.index() == index)
+            && self.nodes.is_zero()
+    }
+
+    #[inline]
+    fn symbol(&self, symbol: Symbol) -> Symbol {
+        match symbol.index().checked_sub(self.first) {
+            Some(index) => self.symbols[index],
+            None => symbol,
+        }
+    }
+
+    fn resource(&mut self, nodes: &mut NodeTable, resource: &mut ResourceInstruction) {
+        for dependency in &mut resource.dependencies {
+            *dependency = self.symbol(*dependency);
+        }
+        resource.references = resource
+            .references
+            .iter()
+            .map(|symbol| self.symbol(*symbol))
+            .collect::<BTreeSet<_>>();
+
+        let values = resource.properties.values_mut();
+        for value in values
+            .chain(&mut resource.metadata)
+            .chain(&mut resource.update_policy)
+        {
+            self.visit_resource_ir_mut(nodes, value);
+        }
+    }
+}
+
+impl VisitorMut for Renumber {
+    #[inline]
+    fn visit_reference_mut(&mut self, reference: &mut Reference) {
+        reference.symbol = self.symbol(reference.symbol);
+    }
+
+    #[inline]
+    fn visit_type_mut(&mut self, id: &mut TypeId) {
+        *id = self.types[id.index()];
+    }
+
+    #[inline]
+    fn visit_node_mut(&mut self, id: &mut NodeId) {
+        *id = self.nodes.node(*id);
+    }
+
+    #[inline]
+    fn visit_list_mut(&mut self, list: &mut NodeList) {
+        *list = self.nodes.list(*list);
+    }
+
+    #[inline]
+    fn visit_entries_mut(&mut self, list: &mut EntryList) {
+        *list = self.nodes.entries(*list);
+    }
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,67 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use std::fs;
+use std::path::Path;
+
+use super::*;
+
+fn translate_both(template: &[u8]) -> (String, String) {
+    let sequential = CloudformationProgramIr::from_sequential(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        Schema::builtin(),
+    );
+    let parallel = translate(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        Schema::builtin(),
+        NonZeroUsize::new(3).unwrap(),
+        1,
+        &mut Timings::new(),
+    );
+    (format!("{sequential:?}"), format!("{parallel:?}"))
+}
+
+#[test]
+fn test_matches_sequential_translation() {
+    let cases = Path::new(env!("CARGO_MANIFEST_DIR")).join("cdk-from-cfn-testing/cases");
+    for case in fs::read_dir(cases).unwrap() {
+        let path = case.unwrap().path();
+        let Ok(template) = fs::read(path.join("template.json")) else {
+            continue;
+        };
+
+        let (sequential, parallel) = translate_both(&template);
+        assert_eq!(sequential, parallel, "{}", path.display());
+    }
+}
+
+#[test]
+fn test_undeclared_names_are_numbered_in_template_order() {
+    let template = br#"{
+        "Conditions": {
+            "IsProd": { "Fn::Equals": [{ "Ref": "Stage" }, "prod"] }
+        },
+        "Resources": {
+            "First": {
+                "Type": "Custom::Thing",
+                "Properties": { "ServiceToken": "arn:aws:lambda:token", "Other": { "Ref": "Missing" } }
+            },
+            "Second": {
+                "Type": "Custom::Thing",
+                "Properties": { "ServiceToken": "arn:aws:lambda:token" }
+            }
+        },
+        "Outputs": {
+            "Out": { "Value": { "Ref": "Elsewhere" } }
+        }
+    }"#;
+
+    let (sequential, parallel) = translate_both(template);
+    assert!(sequential.contains("unknown logical id: Missing"));
+    assert_eq!(sequential, parallel);
+
+    let template =
+        String::from_utf8_lossy(template).replace(r#""Ref": "Missing""#, r#""Ref": "Second""#);
+    let (sequential, parallel) = translate_both(template.as_bytes());
+    assert!(sequential.starts_with("Ok("), "{sequential}");
+    assert_eq!(sequential, parallel);
+}
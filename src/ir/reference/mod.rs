@@ -1,23 +1,24 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
-#[derive(Debug, Clone, PartialEq)]
+use super::symbols::Symbol;
+
+// A reference to a named entity of the template. The name itself lives in the
+// `SymbolTable` of the IR, and is looked up by the synthesizers.
+#[derive(Debug, Clone, PartialEq, serde::Serialize, serde::Deserialize)]
 pub struct Reference {
     pub origin: Origin,
-    pub name: String,
+    pub symbol: Symbol,
 }
 
 impl Reference {
     #[inline]
-    pub fn new(name: &str, origin: Origin) -> Reference {
-        Reference {
-            name: name.to_string(),
-            origin,
-        }
+    pub const fn new(symbol: Symbol, origin: Origin) -> Reference {
+        Reference { symbol, origin }
     }
 }
 
 // Origin for the ReferenceTable
-#[derive(Debug, Clone, PartialEq)]
+#[derive(Debug, Clone, PartialEq, serde::Serialize, serde::Deserialize)]
 pub enum Origin {
     CfnParameter,
     Parameter,
@@ -41,7 +42,7 @@ impl From<PseudoParameter> for Origin {
     }
 }
 
-#[derive(Clone, Copy, Debug, PartialEq)]
+#[derive(Clone, Copy, Debug, PartialEq, serde::Serialize, serde::Deserialize)]
 pub enum PseudoParameter {
     Partition,
     Region,
@@ -53,16 +54,14 @@ pub enum PseudoParameter {
 }
 
 impl PseudoParameter {
-    pub(super) fn try_from(name: &str) -> Option<Self> {
-        match name {
-            "AWS::AccountId" => Some(PseudoParameter::AccountId),
-            "AWS::NotificationARNs" => Some(PseudoParameter::NotificationArns),
-            "AWS::Partition" => Some(PseudoParameter::Partition),
-            "AWS::Region" => Some(PseudoParameter::Region),
-            "AWS::StackId" => Some(PseudoParameter::StackId),
-            "AWS::StackName" => Some(PseudoParameter::StackName),
-            "AWS::URLSuffix" => Some(PseudoParameter::URLSuffix),
-            _ => None,
-        }
-    }
+    // Every pseudo parameter, along with the name templates refer to it by.
+    pub(super) const ALL: [(&'static str, PseudoParameter); 7] = [
+        ("AWS::AccountId", PseudoParameter::AccountId),
+        ("AWS::NotificationARNs", PseudoParameter::NotificationArns),
+        ("AWS::Partition", PseudoParameter::Partition),
+        ("AWS::Region", PseudoParameter::Region),
+        ("AWS::StackId", PseudoParameter::StackId),
+        ("AWS::StackName", PseudoParameter::StackName),
+        ("AWS::URLSuffix", PseudoParameter::URLSuffix),
+    ];
 }
@@ -1,16 +1,20 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
-use std::collections::{BTreeSet, HashMap, HashSet};
+use std::borrow::Cow;
+use std::collections::BTreeSet;
 use std::convert::TryInto;
 use std::fmt;
 use std::ops::Deref;
 
 use base64::Engine;
 use indexmap::IndexMap;
-use topological_sort::TopologicalSort;
 
+use crate::ir::nodes::{EntryList, NodeId, NodeList, NodeTable};
 use crate::ir::reference::{Origin, Reference};
 use crate::ir::sub::{sub_parse_tree, SubValue};
+use crate::ir::symbols::{Symbol, SymbolTable};
+use crate::ir::types::TypeId;
+use crate::ir::visit::{LogicalIdReferences, Visitor};
 use crate::parser::resource::{
     DeletionPolicy, IntrinsicFunction, ResourceAttributes, ResourceValue,
 };
@@ -19,14 +23,19 @@ use crate::Error;
 use crate::Hasher;
 use crate::{cdk::*, CFCResult};
 
+use super::graph::{describe_cycle, DependencyGraph};
 use super::ReferenceOrigins;
 
 // ResourceIr is the intermediate representation of a nested stack resource.
 // It is slightly more refined than the ResourceValue, in some cases always resolving
 // known types. It also decorates objects with the necessary information for a separate
 // system to output all the necessary internal structures appropriately.
-#[derive(Clone, Debug, PartialEq)]
+//
+// The values a node contains are stored in the `NodeTable` of the IR, which
+// its variants refer to by ID.
+#[derive(Clone, Debug, Default, PartialEq, serde::Serialize, serde::Deserialize)]
 pub enum ResourceIr {
+    #[default]
     Null,
     Bool(bool),
     Number(i64),
@@ -34,31 +43,38 @@ pub enum ResourceIr {
     String(String),
 
     // Higher level resolutions
-    Array(TypeReference, Vec<ResourceIr>),
-    Object(TypeReference, IndexMap<String, ResourceIr, Hasher>),
+    // Typed by their item type and their own type, interned into the
+    // `TypeTable` of the IR.
+    Array(TypeId, NodeList),
+    Object(TypeId, EntryList),
 
     // Rest is meta functions
     // https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/intrinsic-function-reference-conditions.html#w2ab1c33c28c21c29
-    If(String, Box<ResourceIr>, Box<ResourceIr>),
-    Join(String, Vec<ResourceIr>),
-    Split(String, Box<ResourceIr>),
+    If(String, NodeId, NodeId),
+    Join(String, NodeList),
+    Split(String, NodeId),
     Ref(Reference),
-    Sub(Vec<ResourceIr>),
-    Map(String, Box<ResourceIr>, Box<ResourceIr>),
-    Base64(Box<ResourceIr>),
-    ImportValue(Box<ResourceIr>),
-    GetAZs(Box<ResourceIr>),
-    Select(usize, Box<ResourceIr>),
-    Cidr(Box<ResourceIr>, Box<ResourceIr>, Box<ResourceIr>),
+    Sub(NodeList),
+    Map(String, NodeId, NodeId),
+    Base64(NodeId),
+    ImportValue(NodeId),
+    GetAZs(NodeId),
+    Select(usize, NodeId),
+    Cidr(NodeId, NodeId, NodeId),
 }
 
+const JSON: &TypeReference = &TypeReference::Primitive(Primitive::Json);
+const STRING: &TypeReference = &TypeReference::Primitive(Primitive::String);
+const UNKNOWN: &TypeReference = &TypeReference::Primitive(Primitive::Unknown);
+
 // ResourceTranslationInputs is a place to store all the intermediate recursion
-// for resource types.
+// for resource types. The value type is borrowed from the schema (or is one of
+// the constants above), so translating does not copy any of the schema.
 #[derive(Clone)]
 pub(super) struct ResourceTranslator<'a, 'b> {
     pub schema: &'a Schema,
     pub origins: &'b ReferenceOrigins,
-    pub value_type: Option<TypeReference>,
+    pub value_type: Option<&'a TypeReference>,
 }
 
 impl<'a, 'b> ResourceTranslator<'a, 'b> {
@@ -66,11 +82,11 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
         Self {
             schema,
             origins,
-            value_type: Some(TypeReference::Primitive(Primitive::Json)),
+            value_type: Some(JSON),
         }
     }
 
-    pub(super) fn translate(&self, resource_value: ResourceValue) -> Result<ResourceIr, Error> {
+    pub(super) fn translate(&self, resource_value: ResourceValue<'_>) -> Result<ResourceIr, Error> {
         match resource_value {
             ResourceValue::Null => Ok(ResourceIr::Null),
             ResourceValue::Bool(b) => Ok(ResourceIr::Bool(b)),
@@ -100,45 +116,45 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
 
                             Ok(ir)
                         }
-                        _ => Ok(ResourceIr::String(s)),
+                        _ => Ok(ResourceIr::String(s.into_owned())),
                     };
                 }
-                Ok(ResourceIr::String(s))
+                Ok(ResourceIr::String(s.into_owned()))
             }
             ResourceValue::Array(parse_resource_vec) => {
-                let item_type = match &self.value_type {
-                    Some(TypeReference::List(item_type)) => Some(item_type.deref().clone()),
-                    value_type => value_type.clone(),
-                };
-                let array_ir = {
-                    let item_translator = Self {
-                        schema: self.schema,
-                        origins: self.origins,
-                        value_type: item_type.clone(),
-                    };
-
-                    let mut array_ir = Vec::with_capacity(parse_resource_vec.len());
-                    for parse_resource in parse_resource_vec {
-                        array_ir.push(item_translator.translate(parse_resource)?);
-                    }
-                    array_ir
+                let item_type = match self.value_type {
+                    Some(TypeReference::List(item_type)) => Some(item_type.deref()),
+                    value_type => value_type,
                 };
+                let array_ir = Self {
+                    schema: self.schema,
+                    origins: self.origins,
+                    value_type: item_type,
+                }
+                .translate_list(parse_resource_vec)?;
 
-                Ok(ResourceIr::Array(item_type.unwrap_or_default(), array_ir))
+                Ok(ResourceIr::Array(
+                    self.origins.type_id(item_type.unwrap_or(UNKNOWN)),
+                    array_ir,
+                ))
             }
             ResourceValue::Object(o) => {
                 let mut is_resource_ir_array = false;
-                let property_bag: Box<dyn PropertyBag> = match &self.value_type {
-                    Some(TypeReference::Named(name)) => {
-                        Box::new(self.schema.type_named(name).cloned().unwrap())
+                let map_of;
+                let property_bag: &dyn PropertyBag = match self.value_type {
+                    Some(TypeReference::Named(name)) => self.schema.type_named(name).unwrap(),
+                    Some(TypeReference::Map(item_type)) => {
+                        map_of = MapOf(item_type);
+                        &map_of
                     }
-                    Some(TypeReference::Map(item_type)) => Box::new(MapOf(item_type)),
                     Some(TypeReference::List(item_type)) => {
                         is_resource_ir_array = true;
-                        Box::new(MapOf(item_type))
+                        map_of = MapOf(item_type);
+                        &map_of
                     }
                     Some(TypeReference::Primitive(Primitive::Json)) => {
-                        Box::new(MapOf(&TypeReference::Primitive(Primitive::Json)))
+                        map_of = MapOf(JSON);
+                        &map_of
                     }
                     other => {
                         return Err(Error::ResourceTranslationError {
@@ -149,27 +165,26 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
                     }
                 };
 
-                let mut new_hash = IndexMap::with_capacity_and_hasher(o.len(), Hasher::default());
+                let start = self.origins.nodes.borrow().entries_staged();
                 for (s, rv) in o {
-                    let property_type = property_bag.property(&s);
-                    let property_ir = Self {
+                    let property_ir = ResourceTranslator {
                         schema: self.schema,
                         origins: self.origins,
-                        value_type: property_type.map(|pt| pt.value_type),
+                        value_type: property_bag.property_type(&s),
                     }
                     .translate(rv)?;
 
-                    new_hash.insert(s, property_ir);
+                    let mut nodes = self.origins.nodes.borrow_mut();
+                    nodes.stage_entry(s.into_owned(), property_ir);
                 }
+                let entries = self.origins.nodes.borrow_mut().push_entries(start);
 
-                let resource_ir =
-                    ResourceIr::Object(self.value_type.clone().unwrap_or_default(), new_hash);
+                let type_id = self.origins.type_id(self.value_type.unwrap_or(UNKNOWN));
+                let resource_ir = ResourceIr::Object(type_id, entries);
 
                 if is_resource_ir_array {
-                    return Ok(ResourceIr::Array(
-                        self.value_type.clone().unwrap_or_default(),
-                        Vec::from([resource_ir]),
-                    ));
+                    let items = self.origins.nodes.borrow_mut().push_list([resource_ir]);
+                    return Ok(ResourceIr::Array(type_id, items));
                 }
 
                 Ok(resource_ir)
@@ -177,13 +192,22 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
             ResourceValue::IntrinsicFunction(intrinsic) => {
                 match *intrinsic {
                     IntrinsicFunction::Sub { string, replaces } => {
+                        // Without replacements, the translation only depends
+                        // on the string, which large templates repeat.
+                        if replaces.is_none() {
+                            if let Some(parts) = self.origins.substitutions.borrow().get(&*string) {
+                                let mut nodes = self.origins.nodes.borrow_mut();
+                                return Ok(ResourceIr::Sub(nodes.push_list(parts.iter().cloned())));
+                            }
+                        }
+
                         let mut excess_map = IndexMap::<_, _, Hasher>::default();
                         if let Some(replaces) = replaces {
                             match replaces {
                                 ResourceValue::Object(obj) => {
                                     excess_map.reserve(obj.len());
                                     for (key, val) in obj.into_iter() {
-                                        excess_map.insert(key.to_string(), self.translate(val)?);
+                                        excess_map.insert(key.into_owned(), self.translate(val)?);
                                     }
                                 }
                                 _ => {
@@ -196,84 +220,97 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
                         }
 
                         let vars = sub_parse_tree(&string)?;
-                        let r = vars
-                            .into_iter()
-                            .map(|x| match x {
-                                SubValue::String(x) => ResourceIr::String(x),
-                                SubValue::Variable(x) => match excess_map.get(&x) {
-                                    None => ResourceIr::Ref(self.translate_ref(&x)),
-                                    Some(x) => x.clone(),
+                        if excess_map.is_empty() {
+                            let r: Vec<_> = vars
+                                .into_iter()
+                                .map(|x| match x {
+                                    SubValue::String(x) => ResourceIr::String(x.into_owned()),
+                                    SubValue::Variable(x) => ResourceIr::Ref(self.translate_ref(x)),
+                                })
+                                .collect();
+                            let parts =
+                                self.origins.nodes.borrow_mut().push_list(r.iter().cloned());
+                            self.origins
+                                .substitutions
+                                .borrow_mut()
+                                .insert(string.into_owned().into_boxed_str(), r);
+                            return Ok(ResourceIr::Sub(parts));
+                        }
+
+                        // Replacements can be used more than once, and every
+                        // use gets a copy of the nodes of the value.
+                        let start = self.origins.nodes.borrow().items_staged();
+                        for x in vars {
+                            let part = match x {
+                                SubValue::String(x) => ResourceIr::String(x.into_owned()),
+                                SubValue::Variable(x) => match excess_map.get(x) {
+                                    None => ResourceIr::Ref(self.translate_ref(x)),
+                                    Some(x) => self.origins.nodes.borrow_mut().copy(x),
                                 },
-                            })
-                            .collect();
-                        Ok(ResourceIr::Sub(r))
+                            };
+                            self.origins.nodes.borrow_mut().stage_item(part);
+                        }
+                        Ok(ResourceIr::Sub(
+                            self.origins.nodes.borrow_mut().push_items(start),
+                        ))
                     }
                     IntrinsicFunction::FindInMap {
                         map_name,
                         top_level_key,
                         second_level_key,
                     } => {
-                        let rt = self.with_value_type(TypeReference::Primitive(Primitive::String));
-                        let top_level_key_str = rt.translate(top_level_key)?;
-                        let second_level_key_str = rt.translate(second_level_key)?;
+                        let rt = self.with_value_type(STRING);
+                        let top_level_key_str = rt.translate_node(top_level_key)?;
+                        let second_level_key_str = rt.translate_node(second_level_key)?;
                         Ok(ResourceIr::Map(
-                            map_name,
-                            Box::new(top_level_key_str),
-                            Box::new(second_level_key_str),
+                            map_name.into_owned(),
+                            top_level_key_str,
+                            second_level_key_str,
                         ))
                     }
                     IntrinsicFunction::GetAtt {
                         logical_name,
                         attribute_name,
-                    } => Ok(ResourceIr::Ref(Reference::new(
-                        &logical_name,
-                        Origin::GetAttribute {
-                            attribute: attribute_name.replace('.', ""),
-                            conditional: self.origins.is_conditional(&logical_name),
-                            is_custom_resource: self.origins.is_custom_resource(&logical_name),
-                        },
-                    ))),
+                    } => Ok(ResourceIr::Ref(
+                        self.origins
+                            .get_attribute(&logical_name, attribute_name.replace('.', "")),
+                    )),
                     IntrinsicFunction::If {
                         condition_name,
                         value_if_true,
                         value_if_false,
                     } => {
-                        let value_if_true = self.translate(value_if_true)?;
-                        let value_if_false = self.translate(value_if_false)?;
+                        let value_if_true = self.translate_node(value_if_true)?;
+                        let value_if_false = self.translate_node(value_if_false)?;
 
                         Ok(ResourceIr::If(
-                            condition_name,
-                            Box::new(value_if_true),
-                            Box::new(value_if_false),
+                            condition_name.into_owned(),
+                            value_if_true,
+                            value_if_false,
                         ))
                     }
                     IntrinsicFunction::Join { sep, list } => {
                         let irs = match list {
-                            ResourceValue::Array(list) => {
-                                let mut irs = Vec::with_capacity(list.len());
-                                for item in list {
-                                    irs.push(self.translate(item)?);
-                                }
-                                irs
-                            }
-                            list => vec![self.translate(list)?],
+                            ResourceValue::Array(list) => self.translate_list(list)?,
+                            list => self.translate_list([list])?,
                         };
 
-                        Ok(ResourceIr::Join(sep, irs))
+                        Ok(ResourceIr::Join(sep.into_owned(), irs))
                     }
                     IntrinsicFunction::Split { sep, string } => {
-                        let ir = self.translate(string)?;
+                        let ir = self.translate_node(string)?;
 
-                        Ok(ResourceIr::Split(sep, Box::new(ir)))
+                        Ok(ResourceIr::Split(sep.into_owned(), ir))
                     }
                     IntrinsicFunction::Ref(x) => Ok(ResourceIr::Ref(self.translate_ref(&x))),
                     IntrinsicFunction::Base64(x) => match x {
                         ResourceValue::String(b64) => {
-                            match base64::engine::general_purpose::STANDARD.decode(&b64) {
+                            match base64::engine::general_purpose::STANDARD.decode(b64.as_bytes()) {
                                 Ok(decoded) => match String::from_utf8(decoded) {
                                     Ok(text) => Ok(ResourceIr::String(text)),
                                     Err(_) => {
-                                        Ok(ResourceIr::Base64(Box::new(ResourceIr::String(b64))))
+                                        let ir = ResourceIr::String(b64.into_owned());
+                                        Ok(ResourceIr::Base64(self.push(ir)))
                                     }
                                 },
                                 Err(cause) => Err(Error::ResourceTranslationError {
@@ -282,13 +319,13 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
                             }
                         }
                         x => {
-                            let ir = self.translate(x)?;
-                            Ok(ResourceIr::Base64(Box::new(ir)))
+                            let ir = self.translate_node(x)?;
+                            Ok(ResourceIr::Base64(ir))
                         }
                     },
                     IntrinsicFunction::ImportValue(x) => {
-                        let ir = self.translate(x)?;
-                        Ok(ResourceIr::ImportValue(Box::new(ir)))
+                        let ir = self.translate_node(x)?;
+                        Ok(ResourceIr::ImportValue(ir))
                     }
                     IntrinsicFunction::Select { index, list } => {
                         let index = match index {
@@ -315,27 +352,23 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
                             }
                         };
 
-                        let obj = self.translate(list)?;
-                        Ok(ResourceIr::Select(index, Box::new(obj)))
+                        let obj = self.translate_node(list)?;
+                        Ok(ResourceIr::Select(index, obj))
                     }
                     IntrinsicFunction::GetAZs(x) => {
-                        let ir = self.translate(x)?;
-                        Ok(ResourceIr::GetAZs(Box::new(ir)))
+                        let ir = self.translate_node(x)?;
+                        Ok(ResourceIr::GetAZs(ir))
                     }
                     IntrinsicFunction::Cidr {
                         ip_block,
                         count,
                         cidr_bits,
                     } => {
-                        let rt = self.with_value_type(TypeReference::Primitive(Primitive::String));
-                        let ip_block_str = rt.translate(ip_block)?;
-                        let count_str = rt.translate(count)?;
-                        let cidr_bits_str = rt.translate(cidr_bits)?;
-                        Ok(ResourceIr::Cidr(
-                            Box::new(ip_block_str),
-                            Box::new(count_str),
-                            Box::new(cidr_bits_str),
-                        ))
+                        let rt = self.with_value_type(STRING);
+                        let ip_block_str = rt.translate_node(ip_block)?;
+                        let count_str = rt.translate_node(count)?;
+                        let cidr_bits_str = rt.translate_node(cidr_bits)?;
+                        Ok(ResourceIr::Cidr(ip_block_str, count_str, cidr_bits_str))
                     }
 
                     unimplemented => unimplemented!("{unimplemented:?}"),
@@ -344,21 +377,39 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
         }
     }
 
+    /// Translates `resource_value` into a node of the table of the IR.
+    fn translate_node(&self, resource_value: ResourceValue<'_>) -> Result<NodeId, Error> {
+        let ir = self.translate(resource_value)?;
+        Ok(self.push(ir))
+    }
+
+    /// Translates `resource_values` into nodes of the table of the IR, next
+    /// to each other.
+    fn translate_list<'v>(
+        &self,
+        resource_values: impl IntoIterator<Item = ResourceValue<'v>>,
+    ) -> Result<NodeList, Error> {
+        let start = self.origins.nodes.borrow().items_staged();
+        for resource_value in resource_values {
+            let item = self.translate(resource_value)?;
+            self.origins.nodes.borrow_mut().stage_item(item);
+        }
+        Ok(self.origins.nodes.borrow_mut().push_items(start))
+    }
+
+    #[inline]
+    fn push(&self, ir: ResourceIr) -> NodeId {
+        self.origins.nodes.borrow_mut().push(ir)
+    }
+
     fn translate_ref(&self, x: &str) -> Reference {
-        if let Some(origin) = self.origins.for_ref(x) {
-            Reference::new(x, origin)
+        if let Some(reference) = self.origins.for_ref(x) {
+            reference
         } else if let Some((name, attribute)) = x.split_once('.') {
-            Reference::new(
-                name,
-                Origin::GetAttribute {
-                    attribute: attribute.into(),
-                    conditional: self.origins.is_conditional(name),
-                    is_custom_resource: self.origins.is_custom_resource(name),
-                },
-            )
+            self.origins.get_attribute(name, attribute.into())
         } else {
             Reference::new(
-                x,
+                self.origins.symbol(x),
                 Origin::LogicalId {
                     conditional: false,
                     is_custom_resource: false,
@@ -368,7 +419,7 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
     }
 
     #[inline]
-    fn with_value_type(&self, value_type: TypeReference) -> Self {
+    fn with_value_type(&self, value_type: &'a TypeReference) -> Self {
         Self {
             schema: self.schema,
             origins: self.origins,
@@ -380,38 +431,54 @@ impl<'a, 'b> ResourceTranslator<'a, 'b> {
 #[derive(Clone)]
 struct MapOf<'a>(&'a TypeReference);
 impl PropertyBag for MapOf<'_> {
-    fn property(&self, key: &str) -> Option<Property> {
-        Some(Property {
-            name: voca_rs::case::camel_case(key).into(),
-            required: false,
-            value_type: self.0.clone(),
-        })
+    fn property_type(&self, _: &str) -> Option<&TypeReference> {
+        Some(self.0)
     }
 }
 
 // ResourceInstruction is all the information needed to output a resource assignment.
-#[derive(Clone, Debug, PartialEq)]
+#[derive(Clone, Debug, PartialEq, serde::Serialize, serde::Deserialize)]
 pub struct ResourceInstruction {
     pub name: String,
     pub condition: Option<String>,
     pub metadata: Option<ResourceIr>,
     pub update_policy: Option<ResourceIr>,
     pub deletion_policy: Option<DeletionPolicy>,
-    pub dependencies: Vec<String>,
+    pub dependencies: Vec<Symbol>,
     pub resource_type: ResourceType,
     pub properties: IndexMap<String, ResourceIr, Hasher>,
 
     // `references` identify the logical ID of all other template entities that this resource
     // contains a reference to (i.e: it uses them).
-    pub references: BTreeSet<String>,
+    pub references: BTreeSet<Symbol>,
 }
 
 impl ResourceInstruction {
+    /// Translates and orders every resource of the template.
+    #[cfg(test)]
     pub(super) fn from(
-        parse_tree: IndexMap<String, ResourceAttributes, Hasher>,
+        parse_tree: IndexMap<String, ResourceAttributes<'_>, Hasher>,
         schema: &Schema,
         origins: &ReferenceOrigins,
     ) -> Result<Vec<Self>, Error> {
+        let instructions = Self::translate(parse_tree, schema, origins)?;
+        let mut symbols = origins.declared.symbols.clone();
+        symbols.append(origins.undeclared.borrow().clone());
+        order(instructions, &mut symbols)
+    }
+
+    /// Translates every resource of the template (or of a slice of it), in
+    /// template order.
+    pub(super) fn translate<'a, I>(
+        parse_tree: I,
+        schema: &Schema,
+        origins: &ReferenceOrigins,
+    ) -> Result<Vec<Self>, Error>
+    where
+        I: IntoIterator<Item = (String, ResourceAttributes<'a>)>,
+        I::IntoIter: ExactSizeIterator,
+    {
+        let parse_tree = parse_tree.into_iter();
         let mut instructions = Vec::with_capacity(parse_tree.len());
 
         for (resource_name, attributes) in parse_tree {
@@ -450,8 +517,8 @@ impl ResourceInstruction {
                 let translator = if is_custom {
                     ResourceTranslator::json(schema, origins)
                 } else {
-                    let property_type = resource_spec.and_then(|spec| spec.property(&prop_name));
-                    let property_type = property_type.map(|prop| prop.value_type);
+                    let property_type =
+                        resource_spec.and_then(|spec| spec.property_type(&prop_name));
                     if property_type.is_none() {
                         let resource_type = format!(
                             "{:#?}::{:#?}::{:#?}",
@@ -472,36 +539,41 @@ impl ResourceInstruction {
                         value_type: property_type,
                     }
                 };
-                properties.insert(prop_name, translator.translate(prop)?);
+                properties.insert(prop_name.into_owned(), translator.translate(prop)?);
             }
 
             let mut instruction = Self {
                 name: resource_name,
-                condition: attributes.condition,
+                condition: attributes.condition.map(Cow::into_owned),
                 metadata,
                 update_policy,
                 deletion_policy: attributes.deletion_policy,
-                dependencies: attributes.depends_on,
+                dependencies: attributes
+                    .depends_on
+                    .iter()
+                    .map(|dependency| origins.symbol(dependency))
+                    .collect(),
                 resource_type,
                 properties,
                 references: BTreeSet::default(),
             };
-            instruction.generate_references();
+            instruction.generate_references(origins.nodes.borrow().table());
             instructions.push(instruction);
         }
 
-        order(instructions)
+        Ok(instructions)
     }
 
-    fn generate_references(&mut self) {
-        self.references.extend(self.dependencies.iter().cloned());
-        for (_, property) in &self.properties {
-            self.references.extend(find_references(property));
+    fn generate_references(&mut self, nodes: &NodeTable) {
+        self.references.extend(self.dependencies.iter().copied());
+        let mut visitor = LogicalIdReferences(&mut self.references);
+        for property in self.properties.values() {
+            visitor.visit_resource_ir(nodes, property);
         }
     }
 }
 
-#[derive(Clone, Debug, PartialEq)]
+#[derive(Clone, Debug, PartialEq, serde::Serialize, serde::Deserialize)]
 pub enum ResourceType {
     Alexa { service: String, type_name: String },
     // A standard resource type (AWS::<service>::<type_name>)
@@ -648,176 +720,62 @@ impl fmt::Display for ResourceType {
     }
 }
 
-fn order(resource_instructions: Vec<ResourceInstruction>) -> CFCResult<Vec<ResourceInstruction>> {
-    let mut topo = TopologicalSort::new();
-    let mut hash = HashMap::with_capacity(resource_instructions.len());
-    for resource_instruction in resource_instructions {
-        topo.insert(resource_instruction.name.to_string());
-
-        for dep in &resource_instruction.dependencies {
-            topo.add_dependency(dep, resource_instruction.name.to_string());
-        }
-        for (_, property) in &resource_instruction.properties {
-            find_dependencies(&resource_instruction.name, property, &mut topo)
-        }
-        hash.insert(resource_instruction.name.to_string(), resource_instruction);
+pub(super) fn order(
+    resource_instructions: Vec<ResourceInstruction>,
+    symbols: &mut SymbolTable,
+) -> CFCResult<Vec<ResourceInstruction>> {
+    let resource_symbols: Vec<Symbol> = resource_instructions
+        .iter()
+        .map(|resource_instruction| symbols.intern(&resource_instruction.name))
+        .collect();
+
+    // The position of each resource in `resource_instructions`, by symbol.
+    let mut node_of = vec![None; symbols.len()];
+    for (node, symbol) in resource_symbols.iter().enumerate() {
+        node_of[symbol.index()] = Some(node);
     }
 
-    let mut sorted_instructions = Vec::with_capacity(hash.len());
-    while !topo.is_empty() {
-        let mut list = topo.pop_all();
-        if list.is_empty() {
-            return Err(Error::TemplateFormatError {
-                details: "cyclic references in the Resources section".into(),
-            });
-        }
-        // Ensures consistent ordering of generated code...
-        list.sort();
-        sorted_instructions.extend(
-            list.into_iter()
-                .map(|name| match hash.remove(&name) {
-                    None => Err(Error::TemplateFormatError {
-                        details: format!("reference to an unknown logical id: {name}"),
-                    }),
-                    Some(instruction) => Ok(instruction),
-                })
-                .collect::<Result<Vec<_>, _>>()?,
-        );
-    }
-    Ok(sorted_instructions)
-}
-
-pub(crate) fn find_references(resource: &ResourceIr) -> HashSet<String> {
-    let mut set = HashSet::default();
-
-    match resource {
-        ResourceIr::Null
-        | ResourceIr::Bool(_)
-        | ResourceIr::Number(_)
-        | ResourceIr::Double(_)
-        | ResourceIr::String(_)
-        | ResourceIr::ImportValue(_) => { /* No references */ }
-
-        ResourceIr::Array(_, arr) => {
-            for resource in arr {
-                set.extend(find_references(resource));
-            }
-        }
-        ResourceIr::Object(_, hash) => {
-            for resource in hash.values() {
-                set.extend(find_references(resource));
-            }
-        }
-        ResourceIr::If(_, x, y) => {
-            set.extend(find_references(x.deref()));
-            set.extend(find_references(y.deref()));
-        }
-        ResourceIr::Join(_, arr) => {
-            for resource in arr {
-                set.extend(find_references(resource));
-            }
-        }
-        ResourceIr::Split(_, ir) => set = find_references(ir),
-        ResourceIr::Ref(x) => match x.origin {
-            Origin::CfnParameter
-            | Origin::Parameter
-            | Origin::Condition
-            | Origin::PseudoParameter(_) => { /* No references */ }
-            Origin::GetAttribute { .. } | Origin::LogicalId { .. } => {
-                set.insert(x.name.clone());
-            }
-        },
-        ResourceIr::Sub(arr) => {
-            for resource in arr {
-                set.extend(find_references(resource));
+    let mut graph = DependencyGraph::new(resource_instructions.len());
+    let mut unknown: Option<&str> = None;
+    for (node, resource_instruction) in resource_instructions.iter().enumerate() {
+        // `references` already holds both the `DependsOn` entries and the
+        // logical IDs used by the properties.
+        for dependency in &resource_instruction.references {
+            match node_of[dependency.index()] {
+                Some(dependency) => graph.add_dependency(dependency, node),
+                None => {
+                    let name = symbols.resolve(*dependency);
+                    unknown = Some(unknown.map_or(name, |other| other.min(name)));
+                }
             }
         }
-        ResourceIr::Map(_, y, z) => {
-            set.extend(find_references(y.deref()));
-            set.extend(find_references(z.deref()));
-        }
-        ResourceIr::Base64(x) => set = find_references(x.deref()),
-        ResourceIr::Select(_, x) => set = find_references(x.deref()),
-        ResourceIr::GetAZs(x) => set = find_references(x.deref()),
-        ResourceIr::Cidr(x, y, z) => {
-            set.extend(find_references(x.deref()));
-            set.extend(find_references(y.deref()));
-            set.extend(find_references(z.deref()));
-        }
     }
-
-    set
-}
-
-fn find_dependencies(
-    resource_name: &str,
-    resource: &ResourceIr,
-    topo: &mut TopologicalSort<String>,
-) {
-    match resource {
-        ResourceIr::Null
-        | ResourceIr::Bool(_)
-        | ResourceIr::Number(_)
-        | ResourceIr::Double(_)
-        | ResourceIr::String(_)
-        | ResourceIr::ImportValue(_) => {}
-
-        ResourceIr::Array(_, arr) => {
-            for x in arr {
-                find_dependencies(resource_name, x, topo);
-            }
-        }
-        ResourceIr::Object(_, hash) => {
-            for x in hash.values() {
-                find_dependencies(resource_name, x, topo);
-            }
-        }
-        ResourceIr::If(_, x, y) => {
-            find_dependencies(resource_name, x.deref(), topo);
-            find_dependencies(resource_name, y.deref(), topo);
-        }
-        ResourceIr::Join(_, arr) => {
-            for x in arr {
-                find_dependencies(resource_name, x, topo);
-            }
-        }
-        ResourceIr::Split(_, ir) => find_dependencies(resource_name, ir, topo),
-        ResourceIr::Ref(x) => match x.origin {
-            Origin::CfnParameter
-            | Origin::Parameter
-            | Origin::Condition
-            | Origin::PseudoParameter(_) => {}
-            Origin::LogicalId { .. } => {
-                topo.add_dependency(x.name.to_string(), resource_name.to_string());
-            }
-            Origin::GetAttribute { .. } => {
-                topo.add_dependency(x.name.to_string(), resource_name.to_string());
-            }
-        },
-        ResourceIr::Sub(arr) => {
-            for x in arr {
-                find_dependencies(resource_name, x, topo);
-            }
-        }
-        ResourceIr::Map(_, y, z) => {
-            find_dependencies(resource_name, y.deref(), topo);
-            find_dependencies(resource_name, z.deref(), topo);
-        }
-        ResourceIr::Base64(x) => {
-            find_dependencies(resource_name, x.deref(), topo);
-        }
-        ResourceIr::Select(_, x) => {
-            find_dependencies(resource_name, x.deref(), topo);
-        }
-        ResourceIr::GetAZs(x) => {
-            find_dependencies(resource_name, x.deref(), topo);
-        }
-        ResourceIr::Cidr(x, y, z) => {
-            find_dependencies(resource_name, x.deref(), topo);
-            find_dependencies(resource_name, y.deref(), topo);
-            find_dependencies(resource_name, z.deref(), topo);
-        }
+    if let Some(name) = unknown {
+        return Err(Error::TemplateFormatError {
+            details: format!("reference to an unknown logical id: {name}"),
+        });
     }
+
+    // Ensures consistent ordering of generated code...
+    let names: Vec<&str> = resource_instructions
+        .iter()
+        .map(|resource_instruction| resource_instruction.name.as_str())
+        .collect();
+    let sorted = graph
+        .order(&names)
+        .map_err(|cycle| Error::TemplateFormatError {
+            details: format!(
+                "cyclic references in the Resources section: {}",
+                describe_cycle(cycle.iter().map(|&node| names[node]))
+            ),
+        })?;
+
+    let mut resource_instructions: Vec<Option<ResourceInstruction>> =
+        resource_instructions.into_iter().map(Some).collect();
+    Ok(sorted
+        .into_iter()
+        .filter_map(|node| resource_instructions[node].take())
+        .collect())
 }
 
 #[cfg(test)]
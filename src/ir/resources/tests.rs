@@ -1,12 +1,14 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
-use std::collections::{BTreeSet, HashMap};
+use std::collections::BTreeSet;
 
 use indexmap::IndexMap;
 
+use crate::ir::nodes::NodeTable;
 use crate::ir::reference::{Origin, Reference};
 use crate::ir::resources::{order, ResourceInstruction, ResourceIr, ResourceType};
-use crate::ir::ReferenceOrigins;
+use crate::ir::symbols::SymbolTable;
+use crate::ir::{Declaration, ReferenceOrigins};
 use crate::parser::resource::{IntrinsicFunction, ResourceValue};
 use crate::primitives::WrapperF64;
 use crate::Hasher;
@@ -15,6 +17,7 @@ use super::{Primitive, ResourceTranslator, Schema, TypeReference};
 
 #[test]
 fn test_ir_ordering() {
+    let mut symbols = SymbolTable::default();
     let ir_instruction = ResourceInstruction {
         name: "A".to_string(),
         condition: None,
@@ -27,7 +30,7 @@ fn test_ir_ordering() {
         properties: IndexMap::default(),
     };
 
-    let later = ResourceInstruction {
+    let mut later = ResourceInstruction {
         name: "B".to_string(),
         condition: None,
         dependencies: Vec::new(),
@@ -39,7 +42,7 @@ fn test_ir_ordering() {
         properties: create_property(
             "something",
             ResourceIr::Ref(Reference::new(
-                "A",
+                symbols.intern("A"),
                 Origin::LogicalId {
                     conditional: false,
                     is_custom_resource: false,
@@ -48,27 +51,96 @@ fn test_ir_ordering() {
         ),
     };
 
+    later.generate_references(&NodeTable::default());
+
     let misordered = vec![later.clone(), ir_instruction.clone()];
 
-    let actual = order(misordered).unwrap();
+    let actual = order(misordered, &mut symbols).unwrap();
     assert_eq!(actual, vec![ir_instruction, later]);
 }
 
+fn dummy_resource(
+    name: &str,
+    references: &[&str],
+    symbols: &mut SymbolTable,
+) -> ResourceInstruction {
+    ResourceInstruction {
+        name: name.to_string(),
+        condition: None,
+        metadata: None,
+        deletion_policy: None,
+        update_policy: None,
+        dependencies: Vec::new(),
+        resource_type: ResourceType::Custom("Dummy".into()),
+        references: references.iter().map(|name| symbols.intern(name)).collect(),
+        properties: IndexMap::default(),
+    }
+}
+
+#[test]
+fn test_ir_ordering_is_layered_by_name() {
+    let mut symbols = SymbolTable::default();
+    let instructions = vec![
+        dummy_resource("A", &["C"], &mut symbols),
+        dummy_resource("B", &[], &mut symbols),
+        dummy_resource("C", &[], &mut symbols),
+        dummy_resource("D", &["A"], &mut symbols),
+    ];
+
+    let actual: Vec<String> = order(instructions, &mut symbols)
+        .unwrap()
+        .into_iter()
+        .map(|instruction| instruction.name)
+        .collect();
+    assert_eq!(actual, vec!["B", "C", "A", "D"]);
+}
+
+#[test]
+fn test_ir_ordering_names_cycle_members() {
+    let mut symbols = SymbolTable::default();
+    let instructions = vec![
+        dummy_resource("Queue", &["Topic"], &mut symbols),
+        dummy_resource("Bucket", &[], &mut symbols),
+        dummy_resource("Topic", &["Queue"], &mut symbols),
+    ];
+
+    let error = order(instructions, &mut symbols).unwrap_err();
+    assert_eq!(
+        "Template format error: cyclic references in the Resources section: Queue -> Topic -> Queue",
+        error.to_string(),
+    );
+}
+
+#[test]
+fn test_ir_ordering_unknown_logical_id() {
+    let mut symbols = SymbolTable::default();
+    let instructions = vec![dummy_resource("Queue", &["Missing"], &mut symbols)];
+
+    let error = order(instructions, &mut symbols).unwrap_err();
+    assert_eq!(
+        "Template format error: reference to an unknown logical id: Missing",
+        error.to_string(),
+    );
+}
+
 #[test]
 fn test_ref_links() {
+    let mut symbols = SymbolTable::default();
+    let foo = symbols.intern("foo");
+    let bar = symbols.intern("bar");
     let mut ir_instruction = ResourceInstruction {
         name: "A".to_string(),
         condition: None,
         metadata: None,
         deletion_policy: None,
         update_policy: None,
-        dependencies: vec!["foo".to_string()],
+        dependencies: vec![foo],
         resource_type: ResourceType::Custom("Dummy".into()),
         references: BTreeSet::default(),
         properties: create_property(
             "something",
             ResourceIr::Ref(Reference::new(
-                "bar",
+                bar,
                 Origin::LogicalId {
                     conditional: false,
                     is_custom_resource: false,
@@ -77,12 +149,9 @@ fn test_ref_links() {
         ),
     };
 
-    ir_instruction.generate_references();
+    ir_instruction.generate_references(&NodeTable::default());
 
-    assert_eq!(
-        ir_instruction.references,
-        BTreeSet::from([String::from("foo"), String::from("bar")])
-    );
+    assert_eq!(ir_instruction.references, BTreeSet::from([foo, bar]));
 }
 
 #[test]
@@ -188,13 +257,11 @@ fn unknown_resource_type() {
 
 #[test]
 fn test_boolean_parse_error() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::Boolean)),
+        value_type: Some(&TypeReference::Primitive(Primitive::Boolean)),
     };
     let resource_value = ResourceValue::String("fals".into());
     let result = translator.translate(resource_value).unwrap_err();
@@ -206,13 +273,11 @@ fn test_boolean_parse_error() {
 
 #[test]
 fn test_number_parse_float() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::Number)),
+        value_type: Some(&TypeReference::Primitive(Primitive::Number)),
     };
     let resource_value = ResourceValue::String("1.5".into());
     let result = translator.translate(resource_value).unwrap();
@@ -221,13 +286,11 @@ fn test_number_parse_float() {
 
 #[test]
 fn test_number_parse_error() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::Number)),
+        value_type: Some(&TypeReference::Primitive(Primitive::Number)),
     };
     let resource_value = ResourceValue::String("15abc".into());
     let result = translator.translate(resource_value).unwrap_err();
@@ -236,13 +299,11 @@ fn test_number_parse_error() {
 
 #[test]
 fn test_sub_excess_map_error() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::Number)),
+        value_type: Some(&TypeReference::Primitive(Primitive::Number)),
     };
     let resource_value = ResourceValue::IntrinsicFunction(Box::new(IntrinsicFunction::Sub {
         string: "BadSub".into(),
@@ -254,13 +315,11 @@ fn test_sub_excess_map_error() {
 
 #[test]
 fn test_invalid_base_64() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::Number)),
+        value_type: Some(&TypeReference::Primitive(Primitive::Number)),
     };
     let resource_value = ResourceValue::IntrinsicFunction(Box::new(IntrinsicFunction::Base64(
         ResourceValue::String("Base64".into()),
@@ -274,13 +333,11 @@ fn test_invalid_base_64() {
 
 #[test]
 fn test_invalid_select_index() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::Number)),
+        value_type: Some(&TypeReference::Primitive(Primitive::Number)),
     };
     let resource_value = ResourceValue::IntrinsicFunction(Box::new(IntrinsicFunction::Select {
         index: ResourceValue::String("two".into()),
@@ -292,13 +349,11 @@ fn test_invalid_select_index() {
 
 #[test]
 fn test_invalid_select_index_range_error() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::Number)),
+        value_type: Some(&TypeReference::Primitive(Primitive::Number)),
     };
     let resource_value = ResourceValue::IntrinsicFunction(Box::new(IntrinsicFunction::Select {
         index: ResourceValue::Number(-1),
@@ -310,13 +365,11 @@ fn test_invalid_select_index_range_error() {
 
 #[test]
 fn test_select_index_int_error() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::Number)),
+        value_type: Some(&TypeReference::Primitive(Primitive::Number)),
     };
     let resource_value = ResourceValue::IntrinsicFunction(Box::new(IntrinsicFunction::Select {
         index: ResourceValue::Bool(false),
@@ -326,6 +379,18 @@ fn test_select_index_int_error() {
     assert_eq!("Index must be int for Select", result.to_string());
 }
 
+fn custom_resource_origins(logical_id: &str) -> ReferenceOrigins {
+    let mut origins = ReferenceOrigins::default();
+    origins.declare(
+        logical_id,
+        Some(Declaration::Resource {
+            conditional: false,
+            is_custom_resource: true,
+        }),
+    );
+    origins
+}
+
 #[inline]
 fn create_property(name: &str, resource: ResourceIr) -> IndexMap<String, ResourceIr, Hasher> {
     IndexMap::from_iter([(name.into(), resource)])
@@ -338,16 +403,13 @@ use crate::parser::resource::ResourceAttributes;
 #[test]
 fn test_custom_resource_missing_service_token() {
     let mut properties = IndexMap::default();
-    properties.insert(
-        "DatabaseName".to_string(),
-        ResourceValue::String("mydb".into()),
-    );
+    properties.insert("DatabaseName".into(), ResourceValue::String("mydb".into()));
 
     let mut parse_tree: IndexMap<String, ResourceAttributes, Hasher> = IndexMap::default();
     parse_tree.insert(
         "MyCustomResource".to_string(),
         ResourceAttributes {
-            resource_type: "Custom::Setup".to_string(),
+            resource_type: "Custom::Setup".into(),
             condition: None,
             metadata: None,
             update_policy: None,
@@ -357,9 +419,7 @@ fn test_custom_resource_missing_service_token() {
         },
     );
 
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
 
     let result = ResourceInstruction::from(parse_tree, Schema::builtin(), &origins);
     let err = result.unwrap_err();
@@ -372,20 +432,17 @@ fn test_custom_resource_missing_service_token() {
 fn test_custom_resource_json_passthrough() {
     let mut properties = IndexMap::default();
     properties.insert(
-        "ServiceToken".to_string(),
+        "ServiceToken".into(),
         ResourceValue::String("arn:aws:lambda:us-east-1:123456789:function:handler".into()),
     );
-    properties.insert(
-        "StringProp".to_string(),
-        ResourceValue::String("hello".into()),
-    );
-    properties.insert("NumberProp".to_string(), ResourceValue::Number(42));
+    properties.insert("StringProp".into(), ResourceValue::String("hello".into()));
+    properties.insert("NumberProp".into(), ResourceValue::Number(42));
 
     let mut parse_tree: IndexMap<String, ResourceAttributes, Hasher> = IndexMap::default();
     parse_tree.insert(
         "MyCustomResource".to_string(),
         ResourceAttributes {
-            resource_type: "Custom::Setup".to_string(),
+            resource_type: "Custom::Setup".into(),
             condition: None,
             metadata: None,
             update_policy: None,
@@ -395,15 +452,7 @@ fn test_custom_resource_json_passthrough() {
         },
     );
 
-    let origins = ReferenceOrigins {
-        origins: HashMap::from([(
-            "MyCustomResource".to_string(),
-            Origin::LogicalId {
-                conditional: false,
-                is_custom_resource: true,
-            },
-        )]),
-    };
+    let origins = custom_resource_origins("MyCustomResource");
 
     let result = ResourceInstruction::from(parse_tree, Schema::builtin(), &origins).unwrap();
     assert_eq!(result[0].properties.len(), 3);
@@ -414,19 +463,11 @@ fn test_custom_resource_json_passthrough() {
 
 #[test]
 fn test_translate_ref_custom_resource_getatt() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::from([(
-            "MyCustom".to_string(),
-            Origin::LogicalId {
-                conditional: false,
-                is_custom_resource: true,
-            },
-        )]),
-    };
+    let origins = custom_resource_origins("MyCustom");
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::String)),
+        value_type: Some(&TypeReference::Primitive(Primitive::String)),
     };
 
     let resource_value = ResourceValue::IntrinsicFunction(Box::new(IntrinsicFunction::GetAtt {
@@ -453,19 +494,11 @@ fn test_translate_ref_custom_resource_getatt() {
 
 #[test]
 fn test_translate_ref_dotted_ref_custom_resource() {
-    let origins = ReferenceOrigins {
-        origins: HashMap::from([(
-            "MyCustom".to_string(),
-            Origin::LogicalId {
-                conditional: false,
-                is_custom_resource: true,
-            },
-        )]),
-    };
+    let origins = custom_resource_origins("MyCustom");
     let translator = ResourceTranslator {
         schema: Schema::builtin(),
         origins: &origins,
-        value_type: Some(TypeReference::Primitive(Primitive::String)),
+        value_type: Some(&TypeReference::Primitive(Primitive::String)),
     };
 
     // Dotted Ref like {"Ref": "MyCustom.Endpoint"} goes through translate_ref's split_once path
@@ -476,7 +509,7 @@ fn test_translate_ref_dotted_ref_custom_resource() {
 
     match result {
         ResourceIr::Ref(reference) => {
-            assert_eq!(reference.name, "MyCustom");
+            assert_eq!(origins.into_symbols().resolve(reference.symbol), "MyCustom");
             match &reference.origin {
                 Origin::GetAttribute {
                     is_custom_resource,
@@ -496,16 +529,13 @@ fn test_translate_ref_dotted_ref_custom_resource() {
 #[test]
 fn test_standard_resource_invalid_property() {
     let mut properties = IndexMap::default();
-    properties.insert(
-        "FakeProperty".to_string(),
-        ResourceValue::String("value".into()),
-    );
+    properties.insert("FakeProperty".into(), ResourceValue::String("value".into()));
 
     let mut parse_tree: IndexMap<String, ResourceAttributes, Hasher> = IndexMap::default();
     parse_tree.insert(
         "MyBucket".to_string(),
         ResourceAttributes {
-            resource_type: "AWS::S3::Bucket".to_string(),
+            resource_type: "AWS::S3::Bucket".into(),
             condition: None,
             metadata: None,
             update_policy: None,
@@ -515,9 +545,7 @@ fn test_standard_resource_invalid_property() {
         },
     );
 
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
 
     let result = ResourceInstruction::from(parse_tree, Schema::builtin(), &origins);
     let err = result.unwrap_err();
@@ -539,16 +567,13 @@ fn test_cfn_custom_resource_parses_as_custom() {
 #[test]
 fn test_cfn_custom_resource_missing_service_token() {
     let mut properties = IndexMap::default();
-    properties.insert(
-        "DatabaseName".to_string(),
-        ResourceValue::String("mydb".into()),
-    );
+    properties.insert("DatabaseName".into(), ResourceValue::String("mydb".into()));
 
     let mut parse_tree: IndexMap<String, ResourceAttributes, Hasher> = IndexMap::default();
     parse_tree.insert(
         "MyCustomResource".to_string(),
         ResourceAttributes {
-            resource_type: "AWS::CloudFormation::CustomResource".to_string(),
+            resource_type: "AWS::CloudFormation::CustomResource".into(),
             condition: None,
             metadata: None,
             update_policy: None,
@@ -558,9 +583,7 @@ fn test_cfn_custom_resource_missing_service_token() {
         },
     );
 
-    let origins = ReferenceOrigins {
-        origins: HashMap::default(),
-    };
+    let origins = ReferenceOrigins::default();
 
     let result = ResourceInstruction::from(parse_tree, Schema::builtin(), &origins);
     let err = result.unwrap_err();
@@ -573,20 +596,17 @@ fn test_cfn_custom_resource_missing_service_token() {
 fn test_cfn_custom_resource_json_passthrough() {
     let mut properties = IndexMap::default();
     properties.insert(
-        "ServiceToken".to_string(),
+        "ServiceToken".into(),
         ResourceValue::String("arn:aws:lambda:us-east-1:123456789:function:handler".into()),
     );
-    properties.insert(
-        "CustomProp".to_string(),
-        ResourceValue::String("hello".into()),
-    );
-    properties.insert("NumberProp".to_string(), ResourceValue::Number(42));
+    properties.insert("CustomProp".into(), ResourceValue::String("hello".into()));
+    properties.insert("NumberProp".into(), ResourceValue::Number(42));
 
     let mut parse_tree: IndexMap<String, ResourceAttributes, Hasher> = IndexMap::default();
     parse_tree.insert(
         "MyCustomResource".to_string(),
         ResourceAttributes {
-            resource_type: "AWS::CloudFormation::CustomResource".to_string(),
+            resource_type: "AWS::CloudFormation::CustomResource".into(),
             condition: None,
             metadata: None,
             update_policy: None,
@@ -596,15 +616,7 @@ fn test_cfn_custom_resource_json_passthrough() {
         },
     );
 
-    let origins = ReferenceOrigins {
-        origins: HashMap::from([(
-            "MyCustomResource".to_string(),
-            Origin::LogicalId {
-                conditional: false,
-                is_custom_resource: true,
-            },
-        )]),
-    };
+    let origins = custom_resource_origins("MyCustomResource");
 
     let result = ResourceInstruction::from(parse_tree, Schema::builtin(), &origins).unwrap();
     assert_eq!(result[0].properties.len(), 3);
@@ -1,73 +1,76 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
-use nom::branch::alt;
-use nom::bytes::complete::{tag, take, take_until};
-use nom::combinator::{map, rest};
-use nom::error::{Error, ErrorKind};
-use nom::multi::many1;
-use nom::sequence::delimited;
-use nom::IResult;
-use nom::{Err, Parser};
+
+//! Splits the strings of `Fn::Sub` into literal text and variables.
+//!
+//! Strings are scanned in a single pass, jumping from one `${` to the next with
+//! `memchr`, and the segments borrow from the scanned string. As in
+//! CloudFormation, `${!` stands for a literal `${`, so `${!Literal}` resolves to
+//! the text `${Literal}`.
+
+use std::borrow::Cow;
+
+use memchr::{memchr, memmem};
 
 #[derive(Debug, Clone, PartialEq, Eq)]
-pub enum SubValue {
-    String(String),
-    Variable(String),
+pub enum SubValue<'a> {
+    /// Text that is output as is. Consecutive text is a single segment, which
+    /// is only owned if it contains a `${!` escape.
+    String(Cow<'a, str>),
+    /// The name between `${` and `}`.
+    Variable(&'a str),
 }
 
-pub fn sub_parse_tree(str: &str) -> Result<Vec<SubValue>, crate::Error> {
-    let mut full_resolver = many1(inner_resolver);
+pub fn sub_parse_tree(str: &str) -> Result<Vec<SubValue<'_>>, crate::Error> {
+    if str.is_empty() {
+        return Err(crate::Error::SubParseError {
+            message: "Fn::Sub string is empty".into(),
+        });
+    }
 
-    match full_resolver.parse(str) {
-        Ok((remaining, built_subs)) => {
-            let mut subs = built_subs;
-            if !remaining.is_empty() {
-                subs.push(SubValue::String(remaining.to_string()))
-            }
-            Ok(subs)
+    let mut subs = Vec::new();
+    let mut text: Option<Cow<'_, str>> = None;
+    let mut rest = str;
+    while let Some(start) = memmem::find(rest.as_bytes(), b"${") {
+        let (before, after) = (&rest[..start], &rest[start + 2..]);
+        if let Some(after) = after.strip_prefix('!') {
+            let text = text.get_or_insert_with(Cow::default).to_mut();
+            text.push_str(before);
+            text.push_str("${");
+            rest = after;
+            continue;
         }
 
-        Err(err) => Err(crate::Error::SubParseError {
-            message: err.to_string(),
-        }),
+        let Some(end) = memchr(b'}', after.as_bytes()) else {
+            return Err(crate::Error::SubParseError {
+                message: format!("unterminated variable in Fn::Sub string: {str}"),
+            });
+        };
+        push_text(&mut text, before);
+        if let Some(text) = text.take() {
+            subs.push(SubValue::String(text));
+        }
+        subs.push(SubValue::Variable(&after[..end]));
+        rest = &after[end + 1..];
     }
+
+    push_text(&mut text, rest);
+    if let Some(text) = text {
+        subs.push(SubValue::String(text));
+    }
+    Ok(subs)
 }
 
-/// inner_resolver will do one of the following:
-/// * take until you see a ${ which is the start of the variable bits.
-/// * take something like ${ ... }
-///   TODO -- there are some Sub strings that will escape the $, that are not captured yet.
-///   Will need to rewrite the parse tree to handle character escapes.
-fn inner_resolver(str: &str) -> IResult<&str, SubValue> {
-    // Due to the caller being many1, we will need to create out own EOF error to
-    // stop the call pattern.
+/// Adds `str` to the text being accumulated, borrowing it if it is the first.
+#[inline]
+fn push_text<'a>(text: &mut Option<Cow<'a, str>>, str: &'a str) {
     if str.is_empty() {
-        return IResult::Err(Err::Error(Error::new(str, ErrorKind::Eof)));
+        return;
+    }
+    match text {
+        Some(text) => text.to_mut().push_str(str),
+        None => *text = Some(Cow::Borrowed(str)),
     }
-
-    let mut ir = alt((
-        map(
-            delimited(tag("${!"), take_until("}"), take(1usize)),
-            |var: &str| SubValue::String(format!("${{{var}}}")),
-        ),
-        // Attempt to find ${...} and eat those tokens.
-        map(
-            delimited(tag("${"), take_until("}"), take(1usize)),
-            |var: &str| SubValue::Variable(var.to_string()),
-        ),
-        // Attempt to eat anything before ${
-        map(take_until("${"), |static_str: &str| {
-            SubValue::String(static_str.to_string())
-        }),
-        // Anything else is probably "the remaining tokens", consume the remaining tokens as no
-        // other values were found.
-        map(rest, |static_str: &str| {
-            SubValue::String(static_str.to_string())
-        }),
-    ));
-
-    let (remaining, res) = ir.parse(str)?;
-    IResult::Ok((remaining, res))
 }
 
 #[cfg(test)]
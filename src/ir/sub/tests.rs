@@ -9,13 +9,14 @@ fn substitute_arn() -> Result<(), Error> {
     let var = String::from("some_value");
     let postfix = String::from(":constant");
     // for those who don't want to read: arn:${some_value}:constant
-    let v = sub_parse_tree(format!("{prefix}${{{var}}}{postfix}").as_str())?;
+    let sub = format!("{prefix}${{{var}}}{postfix}");
+    let v = sub_parse_tree(&sub)?;
     assert_eq!(
         v,
         vec![
-            SubValue::String(prefix),
-            SubValue::Variable(var),
-            SubValue::String(postfix)
+            SubValue::String(prefix.into()),
+            SubValue::Variable(&var),
+            SubValue::String(postfix.into())
         ]
     );
 
@@ -31,10 +32,7 @@ fn error_on_missing_brackets() {
 #[test]
 fn sub_parse_error() {
     let error = sub_parse_tree("").unwrap_err();
-    assert_eq!(
-        "Parsing Error: Error { input: \"\", code: Eof }",
-        error.to_string(),
-    );
+    assert_eq!("Fn::Sub string is empty", error.to_string());
 }
 
 #[test]
@@ -42,10 +40,7 @@ fn empty_variable() -> Result<(), Error> {
     let v = sub_parse_tree("arn:${}")?;
     assert_eq!(
         v,
-        vec![
-            SubValue::String("arn:".to_string()),
-            SubValue::Variable(String::new())
-        ]
+        vec![SubValue::String("arn:".into()), SubValue::Variable("")]
     );
 
     Ok(())
@@ -57,8 +52,8 @@ fn test_suffix_substitution() -> Result<(), Error> {
     assert_eq!(
         v,
         vec![
-            SubValue::Variable("Tag".to_string()),
-            SubValue::String(String::from("-Concatenated"))
+            SubValue::Variable("Tag"),
+            SubValue::String("-Concatenated".into())
         ]
     );
 
@@ -68,7 +63,19 @@ fn test_suffix_substitution() -> Result<(), Error> {
 #[test]
 fn test_no_substitution() -> Result<(), Error> {
     let v = sub_parse_tree("NoSubstitution")?;
-    assert_eq!(v, vec![SubValue::String(String::from("NoSubstitution"))]);
+    assert_eq!(v, vec![SubValue::String("NoSubstitution".into())]);
+
+    Ok(())
+}
+
+#[test]
+fn test_segments_are_borrowed() -> Result<(), Error> {
+    let v = sub_parse_tree("arn:${AWS::Partition}:s3:::${Bucket}/*")?;
+    assert_eq!(v.len(), 5);
+    assert!(v.iter().all(|segment| match segment {
+        SubValue::String(text) => matches!(text, Cow::Borrowed(_)),
+        SubValue::Variable(_) => true,
+    }));
 
     Ok(())
 }
@@ -79,9 +86,9 @@ fn test_quotes() -> Result<(), Error> {
     assert_eq!(
         v,
         vec![
-            SubValue::String(String::from("echo \"")),
-            SubValue::Variable(String::from("lol")),
-            SubValue::String(String::from("\"")),
+            SubValue::String("echo \"".into()),
+            SubValue::Variable("lol"),
+            SubValue::String("\"".into()),
         ]
     );
 
@@ -93,11 +100,37 @@ fn test_quotes() -> Result<(), Error> {
 #[test]
 fn test_literal() -> Result<(), Error> {
     let v = sub_parse_tree("echo ${!lol}")?;
+    assert_eq!(v, vec![SubValue::String("echo ${lol}".into())]);
+
+    Ok(())
+}
+
+#[test]
+fn test_literal_between_variables() -> Result<(), Error> {
+    let v = sub_parse_tree("${A}: ${!B} is ${!C}-${D}")?;
+    assert_eq!(
+        v,
+        vec![
+            SubValue::Variable("A"),
+            SubValue::String(": ${B} is ${C}-".into()),
+            SubValue::Variable("D"),
+        ]
+    );
+
+    Ok(())
+}
+
+#[test]
+fn test_literal_is_not_a_variable() -> Result<(), Error> {
+    // Only the `${` is escaped, so neither the rest of the name nor a closing
+    // brace is needed.
+    let v = sub_parse_tree("echo ${!HOME:-${Dir}} ${!")?;
     assert_eq!(
         v,
         vec![
-            SubValue::String(String::from("echo ")),
-            SubValue::String(String::from("${lol}"))
+            SubValue::String("echo ${HOME:-".into()),
+            SubValue::Variable("Dir"),
+            SubValue::String("} ${".into()),
         ]
     );
 
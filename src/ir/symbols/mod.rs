@@ -0,0 +1,125 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use indexmap::IndexSet;
+
+use crate::util::Hasher;
+
+/// A dense integer standing for a name of the template (a logical ID, a
+/// parameter, a condition or a pseudo parameter). Symbols are handed out by a
+/// [`SymbolTable`] when the IR is built, and compare, hash and copy as a plain
+/// `u32`; the text they stand for is only needed again during synthesis.
+#[derive(
+    Debug, Clone, Copy, PartialEq, Eq, Hash, PartialOrd, Ord, serde::Serialize, serde::Deserialize,
+)]
+pub struct Symbol(u32);
+
+impl Symbol {
+    /// The position of the symbol in its table, for use as a vector index.
+    #[inline]
+    pub const fn index(self) -> usize {
+        self.0 as usize
+    }
+}
+
+/// Interns names into [`Symbol`]s. Each distinct name is stored once, and
+/// symbols are numbered densely in the order names are first interned.
+#[derive(Debug, Clone, Default, PartialEq, serde::Serialize, serde::Deserialize)]
+pub struct SymbolTable {
+    names: IndexSet<String, Hasher>,
+    // The number of the first symbol of the table, which is not zero for
+    // tables created by `SymbolTable::following`.
+    offset: u32,
+}
+
+impl SymbolTable {
+    pub fn with_capacity(capacity: usize) -> Self {
+        Self {
+            names: IndexSet::with_capacity_and_hasher(capacity, Hasher::default()),
+            offset: 0,
+        }
+    }
+
+    /// Creates an empty table whose symbols are numbered after those of
+    /// `self`, so that names interned into it can later be [`append`]ed to
+    /// `self` (or to a copy of it) without renumbering.
+    ///
+    /// [`append`]: SymbolTable::append
+    pub fn following(&self) -> Self {
+        Self {
+            names: IndexSet::default(),
+            offset: self.offset + self.names.len() as u32,
+        }
+    }
+
+    /// Returns the symbol for `name`, allocating a new one the first time the
+    /// name is seen.
+    pub fn intern(&mut self, name: &str) -> Symbol {
+        let index = match self.names.get_index_of(name) {
+            Some(index) => index,
+            None => self.names.insert_full(name.to_string()).0,
+        };
+        Symbol(self.offset + index as u32)
+    }
+
+    /// Returns the symbol for `name`, if it was interned.
+    #[inline]
+    pub fn get(&self, name: &str) -> Option<Symbol> {
+        self.names
+            .get_index_of(name)
+            .map(|index| Symbol(self.offset + index as u32))
+    }
+
+    /// Interns every name of `other`, in order, and returns the symbols they
+    /// received in `self`, indexed by their position in `other`.
+    pub fn append(&mut self, other: SymbolTable) -> Vec<Symbol> {
+        self.names.reserve(other.names.len());
+        other
+            .names
+            .into_iter()
+            .map(|name| match self.names.get_index_of(name.as_str()) {
+                Some(index) => Symbol(self.offset + index as u32),
+                None => Symbol(self.offset + self.names.insert_full(name).0 as u32),
+            })
+            .collect()
+    }
+
+    /// Forgets every name interned after the first `len` ones.
+    pub fn truncate(&mut self, len: usize) {
+        self.names.truncate(len);
+    }
+
+    /// Returns the name `symbol` stands for.
+    ///
+    /// # Panics
+    ///
+    /// If `symbol` was not handed out by this table.
+    #[inline]
+    pub fn resolve(&self, symbol: Symbol) -> &str {
+        self.try_resolve(symbol).expect("symbol from another table")
+    }
+
+    /// Returns the name `symbol` stands for, if it was handed out by this
+    /// table.
+    #[inline]
+    pub fn try_resolve(&self, symbol: Symbol) -> Option<&str> {
+        symbol
+            .0
+            .checked_sub(self.offset)
+            .and_then(|index| self.names.get_index(index as usize))
+            .map(String::as_str)
+    }
+
+    /// The number of names interned into the table.
+    #[inline]
+    pub fn len(&self) -> usize {
+        self.names.len()
+    }
+
+    #[inline]
+    pub fn is_empty(&self) -> bool {
+        self.names.is_empty()
+    }
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,47 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+
+#[test]
+fn test_intern_is_dense_and_stable() {
+    let mut symbols = SymbolTable::default();
+    let bucket = symbols.intern("Bucket");
+    let queue = symbols.intern("Queue");
+
+    assert_eq!(bucket.index(), 0);
+    assert_eq!(queue.index(), 1);
+    assert_eq!(symbols.intern("Bucket"), bucket);
+    assert_eq!(symbols.len(), 2);
+}
+
+#[test]
+fn test_resolve_round_trips() {
+    let mut symbols = SymbolTable::with_capacity(1);
+    let symbol = symbols.intern("AWS::Region");
+
+    assert_eq!(symbols.resolve(symbol), "AWS::Region");
+    assert_eq!(symbols.get("AWS::Region"), Some(symbol));
+    assert_eq!(symbols.get("AWS::StackName"), None);
+}
+
+#[test]
+fn test_following_tables_append_without_renumbering() {
+    let mut symbols = SymbolTable::default();
+    let bucket = symbols.intern("Bucket");
+
+    let mut undeclared = symbols.following();
+    let queue = undeclared.intern("Queue");
+    assert_eq!(queue.index(), 1);
+    assert_eq!(undeclared.resolve(queue), "Queue");
+    assert_eq!(undeclared.len(), 1);
+
+    // Symbols of tables following the same table overlap until appended.
+    let mut other = symbols.following();
+    assert_eq!(other.intern("Topic"), queue);
+    other.intern("Queue");
+
+    assert_eq!(symbols.append(undeclared), vec![queue]);
+    assert_eq!(symbols.append(other), vec![Symbol(2), queue]);
+    assert_eq!(symbols.resolve(bucket), "Bucket");
+    assert_eq!(symbols.resolve(Symbol(2)), "Topic");
+}
@@ -0,0 +1,152 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Interning of the property types arrays and objects of the IR are typed by.
+//!
+//! Templates repeat the same few types (`String`, the property types of the
+//! resources they use) across thousands of values, so the IR stores each type
+//! once in a [`TypeTable`] and its nodes only carry a [`TypeId`].
+
+use std::ops::Index;
+
+use indexmap::IndexSet;
+
+use super::nodes::NodeTable;
+use super::resources::ResourceInstruction;
+use super::visit::VisitorMut;
+use super::CloudformationProgramIr;
+use crate::cdk::TypeReference;
+use crate::util::Hasher;
+
+/// A dense integer standing for a [`TypeReference`] of a [`TypeTable`].
+#[derive(
+    Debug, Clone, Copy, PartialEq, Eq, Hash, PartialOrd, Ord, serde::Serialize, serde::Deserialize,
+)]
+pub struct TypeId(u32);
+
+impl TypeId {
+    /// The position of the type in its table, for use as a vector index.
+    #[inline]
+    pub const fn index(self) -> usize {
+        self.0 as usize
+    }
+}
+
+/// Interns [`TypeReference`]s into [`TypeId`]s, numbered densely in the order
+/// types are first interned.
+#[derive(Debug, Clone, Default, PartialEq, serde::Serialize, serde::Deserialize)]
+pub struct TypeTable {
+    types: IndexSet<TypeReference, Hasher>,
+}
+
+impl TypeTable {
+    /// Returns the ID of `type_reference`, copying it into the table the first
+    /// time it is seen.
+    pub fn intern(&mut self, type_reference: &TypeReference) -> TypeId {
+        let index = match self.types.get_index_of(type_reference) {
+            Some(index) => index,
+            None => self.types.insert_full(type_reference.clone()).0,
+        };
+        TypeId(index as u32)
+    }
+
+    /// Returns the type `id` stands for, if it was handed out by this table.
+    #[inline]
+    pub fn get(&self, id: TypeId) -> Option<&TypeReference> {
+        self.types.get_index(id.index())
+    }
+
+    /// Interns every type of `other`, in order, and returns the IDs they
+    /// received in `self`, indexed by their position in `other`.
+    pub fn append(&mut self, other: TypeTable) -> Vec<TypeId> {
+        other
+            .types
+            .into_iter()
+            .map(|type_reference| TypeId(self.types.insert_full(type_reference).0 as u32))
+            .collect()
+    }
+
+    /// The number of types interned into the table.
+    #[inline]
+    pub fn len(&self) -> usize {
+        self.types.len()
+    }
+
+    #[inline]
+    pub fn is_empty(&self) -> bool {
+        self.types.is_empty()
+    }
+}
+
+impl Index<TypeId> for TypeTable {
+    type Output = TypeReference;
+
+    /// # Panics
+    ///
+    /// If `id` was not handed out by this table.
+    #[inline]
+    fn index(&self, id: TypeId) -> &TypeReference {
+        self.get(id).expect("type from another table")
+    }
+}
+
+impl CloudformationProgramIr {
+    /// Renumbers the types of the IR in the order they are first used by the
+    /// resources (in their final order) and then the outputs, and drops the
+    /// types nothing uses any more. This makes the table independent of how
+    /// the IR was built (sequentially, across threads or incrementally).
+    /// Returns the number of types left.
+    pub(super) fn compact_types(&mut self) -> usize {
+        let mut compact = Compact {
+            old: std::mem::take(&mut self.types),
+            new: TypeTable::default(),
+            ids: Vec::new(),
+        };
+        compact.ids.resize(compact.old.len(), None);
+
+        let nodes = &mut self.nodes;
+        for resource in &mut self.resources {
+            compact.resource(nodes, resource);
+        }
+        for output in &mut self.outputs {
+            compact.visit_resource_ir_mut(nodes, &mut output.value);
+            if let Some(export) = &mut output.export {
+                compact.visit_resource_ir_mut(nodes, export);
+            }
+        }
+
+        self.types = compact.new;
+        self.types.len()
+    }
+}
+
+/// Moves the types an IR uses from `old` into `new`, remembering the ID each
+/// of them received.
+struct Compact {
+    old: TypeTable,
+    new: TypeTable,
+    ids: Vec<Option<TypeId>>,
+}
+
+impl Compact {
+    fn resource(&mut self, nodes: &mut NodeTable, resource: &mut ResourceInstruction) {
+        let values = resource
+            .metadata
+            .iter_mut()
+            .chain(&mut resource.update_policy);
+        for value in values.chain(resource.properties.values_mut()) {
+            self.visit_resource_ir_mut(nodes, value);
+        }
+    }
+}
+
+impl VisitorMut for Compact {
+    #[inline]
+    fn visit_type_mut(&mut self, id: &mut TypeId) {
+        let new = &mut self.ids[id.index()];
+        *id = *new.get_or_insert_with(|| self.new.intern(&self.old[*id]));
+    }
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,91 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+use crate::cdk::{ItemType, Primitive, Schema};
+use crate::ir::visit::Visitor;
+use crate::CloudformationParseTree;
+
+const STRING: TypeReference = TypeReference::Primitive(Primitive::String);
+
+#[test]
+fn test_intern_is_dense_and_stable() {
+    let mut types = TypeTable::default();
+    let string = types.intern(&STRING);
+    let list = types.intern(&TypeReference::List(ItemType::Static(&STRING)));
+
+    assert_eq!(string.index(), 0);
+    assert_eq!(list.index(), 1);
+    assert_eq!(types.intern(&STRING), string);
+    // Boxed and static item types are the same type.
+    assert_eq!(
+        types.intern(&TypeReference::List(ItemType::Boxed(Box::new(STRING)))),
+        list
+    );
+    assert_eq!(types.len(), 2);
+    assert_eq!(types[string], STRING);
+}
+
+#[test]
+fn test_append_merges_by_value() {
+    let mut types = TypeTable::default();
+    let string = types.intern(&STRING);
+
+    let mut other = TypeTable::default();
+    let json = other.intern(&TypeReference::Primitive(Primitive::Json));
+    other.intern(&STRING);
+
+    assert_eq!(json.index(), 0);
+    assert_eq!(types.append(other), vec![TypeId(1), string]);
+    assert_eq!(types[TypeId(1)], TypeReference::Primitive(Primitive::Json));
+    assert_eq!(types.get(TypeId(2)), None);
+}
+
+#[test]
+fn test_compact_numbers_types_in_order_of_use() {
+    let template = br#"{
+        "Resources": {
+            "Queue": {
+                "Type": "AWS::SQS::Queue",
+                "Properties": { "Tags": [{ "Key": "Team", "Value": "Data" }] }
+            },
+            "Bucket": {
+                "Type": "AWS::S3::Bucket",
+                "Properties": {
+                    "BucketName": { "Fn::GetAtt": ["Queue", "QueueName"] },
+                    "VersioningConfiguration": { "Status": "Enabled" },
+                    "Tags": [{ "Key": "Team", "Value": "Data" }]
+                }
+            }
+        }
+    }"#;
+    let mut ir = CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        Schema::builtin(),
+    )
+    .unwrap();
+
+    // Types are numbered in the order the resources first use them.
+    struct FirstUses(Vec<TypeId>);
+    impl Visitor<'_> for FirstUses {
+        fn visit_type(&mut self, id: TypeId) {
+            if !self.0.contains(&id) {
+                self.0.push(id);
+            }
+        }
+    }
+    let mut first_uses = FirstUses(Vec::new());
+    for resource in &ir.resources {
+        for value in resource.properties.values() {
+            first_uses.visit_resource_ir(&ir.nodes, value);
+        }
+    }
+    let expected: Vec<_> = (0..ir.types.len() as u32).map(TypeId).collect();
+    assert!(expected.len() > 1);
+    assert_eq!(first_uses.0, expected);
+
+    // Types nothing uses any more are dropped.
+    let types = ir.types.clone();
+    ir.types.intern(&TypeReference::Named("Unused".into()));
+    assert_eq!(ir.compact_types(), types.len());
+    assert_eq!(ir.types, types);
+}
@@ -0,0 +1,276 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use std::collections::HashSet;
+use std::mem;
+
+use super::conditions::ConditionIr;
+use super::nodes::{EntryList, NodeId, NodeList, NodeTable};
+use super::reference::{Origin, Reference};
+use super::resources::ResourceIr;
+use super::symbols::Symbol;
+use super::types::TypeId;
+use crate::util::Hasher;
+
+// A read-only traversal of `ResourceIr` and `ConditionIr` trees. Every method
+// has a default implementation, so a visitor only overrides the hooks it cares
+// about and accumulates into its own state; the `walk_*` functions perform the
+// default descent into child nodes and can be called from an overridden
+// `visit_*` method to keep going. The children of a `ResourceIr` are looked up
+// in the `NodeTable` passed along with it. The traversal itself does not
+// allocate.
+//
+// The `'ir` lifetime lets visitors keep borrows of the names they visit
+// instead of copying them.
+pub trait Visitor<'ir> {
+    fn visit_resource_ir(&mut self, nodes: &'ir NodeTable, ir: &'ir ResourceIr) {
+        walk_resource_ir(self, nodes, ir)
+    }
+
+    fn visit_condition_ir(&mut self, ir: &'ir ConditionIr) {
+        walk_condition_ir(self, ir)
+    }
+
+    // Called for every `Ref` (or `GetAtt`) found in the tree.
+    fn visit_reference(&mut self, _reference: &'ir Reference) {}
+
+    // Called with the name of every mapping table a `FindInMap` looks into.
+    fn visit_mapping(&mut self, _name: &'ir str) {}
+
+    // Called with the name of every condition an `If` (or `Condition`) uses.
+    fn visit_condition(&mut self, _name: &'ir str) {}
+
+    // Called with the type of every array and object.
+    fn visit_type(&mut self, _id: TypeId) {}
+}
+
+pub fn walk_resource_ir<'ir, V: Visitor<'ir> + ?Sized>(
+    visitor: &mut V,
+    nodes: &'ir NodeTable,
+    ir: &'ir ResourceIr,
+) {
+    match ir {
+        ResourceIr::Null
+        | ResourceIr::Bool(_)
+        | ResourceIr::Number(_)
+        | ResourceIr::Double(_)
+        | ResourceIr::String(_) => {}
+
+        ResourceIr::Array(id, list) => {
+            visitor.visit_type(*id);
+            for item in nodes.list(*list) {
+                visitor.visit_resource_ir(nodes, item);
+            }
+        }
+        ResourceIr::Join(_, list) | ResourceIr::Sub(list) => {
+            for item in nodes.list(*list) {
+                visitor.visit_resource_ir(nodes, item);
+            }
+        }
+        ResourceIr::Object(id, entries) => {
+            visitor.visit_type(*id);
+            for (_, value) in nodes.entries(*entries) {
+                visitor.visit_resource_ir(nodes, value);
+            }
+        }
+        ResourceIr::If(condition, when_true, when_false) => {
+            visitor.visit_condition(condition);
+            visitor.visit_resource_ir(nodes, &nodes[*when_true]);
+            visitor.visit_resource_ir(nodes, &nodes[*when_false]);
+        }
+        ResourceIr::Map(name, top_level_key, second_level_key) => {
+            visitor.visit_mapping(name);
+            visitor.visit_resource_ir(nodes, &nodes[*top_level_key]);
+            visitor.visit_resource_ir(nodes, &nodes[*second_level_key]);
+        }
+        ResourceIr::Ref(reference) => visitor.visit_reference(reference),
+        ResourceIr::Split(_, value)
+        | ResourceIr::Base64(value)
+        | ResourceIr::ImportValue(value)
+        | ResourceIr::GetAZs(value)
+        | ResourceIr::Select(_, value) => visitor.visit_resource_ir(nodes, &nodes[*value]),
+        ResourceIr::Cidr(ip_block, count, cidr_bits) => {
+            visitor.visit_resource_ir(nodes, &nodes[*ip_block]);
+            visitor.visit_resource_ir(nodes, &nodes[*count]);
+            visitor.visit_resource_ir(nodes, &nodes[*cidr_bits]);
+        }
+    }
+}
+
+pub fn walk_condition_ir<'ir, V: Visitor<'ir> + ?Sized>(visitor: &mut V, ir: &'ir ConditionIr) {
+    match ir {
+        ConditionIr::And(list) | ConditionIr::Or(list) => {
+            for item in list {
+                visitor.visit_condition_ir(item);
+            }
+        }
+        ConditionIr::Equals(lhs, rhs) => {
+            visitor.visit_condition_ir(lhs);
+            visitor.visit_condition_ir(rhs);
+        }
+        ConditionIr::Not(value) | ConditionIr::Split(_, value) | ConditionIr::Select(_, value) => {
+            visitor.visit_condition_ir(value)
+        }
+        ConditionIr::Condition(name) => visitor.visit_condition(name),
+        ConditionIr::Map(name, top_level_key, second_level_key) => {
+            visitor.visit_mapping(name);
+            visitor.visit_condition_ir(top_level_key);
+            visitor.visit_condition_ir(second_level_key);
+        }
+        ConditionIr::Str(_) => {}
+        ConditionIr::Ref(reference) => visitor.visit_reference(reference),
+    }
+}
+
+// The mutable counterpart of `Visitor`, for passes that rewrite the IR in
+// place. The children of a `ResourceIr` are moved out of the `NodeTable`
+// while they are visited, and back once they were.
+pub trait VisitorMut {
+    fn visit_resource_ir_mut(&mut self, nodes: &mut NodeTable, ir: &mut ResourceIr) {
+        walk_resource_ir_mut(self, nodes, ir)
+    }
+
+    fn visit_condition_ir_mut(&mut self, ir: &mut ConditionIr) {
+        walk_condition_ir_mut(self, ir)
+    }
+
+    fn visit_reference_mut(&mut self, _reference: &mut Reference) {}
+
+    fn visit_mapping_mut(&mut self, _name: &mut String) {}
+
+    fn visit_condition_mut(&mut self, _name: &mut String) {}
+
+    fn visit_type_mut(&mut self, _id: &mut TypeId) {}
+
+    // Called with the ID of every child, and with the items and entries of
+    // every array and object, before they are looked up.
+    fn visit_node_mut(&mut self, _id: &mut NodeId) {}
+
+    fn visit_list_mut(&mut self, _list: &mut NodeList) {}
+
+    fn visit_entries_mut(&mut self, _list: &mut EntryList) {}
+}
+
+pub fn walk_resource_ir_mut<V: VisitorMut + ?Sized>(
+    visitor: &mut V,
+    nodes: &mut NodeTable,
+    ir: &mut ResourceIr,
+) {
+    match ir {
+        ResourceIr::Null
+        | ResourceIr::Bool(_)
+        | ResourceIr::Number(_)
+        | ResourceIr::Double(_)
+        | ResourceIr::String(_) => {}
+
+        ResourceIr::Array(id, list) => {
+            visitor.visit_type_mut(id);
+            walk_list_mut(visitor, nodes, list);
+        }
+        ResourceIr::Join(_, list) | ResourceIr::Sub(list) => walk_list_mut(visitor, nodes, list),
+        ResourceIr::Object(id, entries) => {
+            visitor.visit_type_mut(id);
+            visitor.visit_entries_mut(entries);
+            for index in 0..entries.len() {
+                let mut value = mem::take(&mut nodes.entries_mut(*entries)[index].1);
+                visitor.visit_resource_ir_mut(nodes, &mut value);
+                nodes.entries_mut(*entries)[index].1 = value;
+            }
+        }
+        ResourceIr::If(condition, when_true, when_false) => {
+            visitor.visit_condition_mut(condition);
+            walk_node_mut(visitor, nodes, when_true);
+            walk_node_mut(visitor, nodes, when_false);
+        }
+        ResourceIr::Map(name, top_level_key, second_level_key) => {
+            visitor.visit_mapping_mut(name);
+            walk_node_mut(visitor, nodes, top_level_key);
+            walk_node_mut(visitor, nodes, second_level_key);
+        }
+        ResourceIr::Ref(reference) => visitor.visit_reference_mut(reference),
+        ResourceIr::Split(_, value)
+        | ResourceIr::Base64(value)
+        | ResourceIr::ImportValue(value)
+        | ResourceIr::GetAZs(value)
+        | ResourceIr::Select(_, value) => walk_node_mut(visitor, nodes, value),
+        ResourceIr::Cidr(ip_block, count, cidr_bits) => {
+            walk_node_mut(visitor, nodes, ip_block);
+            walk_node_mut(visitor, nodes, count);
+            walk_node_mut(visitor, nodes, cidr_bits);
+        }
+    }
+}
+
+fn walk_node_mut<V: VisitorMut + ?Sized>(visitor: &mut V, nodes: &mut NodeTable, id: &mut NodeId) {
+    visitor.visit_node_mut(id);
+    let mut node = nodes.take(*id);
+    visitor.visit_resource_ir_mut(nodes, &mut node);
+    nodes.put(*id, node);
+}
+
+fn walk_list_mut<V: VisitorMut + ?Sized>(
+    visitor: &mut V,
+    nodes: &mut NodeTable,
+    list: &mut NodeList,
+) {
+    visitor.visit_list_mut(list);
+    for index in 0..list.len() {
+        let mut item = mem::take(&mut nodes.list_mut(*list)[index]);
+        visitor.visit_resource_ir_mut(nodes, &mut item);
+        nodes.list_mut(*list)[index] = item;
+    }
+}
+
+pub fn walk_condition_ir_mut<V: VisitorMut + ?Sized>(visitor: &mut V, ir: &mut ConditionIr) {
+    match ir {
+        ConditionIr::And(list) | ConditionIr::Or(list) => {
+            for item in list {
+                visitor.visit_condition_ir_mut(item);
+            }
+        }
+        ConditionIr::Equals(lhs, rhs) => {
+            visitor.visit_condition_ir_mut(lhs);
+            visitor.visit_condition_ir_mut(rhs);
+        }
+        ConditionIr::Not(value) | ConditionIr::Split(_, value) | ConditionIr::Select(_, value) => {
+            visitor.visit_condition_ir_mut(value)
+        }
+        ConditionIr::Condition(name) => visitor.visit_condition_mut(name),
+        ConditionIr::Map(name, top_level_key, second_level_key) => {
+            visitor.visit_mapping_mut(name);
+            visitor.visit_condition_ir_mut(top_level_key);
+            visitor.visit_condition_ir_mut(second_level_key);
+        }
+        ConditionIr::Str(_) => {}
+        ConditionIr::Ref(reference) => visitor.visit_reference_mut(reference),
+    }
+}
+
+// Collects the logical IDs referenced (by `Ref` or `GetAtt`) by the visited
+// trees into the provided accumulator. Parameters, conditions and pseudo
+// parameters are not collected.
+pub struct LogicalIdReferences<'a, E: Extend<Symbol>>(pub &'a mut E);
+
+impl<'ir, E: Extend<Symbol>> Visitor<'ir> for LogicalIdReferences<'_, E> {
+    #[inline]
+    fn visit_reference(&mut self, reference: &'ir Reference) {
+        if let Origin::LogicalId { .. } | Origin::GetAttribute { .. } = reference.origin {
+            self.0.extend(Some(reference.symbol));
+        }
+    }
+}
+
+// Collects the name of every mapping table used by the visited trees.
+#[derive(Debug, Default)]
+pub struct MappingUsage<'ir> {
+    pub used: HashSet<&'ir str, Hasher>,
+}
+
+impl<'ir> Visitor<'ir> for MappingUsage<'ir> {
+    #[inline]
+    fn visit_mapping(&mut self, name: &'ir str) {
+        self.used.insert(name);
+    }
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,111 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use std::collections::BTreeSet;
+
+use super::*;
+use crate::cdk::TypeReference;
+use crate::ir::symbols::SymbolTable;
+use crate::ir::types::TypeTable;
+
+fn reference(symbol: Symbol, origin: Origin) -> ResourceIr {
+    ResourceIr::Ref(Reference::new(symbol, origin))
+}
+
+#[test]
+fn test_logical_id_references_skip_parameters() {
+    let mut symbols = SymbolTable::default();
+    let bucket = symbols.intern("Bucket");
+    let queue = symbols.intern("Queue");
+    let parameter = symbols.intern("Env");
+    let unknown = TypeTable::default().intern(&TypeReference::default());
+
+    let mut nodes = NodeTable::default();
+    let arn = nodes.push_list([
+        ResourceIr::String("arn:".into()),
+        reference(
+            queue,
+            Origin::GetAttribute {
+                attribute: "Arn".into(),
+                conditional: false,
+                is_custom_resource: false,
+            },
+        ),
+    ]);
+    let entries = nodes.push_entries([
+        (
+            "Bucket".into(),
+            reference(
+                bucket,
+                Origin::LogicalId {
+                    conditional: false,
+                    is_custom_resource: false,
+                },
+            ),
+        ),
+        ("Arn".into(), ResourceIr::Sub(arn)),
+        ("Env".into(), reference(parameter, Origin::Parameter)),
+    ]);
+    let ir = ResourceIr::Object(unknown, entries);
+
+    let mut references = BTreeSet::new();
+    LogicalIdReferences(&mut references).visit_resource_ir(&nodes, &ir);
+
+    assert_eq!(references, BTreeSet::from([bucket, queue]));
+}
+
+#[test]
+fn test_mapping_usage_visits_conditions_and_resources() {
+    let condition = ConditionIr::Not(Box::new(ConditionIr::Map(
+        "RegionMap".into(),
+        Box::new(ConditionIr::Str("us-east-1".into())),
+        Box::new(ConditionIr::Str("Enabled".into())),
+    )));
+    let mut nodes = NodeTable::default();
+    let map = ResourceIr::Map(
+        "Exports".into(),
+        nodes.push(ResourceIr::String("prod".into())),
+        nodes.push(ResourceIr::String("Name".into())),
+    );
+    let import = ResourceIr::ImportValue(nodes.push(map));
+    let resource = ResourceIr::If(
+        "IsProd".into(),
+        nodes.push(import),
+        nodes.push(ResourceIr::Null),
+    );
+
+    let mut usage = MappingUsage::default();
+    usage.visit_condition_ir(&condition);
+    usage.visit_resource_ir(&nodes, &resource);
+
+    assert_eq!(usage.used.len(), 2);
+    assert!(usage.used.contains("RegionMap"));
+    assert!(usage.used.contains("Exports"));
+}
+
+#[test]
+fn test_visitor_mut_rewrites_in_place() {
+    struct Rename;
+    impl VisitorMut for Rename {
+        fn visit_condition_mut(&mut self, name: &mut String) {
+            name.make_ascii_uppercase();
+        }
+    }
+
+    let unknown = TypeTable::default().intern(&TypeReference::default());
+    let mut nodes = NodeTable::default();
+    let (when_true, when_false) = (
+        nodes.push(ResourceIr::Bool(true)),
+        nodes.push(ResourceIr::Bool(false)),
+    );
+    let items = nodes.push_list([ResourceIr::If("isProd".into(), when_true, when_false)]);
+    let mut ir = ResourceIr::Array(unknown, items);
+    Rename.visit_resource_ir_mut(&mut nodes, &mut ir);
+
+    assert_eq!(ir, ResourceIr::Array(unknown, items));
+    assert_eq!(
+        nodes.list(items),
+        [ResourceIr::If("ISPROD".into(), when_true, when_false)],
+    );
+    assert_eq!(nodes[when_true], ResourceIr::Bool(true));
+    assert_eq!(nodes[when_false], ResourceIr::Bool(false));
+}
@@ -17,6 +17,8 @@ use parser::parameters::Parameter;
 use parser::resource::ResourceAttributes;
 use serde::{Deserialize, Deserializer};
 
+#[cfg(not(target_family = "wasm"))]
+pub mod cache;
 pub mod cdk;
 pub mod code;
 pub mod errors;
@@ -24,6 +26,7 @@ pub mod ir;
 pub mod parser;
 pub mod primitives;
 pub mod synthesizer;
+pub mod timings;
 
 mod util;
 
@@ -33,9 +36,14 @@ pub use errors::*;
 #[doc(inline)]
 pub use util::Hasher;
 
-#[derive(Debug, serde::Deserialize)]
+/// A CloudFormation template, as parsed from its JSON or YAML form.
+///
+/// Resource and output values borrow their strings from the template buffer
+/// whenever the parser front-end allows it, so the tree cannot outlive the
+/// buffer it was parsed from.
+#[derive(Clone, Debug, serde::Deserialize)]
 #[serde(rename_all = "PascalCase")]
-pub struct CloudformationParseTree {
+pub struct CloudformationParseTree<'a> {
     pub description: Option<String>,
 
     #[serde(
@@ -49,12 +57,56 @@ pub struct CloudformationParseTree {
     pub conditions: IndexMap<String, ConditionFunction, Hasher>,
     #[serde(default)]
     pub mappings: IndexMap<String, MappingTable, Hasher>,
-    #[serde(default)]
-    pub outputs: IndexMap<String, Output, Hasher>,
+    #[serde(default, borrow)]
+    pub outputs: IndexMap<String, Output<'a>, Hasher>,
     #[serde(default)]
     pub parameters: IndexMap<String, Parameter, Hasher>,
 
-    pub resources: IndexMap<String, ResourceAttributes, Hasher>,
+    #[serde(borrow)]
+    pub resources: IndexMap<String, ResourceAttributes<'a>, Hasher>,
+}
+
+impl<'a> CloudformationParseTree<'a> {
+    /// Parses a CloudFormation template in either its JSON or its YAML form.
+    ///
+    /// Templates starting with `{` are parsed with `serde_json`, which is much
+    /// faster than `serde_yaml` and drives the same deserialization visitors.
+    /// Should that fail on syntax (flow-style YAML also starts with `{`), and
+    /// for every other template, `serde_yaml` is used. Only `serde_json` lends
+    /// out slices of the template, so only JSON templates are parsed without
+    /// copying their strings.
+    pub fn from_slice(template: &'a [u8]) -> Result<Self, Error> {
+        if template.iter().find(|byte| !byte.is_ascii_whitespace()) == Some(&b'{') {
+            match serde_json::from_slice(template) {
+                Ok(tree) => return Ok(tree),
+                Err(err) if err.is_syntax() => {}
+                Err(err) => return Err(err.into()),
+            }
+        }
+        Ok(serde_yaml::from_slice(template)?)
+    }
+
+    /// Converts the tree into one that does not borrow from the template
+    /// buffer, so that it can outlive it.
+    pub fn into_owned(self) -> CloudformationParseTree<'static> {
+        CloudformationParseTree {
+            description: self.description,
+            transforms: self.transforms,
+            conditions: self.conditions,
+            mappings: self.mappings,
+            outputs: self
+                .outputs
+                .into_iter()
+                .map(|(name, output)| (name, output.into_owned()))
+                .collect(),
+            parameters: self.parameters,
+            resources: self
+                .resources
+                .into_iter()
+                .map(|(name, attributes)| (name, attributes.into_owned()))
+                .collect(),
+        }
+    }
 }
 
 fn string_or_seq_string<'de, D>(deserializer: D) -> Result<Vec<String>, D::Error>
@@ -108,7 +160,7 @@ pub mod wasm {
         class_name: &str,
         class_type: Option<String>,
     ) -> Result<String, JsError> {
-        let cfn_tree: CloudformationParseTree = serde_yaml::from_str(template)?;
+        let cfn_tree = CloudformationParseTree::from_slice(template.as_bytes())?;
         let ir = crate::ir::CloudformationProgramIr::from(cfn_tree, Schema::builtin())?;
         let mut output = Vec::new();
 
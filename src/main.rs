@@ -1,13 +1,20 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
+use cdk_from_cfn::cache::{self, Cache};
 use cdk_from_cfn::cdk::Schema;
 use cdk_from_cfn::ir::CloudformationProgramIr;
 use cdk_from_cfn::synthesizer::ClassType;
+use cdk_from_cfn::timings::Timings;
 use cdk_from_cfn::CloudformationParseTree;
 use cdk_from_cfn::Error;
-use clap::{Arg, ArgAction, Command};
-use std::borrow::Cow;
-use std::{fs, io};
+use clap::error::ErrorKind;
+use clap::{value_parser, Arg, ArgAction, ArgMatches, Command};
+use std::io::Write;
+use std::path::{Path, PathBuf};
+use std::time::Duration;
+use std::{fs, io, process, thread};
+
+mod cli;
 
 // Ensure at least one target language is enabled...
 #[cfg(not(any(
@@ -33,9 +40,10 @@ fn main() -> Result<(), Error> {
         "csharp",
     ];
 
-    let matches = Command::new(env!("CARGO_BIN_NAME"))
+    let mut command = Command::new(env!("CARGO_BIN_NAME"))
         .about(clap::crate_description!())
         .version(clap::crate_version!())
+        .args_conflicts_with_subcommands(true)
         .arg(
             Arg::new("INPUT")
                 .help("Sets the input file to use (use - to read from STDIN)")
@@ -51,61 +59,397 @@ fn main() -> Result<(), Error> {
                 .index(2)
                 .action(ArgAction::Set),
         )
+        .args(output_args(&[&targets[..], &["all"]].concat()))
+        .args(cache_args())
         .arg(
-            Arg::new("language")
-                .long("language")
-                .short('l')
-                .help("Sets the output language to use")
-                .required(false)
-                .default_value(targets[0])
-                .value_parser(targets)
+            Arg::new("emit-ir")
+                .help("Writes the IR of the template to the given file (as JSON if it ends in .json) instead of generating code")
+                .long("emit-ir")
+                .value_name("FILE")
+                .value_parser(value_parser!(PathBuf))
                 .action(ArgAction::Set),
         )
         .arg(
-            Arg::new("stack-name")
-                .help("Sets the name of the stack")
-                .required(false)
-                .long("stack-name")
-                .short('s')
-                .action(ArgAction::Set),
+            Arg::new("from-ir")
+                .help("Reads INPUT as IR written by --emit-ir rather than as a template")
+                .long("from-ir")
+                .conflicts_with("emit-ir")
+                .action(ArgAction::SetTrue),
         )
         .arg(
-            Arg::new("as")
-                .help("Sets the output type: 'stack' or 'construct'")
-                .long("as")
-                .default_value("stack")
-                .value_parser(["stack", "construct"])
-                .action(ArgAction::Set),
+            Arg::new("timings")
+                .help("Prints the time spent in each phase of the conversion to STDERR")
+                .long("timings")
+                .action(ArgAction::SetTrue),
+        )
+        .arg(
+            Arg::new("timings-json")
+                .help("Prints the time spent in each phase of the conversion to STDERR, as JSON")
+                .long("timings-json")
+                .action(ArgAction::SetTrue),
         )
-        .get_matches();
+        .subcommand(
+            Command::new("batch")
+                .about("Converts many templates in parallel from a single process")
+                .arg(
+                    Arg::new("INPUTS")
+                        .help("Sets the template files or directories to convert")
+                        .required(true)
+                        .num_args(1..)
+                        .value_parser(value_parser!(PathBuf))
+                        .action(ArgAction::Append),
+                )
+                .arg(
+                    Arg::new("out-dir")
+                        .help("Sets the directory in which generated code is written")
+                        .long("out-dir")
+                        .short('o')
+                        .required(true)
+                        .value_parser(value_parser!(PathBuf))
+                        .action(ArgAction::Set),
+                )
+                .arg(
+                    Arg::new("jobs")
+                        .help("Sets the number of templates converted concurrently (defaults to the number of CPUs)")
+                        .long("jobs")
+                        .short('j')
+                        .value_parser(value_parser!(usize))
+                        .action(ArgAction::Set),
+                )
+                .args(output_args(&targets))
+                .args(cache_args()),
+        )
+        .subcommand(
+            Command::new("watch")
+                .about("Regenerates the code of templates whenever they change")
+                .arg(
+                    Arg::new("INPUTS")
+                        .help("Sets the template files or directories to watch")
+                        .required(true)
+                        .num_args(1..)
+                        .value_parser(value_parser!(PathBuf))
+                        .action(ArgAction::Append),
+                )
+                .arg(
+                    Arg::new("out-dir")
+                        .help("Sets the directory in which generated code is written")
+                        .long("out-dir")
+                        .short('o')
+                        .required(true)
+                        .value_parser(value_parser!(PathBuf))
+                        .action(ArgAction::Set),
+                )
+                .arg(
+                    Arg::new("interval")
+                        .help("Sets the time in milliseconds between checks for changed templates")
+                        .long("interval")
+                        .default_value("20")
+                        .value_parser(value_parser!(u64))
+                        .action(ArgAction::Set),
+                )
+                .arg(
+                    Arg::new("debounce")
+                        .help("Sets the time in milliseconds a template must remain unchanged before it is converted")
+                        .long("debounce")
+                        .default_value("10")
+                        .value_parser(value_parser!(u64))
+                        .action(ArgAction::Set),
+                )
+                .args(output_args(&targets))
+                .args(cache_args()),
+        )
+        .subcommand(
+            Command::new("serve")
+                .about("Serves conversion requests read as JSON lines from STDIN or a Unix socket")
+                .arg(
+                    Arg::new("socket")
+                        .help("Listens on the given Unix domain socket instead of reading STDIN")
+                        .long("socket")
+                        .value_parser(value_parser!(PathBuf))
+                        .action(ArgAction::Set),
+                )
+                .arg(
+                    Arg::new("workers")
+                        .help("Sets the number of conversions run concurrently (defaults to the number of CPUs)")
+                        .long("workers")
+                        .short('w')
+                        .value_parser(value_parser!(usize))
+                        .action(ArgAction::Set),
+                )
+                .arg(
+                    Arg::new("timeout")
+                        .help("Sets the time in milliseconds after which a request is answered with an error")
+                        .long("timeout")
+                        .default_value("30000")
+                        .value_parser(value_parser!(u64))
+                        .action(ArgAction::Set),
+                )
+                .args(cache_args()),
+        );
+    let matches = command.get_matches_mut();
+
+    match matches.subcommand() {
+        Some(("batch", matches)) => return batch(matches, targets[0]),
+        Some(("watch", matches)) => return watch(matches, targets[0]),
+        Some(("serve", matches)) => return serve(matches, targets[0]),
+        _ => {}
+    }
 
-    let cfn_tree: CloudformationParseTree = {
-        let reader: Box<dyn std::io::Read> =
-            match matches.get_one::<String>("INPUT").map(String::as_str) {
-                None | Some("-") => Box::new(io::stdin()),
-                Some(file) => Box::new(fs::File::open(file)?),
-            };
+    let (language, class_name, class_type) = output_settings(&matches, targets[0]);
+    let from_ir = matches.get_flag("from-ir");
+    let output = matches
+        .get_one::<String>("OUTPUT")
+        .map(String::as_str)
+        .unwrap_or("-");
+    if language == "all" && output == "-" {
+        command
+            .error(
+                ErrorKind::MissingRequiredArgument,
+                "--language all requires OUTPUT to be a directory",
+            )
+            .exit();
+    }
 
-        serde_yaml::from_reader(reader)?
+    let template = {
+        let input = matches
+            .get_one::<String>("INPUT")
+            .map(String::as_str)
+            .unwrap_or("-");
+        cli::input::read(Path::new(input))?
     };
+    let mut timings = Timings::new();
 
-    let schema = Cow::Borrowed(Schema::builtin());
+    if let Some(path) = matches.get_one::<PathBuf>("emit-ir") {
+        let ir = translate(&template, &mut timings)?;
+        let bytes = timings.time(
+            "encode",
+            || match path.extension() {
+                Some(extension) if extension == "json" => ir.to_json(),
+                _ => ir.to_binary(),
+            },
+            |bytes| bytes.as_ref().map_or(0, Vec::len),
+        )?;
+        timings.time("write", || fs::write(path, &bytes), |_| bytes.len())?;
+    } else if language == "all" {
+        let ir = load(&template, from_ir, &mut timings)?;
+        synthesize_all(
+            &ir,
+            &targets,
+            Path::new(output),
+            class_name,
+            class_type,
+            &mut timings,
+        )?;
+    } else {
+        let cache = open_cache(&matches)?.map(|cache| {
+            let key = cache::Key::new(&template, language, class_name, class_type);
+            (cache, key)
+        });
+        let cached = match &cache {
+            Some((cache, key)) => timings.time(
+                "cache",
+                || cache.get(key),
+                |code| code.as_ref().map_or(0, Vec::len),
+            ),
+            None => None,
+        };
 
-    let ir = CloudformationProgramIr::from(cfn_tree, &schema)?;
+        let code = match cached {
+            Some(code) => Some(code),
+            None => {
+                let ir = load(&template, from_ir, &mut timings)?;
+                match &cache {
+                    // The code is stored in the cache, so it is rendered in
+                    // memory first.
+                    Some((cache, key)) => {
+                        let code = timings.time(
+                            "synthesize",
+                            || {
+                                let mut code = Vec::new();
+                                ir.synthesize(language, &mut code, class_name, class_type)
+                                    .map(|()| code)
+                            },
+                            |code| code.as_ref().map_or(0, Vec::len),
+                        )?;
+                        if let Err(err) = cache.put(key, &code) {
+                            eprintln!(
+                                "warning: could not store the generated code in the cache: {err}"
+                            );
+                        }
+                        Some(code)
+                    }
+                    // Otherwise it is written out as it is synthesized, so the
+                    // rendered program is never held in memory as a whole.
+                    None => {
+                        let mut into = create_output(output)?;
+                        let result = timings.time(
+                            "synthesize",
+                            || ir.synthesize(language, &mut into, class_name, class_type),
+                            |_| ir.resources.len(),
+                        );
+                        if result.is_err() && output != "-" {
+                            drop(into);
+                            let _ = fs::remove_file(output);
+                        }
+                        result?;
+                        None
+                    }
+                }
+            }
+        };
 
-    let mut output: Box<dyn io::Write> = match matches
-        .get_one::<String>("OUTPUT")
-        .map(String::as_str)
-        .unwrap_or("-")
-    {
+        if let Some(code) = code {
+            let mut output = create_output(output)?;
+            timings.time(
+                "write",
+                || output.write_all(&code).and_then(|()| output.flush()),
+                |_| code.len(),
+            )?;
+        }
+    }
+
+    if matches.get_flag("timings") {
+        timings.write_table(&mut io::stderr())?;
+    }
+    if matches.get_flag("timings-json") {
+        eprintln!("{}", timings.to_json());
+    }
+
+    Ok(())
+}
+
+/// Opens the file the generated code is written to, or STDOUT for `-`.
+fn create_output(output: &str) -> io::Result<io::BufWriter<Box<dyn io::Write>>> {
+    let output: Box<dyn io::Write> = match output {
         "-" => Box::new(io::stdout()),
         output_file => Box::new(fs::File::create(output_file)?),
     };
+    Ok(io::BufWriter::new(output))
+}
+
+/// Parses the template and translates it into the IR, recording the time
+/// spent doing so.
+fn translate(template: &[u8], timings: &mut Timings) -> Result<CloudformationProgramIr, Error> {
+    let cfn_tree = timings.time(
+        "parse",
+        || CloudformationParseTree::from_slice(template),
+        |tree| tree.as_ref().map_or(0, |tree| tree.resources.len()),
+    )?;
+    CloudformationProgramIr::from_timed(cfn_tree, Schema::builtin(), timings)
+}
+
+/// Reads the IR of the program from `input`, which is either a template or,
+/// if `from_ir` is set, IR written by `--emit-ir`.
+fn load(
+    input: &[u8],
+    from_ir: bool,
+    timings: &mut Timings,
+) -> Result<CloudformationProgramIr, Error> {
+    if !from_ir {
+        return translate(input, timings);
+    }
+    timings.time(
+        "decode",
+        || CloudformationProgramIr::decode(input),
+        |ir| ir.as_ref().map_or(0, |ir| ir.resources.len()),
+    )
+}
+
+/// Synthesizes the program in every enabled language concurrently, writing one
+/// source file per language into `out_dir` as the code is synthesized.
+fn synthesize_all(
+    ir: &CloudformationProgramIr,
+    targets: &[&str],
+    out_dir: &Path,
+    class_name: &str,
+    class_type: ClassType,
+    timings: &mut Timings,
+) -> Result<(), Error> {
+    fs::create_dir_all(out_dir)?;
+    let mut outputs = Vec::with_capacity(targets.len());
+    for &language in targets {
+        let path = out_dir.join(format!("{class_name}.{}", cli::extension(language)));
+        outputs.push((language, io::BufWriter::new(fs::File::create(path)?)));
+    }
 
+    let results = timings.time(
+        "synthesize",
+        || ir.synthesize_concurrently(&mut outputs, class_name, class_type),
+        |_| targets.len() * ir.resources.len(),
+    );
+    results.into_iter().collect()
+}
+
+/// The arguments controlling code generation, shared by every mode of
+/// operation.
+fn output_args(languages: &[&'static str]) -> [Arg; 3] {
+    [
+        Arg::new("language")
+            .long("language")
+            .short('l')
+            .help("Sets the output language to use")
+            .required(false)
+            .default_value(languages[0])
+            .value_parser(languages.to_vec())
+            .action(ArgAction::Set),
+        Arg::new("stack-name")
+            .help("Sets the name of the stack")
+            .required(false)
+            .long("stack-name")
+            .short('s')
+            .action(ArgAction::Set),
+        Arg::new("as")
+            .help("Sets the output type: 'stack' or 'construct'")
+            .long("as")
+            .default_value("stack")
+            .value_parser(["stack", "construct"])
+            .action(ArgAction::Set),
+    ]
+}
+
+/// The arguments controlling the conversion cache, shared by every mode of
+/// operation.
+fn cache_args() -> [Arg; 3] {
+    [
+        Arg::new("cache-dir")
+            .help("Reuses the code generated for identical conversions, stored in the given directory")
+            .long("cache-dir")
+            .value_parser(value_parser!(PathBuf))
+            .action(ArgAction::Set),
+        Arg::new("cache-size")
+            .help("Sets the size in MiB above which the least recently used cache entries are evicted")
+            .long("cache-size")
+            .default_value("256")
+            .value_parser(value_parser!(u64))
+            .action(ArgAction::Set),
+        Arg::new("no-cache")
+            .help("Neither reads from nor writes to the cache, even if --cache-dir is set")
+            .long("no-cache")
+            .action(ArgAction::SetTrue),
+    ]
+}
+
+fn open_cache(matches: &ArgMatches) -> Result<Option<Cache>, Error> {
+    if matches.get_flag("no-cache") {
+        return Ok(None);
+    }
+    let Some(dir) = matches.get_one::<PathBuf>("cache-dir") else {
+        return Ok(None);
+    };
+    let size = matches
+        .get_one::<u64>("cache-size")
+        .expect("cache-size has a default value");
+    Ok(Some(Cache::open(dir, size.saturating_mul(1024 * 1024))?))
+}
+
+fn output_settings<'a>(
+    matches: &'a ArgMatches,
+    default_language: &'a str,
+) -> (&'a str, &'a str, ClassType) {
     let language = matches
         .get_one::<String>("language")
         .map(String::as_str)
-        .unwrap_or(targets[0]);
+        .unwrap_or(default_language);
 
     let class_name = matches
         .get_one::<String>("stack-name")
@@ -117,7 +461,111 @@ fn main() -> Result<(), Error> {
         .map(|s| s.parse().unwrap())
         .unwrap_or_default();
 
-    ir.synthesize(language, &mut output, class_name, class_type)?;
+    (language, class_name, class_type)
+}
+
+fn batch(matches: &ArgMatches, default_language: &str) -> Result<(), Error> {
+    let (language, class_name, class_type) = output_settings(matches, default_language);
+    let inputs: Vec<PathBuf> = matches
+        .get_many::<PathBuf>("INPUTS")
+        .unwrap_or_default()
+        .cloned()
+        .collect();
+    let out_dir = matches
+        .get_one::<PathBuf>("out-dir")
+        .expect("out-dir is required");
+    let jobs = matches
+        .get_one::<usize>("jobs")
+        .copied()
+        .unwrap_or_else(available_parallelism);
+    let cache = open_cache(matches)?;
+
+    let report = cli::batch::run(
+        &inputs,
+        &cli::batch::Options {
+            out_dir,
+            language,
+            class_name,
+            class_type,
+            jobs,
+            cache: cache.as_ref(),
+        },
+    )?;
+    report.write(&mut io::stderr())?;
 
+    if report.failures().next().is_some() {
+        process::exit(1);
+    }
     Ok(())
 }
+
+fn watch(matches: &ArgMatches, default_language: &str) -> Result<(), Error> {
+    let (language, class_name, class_type) = output_settings(matches, default_language);
+    let inputs: Vec<PathBuf> = matches
+        .get_many::<PathBuf>("INPUTS")
+        .unwrap_or_default()
+        .cloned()
+        .collect();
+    let millis = |name: &str| {
+        Duration::from_millis(
+            *matches
+                .get_one::<u64>(name)
+                .expect("argument has a default value"),
+        )
+    };
+    let cache = open_cache(matches)?;
+
+    let mut watcher = cli::watch::Watcher::new(
+        &inputs,
+        cli::watch::Options {
+            out_dir: matches
+                .get_one::<PathBuf>("out-dir")
+                .expect("out-dir is required"),
+            language,
+            class_name,
+            class_type,
+            interval: millis("interval"),
+            debounce: millis("debounce"),
+            cache: cache.as_ref(),
+        },
+    )?;
+    eprintln!("Watching for changes, press Ctrl+C to stop");
+    Ok(watcher.run(&mut io::stderr())?)
+}
+
+fn serve(matches: &ArgMatches, default_language: &'static str) -> Result<(), Error> {
+    let server = cli::serve::Server::new(cli::serve::Options {
+        workers: matches
+            .get_one::<usize>("workers")
+            .copied()
+            .unwrap_or_else(available_parallelism),
+        timeout: Duration::from_millis(
+            *matches
+                .get_one::<u64>("timeout")
+                .expect("timeout has a default value"),
+        ),
+        default_language,
+        cache: open_cache(matches)?,
+    });
+
+    match matches.get_one::<PathBuf>("socket") {
+        #[cfg(unix)]
+        Some(socket) => server.serve_socket(socket)?,
+        #[cfg(not(unix))]
+        Some(_) => {
+            return Err(io::Error::new(
+                io::ErrorKind::Unsupported,
+                "Unix domain sockets are not supported on this platform",
+            )
+            .into())
+        }
+        None => server.serve(io::stdin().lock(), io::BufWriter::new(io::stdout()))?,
+    }
+    eprintln!("{}", server.counters().to_json());
+
+    Ok(())
+}
+
+fn available_parallelism() -> usize {
+    thread::available_parallelism().map_or(1, usize::from)
+}
@@ -0,0 +1,146 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Deserialization helpers for strings that borrow from the template buffer.
+//!
+//! The `Deserialize` implementation of `Cow<'a, str>` always produces an owned
+//! string, so the parse tree uses these helpers instead. They borrow whenever
+//! the front-end hands out a slice of its input (`serde_json` does so for every
+//! string without escape sequences), and take ownership of the string
+//! otherwise (`serde_yaml` never borrows).
+
+use indexmap::IndexMap;
+use serde::de::{self, Deserialize, Deserializer, Error};
+use std::borrow::Cow;
+use std::fmt;
+use std::hash::BuildHasher;
+use std::marker::PhantomData;
+
+/// A string that borrows from the deserializer's input when possible.
+#[derive(Debug)]
+pub(crate) struct CowStr<'a>(pub Cow<'a, str>);
+
+impl<'de: 'a, 'a> Deserialize<'de> for CowStr<'a> {
+    fn deserialize<D: Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
+        deserializer.deserialize_str(CowStrVisitor(PhantomData))
+    }
+}
+
+struct CowStrVisitor<'a>(PhantomData<&'a ()>);
+
+impl<'de: 'a, 'a> de::Visitor<'de> for CowStrVisitor<'a> {
+    type Value = CowStr<'a>;
+
+    fn expecting(&self, formatter: &mut fmt::Formatter) -> fmt::Result {
+        formatter.write_str("a string")
+    }
+
+    #[inline]
+    fn visit_borrowed_str<E: Error>(self, val: &'de str) -> Result<Self::Value, E> {
+        Ok(CowStr(Cow::Borrowed(val)))
+    }
+
+    #[inline]
+    fn visit_str<E: Error>(self, val: &str) -> Result<Self::Value, E> {
+        Ok(CowStr(Cow::Owned(val.to_owned())))
+    }
+
+    #[inline]
+    fn visit_string<E: Error>(self, val: String) -> Result<Self::Value, E> {
+        Ok(CowStr(Cow::Owned(val)))
+    }
+}
+
+/// Takes ownership of a string that may borrow from the template buffer.
+#[inline]
+pub(crate) fn owned(string: Cow<'_, str>) -> Cow<'static, str> {
+    Cow::Owned(string.into_owned())
+}
+
+pub(crate) fn cow_str<'de: 'a, 'a, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Cow<'a, str>, D::Error> {
+    CowStr::deserialize(deserializer).map(|CowStr(string)| string)
+}
+
+pub(crate) fn option_cow_str<'de: 'a, 'a, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Option<Cow<'a, str>>, D::Error> {
+    Ok(Option::<CowStr>::deserialize(deserializer)?.map(|CowStr(string)| string))
+}
+
+/// Deserializes either a single string or a list of strings into a list.
+pub(crate) fn cow_str_or_seq<'de: 'a, 'a, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Vec<Cow<'a, str>>, D::Error> {
+    struct StringOrVec<'a>(PhantomData<&'a ()>);
+
+    impl<'de: 'a, 'a> de::Visitor<'de> for StringOrVec<'a> {
+        type Value = Vec<Cow<'a, str>>;
+
+        fn expecting(&self, formatter: &mut fmt::Formatter) -> fmt::Result {
+            formatter.write_str("string or list of strings")
+        }
+
+        fn visit_borrowed_str<E: Error>(self, val: &'de str) -> Result<Self::Value, E> {
+            Ok(vec![Cow::Borrowed(val)])
+        }
+
+        fn visit_str<E: Error>(self, val: &str) -> Result<Self::Value, E> {
+            Ok(vec![Cow::Owned(val.to_owned())])
+        }
+
+        fn visit_string<E: Error>(self, val: String) -> Result<Self::Value, E> {
+            Ok(vec![Cow::Owned(val)])
+        }
+
+        fn visit_seq<S: de::SeqAccess<'de>>(self, mut seq: S) -> Result<Self::Value, S::Error> {
+            let mut vec = Vec::with_capacity(seq.size_hint().unwrap_or_default());
+            while let Some(CowStr(string)) = seq.next_element()? {
+                vec.push(string);
+            }
+            Ok(vec)
+        }
+    }
+
+    deserializer.deserialize_any(StringOrVec(PhantomData))
+}
+
+/// Deserializes a map whose keys borrow from the input when possible. As with
+/// the `Deserialize` implementation of `IndexMap`, the last of duplicate keys
+/// wins.
+pub(crate) fn cow_map<'de: 'a, 'a, V, S, D>(
+    deserializer: D,
+) -> Result<IndexMap<Cow<'a, str>, V, S>, D::Error>
+where
+    V: Deserialize<'de>,
+    S: BuildHasher + Default,
+    D: Deserializer<'de>,
+{
+    struct MapVisitor<'a, V, S>(PhantomData<(&'a (), V, S)>);
+
+    impl<'de: 'a, 'a, V, S> de::Visitor<'de> for MapVisitor<'a, V, S>
+    where
+        V: Deserialize<'de>,
+        S: BuildHasher + Default,
+    {
+        type Value = IndexMap<Cow<'a, str>, V, S>;
+
+        fn expecting(&self, formatter: &mut fmt::Formatter) -> fmt::Result {
+            formatter.write_str("a map")
+        }
+
+        fn visit_map<A: de::MapAccess<'de>>(self, mut data: A) -> Result<Self::Value, A::Error> {
+            let mut map = IndexMap::with_capacity_and_hasher(
+                data.size_hint().unwrap_or_default(),
+                S::default(),
+            );
+            while let Some(CowStr(key)) = data.next_key()? {
+                map.insert(key, data.next_value()?);
+            }
+            Ok(map)
+        }
+    }
+
+    deserializer.deserialize_map(MapVisitor(PhantomData))
+}
@@ -1,50 +1,52 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::borrowed::{owned, CowStr};
 use super::resource::ResourceValue;
 use serde::de::{Error, VariantAccess};
+use std::borrow::Cow;
 
 #[derive(Clone, Debug, PartialEq)]
-pub enum IntrinsicFunction {
+pub enum IntrinsicFunction<'a> {
     // Standard built-ins
-    Base64(ResourceValue),
+    Base64(ResourceValue<'a>),
     Cidr {
-        ip_block: ResourceValue,
-        count: ResourceValue,
-        cidr_bits: ResourceValue,
+        ip_block: ResourceValue<'a>,
+        count: ResourceValue<'a>,
+        cidr_bits: ResourceValue<'a>,
     },
     FindInMap {
-        map_name: String,
-        top_level_key: ResourceValue,
-        second_level_key: ResourceValue,
+        map_name: Cow<'a, str>,
+        top_level_key: ResourceValue<'a>,
+        second_level_key: ResourceValue<'a>,
     },
     GetAtt {
-        logical_name: String,
-        attribute_name: String,
+        logical_name: Cow<'a, str>,
+        attribute_name: Cow<'a, str>,
     },
-    GetAZs(ResourceValue),
+    GetAZs(ResourceValue<'a>),
     If {
-        condition_name: String,
-        value_if_true: ResourceValue,
-        value_if_false: ResourceValue,
+        condition_name: Cow<'a, str>,
+        value_if_true: ResourceValue<'a>,
+        value_if_false: ResourceValue<'a>,
     },
-    ImportValue(ResourceValue),
+    ImportValue(ResourceValue<'a>),
     Join {
-        sep: String,
-        list: ResourceValue,
+        sep: Cow<'a, str>,
+        list: ResourceValue<'a>,
     },
     Select {
-        index: ResourceValue,
-        list: ResourceValue,
+        index: ResourceValue<'a>,
+        list: ResourceValue<'a>,
     },
     Split {
-        sep: String,
-        string: ResourceValue,
+        sep: Cow<'a, str>,
+        string: ResourceValue<'a>,
     },
     Sub {
-        string: String,
-        replaces: Option<ResourceValue>,
+        string: Cow<'a, str>,
+        replaces: Option<ResourceValue<'a>>,
     },
-    Ref(String),
+    Ref(Cow<'a, str>),
 
     // Special semantics
     Transform,
@@ -69,11 +71,13 @@ static INTRINSIC_FUNCTION_TAGS: &[&str] = &[
     "Ref",
 ];
 
-impl IntrinsicFunction {
-    pub(super) fn from_enum<'de, A: serde::de::EnumAccess<'de>>(data: A) -> Result<Self, A::Error> {
-        let (tag, data): (String, _) = data.variant()?;
+impl<'a> IntrinsicFunction<'a> {
+    pub(super) fn from_enum<'de: 'a, A: serde::de::EnumAccess<'de>>(
+        data: A,
+    ) -> Result<Self, A::Error> {
+        let (CowStr(tag), data) = data.variant()?;
 
-        Ok(match tag.as_str() {
+        Ok(match &*tag {
             "Base64" => Self::Base64(data.newtype_variant()?),
             "Cidr" => {
                 let (ip_block, count, cidr_bits) = data.newtype_variant()?;
@@ -84,7 +88,7 @@ impl IntrinsicFunction {
                 }
             }
             "FindInMap" => {
-                let (map_name, top_level_key, second_level_key) = data.newtype_variant()?;
+                let (CowStr(map_name), top_level_key, second_level_key) = data.newtype_variant()?;
                 Self::FindInMap {
                     map_name,
                     top_level_key,
@@ -101,7 +105,8 @@ impl IntrinsicFunction {
             }
             "GetAZs" => Self::GetAZs(data.newtype_variant()?),
             "If" => {
-                let (condition_name, value_if_true, value_if_false) = data.newtype_variant()?;
+                let (CowStr(condition_name), value_if_true, value_if_false) =
+                    data.newtype_variant()?;
                 Self::If {
                     condition_name,
                     value_if_true,
@@ -110,7 +115,7 @@ impl IntrinsicFunction {
             }
             "ImportValue" => Self::ImportValue(data.newtype_variant()?),
             "Join" => {
-                let (sep, list) = data.newtype_variant()?;
+                let (CowStr(sep), list) = data.newtype_variant()?;
                 Self::Join { sep, list }
             }
             "Select" => {
@@ -118,19 +123,19 @@ impl IntrinsicFunction {
                 Self::Select { index, list }
             }
             "Split" => {
-                let (sep, string) = data.newtype_variant()?;
+                let (CowStr(sep), string) = data.newtype_variant()?;
                 Self::Split { sep, string }
             }
             "Sub" => {
                 let (string, replaces) = data.newtype_variant::<SubPayload>()?.into_pair();
                 Self::Sub { string, replaces }
             }
-            "Ref" => Self::Ref(data.newtype_variant()?),
+            "Ref" => Self::Ref(data.newtype_variant::<CowStr>()?.0),
             unknown => return Err(A::Error::unknown_variant(unknown, INTRINSIC_FUNCTION_TAGS)),
         })
     }
 
-    pub(super) fn from_singleton_map<'de, A: serde::de::MapAccess<'de>>(
+    pub(super) fn from_singleton_map<'de: 'a, A: serde::de::MapAccess<'de>>(
         key: &str,
         data: &mut A,
     ) -> Result<Option<Self>, A::Error> {
@@ -145,7 +150,7 @@ impl IntrinsicFunction {
                 })
             }
             "!FindInMap" | "Fn::FindInMap" => {
-                let (map_name, top_level_key, second_level_key) = data.next_value()?;
+                let (CowStr(map_name), top_level_key, second_level_key) = data.next_value()?;
                 Some(Self::FindInMap {
                     map_name,
                     top_level_key,
@@ -162,7 +167,7 @@ impl IntrinsicFunction {
             }
             "!GetAZs" | "Fn::GetAZs" => Some(Self::GetAZs(data.next_value()?)),
             "!If" | "Fn::If" => Some({
-                let (condition_name, value_if_true, value_if_false) = data.next_value()?;
+                let (CowStr(condition_name), value_if_true, value_if_false) = data.next_value()?;
                 Self::If {
                     condition_name,
                     value_if_true,
@@ -171,7 +176,7 @@ impl IntrinsicFunction {
             }),
             "!ImportValue" | "Fn::ImportValue" => Some(Self::ImportValue(data.next_value()?)),
             "!Join" | "Fn::Join" => {
-                let (sep, list) = data.next_value()?;
+                let (CowStr(sep), list) = data.next_value()?;
                 Some(Self::Join { sep, list })
             }
             "!Select" | "Fn::Select" => {
@@ -179,82 +184,159 @@ impl IntrinsicFunction {
                 Some(Self::Select { index, list })
             }
             "!Split" | "Fn::Split" => {
-                let (sep, string) = data.next_value()?;
+                let (CowStr(sep), string) = data.next_value()?;
                 Some(Self::Split { sep, string })
             }
             "!Sub" | "Fn::Sub" => {
                 let (string, replaces) = data.next_value::<SubPayload>()?.into_pair();
                 Some(Self::Sub { string, replaces })
             }
-            "!Ref" | "Ref" => Some(Self::Ref(data.next_value()?)),
+            "!Ref" | "Ref" => Some(Self::Ref(data.next_value::<CowStr>()?.0)),
             _ => None,
         })
     }
+
+    /// Converts the function into one that does not borrow from the template
+    /// buffer.
+    pub fn into_owned(self) -> IntrinsicFunction<'static> {
+        match self {
+            Self::Base64(value) => IntrinsicFunction::Base64(value.into_owned()),
+            Self::Cidr {
+                ip_block,
+                count,
+                cidr_bits,
+            } => IntrinsicFunction::Cidr {
+                ip_block: ip_block.into_owned(),
+                count: count.into_owned(),
+                cidr_bits: cidr_bits.into_owned(),
+            },
+            Self::FindInMap {
+                map_name,
+                top_level_key,
+                second_level_key,
+            } => IntrinsicFunction::FindInMap {
+                map_name: owned(map_name),
+                top_level_key: top_level_key.into_owned(),
+                second_level_key: second_level_key.into_owned(),
+            },
+            Self::GetAtt {
+                logical_name,
+                attribute_name,
+            } => IntrinsicFunction::GetAtt {
+                logical_name: owned(logical_name),
+                attribute_name: owned(attribute_name),
+            },
+            Self::GetAZs(value) => IntrinsicFunction::GetAZs(value.into_owned()),
+            Self::If {
+                condition_name,
+                value_if_true,
+                value_if_false,
+            } => IntrinsicFunction::If {
+                condition_name: owned(condition_name),
+                value_if_true: value_if_true.into_owned(),
+                value_if_false: value_if_false.into_owned(),
+            },
+            Self::ImportValue(value) => IntrinsicFunction::ImportValue(value.into_owned()),
+            Self::Join { sep, list } => IntrinsicFunction::Join {
+                sep: owned(sep),
+                list: list.into_owned(),
+            },
+            Self::Select { index, list } => IntrinsicFunction::Select {
+                index: index.into_owned(),
+                list: list.into_owned(),
+            },
+            Self::Split { sep, string } => IntrinsicFunction::Split {
+                sep: owned(sep),
+                string: string.into_owned(),
+            },
+            Self::Sub { string, replaces } => IntrinsicFunction::Sub {
+                string: owned(string),
+                replaces: replaces.map(ResourceValue::into_owned),
+            },
+            Self::Ref(name) => IntrinsicFunction::Ref(owned(name)),
+            Self::Transform => IntrinsicFunction::Transform,
+            Self::Length => IntrinsicFunction::Length,
+            Self::ToJsonString => IntrinsicFunction::ToJsonString,
+        }
+    }
 }
 
 #[derive(Debug, serde::Deserialize)]
 #[serde(untagged)]
-enum StringOrPair {
-    String(String),
-    Pair(String, String),
+enum StringOrPair<'a> {
+    String(#[serde(borrow)] CowStr<'a>),
+    Pair(#[serde(borrow)] CowStr<'a>, #[serde(borrow)] CowStr<'a>),
 }
 
-impl StringOrPair {
-    fn into_pair<E: serde::de::Error>(self) -> Result<(String, String), E> {
+impl<'a> StringOrPair<'a> {
+    fn into_pair<E: serde::de::Error>(self) -> Result<(Cow<'a, str>, Cow<'a, str>), E> {
         match self {
-            Self::String(string) => match string.split_once('.') {
-                Some((left, right)) => Ok((left.into(), right.into())),
-                None => Err(E::invalid_value(
-                    serde::de::Unexpected::Str(&string),
-                    &"<logicalNameOfResource>.<attributeName>",
-                )),
-            },
-            Self::Pair(left, right) => Ok((left, right)),
+            Self::String(CowStr(Cow::Borrowed(string))) => {
+                let (left, right) = split_attribute(string)?;
+                Ok((Cow::Borrowed(left), Cow::Borrowed(right)))
+            }
+            Self::String(CowStr(Cow::Owned(string))) => {
+                let (left, right) = split_attribute(&string)?;
+                Ok((Cow::Owned(left.into()), Cow::Owned(right.into())))
+            }
+            Self::Pair(CowStr(left), CowStr(right)) => Ok((left, right)),
         }
     }
 }
 
+fn split_attribute<E: serde::de::Error>(string: &str) -> Result<(&str, &str), E> {
+    string.split_once('.').ok_or_else(|| {
+        E::invalid_value(
+            serde::de::Unexpected::Str(string),
+            &"<logicalNameOfResource>.<attributeName>",
+        )
+    })
+}
+
 // `Fn::Sub` is either a bare template string or `[template, {variables}]`. This
 // was previously modeled with `#[serde(untagged)]`, which buffers through
 // `Content` and then refuses enum input ("untagged and internally tagged enums
 // do not support enum input"). A variables map whose values are shorthand tags
 // (`!Ref`, `!GetAtt`, ...) is exactly such enum input, so it failed to parse.
 // Deserializing the parts directly (ResourceValue handles tags) avoids buffering.
-struct SubPayload(String, Option<ResourceValue>);
+struct SubPayload<'a>(Cow<'a, str>, Option<ResourceValue<'a>>);
 
-impl SubPayload {
-    fn into_pair(self) -> (String, Option<ResourceValue>) {
+impl<'a> SubPayload<'a> {
+    fn into_pair(self) -> (Cow<'a, str>, Option<ResourceValue<'a>>) {
         (self.0, self.1)
     }
 }
 
-impl<'de> serde::Deserialize<'de> for SubPayload {
+impl<'de: 'a, 'a> serde::Deserialize<'de> for SubPayload<'a> {
     fn deserialize<D: serde::Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
-        struct SubVisitor;
-        impl<'de> serde::de::Visitor<'de> for SubVisitor {
-            type Value = SubPayload;
+        struct SubVisitor<'a>(std::marker::PhantomData<&'a ()>);
+        impl<'de: 'a, 'a> serde::de::Visitor<'de> for SubVisitor<'a> {
+            type Value = SubPayload<'a>;
 
             fn expecting(&self, formatter: &mut std::fmt::Formatter) -> std::fmt::Result {
                 formatter.write_str("a Sub template string or a [template, variables] list")
             }
 
+            fn visit_borrowed_str<E: Error>(self, val: &'de str) -> Result<Self::Value, E> {
+                Ok(SubPayload(Cow::Borrowed(val), None))
+            }
             fn visit_str<E: Error>(self, val: &str) -> Result<Self::Value, E> {
-                Ok(SubPayload(val.to_string(), None))
+                Ok(SubPayload(Cow::Owned(val.to_string()), None))
             }
             fn visit_string<E: Error>(self, val: String) -> Result<Self::Value, E> {
-                Ok(SubPayload(val, None))
+                Ok(SubPayload(Cow::Owned(val), None))
             }
 
             fn visit_seq<A: serde::de::SeqAccess<'de>>(
                 self,
                 mut seq: A,
             ) -> Result<Self::Value, A::Error> {
-                let template: String = match seq.next_element()? {
-                    Some(template) => template,
+                let template = match seq.next_element()? {
+                    Some(CowStr(template)) => template,
                     None => return Err(A::Error::invalid_length(0, &self)),
                 };
                 // The second element (the variables map) is optional.
-                let variables: Option<ResourceValue> = seq.next_element()?;
+                let variables: Option<ResourceValue<'a>> = seq.next_element()?;
                 // `Fn::Sub` is `template` or `[template, variables]`; a third
                 // element means a malformed template, so surface it.
                 if seq.next_element::<serde::de::IgnoredAny>()?.is_some() {
@@ -264,6 +346,6 @@ impl<'de> serde::Deserialize<'de> for SubPayload {
             }
         }
 
-        deserializer.deserialize_any(SubVisitor)
+        deserializer.deserialize_any(SubVisitor(std::marker::PhantomData))
     }
 }
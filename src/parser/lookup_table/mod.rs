@@ -19,7 +19,7 @@ pub struct MappingTable {
  * In reality, all values are allowed from the json specification. If we detect any other conflicting
  * numbers, then the type becomes "Any" to allow for the strangeness.
  */
-#[derive(Debug, Clone, PartialEq, serde::Deserialize)]
+#[derive(Debug, Clone, PartialEq, serde::Serialize, serde::Deserialize)]
 #[serde(untagged)]
 pub enum MappingInnerValue {
     Number(i64),
@@ -1,5 +1,6 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
+mod borrowed;
 pub mod condition;
 mod intrinsics;
 pub mod lookup_table;
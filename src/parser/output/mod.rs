@@ -4,9 +4,24 @@ use super::resource::ResourceValue;
 
 #[derive(Clone, Debug, PartialEq, serde::Deserialize)]
 #[serde(rename_all = "PascalCase")]
-pub struct Output {
-    pub value: ResourceValue,
-    pub export: Option<ResourceValue>,
+pub struct Output<'a> {
+    #[serde(borrow)]
+    pub value: ResourceValue<'a>,
+    #[serde(borrow)]
+    pub export: Option<ResourceValue<'a>>,
     pub condition: Option<String>,
     pub description: Option<String>,
 }
+
+impl Output<'_> {
+    /// Converts the output into one that does not borrow from the template
+    /// buffer.
+    pub fn into_owned(self) -> Output<'static> {
+        Output {
+            value: self.value.into_owned(),
+            export: self.export.map(ResourceValue::into_owned),
+            condition: self.condition,
+            description: self.description,
+        }
+    }
+}
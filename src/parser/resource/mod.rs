@@ -1,11 +1,12 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::borrowed::{cow_map, cow_str, cow_str_or_seq, option_cow_str, owned, CowStr};
 use crate::primitives::WrapperF64;
 use crate::Hasher;
 use indexmap::map::Entry;
 use indexmap::IndexMap;
 use serde::de::Error;
-use serde::{de, Deserialize, Deserializer};
+use std::borrow::Cow;
 use std::convert::TryInto;
 use std::fmt;
 use std::marker::PhantomData;
@@ -13,20 +14,46 @@ use std::marker::PhantomData;
 pub use super::intrinsics::IntrinsicFunction;
 
 #[derive(Clone, Debug, PartialEq)]
-pub enum ResourceValue {
+pub enum ResourceValue<'a> {
     Null,
     Bool(bool),
     Number(i64),
     Double(WrapperF64),
-    String(String),
-    Array(Vec<ResourceValue>),
-    Object(IndexMap<String, ResourceValue, Hasher>),
+    String(Cow<'a, str>),
+    Array(Vec<ResourceValue<'a>>),
+    Object(IndexMap<Cow<'a, str>, ResourceValue<'a>, Hasher>),
 
-    IntrinsicFunction(Box<IntrinsicFunction>),
+    IntrinsicFunction(Box<IntrinsicFunction<'a>>),
 }
 
-impl From<IntrinsicFunction> for ResourceValue {
-    fn from(i: IntrinsicFunction) -> Self {
+impl ResourceValue<'_> {
+    /// Converts the value into one that does not borrow from the template
+    /// buffer.
+    pub fn into_owned(self) -> ResourceValue<'static> {
+        match self {
+            Self::Null => ResourceValue::Null,
+            Self::Bool(b) => ResourceValue::Bool(b),
+            Self::Number(n) => ResourceValue::Number(n),
+            Self::Double(d) => ResourceValue::Double(d),
+            Self::String(s) => ResourceValue::String(owned(s)),
+            Self::Array(items) => {
+                ResourceValue::Array(items.into_iter().map(Self::into_owned).collect())
+            }
+            Self::Object(entries) => ResourceValue::Object(
+                entries
+                    .into_iter()
+                    .map(|(key, value)| (owned(key), value.into_owned()))
+                    .collect(),
+            ),
+            Self::IntrinsicFunction(intrinsic) => {
+                ResourceValue::IntrinsicFunction(Box::new(intrinsic.into_owned()))
+            }
+        }
+    }
+}
+
+impl<'a> From<IntrinsicFunction<'a>> for ResourceValue<'a> {
+    fn from(i: IntrinsicFunction<'a>) -> Self {
         match i {
             IntrinsicFunction::Ref(ref_name) if ref_name == "AWS::NoValue" => ResourceValue::Null,
             i => ResourceValue::IntrinsicFunction(Box::new(i)),
@@ -34,11 +61,11 @@ impl From<IntrinsicFunction> for ResourceValue {
     }
 }
 
-impl<'de> serde::de::Deserialize<'de> for ResourceValue {
+impl<'de: 'a, 'a> serde::de::Deserialize<'de> for ResourceValue<'a> {
     fn deserialize<D: serde::de::Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
-        struct ResourceValueVisitor;
-        impl<'de> serde::de::Visitor<'de> for ResourceValueVisitor {
-            type Value = ResourceValue;
+        struct ResourceValueVisitor<'a>(PhantomData<&'a ()>);
+        impl<'de: 'a, 'a> serde::de::Visitor<'de> for ResourceValueVisitor<'a> {
+            type Value = ResourceValue<'a>;
 
             #[inline]
             fn expecting(&self, formatter: &mut std::fmt::Formatter) -> std::fmt::Result {
@@ -85,7 +112,7 @@ impl<'de> serde::de::Deserialize<'de> for ResourceValue {
                     data.size_hint().unwrap_or_default(),
                     Hasher::default(),
                 );
-                while let Some(key) = data.next_key::<String>()? {
+                while let Some(CowStr(key)) = data.next_key()? {
                     if let Some(intrinsic) = IntrinsicFunction::from_singleton_map(&key, &mut data)?
                     {
                         if let Some(extraneous) = data.next_key()? {
@@ -119,9 +146,22 @@ impl<'de> serde::de::Deserialize<'de> for ResourceValue {
                 Ok(Self::Value::Array(vec))
             }
 
+            #[inline]
+            fn visit_borrowed_str<E: serde::de::Error>(
+                self,
+                val: &'de str,
+            ) -> Result<Self::Value, E> {
+                Ok(Self::Value::String(Cow::Borrowed(val)))
+            }
+
             #[inline]
             fn visit_str<E: serde::de::Error>(self, val: &str) -> Result<Self::Value, E> {
-                Ok(Self::Value::String(val.into()))
+                Ok(Self::Value::String(Cow::Owned(val.into())))
+            }
+
+            #[inline]
+            fn visit_string<E: serde::de::Error>(self, val: String) -> Result<Self::Value, E> {
+                Ok(Self::Value::String(Cow::Owned(val)))
             }
 
             #[inline]
@@ -148,64 +188,62 @@ impl<'de> serde::de::Deserialize<'de> for ResourceValue {
             }
         }
 
-        deserializer.deserialize_any(ResourceValueVisitor)
+        deserializer.deserialize_any(ResourceValueVisitor(PhantomData))
     }
 }
 
-#[derive(Debug, PartialEq, serde::Deserialize)]
+#[derive(Clone, Debug, PartialEq, serde::Deserialize)]
 #[serde(rename_all = "PascalCase")]
-pub struct ResourceAttributes {
-    #[serde(rename = "Type")]
-    pub resource_type: String,
+pub struct ResourceAttributes<'a> {
+    #[serde(rename = "Type", borrow, deserialize_with = "cow_str")]
+    pub resource_type: Cow<'a, str>,
 
-    pub condition: Option<String>,
+    #[serde(default, borrow, deserialize_with = "option_cow_str")]
+    pub condition: Option<Cow<'a, str>>,
 
-    pub metadata: Option<ResourceValue>,
+    #[serde(borrow)]
+    pub metadata: Option<ResourceValue<'a>>,
 
-    #[serde(deserialize_with = "string_or_seq_string")]
-    #[serde(default)]
-    pub depends_on: Vec<String>,
+    #[serde(default, borrow, deserialize_with = "cow_str_or_seq")]
+    pub depends_on: Vec<Cow<'a, str>>,
 
-    pub update_policy: Option<ResourceValue>,
+    #[serde(borrow)]
+    pub update_policy: Option<ResourceValue<'a>>,
 
     pub deletion_policy: Option<DeletionPolicy>,
 
-    #[serde(default)]
-    pub properties: IndexMap<String, ResourceValue>,
+    #[serde(default, borrow, deserialize_with = "cow_map")]
+    pub properties: IndexMap<Cow<'a, str>, ResourceValue<'a>>,
 }
 
-fn string_or_seq_string<'de, D>(deserializer: D) -> Result<Vec<String>, D::Error>
-where
-    D: Deserializer<'de>,
-{
-    struct StringOrVec(PhantomData<Vec<String>>);
-
-    impl<'de> de::Visitor<'de> for StringOrVec {
-        type Value = Vec<String>;
-
-        fn expecting(&self, formatter: &mut fmt::Formatter) -> fmt::Result {
-            formatter.write_str("string or list of strings")
-        }
-
-        fn visit_str<E>(self, value: &str) -> Result<Self::Value, E>
-        where
-            E: de::Error,
-        {
-            Ok(vec![value.to_owned()])
-        }
-
-        fn visit_seq<S>(self, visitor: S) -> Result<Self::Value, S::Error>
-        where
-            S: de::SeqAccess<'de>,
-        {
-            Deserialize::deserialize(de::value::SeqAccessDeserializer::new(visitor))
+impl ResourceAttributes<'_> {
+    /// Converts the attributes into ones that do not borrow from the template
+    /// buffer.
+    pub fn into_owned(self) -> ResourceAttributes<'static> {
+        ResourceAttributes {
+            resource_type: owned(self.resource_type),
+            condition: self.condition.map(owned),
+            metadata: self.metadata.map(ResourceValue::into_owned),
+            depends_on: self.depends_on.into_iter().map(owned).collect(),
+            update_policy: self.update_policy.map(ResourceValue::into_owned),
+            deletion_policy: self.deletion_policy,
+            properties: self
+                .properties
+                .into_iter()
+                .map(|(name, value)| (owned(name), value.into_owned()))
+                .collect(),
         }
     }
-
-    deserializer.deserialize_any(StringOrVec(PhantomData))
 }
 
-#[derive(Clone, Copy, Debug, PartialEq, serde_enum_str::Deserialize_enum_str)]
+#[derive(
+    Clone,
+    Copy,
+    Debug,
+    PartialEq,
+    serde_enum_str::Deserialize_enum_str,
+    serde_enum_str::Serialize_enum_str,
+)]
 pub enum DeletionPolicy {
     Delete,
     Retain,
@@ -1,5 +1,6 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
+use serde::Deserialize;
 use serde_yaml::Value;
 
 use super::*;
@@ -12,14 +13,14 @@ fn intrinsic_base64() {
     const BASE64_TEXT: &str = "dGVzdAo=";
     assert_eq!(
         ResourceValue::from_value(json!({ "Fn::Base64": BASE64_TEXT })).unwrap(),
-        IntrinsicFunction::Base64(ResourceValue::String(BASE64_TEXT.to_string())).into(),
+        IntrinsicFunction::Base64(ResourceValue::String(BASE64_TEXT.into())).into(),
     );
     assert_eq!(
         ResourceValue::from_value(
             serde_yaml::from_str(&format!("!Base64 {BASE64_TEXT:?}")).unwrap()
         )
         .unwrap(),
-        IntrinsicFunction::Base64(ResourceValue::String(BASE64_TEXT.to_string())).into(),
+        IntrinsicFunction::Base64(ResourceValue::String(BASE64_TEXT.into())).into(),
     );
 }
 
@@ -32,7 +33,7 @@ fn intrinsic_cidr() {
     assert_eq!(
         ResourceValue::from_value(json!({"Fn::Cidr": [IP_BLOCK, COUNT, CIDR_BITS] })).unwrap(),
         IntrinsicFunction::Cidr {
-            ip_block: ResourceValue::String(IP_BLOCK.to_string()),
+            ip_block: ResourceValue::String(IP_BLOCK.into()),
             count: ResourceValue::Number(COUNT),
             cidr_bits: ResourceValue::Number(CIDR_BITS)
         }
@@ -44,7 +45,7 @@ fn intrinsic_cidr() {
         )
         .unwrap(),
         IntrinsicFunction::Cidr {
-            ip_block: ResourceValue::String(IP_BLOCK.to_string()),
+            ip_block: ResourceValue::String(IP_BLOCK.into()),
             count: ResourceValue::Number(COUNT),
             cidr_bits: ResourceValue::Number(CIDR_BITS)
         }
@@ -57,9 +58,9 @@ fn intrinsic_cidr() {
         )
         .unwrap(),
         IntrinsicFunction::Cidr {
-            ip_block: ResourceValue::String(IP_BLOCK.to_string()),
-            count: ResourceValue::String(COUNT.to_string()),
-            cidr_bits: ResourceValue::String(CIDR_BITS.to_string())
+            ip_block: ResourceValue::String(IP_BLOCK.into()),
+            count: ResourceValue::String(COUNT.to_string().into()),
+            cidr_bits: ResourceValue::String(CIDR_BITS.to_string().into())
         }
         .into(),
     );
@@ -74,9 +75,9 @@ fn intrinsic_cidr() {
         )
         .unwrap(),
         IntrinsicFunction::Cidr {
-            ip_block: ResourceValue::String(IP_BLOCK.to_string()),
-            count: ResourceValue::String(COUNT.to_string()),
-            cidr_bits: ResourceValue::String(CIDR_BITS.to_string())
+            ip_block: ResourceValue::String(IP_BLOCK.into()),
+            count: ResourceValue::String(COUNT.to_string().into()),
+            cidr_bits: ResourceValue::String(CIDR_BITS.to_string().into())
         }
         .into(),
     );
@@ -91,9 +92,9 @@ fn intrinsic_find_in_map() {
         ResourceValue::from_value(json!({"Fn::FindInMap": [MAP_NAME, FIRST_KEY, SECOND_KEY]}))
             .unwrap(),
         IntrinsicFunction::FindInMap {
-            map_name: MAP_NAME.to_string(),
-            top_level_key: ResourceValue::String(FIRST_KEY.to_string()),
-            second_level_key: ResourceValue::String(SECOND_KEY.to_string())
+            map_name: MAP_NAME.into(),
+            top_level_key: ResourceValue::String(FIRST_KEY.into()),
+            second_level_key: ResourceValue::String(SECOND_KEY.into())
         }
         .into(),
     );
@@ -106,9 +107,9 @@ fn intrinsic_find_in_map() {
         )
         .unwrap(),
         IntrinsicFunction::FindInMap {
-            map_name: MAP_NAME.to_string(),
-            top_level_key: ResourceValue::String(FIRST_KEY.to_string()),
-            second_level_key: ResourceValue::String(SECOND_KEY.to_string())
+            map_name: MAP_NAME.into(),
+            top_level_key: ResourceValue::String(FIRST_KEY.into()),
+            second_level_key: ResourceValue::String(SECOND_KEY.into())
         }
         .into(),
     );
@@ -156,12 +157,12 @@ fn intrinsic_get_azs() {
     const REGION: &str = "test-dummy-1337";
     assert_eq!(
         ResourceValue::from_value(json!({ "Fn::GetAZs": REGION })).unwrap(),
-        IntrinsicFunction::GetAZs(ResourceValue::String(REGION.to_string())).into(),
+        IntrinsicFunction::GetAZs(ResourceValue::String(REGION.into())).into(),
     );
     assert_eq!(
         ResourceValue::from_value(serde_yaml::from_str(&format!("!GetAZs {REGION}")).unwrap())
             .unwrap(),
-        IntrinsicFunction::GetAZs(ResourceValue::String(REGION.to_string())).into(),
+        IntrinsicFunction::GetAZs(ResourceValue::String(REGION.into())).into(),
     );
 }
 
@@ -193,7 +194,7 @@ fn intrinsic_join() {
             list: ResourceValue::Array(
                 VALUES
                     .iter()
-                    .map(|v| ResourceValue::String(v.to_string()))
+                    .map(|v| ResourceValue::String(v.to_string().into()))
                     .collect()
             )
         }
@@ -209,7 +210,7 @@ fn intrinsic_join() {
             list: ResourceValue::Array(
                 VALUES
                     .iter()
-                    .map(|v| ResourceValue::String(v.to_string()))
+                    .map(|v| ResourceValue::String(v.to_string().into()))
                     .collect()
             )
         }
@@ -229,7 +230,7 @@ fn intrinsic_select() {
             list: ResourceValue::Array(
                 VALUES
                     .iter()
-                    .map(|v| ResourceValue::String(v.to_string()))
+                    .map(|v| ResourceValue::String(v.to_string().into()))
                     .collect()
             )
         }
@@ -245,7 +246,7 @@ fn intrinsic_select() {
             list: ResourceValue::Array(
                 VALUES
                     .iter()
-                    .map(|v| ResourceValue::String(v.to_string()))
+                    .map(|v| ResourceValue::String(v.to_string().into()))
                     .collect()
             )
         }
@@ -262,7 +263,7 @@ fn intrinsic_split() {
         ResourceValue::from_value(json!({"Fn::Split": [DELIMITER, VALUE]})).unwrap(),
         IntrinsicFunction::Split {
             sep: DELIMITER.into(),
-            string: ResourceValue::String(VALUE.to_string())
+            string: ResourceValue::String(VALUE.into())
         }
         .into(),
     );
@@ -273,7 +274,7 @@ fn intrinsic_split() {
         .unwrap(),
         IntrinsicFunction::Split {
             sep: DELIMITER.into(),
-            string: ResourceValue::String(VALUE.to_string())
+            string: ResourceValue::String(VALUE.into())
         }
         .into(),
     );
@@ -325,7 +326,7 @@ fn intrinsic_sub() {
         IntrinsicFunction::Sub {
             string: STRING.into(),
             replaces: Some(ResourceValue::Object(IndexMap::from_iter([(
-                "CUSTOM_VARIABLE".to_string(),
+                "CUSTOM_VARIABLE".into(),
                 ResourceValue::Number(CUSTOM)
             )])))
         }
@@ -342,7 +343,7 @@ fn intrinsic_sub() {
         IntrinsicFunction::Sub {
             string: STRING.into(),
             replaces: Some(ResourceValue::Object(IndexMap::from_iter([(
-                "CUSTOM_VARIABLE".to_string(),
+                "CUSTOM_VARIABLE".into(),
                 ResourceValue::Number(CUSTOM)
             )]))),
         }
@@ -364,8 +365,8 @@ fn intrinsic_sub_shorthand_tagged_variable() {
         IntrinsicFunction::Sub {
             string: "${Foo}".into(),
             replaces: Some(ResourceValue::Object(IndexMap::from_iter([(
-                "Foo".to_string(),
-                IntrinsicFunction::Ref("Bar".to_string()).into(),
+                "Foo".into(),
+                IntrinsicFunction::Ref("Bar".into()).into(),
             )]))),
         }
         .into(),
@@ -388,18 +389,18 @@ fn intrinsic_ref() {
 
     assert_eq!(
         ResourceValue::from_value(json!({ "Ref": LOGICAL_NAME })).unwrap(),
-        IntrinsicFunction::Ref(LOGICAL_NAME.to_string()).into(),
+        IntrinsicFunction::Ref(LOGICAL_NAME.into()).into(),
     );
     assert_eq!(
         ResourceValue::from_value(serde_yaml::from_str(&format!("!Ref {LOGICAL_NAME}")).unwrap())
             .unwrap(),
-        IntrinsicFunction::Ref(LOGICAL_NAME.to_string()).into(),
+        IntrinsicFunction::Ref(LOGICAL_NAME.into()).into(),
     );
 }
 
-impl ResourceValue {
+impl ResourceValue<'static> {
     #[inline(always)]
     fn from_value(value: Value) -> Result<Self, serde_yaml::Error> {
-        serde_yaml::from_value(value)
+        Self::deserialize(value)
     }
 }
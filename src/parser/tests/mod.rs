@@ -228,3 +228,85 @@ fn test_parse_get_attr_shorthand() {
     };
     assert_resource_equal!("LogicalResource" => resource_template, resource);
 }
+
+#[test]
+fn test_json_templates_parse_like_yaml() {
+    use crate::cdk::Schema;
+    use crate::ir::CloudformationProgramIr;
+    use crate::CloudformationParseTree;
+    use std::fs;
+    use std::path::Path;
+
+    let cases = Path::new(env!("CARGO_MANIFEST_DIR")).join("cdk-from-cfn-testing/cases");
+    for case in fs::read_dir(cases).unwrap() {
+        let path = case.unwrap().path().join("template.json");
+        let template = fs::read(&path).unwrap();
+
+        let json = CloudformationParseTree::from_slice(&template).unwrap();
+        let yaml: CloudformationParseTree = serde_yaml::from_slice(&template).unwrap();
+
+        assert_eq!(
+            format!(
+                "{:?}",
+                CloudformationProgramIr::from(json, Schema::builtin()).unwrap()
+            ),
+            format!(
+                "{:?}",
+                CloudformationProgramIr::from(yaml, Schema::builtin()).unwrap()
+            ),
+            "{} parses differently as JSON and as YAML",
+            path.display()
+        );
+    }
+}
+
+#[test]
+fn test_flow_style_yaml_template() {
+    let template = b"{Resources: {Bucket: {Type: AWS::S3::Bucket}}}";
+    let tree = crate::CloudformationParseTree::from_slice(template).unwrap();
+    assert_eq!(tree.resources["Bucket"].resource_type, "AWS::S3::Bucket");
+}
+
+#[test]
+fn test_json_template_borrows_strings() {
+    use crate::parser::resource::{IntrinsicFunction, ResourceValue};
+    use std::borrow::Cow;
+
+    let template = br#"{
+        "Resources": {
+            "Bucket": {
+                "Type": "AWS::S3::Bucket",
+                "DependsOn": "Topic",
+                "Properties": {
+                    "BucketName": { "Fn::Sub": "${AWS::StackName}-bucket" },
+                    "Description": "Line\nbreak"
+                }
+            }
+        }
+    }"#;
+    let tree = crate::CloudformationParseTree::from_slice(template).unwrap();
+    let bucket = &tree.resources["Bucket"];
+
+    assert!(matches!(
+        bucket.resource_type,
+        Cow::Borrowed("AWS::S3::Bucket")
+    ));
+    assert!(matches!(bucket.depends_on[..], [Cow::Borrowed("Topic")]));
+    let (name, value) = bucket.properties.get_index(0).unwrap();
+    assert!(matches!(name, Cow::Borrowed("BucketName")));
+    match value {
+        ResourceValue::IntrinsicFunction(intrinsic) => assert!(matches!(
+            **intrinsic,
+            IntrinsicFunction::Sub {
+                string: Cow::Borrowed("${AWS::StackName}-bucket"),
+                replaces: None
+            }
+        )),
+        other => panic!("expected Fn::Sub, got {other:?}"),
+    }
+    // Escape sequences are resolved into an owned string.
+    assert!(matches!(
+        &bucket.properties["Description"],
+        ResourceValue::String(Cow::Owned(description)) if description == "Line\nbreak"
+    ));
+}
@@ -5,7 +5,7 @@
 macro_rules! map{
     ($($key:expr => $value:expr),+) => {
         {
-            let mut m = ::indexmap::IndexMap::<String, _, _>::default();
+            let mut m = ::indexmap::IndexMap::<_, _, _>::default();
             $(
                 m.insert($key.into(), $value);
             )+
@@ -19,7 +19,7 @@ macro_rules! assert_resource_equal {
     ($name:expr => $val:expr, $resource:expr) => {
         let obj = ($val).as_mapping().unwrap();
         let resources: IndexMap<String, ResourceAttributes> =
-            serde_yaml::from_value(serde_yaml::Value::Mapping(obj.clone())).unwrap();
+            serde::Deserialize::deserialize(serde_yaml::Value::Mapping(obj.clone())).unwrap();
         assert_eq!(resources[$name], ($resource))
     };
 }
@@ -9,7 +9,7 @@ use std::fmt;
 
 /// WrapperF64 exists because compraisons and outputs into typescripts are annoying with the
 /// default f64. Use this whenever referring to a floating point number in CFN standard.
-#[derive(Clone, Copy, Debug, serde::Deserialize)]
+#[derive(Clone, Copy, Debug, serde::Serialize, serde::Deserialize)]
 #[serde(transparent)]
 pub struct WrapperF64(f64);
 
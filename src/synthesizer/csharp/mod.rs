@@ -6,9 +6,12 @@ use crate::ir::conditions::ConditionIr;
 use crate::ir::constructor::ConstructorParameter;
 use crate::ir::importer::ImportInstruction;
 use crate::ir::mappings::OutputType;
+use crate::ir::nodes::NodeTable;
 use crate::ir::outputs::OutputInstruction;
 use crate::ir::reference::{Origin, PseudoParameter, Reference};
 use crate::ir::resources::{ResourceInstruction, ResourceIr, ResourceType, CFN_CUSTOM_RESOURCE};
+use crate::ir::symbols::SymbolTable;
+use crate::ir::types::TypeTable;
 use crate::ir::CloudformationProgramIr;
 use crate::parser::lookup_table::MappingInnerValue;
 use crate::Error;
@@ -62,7 +65,7 @@ impl Default for CSharp<'_> {
 impl Synthesizer for CSharp<'_> {
     fn synthesize(
         &self,
-        ir: CloudformationProgramIr,
+        ir: &CloudformationProgramIr,
         into: &mut dyn io::Write,
         class_name: &str,
         class_type: super::ClassType,
@@ -115,7 +118,7 @@ impl Synthesizer for CSharp<'_> {
         namespace.newline();
 
         // Description - comment before the stack class
-        if let Some(descr) = ir.description {
+        if let Some(descr) = &ir.description {
             namespace.line("/// <summary>");
             for description_line in descr.split('\n') {
                 namespace.line(format!("/// {description_line}"));
@@ -318,7 +321,9 @@ impl Synthesizer for CSharp<'_> {
         }
         for condition in &ir.conditions {
             ctor.text(format!("bool {} = ", camel_case(&condition.name)));
-            condition.value.emit_csharp(&ctor, self.schema, class_type);
+            condition
+                .value
+                .emit_csharp(&ctor, self.schema, &ir.symbols, class_type);
             ctor.text(";");
             ctor.newline();
         }
@@ -328,7 +333,15 @@ impl Synthesizer for CSharp<'_> {
         ctor.line("// Resources");
         for resource in &ir.resources {
             if matches!(resource.resource_type, ResourceType::Custom(_)) {
-                emit_custom_resource(&ctor, resource, self.schema, class_type)?;
+                emit_custom_resource(
+                    &ctor,
+                    resource,
+                    self.schema,
+                    &ir.symbols,
+                    &ir.types,
+                    &ir.nodes,
+                    class_type,
+                )?;
             } else {
                 let class = resource.resource_type.type_name();
                 let resource_constructor = ctor.indent_with_options(IndentOptions {
@@ -342,11 +355,19 @@ impl Synthesizer for CSharp<'_> {
                 });
                 for (name, value) in &resource.properties {
                     resource_constructor.text(format!("{name} = ", name = pascal_case(name)));
-                    value.emit_csharp(&resource_constructor, self.schema, class_type)?;
+                    value.emit_csharp(
+                        &resource_constructor,
+                        self.schema,
+                        &ir.symbols,
+                        &ir.types,
+                        &ir.nodes,
+                        class_type,
+                    )?;
                     resource_constructor.text(",");
                     resource_constructor.newline();
                 }
             }
+            ctor.stream(into)?;
         }
 
         // Set values for the outputs
@@ -355,7 +376,15 @@ impl Synthesizer for CSharp<'_> {
             ctor.line("// Outputs");
 
             for op in &ir.outputs {
-                op.emit_csharp(&ctor, self.schema, class_type)?;
+                op.emit_csharp(
+                    &ctor,
+                    self.schema,
+                    &ir.symbols,
+                    &ir.types,
+                    &ir.nodes,
+                    class_type,
+                )?;
+                ctor.stream(into)?;
             }
         }
 
@@ -367,6 +396,9 @@ fn emit_custom_resource(
     output: &CodeBuffer,
     resource: &ResourceInstruction,
     schema: &Schema,
+    symbols: &SymbolTable,
+    types: &TypeTable,
+    nodes: &NodeTable,
     class_type: ClassType,
 ) -> Result<(), Error> {
     let var_name = camel_case(&resource.name);
@@ -393,7 +425,14 @@ fn emit_custom_resource(
     });
     if let Some(token) = service_token {
         resource_constructor.text("ServiceToken = ");
-        token.emit_csharp(&resource_constructor, schema, class_type)?;
+        token.emit_csharp(
+            &resource_constructor,
+            schema,
+            symbols,
+            types,
+            nodes,
+            class_type,
+        )?;
         resource_constructor.text(",");
         resource_constructor.newline();
     }
@@ -412,7 +451,7 @@ fn emit_custom_resource(
     for (name, value) in &resource.properties {
         if name != "ServiceToken" {
             output.text(format!("{var_name}.AddPropertyOverride(\"{name}\", "));
-            value.emit_csharp(output, schema, class_type)?;
+            value.emit_csharp(output, schema, symbols, types, nodes, class_type)?;
             output.line(");");
         }
     }
@@ -427,14 +466,14 @@ fn emit_custom_resource(
     // Handle Metadata
     if let Some(metadata) = &resource.metadata {
         output.text(format!("{var_name}.CfnOptions.Metadata = "));
-        metadata.emit_csharp(output, schema, class_type)?;
+        metadata.emit_csharp(output, schema, symbols, types, nodes, class_type)?;
         output.line(";");
     }
 
     // Handle UpdatePolicy
     if let Some(update_policy) = &resource.update_policy {
         output.text(format!("{var_name}.CfnOptions.UpdatePolicy = "));
-        update_policy.emit_csharp(output, schema, class_type)?;
+        update_policy.emit_csharp(output, schema, symbols, types, nodes, class_type)?;
         output.line(";");
     }
 
@@ -442,7 +481,7 @@ fn emit_custom_resource(
     for dependency in &resource.dependencies {
         output.line(format!(
             "{var_name}.AddDependency({});",
-            camel_case(dependency)
+            camel_case(symbols.resolve(*dependency))
         ));
     }
 
@@ -496,15 +535,24 @@ trait CsharpEmitter {
         &self,
         output: &CodeBuffer,
         schema: &Schema,
+        symbols: &SymbolTable,
+        types: &TypeTable,
+        nodes: &NodeTable,
         class_type: ClassType,
     ) -> Result<(), Error>;
 }
 
 impl ConditionIr {
-    fn emit_csharp(&self, output: &CodeBuffer, _schema: &Schema, class_type: ClassType) {
+    fn emit_csharp(
+        &self,
+        output: &CodeBuffer,
+        _schema: &Schema,
+        symbols: &SymbolTable,
+        class_type: ClassType,
+    ) {
         match self {
-            ConditionIr::Ref(reference) => reference.emit_csharp(output, class_type),
-            ConditionIr::Str(str) => output.text(format!("\"{str}\"")),
+            ConditionIr::Ref(reference) => reference.emit_csharp(output, symbols, class_type),
+            ConditionIr::Str(str) => output.text_fmt(format_args!("\"{str}\"")),
             ConditionIr::Condition(condition) => output.text(camel_case(condition)),
 
             ConditionIr::And(list) => {
@@ -512,7 +560,7 @@ impl ConditionIr {
                     if index > 0 {
                         output.text(" && ");
                     }
-                    condition.emit_csharp(output, _schema, class_type);
+                    condition.emit_csharp(output, _schema, symbols, class_type);
                 }
             }
             ConditionIr::Or(list) => {
@@ -520,43 +568,43 @@ impl ConditionIr {
                     if index > 0 {
                         output.text(" || ");
                     }
-                    condition.emit_csharp(output, _schema, class_type);
+                    condition.emit_csharp(output, _schema, symbols, class_type);
                 }
             }
 
             ConditionIr::Not(condition) => {
                 output.text("!");
-                condition.emit_csharp(output, _schema, class_type);
+                condition.emit_csharp(output, _schema, symbols, class_type);
             }
 
             ConditionIr::Equals(left, right) => {
-                left.emit_csharp(output, _schema, class_type);
+                left.emit_csharp(output, _schema, symbols, class_type);
                 output.text(" == ");
-                right.emit_csharp(output, _schema, class_type);
+                right.emit_csharp(output, _schema, symbols, class_type);
             }
 
             ConditionIr::Map(map, top_level_key, second_level_key) => {
                 output.text(camel_case(map));
                 output.text("[");
-                top_level_key.emit_csharp(output, _schema, class_type);
+                top_level_key.emit_csharp(output, _schema, symbols, class_type);
                 output.text("][");
-                second_level_key.emit_csharp(output, _schema, class_type);
+                second_level_key.emit_csharp(output, _schema, symbols, class_type);
                 output.text("]");
             }
             ConditionIr::Split(sep, str) => match str.as_ref() {
                 ConditionIr::Str(str) => {
-                    output.text(format!("'{str}'", str = str.escape_debug()));
-                    output.text(format!(".Split('{sep}')", sep = sep.escape_debug()))
+                    output.text_fmt(format_args!("'{str}'", str = str.escape_debug()));
+                    output.text_fmt(format_args!(".Split('{sep}')", sep = sep.escape_debug()))
                 }
                 other => {
-                    output.text(format!("Fn.Split(\"{sep}\", "));
-                    other.emit_csharp(output, _schema, class_type);
+                    output.text_fmt(format_args!("Fn.Split(\"{sep}\", "));
+                    other.emit_csharp(output, _schema, symbols, class_type);
                     output.text(")")
                 }
             },
             ConditionIr::Select(index, str) => {
-                output.text(format!("Fn.Select({index}, "));
-                str.emit_csharp(output, _schema, class_type);
+                output.text_fmt(format_args!("Fn.Select({index}, "));
+                str.emit_csharp(output, _schema, symbols, class_type);
                 output.text(")");
             }
         }
@@ -564,32 +612,33 @@ impl ConditionIr {
 }
 
 impl Reference {
-    fn emit_csharp(&self, output: &CodeBuffer, class_type: ClassType) {
+    fn emit_csharp(&self, output: &CodeBuffer, symbols: &SymbolTable, class_type: ClassType) {
+        let name = symbols.resolve(self.symbol);
         match &self.origin {
-            Origin::Condition => output.text(camel_case(&self.name)),
+            Origin::Condition => output.text(camel_case(name)),
             Origin::GetAttribute {
                 attribute,
                 conditional: _,
                 is_custom_resource,
             } => {
                 if *is_custom_resource {
-                    output.text(format!(
+                    output.text_fmt(format_args!(
                         "{}.GetAtt(\"{attribute}\").ToString()",
-                        camel_case(&self.name),
+                        camel_case(name),
                     ))
                 } else {
-                    output.text(format!(
+                    output.text_fmt(format_args!(
                         "{}.Attr{}",
-                        camel_case(&self.name),
+                        camel_case(name),
                         attribute.replace('.', "")
                     ))
                 }
             }
             Origin::LogicalId { .. } => {
-                output.text(format!("{}.Ref", camel_case(&self.name.replace('.', ""))))
+                output.text_fmt(format_args!("{}.Ref", camel_case(&name.replace('.', ""))))
             }
             Origin::CfnParameter | Origin::Parameter => {
-                output.text(format!("props.{}", pascal_case(&self.name)))
+                output.text_fmt(format_args!("props.{}", pascal_case(name)))
             }
             Origin::PseudoParameter(pseudo) => {
                 let prefix = match class_type {
@@ -605,7 +654,7 @@ impl Reference {
                     PseudoParameter::URLSuffix => "UrlSuffix",
                     PseudoParameter::NotificationArns => "NotificationArns",
                 };
-                output.text(format!("{prefix}{pseudo}"));
+                output.text_fmt(format_args!("{prefix}{pseudo}"));
             }
         }
     }
@@ -616,6 +665,9 @@ impl ResourceIr {
         &self,
         output: &CodeBuffer,
         schema: &Schema,
+        symbols: &SymbolTable,
+        types: &TypeTable,
+        nodes: &NodeTable,
         class_type: ClassType,
     ) -> Result<(), Error> {
         match self {
@@ -637,9 +689,9 @@ impl ResourceIr {
             }
             ResourceIr::String(str) => {
                 if str.lines().count() > 1 {
-                    output.text(format!("@\"{str}\""));
+                    output.text_fmt(format_args!("@\"{str}\""));
                 } else {
-                    output.text(format!("\"{str}\""));
+                    output.text_fmt(format_args!("\"{str}\""));
                 };
                 Ok(())
             }
@@ -650,14 +702,14 @@ impl ResourceIr {
                     trailing: Some("}".into()),
                     trailing_newline: false,
                 });
-                for item in array {
-                    item.emit_csharp(&array_block, schema, class_type)?;
+                for item in nodes.list(*array) {
+                    item.emit_csharp(&array_block, schema, symbols, types, nodes, class_type)?;
                     array_block.text(",");
                     array_block.newline();
                 }
                 Ok(())
             }
-            ResourceIr::Object(structure, properties) => match &structure {
+            ResourceIr::Object(structure, properties) => match &types[*structure] {
                 TypeReference::Named(name)
                 | TypeReference::List(ItemType::Static(TypeReference::Named(name))) => {
                     match name.as_ref() {
@@ -668,9 +720,16 @@ impl ResourceIr {
                                 trailing: Some("}".into()),
                                 trailing_newline: false,
                             });
-                            for (name, val) in properties {
-                                object_block.text(format!("{name} = "));
-                                val.emit_csharp(&object_block, schema, class_type)?;
+                            for (name, val) in nodes.entries(*properties) {
+                                object_block.text_fmt(format_args!("{name} = "));
+                                val.emit_csharp(
+                                    &object_block,
+                                    schema,
+                                    symbols,
+                                    types,
+                                    nodes,
+                                    class_type,
+                                )?;
                                 object_block.text(",");
                                 object_block.newline();
                             }
@@ -684,9 +743,16 @@ impl ResourceIr {
                                 trailing: Some("}".into()),
                                 trailing_newline: false,
                             });
-                            for (name, val) in properties {
-                                object_block.text(format!("{name} = "));
-                                val.emit_csharp(&object_block, schema, class_type)?;
+                            for (name, val) in nodes.entries(*properties) {
+                                object_block.text_fmt(format_args!("{name} = "));
+                                val.emit_csharp(
+                                    &object_block,
+                                    schema,
+                                    symbols,
+                                    types,
+                                    nodes,
+                                    class_type,
+                                )?;
                                 object_block.text(",");
                                 object_block.newline();
                             }
@@ -701,9 +767,9 @@ impl ResourceIr {
                         trailing: Some("}".into()),
                         trailing_newline: false,
                     });
-                    for (name, val) in properties {
-                        object_block.text(format!("{{ \"{name}\", "));
-                        val.emit_csharp(&object_block, schema, class_type)?;
+                    for (name, val) in nodes.entries(*properties) {
+                        object_block.text_fmt(format_args!("{{ \"{name}\", "));
+                        val.emit_csharp(&object_block, schema, symbols, types, nodes, class_type)?;
                         object_block.text("},");
                         object_block.newline();
                     }
@@ -716,9 +782,9 @@ impl ResourceIr {
                         trailing: Some("}".into()),
                         trailing_newline: false,
                     });
-                    for (name, val) in properties {
-                        object_block.text(format!("{{ \"{name}\", "));
-                        val.emit_csharp(&object_block, schema, class_type)?;
+                    for (name, val) in nodes.entries(*properties) {
+                        object_block.text_fmt(format_args!("{{ \"{name}\", "));
+                        val.emit_csharp(&object_block, schema, symbols, types, nodes, class_type)?;
                         object_block.text("},");
                         object_block.newline();
                     }
@@ -731,10 +797,11 @@ impl ResourceIr {
                 }),
             },
             ResourceIr::If(cond, when_true, when_false) => {
-                output.text(format!("{} ? ", camel_case(cond)));
-                when_true.emit_csharp(output, schema, class_type)?;
+                output.text_fmt(format_args!("{} ? ", camel_case(cond)));
+                nodes[*when_true].emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 output.text(" : ");
-                when_false.emit_csharp(output, schema, class_type)?;
+                nodes[*when_false]
+                    .emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 Ok(())
             }
             ResourceIr::Join(sep, list) => {
@@ -750,38 +817,38 @@ impl ResourceIr {
                     trailing: Some("})".into()),
                     trailing_newline: false,
                 });
-                for item in list {
-                    item.emit_csharp(&items, schema, class_type)?;
+                for item in nodes.list(*list) {
+                    item.emit_csharp(&items, schema, symbols, types, nodes, class_type)?;
                     items.text(",");
                     items.newline();
                 }
                 Ok(())
             }
-            ResourceIr::Split(sep, str) => match str.as_ref() {
+            ResourceIr::Split(sep, str) => match &nodes[*str] {
                 ResourceIr::String(str) => {
-                    output.text(format!("\"{str}\"", str = str.escape_debug()));
-                    output.text(format!(".Split('{sep}')", sep = sep.escape_debug()));
+                    output.text_fmt(format_args!("\"{str}\"", str = str.escape_debug()));
+                    output.text_fmt(format_args!(".Split('{sep}')", sep = sep.escape_debug()));
                     Ok(())
                 }
                 other => {
-                    output.text(format!("Fn.Split('{sep}', "));
-                    other.emit_csharp(output, schema, class_type)?;
+                    output.text_fmt(format_args!("Fn.Split('{sep}', "));
+                    other.emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                     output.text(")");
                     Ok(())
                 }
             },
             ResourceIr::Ref(reference) => {
-                reference.emit_csharp(output, class_type);
+                reference.emit_csharp(output, symbols, class_type);
                 Ok(())
             }
             ResourceIr::Sub(parts) => {
                 output.text("$\"");
-                for part in parts {
+                for part in nodes.list(*parts) {
                     match part {
                         ResourceIr::String(lit) => output.text(lit.clone()),
                         other => {
                             output.text("{");
-                            other.emit_csharp(output, schema, class_type)?;
+                            other.emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                             output.text("}");
                         }
                     }
@@ -792,60 +859,65 @@ impl ResourceIr {
             ResourceIr::Map(table, top_level_key, second_level_key) => {
                 output.text(camel_case(table));
                 output.text("[");
-                top_level_key.emit_csharp(output, schema, class_type)?;
+                nodes[*top_level_key]
+                    .emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 output.text("][");
-                second_level_key.emit_csharp(output, schema, class_type)?;
+                nodes[*second_level_key]
+                    .emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 output.text("]");
                 Ok(())
             }
             ResourceIr::Base64(value) => {
                 output.text("Fn.Base64(");
-                value.emit_csharp(output, schema, class_type)?;
+                nodes[*value].emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 output.text(" as string)");
                 Ok(())
             }
             ResourceIr::ImportValue(import) => {
                 output.text("Fn.ImportValue(");
-                import.emit_csharp(output, schema, class_type)?;
+                nodes[*import].emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 output.text(")");
                 Ok(())
             }
             ResourceIr::GetAZs(region) => {
                 output.text("Fn.GetAzs(");
-                region.emit_csharp(output, schema, class_type)?;
+                nodes[*region].emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 output.text(")");
                 Ok(())
             }
-            ResourceIr::Select(idx, list) => match list.as_ref() {
+            ResourceIr::Select(idx, list) => match &nodes[*list] {
                 ResourceIr::Array(_, array) => {
+                    let array = nodes.list(*array);
                     if *idx <= array.len() {
-                        array[*idx].emit_csharp(output, schema, class_type)?;
+                        array[*idx]
+                            .emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                     } else {
                         output.text("null");
                     }
                     Ok(())
                 }
                 other => {
-                    output.text(format!("Fn.Select({idx}, "));
-                    other.emit_csharp(output, schema, class_type)?;
+                    output.text_fmt(format_args!("Fn.Select({idx}, "));
+                    other.emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                     output.text(")");
                     Ok(())
                 }
             },
             ResourceIr::Cidr(cidr_block, count, mask) => {
                 output.text("Fn.Cidr(");
-                cidr_block.emit_csharp(output, schema, class_type)?;
+                nodes[*cidr_block]
+                    .emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 output.text(", ");
-                count.emit_csharp(output, schema, class_type)?;
+                nodes[*count].emit_csharp(output, schema, symbols, types, nodes, class_type)?;
                 output.text(", ");
-                match mask.as_ref() {
+                match &nodes[*mask] {
                     ResourceIr::Number(mask) => {
-                        output.text(format!("\"{mask}\""));
+                        output.text_fmt(format_args!("\"{mask}\""));
                     }
                     ResourceIr::String(mask) => {
                         output.text(mask.to_string());
                     }
-                    mask => mask.emit_csharp(output, schema, class_type)?,
+                    mask => mask.emit_csharp(output, schema, symbols, types, nodes, class_type)?,
                 }
                 output.text(")");
                 Ok(())
@@ -859,19 +931,24 @@ impl CsharpEmitter for OutputInstruction {
         &self,
         output: &CodeBuffer,
         schema: &Schema,
+        symbols: &SymbolTable,
+        types: &TypeTable,
+        nodes: &NodeTable,
         class_type: ClassType,
     ) -> Result<(), Error> {
         let var_name = &self.name;
 
         if let Some(cond) = &self.condition {
-            output.line(format!("{var_name} = {}", camel_case(cond)));
-            output.text(format!("{INDENT}? "));
+            output.line_fmt(format_args!("{var_name} = {}", camel_case(cond)));
+            output.text_fmt(format_args!("{INDENT}? "));
             let indented = output.indent(INDENT);
-            self.value.emit_csharp(&indented, schema, class_type)?;
-            output.line(format!("\n{INDENT}: null;"));
+            self.value
+                .emit_csharp(&indented, schema, symbols, types, nodes, class_type)?;
+            output.line_fmt(format_args!("\n{INDENT}: null;"));
         } else {
-            output.text(format!("{var_name} = "));
-            self.value.emit_csharp(output, schema, class_type)?;
+            output.text_fmt(format_args!("{var_name} = "));
+            self.value
+                .emit_csharp(output, schema, symbols, types, nodes, class_type)?;
             output.line(";");
         }
 
@@ -884,9 +961,9 @@ impl CsharpEmitter for OutputInstruction {
                     trailing: Some("}".into()),
                     trailing_newline: true,
                 });
-                self.emit_cfn_output(&indented, export, var_name, schema, class_type)?;
+                self.emit_cfn_output(&indented, export, schema, symbols, types, nodes, class_type)?;
             } else {
-                self.emit_cfn_output(output, export, var_name, schema, class_type)?;
+                self.emit_cfn_output(output, export, schema, symbols, types, nodes, class_type)?;
             }
         }
 
@@ -899,8 +976,10 @@ impl OutputInstruction {
         &self,
         output: &CodeBuffer,
         export: &ResourceIr,
-        var_name: &str,
         schema: &Schema,
+        symbols: &SymbolTable,
+        types: &TypeTable,
+        nodes: &NodeTable,
         class_type: ClassType,
     ) -> Result<(), Error> {
         let output = output.indent_with_options(IndentOptions {
@@ -921,9 +1000,9 @@ impl OutputInstruction {
             output.line(format!("Description = \"{}\",", description.escape_debug()));
         }
         output.text("ExportName = ");
-        export.emit_csharp(&output, schema, class_type)?;
+        export.emit_csharp(&output, schema, symbols, types, nodes, class_type)?;
         output.text(",\n");
-        output.line(format!("Value = {var_name} as string,"));
+        output.line(format!("Value = {} as string,", self.name));
 
         Ok(())
     }
@@ -3,14 +3,12 @@
 use std::borrow::Cow;
 use std::str::FromStr;
 
-use indexmap::IndexMap;
-
 use crate::{
     cdk::{ItemType, Primitive, Schema, TypeReference, TypeUnion},
     code::CodeBuffer,
     ir::{
-        conditions::ConditionIr, importer::ImportInstruction, outputs::OutputInstruction,
-        resources::ResourceIr,
+        conditions::ConditionIr, importer::ImportInstruction, nodes::NodeTable,
+        outputs::OutputInstruction, resources::ResourceIr, symbols::SymbolTable, types::TypeTable,
     },
     primitives::WrapperF64,
     synthesizer::ClassType,
@@ -22,11 +20,15 @@ use super::CsharpEmitter;
 fn test_fn_split() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let resource_ir = ResourceIr::Split(
         "-".into(),
-        Box::new(ResourceIr::String("My-EC2-Instance".into())),
+        nodes.push(ResourceIr::String("My-EC2-Instance".into())),
     );
-    let result = resource_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    let result =
+        resource_ir.emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack);
     assert_eq!((), result.unwrap());
 }
 
@@ -34,18 +36,20 @@ fn test_fn_split() {
 fn test_fn_split_other() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let items = nodes.push_list([
+        ResourceIr::String("a".into()),
+        ResourceIr::String("b".into()),
+        ResourceIr::String("c".into()),
+    ]);
     let resource_ir = ResourceIr::Split(
         "-".into(),
-        Box::new(ResourceIr::Join(
-            ",".to_string(),
-            vec![
-                ResourceIr::String("a".into()),
-                ResourceIr::String("b".into()),
-                ResourceIr::String("c".into()),
-            ],
-        )),
+        nodes.push(ResourceIr::Join(",".to_string(), items)),
     );
-    let result = resource_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    let result =
+        resource_ir.emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack);
     assert_eq!((), result.unwrap());
 }
 
@@ -53,23 +57,25 @@ fn test_fn_split_other() {
 fn test_condition_ir_map() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
     let condition_ir = ConditionIr::Map(
         "ConditionIrMap".into(),
         Box::new(ConditionIr::Str("FirstLevelKey".into())),
         Box::new(ConditionIr::Str("SecondLevelKey".into())),
     );
-    condition_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    condition_ir.emit_csharp(&output, &schema, &symbols, ClassType::Stack);
 }
 
 #[test]
 fn test_condition_ir_split() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
     let condition_ir = ConditionIr::Split(
         "-".into(),
         Box::new(ConditionIr::Str("string-to-split".into())),
     );
-    condition_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    condition_ir.emit_csharp(&output, &schema, &symbols, ClassType::Stack);
 }
 
 #[test]
@@ -86,8 +92,12 @@ fn test_alexa_org() {
 fn test_resource_ir_double() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let nodes = NodeTable::default();
     let resource_ir = ResourceIr::Double(WrapperF64::new(2.0));
-    let result = resource_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    let result =
+        resource_ir.emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack);
     assert_eq!((), result.unwrap());
 }
 
@@ -95,8 +105,12 @@ fn test_resource_ir_double() {
 fn test_resource_ir_select() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::Select(1, Box::new(ResourceIr::String("Not an array".into())));
-    let result = resource_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let resource_ir = ResourceIr::Select(1, nodes.push(ResourceIr::String("Not an array".into())));
+    let result =
+        resource_ir.emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack);
     assert_eq!((), result.unwrap());
 }
 
@@ -104,12 +118,16 @@ fn test_resource_ir_select() {
 fn test_resource_ir_cidr() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let resource_ir = ResourceIr::Cidr(
-        Box::new(ResourceIr::String("0.0.0.0".into())),
-        Box::new(ResourceIr::String("16".into())),
-        Box::new(ResourceIr::String("255.255.255.0".into())),
+        nodes.push(ResourceIr::String("0.0.0.0".into())),
+        nodes.push(ResourceIr::String("16".into())),
+        nodes.push(ResourceIr::String("255.255.255.0".into())),
     );
-    let result = resource_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    let result =
+        resource_ir.emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack);
     assert_eq!((), result.unwrap());
 }
 
@@ -117,12 +135,15 @@ fn test_resource_ir_cidr() {
 fn test_invalid_resource_object_structure() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let resource_ir = ResourceIr::Object(
-        TypeReference::Union(TypeUnion::Static(&[])),
-        IndexMap::default(),
+        types.intern(&TypeReference::Union(TypeUnion::Static(&[]))),
+        nodes.push_entries([]),
     );
     let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
+        .emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack)
         .unwrap_err();
     let expected = "Type reference Union(\n    Static(\n        [],\n    ),\n) not implemented for ResourceIr::Object";
     assert_eq!(expected, result.to_string());
@@ -132,12 +153,15 @@ fn test_invalid_resource_object_structure() {
 fn test_invalid_resource_object_primitive() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let resource_ir = ResourceIr::Object(
-        TypeReference::Primitive(Primitive::String),
-        IndexMap::default(),
+        types.intern(&TypeReference::Primitive(Primitive::String)),
+        nodes.push_entries([]),
     );
     let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
+        .emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack)
         .unwrap_err();
     let expected =
         "Type reference Primitive(\n    String,\n) not implemented for ResourceIr::Object";
@@ -160,15 +184,17 @@ fn test_invalid_organization() {
 fn test_resource_ir_select_idx_greater_than_list_len() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let named_type = TypeReference::Named("AWS::Service::Resource".into());
-    let resource_ir = ResourceIr::Select(
-        1,
-        Box::new(ResourceIr::Array(
-            TypeReference::List(ItemType::Boxed(Box::new(named_type))),
-            vec![],
-        )),
+    let array = ResourceIr::Array(
+        types.intern(&TypeReference::List(ItemType::Boxed(Box::new(named_type)))),
+        nodes.push_list([]),
     );
-    let result = resource_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    let resource_ir = ResourceIr::Select(1, nodes.push(array));
+    let result =
+        resource_ir.emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack);
     assert_eq!((), result.unwrap());
 }
 
@@ -176,12 +202,16 @@ fn test_resource_ir_select_idx_greater_than_list_len() {
 fn test_resource_ir_cidr_null_mask() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let resource_ir = ResourceIr::Cidr(
-        Box::new(ResourceIr::String("0.0.0.0".into())),
-        Box::new(ResourceIr::String("16".into())),
-        Box::new(ResourceIr::Null),
+        nodes.push(ResourceIr::String("0.0.0.0".into())),
+        nodes.push(ResourceIr::String("16".into())),
+        nodes.push(ResourceIr::Null),
     );
-    let result = resource_ir.emit_csharp(&output, &schema, ClassType::Stack);
+    let result =
+        resource_ir.emit_csharp(&output, &schema, &symbols, &types, &nodes, ClassType::Stack);
     assert_eq!((), result.unwrap());
 }
 
@@ -189,6 +219,9 @@ fn test_resource_ir_cidr_null_mask() {
 fn test_output_instruction() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let nodes = NodeTable::default();
     let output_instruction = OutputInstruction {
         name: "instruction".to_string(),
         export: Some(ResourceIr::Number(2)),
@@ -196,303 +229,195 @@ fn test_output_instruction() {
         condition: Option::None,
         description: Option::None,
     };
-    let result = output_instruction.emit_csharp(&output, &schema, ClassType::Stack);
+    let result = output_instruction.emit_csharp(
+        &output,
+        &schema,
+        &symbols,
+        &types,
+        &nodes,
+        ClassType::Stack,
+    );
     assert_eq!((), result.unwrap());
 }
 
-#[test]
-fn test_resource_ir_array_error() {
+/// Adds an object of a type the synthesizer does not support to `nodes`.
+fn unsupported_object(types: &mut TypeTable, nodes: &mut NodeTable) -> ResourceIr {
+    ResourceIr::Object(
+        types.intern(&TypeReference::Union(TypeUnion::Vec(Vec::new()))),
+        nodes.push_entries([]),
+    )
+}
+
+/// Emits `resource_ir` and returns the error it fails with.
+fn emit_error(resource_ir: &ResourceIr, types: &TypeTable, nodes: &NodeTable) -> String {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    resource_ir
+        .emit_csharp(&output, &schema, &symbols, types, nodes, ClassType::Stack)
+        .unwrap_err()
+        .to_string()
+}
+
+const UNSUPPORTED_OBJECT: &str =
+    "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object";
+
+#[test]
+fn test_resource_ir_array_error() {
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let item = unsupported_object(&mut types, &mut nodes);
     let resource_ir = ResourceIr::Array(
-        TypeReference::Primitive(Primitive::Json),
-        vec![ResourceIr::Object(
-            TypeReference::Union(TypeUnion::Vec(Vec::new())),
-            IndexMap::new(),
-        )],
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
+        types.intern(&TypeReference::Primitive(Primitive::Json)),
+        nodes.push_list([item]),
     );
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_object_named_structure_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let map = unsupported_object(&mut types, &mut nodes);
     let resource_ir = ResourceIr::Object(
-        TypeReference::Named("AWS::ACMPCA::CertificateAuthority.Subject".into()),
-        IndexMap::from([(
-            "map".into(),
-            ResourceIr::Object(
-                TypeReference::Union(TypeUnion::Vec(Vec::new())),
-                IndexMap::new(),
-            ),
-        )]),
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
+        types.intern(&TypeReference::Named(
+            "AWS::ACMPCA::CertificateAuthority.Subject".into(),
+        )),
+        nodes.push_entries([("map".into(), map)]),
     );
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_object_primitive_structure_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let map = unsupported_object(&mut types, &mut nodes);
     let resource_ir = ResourceIr::Object(
-        TypeReference::Primitive(Primitive::Json),
-        IndexMap::from([(
-            "map".into(),
-            ResourceIr::Object(
-                TypeReference::Union(TypeUnion::Vec(Vec::new())),
-                IndexMap::new(),
-            ),
-        )]),
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
+        types.intern(&TypeReference::Primitive(Primitive::Json)),
+        nodes.push_entries([("map".into(), map)]),
     );
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_object_map_structure_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let map = unsupported_object(&mut types, &mut nodes);
     let resource_ir = ResourceIr::Object(
-        TypeReference::Map(ItemType::Boxed(Box::new(TypeReference::Primitive(
-            Primitive::Json,
+        types.intern(&TypeReference::Map(ItemType::Boxed(Box::new(
+            TypeReference::Primitive(Primitive::Json),
         )))),
-        IndexMap::from([(
-            "map".into(),
-            ResourceIr::Object(
-                TypeReference::Union(TypeUnion::Vec(Vec::new())),
-                IndexMap::new(),
-            ),
-        )]),
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
+        nodes.push_entries([("map".into(), map)]),
     );
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_if_when_true_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let map = unsupported_object(&mut types, &mut nodes);
+    let when_true = ResourceIr::Object(
+        types.intern(&TypeReference::Primitive(Primitive::Json)),
+        nodes.push_entries([("map".into(), map)]),
+    );
     let resource_ir = ResourceIr::If(
         "if".into(),
-        Box::new(ResourceIr::Object(
-            TypeReference::Primitive(Primitive::Json),
-            IndexMap::from([(
-                "map".into(),
-                ResourceIr::Object(
-                    TypeReference::Union(TypeUnion::Vec(Vec::new())),
-                    IndexMap::new(),
-                ),
-            )]),
-        )),
-        Box::new(ResourceIr::Null),
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
+        nodes.push(when_true),
+        nodes.push(ResourceIr::Null),
     );
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_if_when_false_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let map = unsupported_object(&mut types, &mut nodes);
+    let when_false = ResourceIr::Object(
+        types.intern(&TypeReference::Primitive(Primitive::Json)),
+        nodes.push_entries([("map".into(), map)]),
+    );
     let resource_ir = ResourceIr::If(
         "if".into(),
-        Box::new(ResourceIr::Null),
-        Box::new(ResourceIr::Object(
-            TypeReference::Primitive(Primitive::Json),
-            IndexMap::from([(
-                "map".into(),
-                ResourceIr::Object(
-                    TypeReference::Union(TypeUnion::Vec(Vec::new())),
-                    IndexMap::new(),
-                ),
-            )]),
-        )),
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
+        nodes.push(ResourceIr::Null),
+        nodes.push(when_false),
     );
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_join_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::Join(
-        "-".into(),
-        vec![ResourceIr::Object(
-            TypeReference::Union(TypeUnion::Vec(Vec::new())),
-            IndexMap::new(),
-        )],
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
-    );
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let item = unsupported_object(&mut types, &mut nodes);
+    let resource_ir = ResourceIr::Join("-".into(), nodes.push_list([item]));
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_split_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::Split(
-        "-".into(),
-        Box::new(ResourceIr::Object(
-            TypeReference::Union(TypeUnion::Vec(Vec::new())),
-            IndexMap::new(),
-        )),
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
-    );
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let value = unsupported_object(&mut types, &mut nodes);
+    let resource_ir = ResourceIr::Split("-".into(), nodes.push(value));
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_sub_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::Sub(vec![ResourceIr::Object(
-        TypeReference::Union(TypeUnion::Vec(Vec::new())),
-        IndexMap::new(),
-    )]);
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
-    );
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let part = unsupported_object(&mut types, &mut nodes);
+    let resource_ir = ResourceIr::Sub(nodes.push_list([part]));
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_map_top_level_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::Map(
-        "map".into(),
-        Box::new(ResourceIr::Object(
-            TypeReference::Union(TypeUnion::Vec(Vec::new())),
-            IndexMap::new(),
-        )),
-        Box::new(ResourceIr::Null),
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
-    );
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let key = unsupported_object(&mut types, &mut nodes);
+    let resource_ir = ResourceIr::Map("map".into(), nodes.push(key), nodes.push(ResourceIr::Null));
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_map_second_level_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::Map(
-        "map".into(),
-        Box::new(ResourceIr::Null),
-        Box::new(ResourceIr::Object(
-            TypeReference::Union(TypeUnion::Vec(Vec::new())),
-            IndexMap::new(),
-        )),
-    );
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
-    );
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let key = unsupported_object(&mut types, &mut nodes);
+    let resource_ir = ResourceIr::Map("map".into(), nodes.push(ResourceIr::Null), nodes.push(key));
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_base64_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::Base64(Box::new(ResourceIr::Object(
-        TypeReference::Union(TypeUnion::Vec(Vec::new())),
-        IndexMap::new(),
-    )));
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
-    );
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let value = unsupported_object(&mut types, &mut nodes);
+    let resource_ir = ResourceIr::Base64(nodes.push(value));
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_import_value_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::ImportValue(Box::new(ResourceIr::Object(
-        TypeReference::Union(TypeUnion::Vec(Vec::new())),
-        IndexMap::new(),
-    )));
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
-    );
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let value = unsupported_object(&mut types, &mut nodes);
+    let resource_ir = ResourceIr::ImportValue(nodes.push(value));
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 #[test]
 fn test_resource_ir_get_azs_error() {
-    let output = CodeBuffer::default();
-    let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::GetAZs(Box::new(ResourceIr::Object(
-        TypeReference::Union(TypeUnion::Vec(Vec::new())),
-        IndexMap::new(),
-    )));
-    let result = resource_ir
-        .emit_csharp(&output, &schema, ClassType::Stack)
-        .unwrap_err();
-    assert_eq!(
-        "Type reference Union(\n    Vec(\n        [],\n    ),\n) not implemented for ResourceIr::Object",
-        result.to_string(),
-    );
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let value = unsupported_object(&mut types, &mut nodes);
+    let resource_ir = ResourceIr::GetAZs(nodes.push(value));
+    assert_eq!(UNSUPPORTED_OBJECT, emit_error(&resource_ir, &types, &nodes));
 }
 
 // Class type integration tests
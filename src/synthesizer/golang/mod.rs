@@ -8,16 +8,22 @@ use crate::ir::conditions::ConditionIr;
 use crate::ir::constructor::ConstructorParameter;
 use crate::ir::importer::ImportInstruction;
 use crate::ir::mappings::OutputType;
+use crate::ir::nodes::NodeTable;
 use crate::ir::reference::{Origin, PseudoParameter, Reference};
-use crate::ir::resources::{find_references, ResourceInstruction, ResourceIr, CFN_CUSTOM_RESOURCE};
+use crate::ir::resources::{ResourceInstruction, ResourceIr, CFN_CUSTOM_RESOURCE};
+use crate::ir::symbols::{Symbol, SymbolTable};
+use crate::ir::types::TypeTable;
+use crate::ir::visit::{LogicalIdReferences, MappingUsage, Visitor};
 use crate::ir::CloudformationProgramIr;
 use crate::parser::lookup_table::MappingInnerValue;
+use crate::util::Hasher;
 use crate::Error;
 use std::borrow::Cow;
+use std::collections::HashSet;
 use std::io;
-use std::rc::Rc;
 use voca_rs::case::{camel_case, pascal_case, snake_case};
 
+use super::helpers::Helpers;
 use super::{ClassType, Synthesizer};
 
 impl ClassType {
@@ -67,7 +73,7 @@ impl Default for Golang<'_> {
 impl Synthesizer for Golang<'_> {
     fn synthesize(
         &self,
-        ir: CloudformationProgramIr,
+        ir: &CloudformationProgramIr,
         into: &mut dyn io::Write,
         class_name: &str,
         class_type: super::ClassType,
@@ -83,7 +89,16 @@ impl Synthesizer for Golang<'_> {
             trailing: Some(")".into()),
             trailing_newline: true,
         });
-        let stdlib_imports = imports.section(false);
+        let helpers = Helpers::of_golang(ir);
+        if helpers.formatted_strings {
+            imports.line("\"fmt\"");
+        }
+        if helpers.timestamps {
+            imports.line("\"time\"");
+        }
+        if helpers.formatted_strings || helpers.timestamps {
+            imports.newline();
+        }
 
         for import in &ir.imports {
             imports.line(import.to_golang()?);
@@ -145,13 +160,28 @@ impl Synthesizer for Golang<'_> {
             trailing_newline: true,
         });
 
-        let context = &mut {
-            let fmt = stdlib_imports.section(false);
-            let time = stdlib_imports.section(false);
-            let blank = stdlib_imports.section(false);
-            let ternary = code.section(false);
-            GoContext::new(self.schema, fmt, time, blank, ternary, class_type)
-        };
+        if helpers.conditional_values {
+            emit_ternary(&code);
+        }
+
+        let context = &mut GoContext::new(self.schema, ir, class_type);
+
+        let mut used_mappings = MappingUsage::default();
+        for condition in &ir.conditions {
+            used_mappings.visit_condition_ir(&condition.value);
+        }
+        for resource in &ir.resources {
+            let values = resource.properties.values();
+            for value in values
+                .chain(&resource.metadata)
+                .chain(&resource.update_policy)
+            {
+                used_mappings.visit_resource_ir(&ir.nodes, value);
+            }
+        }
+        for output in &ir.outputs {
+            used_mappings.visit_resource_ir(&ir.nodes, &output.value);
+        }
 
         for mapping in &ir.mappings {
             let leaf_type = match mapping.output_type() {
@@ -164,7 +194,7 @@ impl Synthesizer for Golang<'_> {
                 },
             };
 
-            let used = ir.uses_map_table(&mapping.name);
+            let used = used_mappings.used.contains(mapping.name.as_str());
             if !used {
                 // Go is merciless about dead stores... so we comment out unused maps...
                 ctor.line("/*");
@@ -260,6 +290,17 @@ impl Synthesizer for Golang<'_> {
             ctor.newline();
         }
 
+        // The logical IDs referenced by other resources or by outputs, which
+        // need a variable to hold the construct.
+        let mut referenced = HashSet::<Symbol, Hasher>::default();
+        for resource in &ir.resources {
+            referenced.extend(resource.references.iter().copied());
+        }
+        let mut visitor = LogicalIdReferences(&mut referenced);
+        for output in &ir.outputs {
+            visitor.visit_resource_ir(&ir.nodes, &output.value);
+        }
+
         for resource in &ir.resources {
             use crate::ir::resources::ResourceType;
 
@@ -274,13 +315,11 @@ impl Synthesizer for Golang<'_> {
                     );
                     let class = resource.resource_type.type_name();
 
-                    let prefix = if ir.resources.iter().any(|other| {
-                        other.name != resource.name && other.references.contains(&resource.name)
-                    }) || ir
-                        .outputs
-                        .iter()
-                        .any(|output| find_references(&output.value).contains(&resource.name))
-                    {
+                    let referenced = ir
+                        .symbols
+                        .get(&resource.name)
+                        .is_some_and(|symbol| referenced.contains(&symbol));
+                    let prefix = if referenced {
                         format!(
                             "{varname} := ",
                             varname = golang_identifier(&resource.name, IdentifierKind::Unexported)
@@ -317,6 +356,7 @@ impl Synthesizer for Golang<'_> {
                     ctor.newline();
                 }
             }
+            ctor.stream(into)?;
         }
 
         for output in &ir.outputs {
@@ -346,6 +386,7 @@ impl Synthesizer for Golang<'_> {
                 props.text("Value: ");
                 output.value.emit_golang(context, &props, Some(","))?;
                 ctor.newline();
+                ctor.stream(into)?;
             }
         }
 
@@ -543,7 +584,10 @@ fn emit_custom_resource(
         for dependency in &resource.dependencies {
             output.line(format!(
                 "{var_name}.AddDependency({})",
-                golang_identifier(dependency, IdentifierKind::Unexported)
+                golang_identifier(
+                    context.symbols.resolve(*dependency),
+                    IdentifierKind::Unexported
+                )
             ));
         }
     }
@@ -554,182 +598,55 @@ fn emit_custom_resource(
 
 struct GoContext<'a> {
     schema: &'a Schema,
-    fmt: Rc<CodeBuffer>,
-    time: Rc<CodeBuffer>,
-    blank: Rc<CodeBuffer>,
-    ternary: Rc<CodeBuffer>,
-    has_fmt: bool,
-    has_time: bool,
-    has_blank: bool,
-    has_ternary: bool,
+    symbols: &'a SymbolTable,
+    types: &'a TypeTable,
+    nodes: &'a NodeTable,
     class_type: ClassType,
 }
 impl<'a> GoContext<'a> {
+    /// Creates a context for synthesizing `ir`, resolving its symbols, types
+    /// and nodes.
     const fn new(
         schema: &'a Schema,
-        fmt: Rc<CodeBuffer>,
-        time: Rc<CodeBuffer>,
-        blank: Rc<CodeBuffer>,
-        ternary: Rc<CodeBuffer>,
+        ir: &'a CloudformationProgramIr,
         class_type: ClassType,
     ) -> Self {
         Self {
             schema,
-            fmt,
-            time,
-            blank,
-            ternary,
-            has_fmt: false,
-            has_time: false,
-            has_blank: false,
-            has_ternary: false,
+            symbols: &ir.symbols,
+            types: &ir.types,
+            nodes: &ir.nodes,
             class_type,
         }
     }
+}
 
-    fn import_fmt(&mut self) {
-        if self.has_fmt {
-            return;
-        }
-        self.fmt.line("\"fmt\"");
-        self.has_fmt = true;
-
-        self.insert_blank();
-    }
-
-    fn import_time(&mut self) {
-        if self.has_time {
-            return;
-        }
-        self.time.line("\"time\"");
-        self.has_time = true;
-
-        self.insert_blank();
-    }
-
-    fn insert_blank(&mut self) {
-        if self.has_blank {
-            return;
-        }
-        self.blank.newline();
-        self.has_blank = true;
-    }
-
-    fn insert_ternary(&mut self) {
-        if self.has_ternary {
-            return;
-        }
+/// Emits the helper function `If` intrinsics are synthesized with.
+fn emit_ternary(output: &CodeBuffer) {
+    output.newline();
+    let comment = output.indent("/// ".into());
+    comment.line("ifCondition is a helper function that replicates the ternary");
+    comment.line("operator that can be found in other languages. It is conceptually");
+    comment.line("equivalent to writing `cond ? whenTrue : whenFalse`, meaning it");
+    comment.line("returns `whenTrue` if `cond` is `true`, and `whenFalse` otherwise.");
+    let block = output.indent_with_options(IndentOptions {
+        indent: INDENT,
+        leading: Some(
+            format!("func {TERNARY}[T any](cond bool, whenTrue T, whenFalse T) T {{").into(),
+        ),
+        trailing: Some("}".into()),
+        trailing_newline: true,
+    });
 
-        self.ternary.newline();
-        let comment = self.ternary.indent("/// ".into());
-        comment.line("ifCondition is a helper function that replicates the ternary");
-        comment.line("operator that can be found in other languages. It is conceptually");
-        comment.line("equivalent to writing `cond ? whenTrue : whenFalse`, meaning it");
-        comment.line("returns `whenTrue` if `cond` is `true`, and `whenFalse` otherwise.");
-        let block = self.ternary.indent_with_options(IndentOptions {
+    block
+        .indent_with_options(IndentOptions {
             indent: INDENT,
-            leading: Some(
-                format!("func {TERNARY}[T any](cond bool, whenTrue T, whenFalse T) T {{").into(),
-            ),
+            leading: Some("if cond {".into()),
             trailing: Some("}".into()),
             trailing_newline: true,
-        });
-
-        block
-            .indent_with_options(IndentOptions {
-                indent: INDENT,
-                leading: Some("if cond {".into()),
-                trailing: Some("}".into()),
-                trailing_newline: true,
-            })
-            .line("return whenTrue");
-        block.line("return whenFalse");
-
-        self.has_ternary = true;
-    }
-}
-
-trait Inspectable {
-    /// Whether the rendered code for this entity uses the named mapping table.
-    fn uses_map_table(&self, name: &str) -> bool;
-}
-
-impl Inspectable for CloudformationProgramIr {
-    fn uses_map_table(&self, name: &str) -> bool {
-        self.conditions
-            .iter()
-            .any(|cond| cond.value.uses_map_table(name))
-            || self.resources.iter().any(|res| res.uses_map_table(name))
-            || self
-                .outputs
-                .iter()
-                .any(|out| out.value.uses_map_table(name))
-    }
-}
-
-impl Inspectable for ConditionIr {
-    fn uses_map_table(&self, name: &str) -> bool {
-        match self {
-            ConditionIr::Equals(lhs, rhs) => lhs.uses_map_table(name) || rhs.uses_map_table(name),
-            ConditionIr::Not(cond) => cond.uses_map_table(name),
-            ConditionIr::And(list) | ConditionIr::Or(list) => {
-                list.iter().any(|cond| cond.uses_map_table(name))
-            }
-            ConditionIr::Map(map_name, _, _) => map_name == name,
-            ConditionIr::Condition(_) | ConditionIr::Str(_) | ConditionIr::Ref(_) => false,
-            ConditionIr::Split(_, cond) => cond.uses_map_table(name),
-            ConditionIr::Select(_, cond) => cond.uses_map_table(name),
-        }
-    }
-}
-
-impl Inspectable for ResourceInstruction {
-    fn uses_map_table(&self, name: &str) -> bool {
-        self.properties.values().any(|val| val.uses_map_table(name))
-            || self
-                .metadata
-                .as_ref()
-                .map(|val| val.uses_map_table(name))
-                .unwrap_or(false)
-            || self
-                .update_policy
-                .as_ref()
-                .map(|val| val.uses_map_table(name))
-                .unwrap_or(false)
-    }
-}
-
-impl Inspectable for ResourceIr {
-    fn uses_map_table(&self, name: &str) -> bool {
-        match self {
-            Self::Sub(list) => list.iter().any(|val| val.uses_map_table(name)),
-            Self::Array(_, list) => list.iter().any(|val| val.uses_map_table(name)),
-            Self::Object(_, props) => props.values().any(|val| val.uses_map_table(name)),
-            Self::Cidr(range, count, mask) => {
-                range.uses_map_table(name)
-                    || count.uses_map_table(name)
-                    || mask.uses_map_table(name)
-            }
-            Self::GetAZs(region) => region.uses_map_table(name),
-            Self::If(_, when_true, when_false) => {
-                when_true.uses_map_table(name) || when_false.uses_map_table(name)
-            }
-            Self::Join(_, parts) => parts.iter().any(|val| val.uses_map_table(name)),
-            Self::Map(map_name, tlk, slk) => {
-                map_name == name || tlk.uses_map_table(name) || slk.uses_map_table(name)
-            }
-            Self::Select(_, list) => list.uses_map_table(name),
-            Self::Split(_, text) => text.uses_map_table(name),
-            Self::Base64(value) => value.uses_map_table(name),
-            Self::Null
-            | Self::Bool(_)
-            | Self::String(_)
-            | Self::Number(_)
-            | Self::Double(_)
-            | Self::Ref(_)
-            | Self::ImportValue(_) => false,
-        }
-    }
+        })
+        .line("return whenTrue");
+    block.line("return whenFalse");
 }
 
 impl ImportInstruction {
@@ -805,7 +722,7 @@ impl GolangEmitter for ConditionIr {
     ) -> Result<(), Error> {
         match self {
             Self::Ref(reference) => reference.emit_golang(context, output, None)?,
-            Self::Str(str) => output.text(format!("jsii.String({str:?})")),
+            Self::Str(str) => output.text_fmt(format_args!("jsii.String({str:?})")),
             Self::Condition(x) => output.text(golang_identifier(x, IdentifierKind::Unexported)),
 
             Self::And(list) => {
@@ -845,12 +762,12 @@ impl GolangEmitter for ConditionIr {
                 output.text("]");
             }
             ConditionIr::Split(sep, str) => {
-                output.text(format!("cdk.Fn_Split(jsii.String({sep:?}), "));
+                output.text_fmt(format_args!("cdk.Fn_Split(jsii.String({sep:?}), "));
                 str.emit_golang(context, output, None)?;
                 output.text(")");
             }
             ConditionIr::Select(index, str) => {
-                output.text(format!("cdk.Fn_Select(jsii.Number({index:?}), "));
+                output.text_fmt(format_args!("cdk.Fn_Select(jsii.Number({index:?}), "));
                 str.emit_golang(context, output, None)?;
                 output.text(")");
             }
@@ -869,19 +786,21 @@ impl GolangEmitter for ResourceIr {
         output: &CodeBuffer,
         trailer: Option<&str>,
     ) -> Result<(), Error> {
+        let nodes = context.nodes;
         match self {
             // Canonical nil
             Self::Null => output.text("nil"),
 
             // Literal values
-            Self::Bool(bool) => output.text(format!("jsii.Bool({bool})")),
-            Self::Double(double) => output.text(format!("jsii.Number({double})")),
-            Self::Number(number) => output.text(format!("jsii.Number({number})")),
-            Self::String(text) => output.text(format!("jsii.String({text:?})")),
+            Self::Bool(bool) => output.text_fmt(format_args!("jsii.Bool({bool})")),
+            Self::Double(double) => output.text_fmt(format_args!("jsii.Number({double})")),
+            Self::Number(number) => output.text_fmt(format_args!("jsii.Number({number})")),
+            Self::String(text) => output.text_fmt(format_args!("jsii.String({text:?})")),
 
             // Composites
             Self::Array(structure, array) => {
-                let value_type: Cow<str> = match structure {
+                let types = context.types;
+                let value_type: Cow<str> = match &types[*structure] {
                     TypeReference::Named(name) => match name.as_ref() {
                         "CfnTag" => "*cdk.CfnTag".into(),
                         name => "interface{}".into(),
@@ -891,10 +810,7 @@ impl GolangEmitter for ResourceIr {
                         Primitive::Number => "*float64".into(),
                         Primitive::Json => "interface{}".into(),
                         Primitive::String => "*string".into(),
-                        Primitive::Timestamp => {
-                            context.import_time();
-                            "time.Time".into()
-                        }
+                        Primitive::Timestamp => "time.Time".into(),
                         Primitive::Unknown => "cdk.IResolvable".into(),
                     },
                     TypeReference::List(item_type) => {
@@ -912,7 +828,7 @@ impl GolangEmitter for ResourceIr {
                     trailing: Some("}".into()),
                     trailing_newline: false,
                 });
-                for item in array {
+                for item in nodes.list(*array) {
                     item.emit_golang(context, &items, None)?;
                     items.line(",");
                 }
@@ -922,7 +838,7 @@ impl GolangEmitter for ResourceIr {
                 let mut structure_is_map = false;
                 let props = output.indent_with_options(IndentOptions {
                     indent: INDENT,
-                    leading: Some(match structure {
+                    leading: Some(match &context.types[*structure] {
                         TypeReference::Named(name)
                         | TypeReference::List(ItemType::Static(TypeReference::Named(name))) => {
                             match name.as_ref() {
@@ -963,16 +879,16 @@ impl GolangEmitter for ResourceIr {
                     trailing: Some("}".into()),
                     trailing_newline: false,
                 });
-                for (name, val) in properties {
+                for (name, val) in nodes.entries(*properties) {
                     if structure_is_simple_json {
-                        props.text(format!(
+                        props.text_fmt(format_args!(
                             "\"{name}\": ",
                             name = golang_identifier(name, IdentifierKind::Exported)
                         ));
                     } else if structure_is_map {
-                        props.text(format!("\"{name}\": "));
+                        props.text_fmt(format_args!("\"{name}\": "));
                     } else {
-                        props.text(format!(
+                        props.text_fmt(format_args!(
                             "{name}: ",
                             name = golang_identifier(name, IdentifierKind::Exported)
                         ));
@@ -984,24 +900,23 @@ impl GolangEmitter for ResourceIr {
             // Intrinsic functions
             Self::Base64(value) => {
                 output.text("cdk.Fn_Base64(");
-                value.emit_golang(context, output, None)?;
+                nodes[*value].emit_golang(context, output, None)?;
                 output.text(")");
             }
             Self::Cidr(cidr_block, count, mask) => {
                 output.text("cdk.Fn_Cidr(");
-                cidr_block.emit_golang(context, output, None)?;
+                nodes[*cidr_block].emit_golang(context, output, None)?;
                 output.text(", ");
-                count.emit_golang(context, output, None)?;
+                nodes[*count].emit_golang(context, output, None)?;
                 output.text(", ");
-                match mask.as_ref() {
+                match &nodes[*mask] {
                     ResourceIr::Number(mask) => {
-                        output.text(format!("jsii.String(\"{mask}\")"));
+                        output.text_fmt(format_args!("jsii.String(\"{mask}\")"));
                     }
                     ResourceIr::String(mask) => {
-                        output.text(format!("jsii.String({mask:?})"));
+                        output.text_fmt(format_args!("jsii.String({mask:?})"));
                     }
                     mask => {
-                        context.import_fmt();
                         output.text("jsii.String(fmt.Sprintf(\"%v\", ");
                         mask.emit_golang(context, output, None)?;
                         output.text("))");
@@ -1011,29 +926,26 @@ impl GolangEmitter for ResourceIr {
             }
             Self::GetAZs(region) => {
                 output.text("cdk.Fn_GetAzs(");
-                region.emit_golang(context, output, None)?;
+                nodes[*region].emit_golang(context, output, None)?;
                 output.text(")");
             }
             Self::If(cond, when_true, when_false) => {
-                // Ensure the ternary function is there...
-                context.insert_ternary();
-
                 let call = output.indent_with_options(IndentOptions {
                     indent: INDENT,
                     leading: Some(format!("{TERNARY}(").into()),
                     trailing: Some(")".into()),
                     trailing_newline: false,
                 });
-                call.line(format!(
+                call.line_fmt(format_args!(
                     "{cond},",
                     cond = golang_identifier(cond, IdentifierKind::Unexported)
                 ));
-                when_true.emit_golang(context, &call, Some(","))?;
-                when_false.emit_golang(context, &call, Some(","))?;
+                nodes[*when_true].emit_golang(context, &call, Some(","))?;
+                nodes[*when_false].emit_golang(context, &call, Some(","))?;
             }
             Self::ImportValue(import) => {
                 output.text("cdk.Fn_ImportValue(");
-                import.emit_golang(context, output, None)?;
+                nodes[*import].emit_golang(context, output, None)?;
                 output.text(")");
             }
             Self::Join(sep, list) => {
@@ -1043,36 +955,37 @@ impl GolangEmitter for ResourceIr {
                     trailing: Some("})".into()),
                     trailing_newline: false,
                 });
-                for item in list {
+                for item in nodes.list(*list) {
                     item.emit_golang(context, &items, Some(","))?;
                 }
             }
             Self::Map(table, tlk, slk) => {
-                output.text(format!(
+                output.text_fmt(format_args!(
                     "{table}[",
                     table = golang_identifier(table, IdentifierKind::Unexported)
                 ));
-                tlk.emit_golang(context, output, None)?;
+                nodes[*tlk].emit_golang(context, output, None)?;
                 output.text("][");
-                slk.emit_golang(context, output, None)?;
+                nodes[*slk].emit_golang(context, output, None)?;
                 output.text("]");
             }
-            Self::Select(idx, list) => match list.as_ref() {
+            Self::Select(idx, list) => match &nodes[*list] {
                 ResourceIr::Array(_, items) => {
-                    items[*idx].emit_golang(context, output, None)?;
+                    nodes.list(*items)[*idx].emit_golang(context, output, None)?;
                 }
                 list => {
-                    output.text(format!("cdk.Fn_Select(jsii.Number({idx}), "));
+                    output.text_fmt(format_args!("cdk.Fn_Select(jsii.Number({idx}), "));
                     list.emit_golang(context, output, None)?;
                     output.text(")");
                 }
             },
             Self::Split(sep, str) => {
-                output.text(format!("cdk.Fn_Split(jsii.String({sep:?}), "));
-                str.emit_golang(context, output, None)?;
+                output.text_fmt(format_args!("cdk.Fn_Split(jsii.String({sep:?}), "));
+                nodes[*str].emit_golang(context, output, None)?;
                 output.text(")");
             }
             Self::Sub(parts) => {
+                let parts = nodes.list(*parts);
                 let pattern = parts
                     .iter()
                     .map(|part| match part {
@@ -1083,8 +996,7 @@ impl GolangEmitter for ResourceIr {
                         _ => "%v".into(),
                     })
                     .collect::<String>();
-                context.import_fmt();
-                output.text(format!("jsii.String(fmt.Sprintf({pattern:?}"));
+                output.text_fmt(format_args!("jsii.String(fmt.Sprintf({pattern:?}"));
                 for part in parts {
                     match part {
                         ResourceIr::Bool(_)
@@ -1149,35 +1061,34 @@ impl GolangEmitter for Reference {
         output: &CodeBuffer,
         trailer: Option<&str>,
     ) -> Result<(), Error> {
+        let name = context.symbols.resolve(self.symbol);
         match &self.origin {
-            Origin::Condition => {
-                output.text(golang_identifier(&self.name, IdentifierKind::Unexported))
-            }
+            Origin::Condition => output.text(golang_identifier(name, IdentifierKind::Unexported)),
             Origin::GetAttribute {
                 attribute,
                 conditional,
                 is_custom_resource,
             } => {
                 if *is_custom_resource {
-                    output.text(format!(
+                    output.text_fmt(format_args!(
                         "{name}.GetAtt(jsii.String(\"{attribute}\")).ToString()",
-                        name = golang_identifier(&self.name, IdentifierKind::Unexported),
+                        name = golang_identifier(name, IdentifierKind::Unexported),
                     ))
                 } else {
-                    output.text(format!(
+                    output.text_fmt(format_args!(
                         "{name}.Attr{attribute}()",
-                        name = golang_identifier(&self.name, IdentifierKind::Unexported),
+                        name = golang_identifier(name, IdentifierKind::Unexported),
                         attribute = golang_identifier(attribute, IdentifierKind::Exported),
                     ))
                 }
             }
-            Origin::LogicalId { conditional, .. } => output.text(format!(
+            Origin::LogicalId { conditional, .. } => output.text_fmt(format_args!(
                 "{name}.Ref()",
-                name = golang_identifier(&self.name, IdentifierKind::Unexported)
+                name = golang_identifier(name, IdentifierKind::Unexported)
             )),
-            Origin::CfnParameter | Origin::Parameter => output.text(format!(
+            Origin::CfnParameter | Origin::Parameter => output.text_fmt(format_args!(
                 "props.{name}",
-                name = golang_identifier(&self.name, IdentifierKind::Exported)
+                name = golang_identifier(name, IdentifierKind::Exported)
             )),
             Origin::PseudoParameter(pseudo) => {
                 let prefix = match context.class_type {
@@ -1193,7 +1104,7 @@ impl GolangEmitter for Reference {
                     PseudoParameter::URLSuffix => "UrlSuffix",
                     PseudoParameter::NotificationArns => "NotificationArns",
                 };
-                output.text(format!("{prefix}.{pseudo}()"));
+                output.text_fmt(format_args!("{prefix}.{pseudo}()"));
             }
         }
 
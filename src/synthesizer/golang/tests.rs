@@ -1,6 +1,5 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
-use indexmap::IndexMap;
 
 use super::*;
 
@@ -45,19 +44,13 @@ fn test_alexa_organization() {
 fn test_condition_ir_map() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let ir = CloudformationProgramIr::default();
     let condition_ir = ConditionIr::Map(
         "ConditionIrMap".to_string(),
         Box::new(ConditionIr::Str("key".to_string())),
         Box::new(ConditionIr::Str("value".to_string())),
     );
-    let context = &mut GoContext::new(
-        &schema,
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        ClassType::Stack,
-    );
+    let context = &mut GoContext::new(&schema, &ir, ClassType::Stack);
     let result = condition_ir.emit_golang(context, &output, Some(","));
     assert_eq!((), result.unwrap());
 }
@@ -66,15 +59,9 @@ fn test_condition_ir_map() {
 fn test_resource_ir_double() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let ir = CloudformationProgramIr::default();
     let resource_ir = ResourceIr::Double(WrapperF64::new(2.0));
-    let context = &mut GoContext::new(
-        &schema,
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        ClassType::Stack,
-    );
+    let context = &mut GoContext::new(&schema, &ir, ClassType::Stack);
     let result = resource_ir.emit_golang(context, &output, Some(","));
     assert_eq!((), result.unwrap());
 }
@@ -83,18 +70,13 @@ fn test_resource_ir_double() {
 fn test_resource_ir_object_primitive_error() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let mut ir = CloudformationProgramIr::default();
     let resource_ir = ResourceIr::Object(
-        TypeReference::Primitive(Primitive::Boolean),
-        IndexMap::new(),
-    );
-    let context = &mut GoContext::new(
-        &schema,
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        ClassType::Stack,
+        ir.types
+            .intern(&TypeReference::Primitive(Primitive::Boolean)),
+        ir.nodes.push_entries([]),
     );
+    let context = &mut GoContext::new(&schema, &ir, ClassType::Stack);
     let result = resource_ir
         .emit_golang(context, &output, Option::None)
         .unwrap_err();
@@ -108,20 +90,14 @@ fn test_resource_ir_object_primitive_error() {
 fn test_resource_ir_object_list_structure() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let mut ir = CloudformationProgramIr::default();
     let resource_ir = ResourceIr::Object(
-        TypeReference::List(ItemType::Static(&TypeReference::Primitive(
-            Primitive::Number,
+        ir.types.intern(&TypeReference::List(ItemType::Static(
+            &TypeReference::Primitive(Primitive::Number),
         ))),
-        IndexMap::new(),
-    );
-    let context = &mut GoContext::new(
-        &schema,
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        ClassType::Stack,
+        ir.nodes.push_entries([]),
     );
+    let context = &mut GoContext::new(&schema, &ir, ClassType::Stack);
     let result = resource_ir.emit_golang(context, &output, Option::None);
     assert_eq!((), result.unwrap());
 }
@@ -130,19 +106,13 @@ fn test_resource_ir_object_list_structure() {
 fn test_resource_ir_cidr_null_mask() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let mut ir = CloudformationProgramIr::default();
     let resource_ir = ResourceIr::Cidr(
-        Box::new(ResourceIr::String("0.0.0.0".into())),
-        Box::new(ResourceIr::String("16".into())),
-        Box::new(ResourceIr::Null),
-    );
-    let context = &mut GoContext::new(
-        &schema,
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        ClassType::Stack,
+        ir.nodes.push(ResourceIr::String("0.0.0.0".into())),
+        ir.nodes.push(ResourceIr::String("16".into())),
+        ir.nodes.push(ResourceIr::Null),
     );
+    let context = &mut GoContext::new(&schema, &ir, ClassType::Stack);
     let result = resource_ir.emit_golang(context, &output, Option::None);
     assert_eq!((), result.unwrap());
 }
@@ -151,19 +121,13 @@ fn test_resource_ir_cidr_null_mask() {
 fn test_resource_ir_cidr_string_mask() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let mut ir = CloudformationProgramIr::default();
     let resource_ir = ResourceIr::Cidr(
-        Box::new(ResourceIr::String("0.0.0.0".into())),
-        Box::new(ResourceIr::String("16".into())),
-        Box::new(ResourceIr::String("255.255.255.0".into())),
-    );
-    let context = &mut GoContext::new(
-        &schema,
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        ClassType::Stack,
+        ir.nodes.push(ResourceIr::String("0.0.0.0".into())),
+        ir.nodes.push(ResourceIr::String("16".into())),
+        ir.nodes.push(ResourceIr::String("255.255.255.0".into())),
     );
+    let context = &mut GoContext::new(&schema, &ir, ClassType::Stack);
     let result = resource_ir.emit_golang(context, &output, Option::None);
     assert_eq!((), result.unwrap());
 }
@@ -172,18 +136,9 @@ fn test_resource_ir_cidr_string_mask() {
 fn test_reference_with_trailer() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
-    let context = &mut GoContext::new(
-        &schema,
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        output.section(false),
-        ClassType::Stack,
-    );
-    let reference = Reference {
-        origin: Origin::Condition {},
-        name: "origin".into(),
-    };
+    let mut ir = CloudformationProgramIr::default();
+    let reference = Reference::new(ir.symbols.intern("origin"), Origin::Condition);
+    let context = &mut GoContext::new(&schema, &ir, ClassType::Stack);
     let result = reference.emit_golang(context, &output, Some(","));
     assert_eq!((), result.unwrap());
 }
@@ -588,3 +543,121 @@ fn test_cfn_custom_resource_no_type_override() {
     assert!(!code.contains("AddOverride(jsii.String(\"Type\"),"));
     assert!(!code.contains("awscloudformation"));
 }
+
+// --- Helper Tests ---
+
+fn synthesize_go(template: &str) -> String {
+    let cfn: CloudformationParseTree = serde_json::from_str(template).unwrap();
+    let ir = CloudformationProgramIr::from(cfn, Schema::builtin()).unwrap();
+
+    let mut output = Vec::new();
+    ir.synthesize("go", &mut output, "TestStack", ClassType::Stack)
+        .unwrap();
+    String::from_utf8(output).unwrap()
+}
+
+#[test]
+fn test_custom_resource_metadata_helpers() {
+    let code = synthesize_go(
+        r#"{
+        "Conditions": {
+            "IsProduction": { "Fn::Equals": ["prod", "prod"] }
+        },
+        "Resources": {
+            "Setup": {
+                "Type": "Custom::Setup",
+                "Metadata": {
+                    "Script": { "Fn::Sub": "${AWS::Region}-setup" },
+                    "Stage": { "Fn::If": ["IsProduction", "prod", "dev"] }
+                },
+                "Properties": { "ServiceToken": "arn:aws:lambda:us-east-1:123456789:function:handler" }
+            }
+        }
+    }"#,
+    );
+
+    assert!(code.contains("setup.CfnOptions().SetMetadata("));
+    assert!(code.contains("fmt.Sprintf("));
+    assert!(code.contains("\"fmt\""));
+    assert!(code.contains("ifCondition("));
+    assert!(code.contains("func ifCondition[T any]"));
+}
+
+#[test]
+fn test_custom_resource_metadata_of_any_shape_uses_helpers() {
+    let code = synthesize_go(
+        r#"{
+        "Resources": {
+            "Setup": {
+                "Type": "Custom::Setup",
+                "Metadata": [{ "Fn::Sub": "${AWS::Region}-setup" }],
+                "Properties": { "ServiceToken": "arn:aws:lambda:us-east-1:123456789:function:handler" }
+            }
+        }
+    }"#,
+    );
+    assert!(code.contains("\"fmt\""));
+}
+
+#[test]
+fn test_resource_metadata_is_left_out_of_helpers() {
+    let code = synthesize_go(
+        r#"{
+        "Resources": {
+            "Bucket": {
+                "Type": "AWS::S3::Bucket",
+                "Metadata": { "Script": { "Fn::Sub": "${AWS::Region}-setup" } }
+            }
+        }
+    }"#,
+    );
+    assert!(!code.contains("fmt.Sprintf("));
+    assert!(!code.contains("\"fmt\""));
+}
+
+#[test]
+fn test_fmt_import_for_selected_item() {
+    let code = synthesize_go(
+        r#"{
+        "Resources": { "Bucket": { "Type": "AWS::S3::Bucket" } },
+        "Outputs": {
+            "Selected": { "Value": { "Fn::Select": [1, ["plain", { "Fn::Sub": "${AWS::Region}" }]] } }
+        }
+    }"#,
+    );
+    assert!(code.contains("\"fmt\""));
+
+    let code = synthesize_go(
+        r#"{
+        "Resources": { "Bucket": { "Type": "AWS::S3::Bucket" } },
+        "Outputs": {
+            "Selected": { "Value": { "Fn::Select": [0, ["plain", { "Fn::Sub": "${AWS::Region}" }]] } }
+        }
+    }"#,
+    );
+    assert!(!code.contains("\"fmt\""));
+}
+
+#[test]
+fn test_fmt_import_for_cidr_mask() {
+    let code = synthesize_go(
+        r#"{
+        "Resources": { "Bucket": { "Type": "AWS::S3::Bucket" } },
+        "Outputs": {
+            "Subnets": { "Value": { "Fn::Cidr": ["10.0.0.0/16", 6, null] } }
+        }
+    }"#,
+    );
+    assert!(code.contains("fmt.Sprintf(\"%v\", nil)"));
+    assert!(code.contains("\"fmt\""));
+
+    let code = synthesize_go(
+        r#"{
+        "Resources": { "Bucket": { "Type": "AWS::S3::Bucket" } },
+        "Outputs": {
+            "Subnets": { "Value": { "Fn::Cidr": ["10.0.0.0/16", 6, 5] } }
+        }
+    }"#,
+    );
+    assert!(!code.contains("\"fmt\""));
+}
@@ -0,0 +1,130 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Discovery of the helpers synthesized code relies on besides the imports of
+//! the program, such as functions decoding base64 or formatting strings. They
+//! are found with a pass over the IR ahead of synthesis, so the synthesizers
+//! can write the imports and definitions they need before the code using them,
+//! and stream that code to the output as it is generated.
+
+use std::iter;
+
+use crate::cdk::{Primitive, TypeReference};
+use crate::ir::nodes::NodeTable;
+use crate::ir::resources::{ResourceIr, ResourceType};
+use crate::ir::types::TypeTable;
+use crate::ir::visit::{self, Visitor};
+use crate::ir::CloudformationProgramIr;
+
+/// The helpers used by the values of a program.
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub(super) struct Helpers {
+    /// A `Fn::Base64` of a literal string, which is decoded in place.
+    pub decoded_base64: bool,
+    /// A `Fn::Sub`, or a `Fn::Cidr` with a mask that is not a literal, which
+    /// are formatted into strings.
+    pub formatted_strings: bool,
+    /// An array of timestamps.
+    pub timestamps: bool,
+    /// A `Fn::If`, which is a conditional expression.
+    pub conditional_values: bool,
+}
+
+impl Helpers {
+    /// Scans the properties, metadata and update policies of the resources of
+    /// `ir`, and the values and exports of its outputs.
+    pub(super) fn of(ir: &CloudformationProgramIr) -> Self {
+        let resources = ir.resources.iter().flat_map(|resource| {
+            // Metadata is only synthesized when it is an object.
+            let metadata = resource
+                .metadata
+                .iter()
+                .filter(|metadata| matches!(metadata, ResourceIr::Object(..)));
+            resource
+                .properties
+                .values()
+                .chain(metadata)
+                .chain(&resource.update_policy)
+        });
+        Self::scan(ir, resources.chain(outputs(ir)))
+    }
+
+    /// Scans the values the Go synthesizer emits: the properties of the
+    /// resources of `ir`, the metadata and update policies of its custom
+    /// resources (whatever their shape), and the values and exports of its
+    /// outputs. Other resources leave their metadata and update policies out.
+    pub(super) fn of_golang(ir: &CloudformationProgramIr) -> Self {
+        let resources = ir.resources.iter().flat_map(|resource| {
+            let custom = matches!(resource.resource_type, ResourceType::Custom(_));
+            let options = resource
+                .metadata
+                .iter()
+                .chain(&resource.update_policy)
+                .filter(move |_| custom);
+            resource.properties.values().chain(options)
+        });
+        Self::scan(ir, resources.chain(outputs(ir)))
+    }
+
+    fn scan<'ir>(
+        ir: &'ir CloudformationProgramIr,
+        values: impl Iterator<Item = &'ir ResourceIr>,
+    ) -> Self {
+        let mut scan = Scan {
+            types: &ir.types,
+            helpers: Self::default(),
+        };
+        values.for_each(|value| scan.visit_resource_ir(&ir.nodes, value));
+        scan.helpers
+    }
+}
+
+fn outputs(ir: &CloudformationProgramIr) -> impl Iterator<Item = &ResourceIr> {
+    ir.outputs
+        .iter()
+        .flat_map(|output| iter::once(&output.value).chain(&output.export))
+}
+
+struct Scan<'a> {
+    types: &'a TypeTable,
+    helpers: Helpers,
+}
+
+impl<'ir> Visitor<'ir> for Scan<'_> {
+    fn visit_resource_ir(&mut self, nodes: &'ir NodeTable, ir: &'ir ResourceIr) {
+        match ir {
+            ResourceIr::Base64(value) if matches!(nodes[*value], ResourceIr::String(_)) => {
+                self.helpers.decoded_base64 = true;
+            }
+            ResourceIr::Sub(_) => self.helpers.formatted_strings = true,
+            ResourceIr::Cidr(_, _, mask)
+                if !matches!(nodes[*mask], ResourceIr::Number(_) | ResourceIr::String(_)) =>
+            {
+                self.helpers.formatted_strings = true;
+            }
+            ResourceIr::Array(id, _)
+                if matches!(
+                    self.types[*id],
+                    TypeReference::Primitive(Primitive::Timestamp)
+                ) =>
+            {
+                self.helpers.timestamps = true;
+            }
+            ResourceIr::If(..) => self.helpers.conditional_values = true,
+            // Only the selected item of a literal array is synthesized.
+            ResourceIr::Select(index, list) => {
+                if let ResourceIr::Array(_, items) = &nodes[*list] {
+                    if let Some(item) = nodes.list(*items).get(*index) {
+                        self.visit_resource_ir(nodes, item);
+                    }
+                    return;
+                }
+            }
+            _ => {}
+        }
+        visit::walk_resource_ir(self, nodes, ir)
+    }
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,70 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+use crate::cdk::Schema;
+use crate::CloudformationParseTree;
+
+fn program(template: &[u8]) -> CloudformationProgramIr {
+    CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(template).unwrap(),
+        Schema::builtin(),
+    )
+    .unwrap()
+}
+
+#[test]
+fn test_finds_helpers_of_emitted_values() {
+    let ir = program(
+        br#"{
+            "Conditions": { "IsProd": { "Fn::Equals": [{ "Ref": "AWS::Region" }, "us-east-1"] } },
+            "Resources": {
+                "Bucket": {
+                    "Type": "AWS::S3::Bucket",
+                    "Metadata": { "Script": { "Fn::Sub": "${AWS::Region}-data" } },
+                    "Properties": { "BucketName": { "Fn::Base64": "3q2+7w==" } }
+                }
+            },
+            "Outputs": {
+                "Stage": { "Value": { "Fn::If": ["IsProd", "prod", "dev"] } }
+            }
+        }"#,
+    );
+
+    assert_eq!(
+        Helpers::of(&ir),
+        Helpers {
+            decoded_base64: true,
+            formatted_strings: true,
+            timestamps: false,
+            conditional_values: true,
+        }
+    );
+    // The metadata of resources other than custom ones is left out.
+    assert_eq!(
+        Helpers::of_golang(&ir),
+        Helpers {
+            decoded_base64: true,
+            formatted_strings: false,
+            timestamps: false,
+            conditional_values: true,
+        }
+    );
+}
+
+#[test]
+fn test_skips_items_select_leaves_out() {
+    let ir = program(
+        br#"{
+            "Resources": {
+                "Bucket": {
+                    "Type": "AWS::S3::Bucket",
+                    "Properties": {
+                        "BucketName": { "Fn::Select": [0, ["data", { "Fn::Sub": "${AWS::Region}" }]] }
+                    }
+                }
+            }
+        }"#,
+    );
+
+    assert_eq!(Helpers::of(&ir), Helpers::default());
+}
@@ -5,8 +5,11 @@ use crate::cdk::{ItemType, Schema, TypeReference};
 use crate::code::{CodeBuffer, IndentOptions};
 use crate::ir::conditions::ConditionIr;
 use crate::ir::importer::ImportInstruction;
+use crate::ir::nodes::NodeTable;
 use crate::ir::reference::{Origin, PseudoParameter, Reference};
 use crate::ir::resources::{ResourceInstruction, ResourceIr, CFN_CUSTOM_RESOURCE};
+use crate::ir::symbols::SymbolTable;
+use crate::ir::types::TypeTable;
 use crate::ir::CloudformationProgramIr;
 use crate::parser::lookup_table::MappingInnerValue;
 use crate::parser::resource::DeletionPolicy;
@@ -325,6 +328,9 @@ impl<'a> Java<'a> {
         resource: &ResourceInstruction,
         writer: &Rc<CodeBuffer>,
         schema: &Schema,
+        symbols: &SymbolTable,
+        types: &TypeTable,
+        nodes: &NodeTable,
         class_type: ClassType,
     ) -> Result<bool, Error> {
         let class = resource.resource_type.type_name();
@@ -335,7 +341,16 @@ impl<'a> Java<'a> {
             let properties = writer.indent(DOUBLE_INDENT);
             for (name, prop) in &resource.properties {
                 properties.text(format!(".{}(", camel_case(name)));
-                emit_java(prop.clone(), &properties, Some(class), schema, class_type)?;
+                emit_java(
+                    prop,
+                    &properties,
+                    Some(class),
+                    schema,
+                    symbols,
+                    types,
+                    nodes,
+                    class_type,
+                )?;
                 properties.text(")\n");
             }
             properties.line(".build()) : Optional.empty();");
@@ -348,7 +363,16 @@ impl<'a> Java<'a> {
             let properties = writer.indent(DOUBLE_INDENT);
             for (name, prop) in &resource.properties {
                 properties.text(format!(".{}(", camel_case(name)));
-                emit_java(prop.clone(), &properties, Some(class), schema, class_type)?;
+                emit_java(
+                    prop,
+                    &properties,
+                    Some(class),
+                    schema,
+                    symbols,
+                    types,
+                    nodes,
+                    class_type,
+                )?;
                 properties.text(")\n");
             }
             properties.line(".build();");
@@ -372,25 +396,35 @@ impl<'a> Java<'a> {
     fn write_resources(
         ir: &CloudformationProgramIr,
         writer: &Rc<CodeBuffer>,
+        into: &mut dyn io::Write,
         schema: &Schema,
         class_type: ClassType,
     ) -> Result<(), Error> {
+        let symbols = &ir.symbols;
+        let types = &ir.types;
+        let nodes = &ir.nodes;
         use crate::ir::resources::ResourceType;
 
         for resource in &ir.resources {
             if matches!(resource.resource_type, ResourceType::Custom(_)) {
-                emit_custom_resource(resource, writer, schema, class_type)?;
+                emit_custom_resource(resource, writer, schema, symbols, types, nodes, class_type)?;
             } else {
-                let maybe_undefined = Self::write_resource(resource, writer, schema, class_type)?;
+                let maybe_undefined = Self::write_resource(
+                    resource, writer, schema, symbols, types, nodes, class_type,
+                )?;
                 writer.newline();
                 Self::write_resource_attributes(
                     resource,
                     writer,
                     maybe_undefined,
                     schema,
+                    symbols,
+                    types,
+                    nodes,
                     class_type,
                 )?;
             }
+            writer.stream(into)?;
         }
         Ok(())
     }
@@ -400,6 +434,9 @@ impl<'a> Java<'a> {
         writer: &Rc<CodeBuffer>,
         maybe_undefined: bool,
         schema: &Schema,
+        symbols: &SymbolTable,
+        types: &TypeTable,
+        nodes: &NodeTable,
         class_type: ClassType,
     ) -> Result<(), Error> {
         let res_name = if maybe_undefined {
@@ -418,14 +455,16 @@ impl<'a> Java<'a> {
         if let Some(metadata) = &resource.metadata {
             match metadata {
                 ResourceIr::Object(_, entries) => {
-                    for (name, value) in entries {
+                    for (name, value) in nodes.entries(*entries) {
                         writer.text(format!("{res_name}.addMetadata(\"{name}\", "));
-                        emit_java(value.clone(), writer, None, schema, class_type)?;
+                        emit_java(
+                            value, writer, None, schema, symbols, types, nodes, class_type,
+                        )?;
                         writer.text(format!("){trailer}"));
                     }
                 }
                 unsupported => {
-                    writer.line(format!("/* {unsupported:?} */"));
+                    writer.line(format!("/* {:?} */", nodes.resolve(unsupported)));
                 }
             }
             extra_line = true;
@@ -434,7 +473,7 @@ impl<'a> Java<'a> {
         for dependency in &resource.dependencies {
             writer.text(format!(
                 "{res_name}.addDependency({}){}",
-                camel_case(dependency),
+                camel_case(symbols.resolve(*dependency)),
                 trailer
             ));
             extra_line = true;
@@ -471,7 +510,16 @@ impl<'a> Java<'a> {
 
         if let Some(update_policy) = &resource.update_policy {
             writer.text(format!("{res_name}.getCfnOptions().setUpdatePolicy("));
-            emit_java(update_policy.clone(), writer, None, schema, class_type)?;
+            emit_java(
+                update_policy,
+                writer,
+                None,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             writer.text(format!("){trailer}"));
             extra_line = true;
         }
@@ -493,7 +541,7 @@ impl<'a> Java<'a> {
             writer.line(format!(
                 "Boolean {} = {};",
                 camel_case(name),
-                emit_conditions(val.clone(), class_type)
+                emit_conditions(val, &ir.symbols, class_type)
             ));
         }
         writer.newline();
@@ -536,15 +584,28 @@ impl<'a> Java<'a> {
     fn write_outputs(
         ir: &CloudformationProgramIr,
         writer: &Rc<CodeBuffer>,
+        into: &mut dyn io::Write,
         schema: &Schema,
         class_type: ClassType,
     ) -> Result<(), Error> {
+        let symbols = &ir.symbols;
+        let types = &ir.types;
+        let nodes = &ir.nodes;
         for output in &ir.outputs {
             let var_name = camel_case(&output.name);
             let output_writer = match &output.condition {
                 None => {
                     writer.text(format!("this.{var_name} = "));
-                    emit_java(output.value.clone(), writer, None, schema, class_type)?;
+                    emit_java(
+                        &output.value,
+                        writer,
+                        None,
+                        schema,
+                        symbols,
+                        types,
+                        nodes,
+                        class_type,
+                    )?;
                     writer.text(";\n");
                     let output_writer = writer.indent_with_options(IndentOptions {
                         indent: DOUBLE_INDENT,
@@ -568,7 +629,16 @@ impl<'a> Java<'a> {
                         camel_case(&output.name),
                         camel_case(cond)
                     ));
-                    emit_java(output.value.clone(), writer, None, schema, class_type)?;
+                    emit_java(
+                        &output.value,
+                        writer,
+                        None,
+                        schema,
+                        symbols,
+                        types,
+                        nodes,
+                        class_type,
+                    )?;
                     writer.text(" : Optional.empty();\n");
                     let output_writer = writer.indent_with_options(IndentOptions {
                         indent: DOUBLE_INDENT,
@@ -593,18 +663,22 @@ impl<'a> Java<'a> {
                     output.description.clone().unwrap()
                 ))
             }
-            if output.export.is_some() {
+            if let Some(export) = &output.export {
                 output_writer.text(".exportName(");
                 emit_java(
-                    output.export.clone().unwrap(),
+                    export,
                     &output_writer,
                     None,
                     schema,
+                    symbols,
+                    types,
+                    nodes,
                     class_type,
                 )?;
                 output_writer.text(")\n");
             }
             writer.newline();
+            writer.stream(into)?;
         }
         Ok(())
     }
@@ -619,7 +693,7 @@ impl Default for Java<'_> {
 impl Synthesizer for Java<'_> {
     fn synthesize(
         &self,
-        ir: CloudformationProgramIr,
+        ir: &CloudformationProgramIr,
         into: &mut dyn io::Write,
         class_name: &str,
         class_type: super::ClassType,
@@ -646,17 +720,17 @@ impl Synthesizer for Java<'_> {
             trailing_newline: true,
         });
 
-        let props = Self::emit_props(&ir);
-        Self::write_output_fields(&ir, &class);
+        let props = Self::emit_props(ir);
+        Self::write_output_fields(ir, &class);
 
         let definitions = Self::write_stack_definitions(&props, &class, class_name, class_type);
         Self::write_props(&props, &definitions);
-        Self::write_transforms(&ir, &definitions, class_type);
+        Self::write_transforms(ir, &definitions, class_type);
 
-        Self::write_mappings(&ir, &definitions);
-        Self::write_conditions(&ir, &definitions, class_type);
-        Self::write_resources(&ir, &definitions, self.schema, class_type)?;
-        Self::write_outputs(&ir, &definitions, self.schema, class_type)?;
+        Self::write_mappings(ir, &definitions);
+        Self::write_conditions(ir, &definitions, class_type);
+        Self::write_resources(ir, &definitions, into, self.schema, class_type)?;
+        Self::write_outputs(ir, &definitions, into, self.schema, class_type)?;
 
         Ok(code.write(into)?)
     }
@@ -690,99 +764,102 @@ impl ImportInstruction {
     }
 }
 
-fn emit_conditions(condition: ConditionIr, class_type: ClassType) -> String {
+fn emit_conditions(
+    condition: &ConditionIr,
+    symbols: &SymbolTable,
+    class_type: ClassType,
+) -> String {
     match condition {
-        ConditionIr::Ref(reference) => emit_reference(reference, class_type),
+        ConditionIr::Ref(reference) => emit_reference(reference, symbols, class_type),
         ConditionIr::Str(str) => format!("{str:?}"),
-        ConditionIr::Condition(x) => camel_case(&x),
+        ConditionIr::Condition(x) => camel_case(x),
         ConditionIr::And(list) => {
-            let and = get_condition(list, " && ", class_type);
+            let and = get_condition(list, " && ", symbols, class_type);
             format!("({and})")
         }
         ConditionIr::Or(list) => {
-            let or = get_condition(list, " || ", class_type);
+            let or = get_condition(list, " || ", symbols, class_type);
             format!("({or})")
         }
         ConditionIr::Not(cond) => {
             if cond.is_simple() {
-                format!("!{}", emit_conditions(*cond, class_type))
+                format!("!{}", emit_conditions(cond, symbols, class_type))
             } else {
-                format!("!({})", emit_conditions(*cond, class_type))
+                format!("!({})", emit_conditions(cond, symbols, class_type))
             }
         }
         ConditionIr::Equals(lhs, rhs) => {
             format!(
                 "{}.equals({})",
-                emit_conditions(*lhs, class_type),
-                emit_conditions(*rhs, class_type)
+                emit_conditions(lhs, symbols, class_type),
+                emit_conditions(rhs, symbols, class_type)
             )
         }
         ConditionIr::Map(_, tlk, slk) => {
             format!(
                 "Fn.map({}, {})",
-                emit_conditions(*tlk, class_type),
-                emit_conditions(*slk, class_type)
+                emit_conditions(tlk, symbols, class_type),
+                emit_conditions(slk, symbols, class_type)
             )
         }
         ConditionIr::Split(sep, l1) => {
-            let str = emit_conditions(l1.as_ref().clone(), class_type);
+            let str = emit_conditions(l1, symbols, class_type);
             format!("Arrays.asList({str}.split(\"{sep}\"))")
         }
         ConditionIr::Select(index, str) => {
             format!(
                 "Fn.select({index:?}, {})",
-                emit_conditions(*str, class_type)
+                emit_conditions(str, symbols, class_type)
             )
         }
     }
 }
 
-fn emit_reference(reference: Reference, class_type: ClassType) -> String {
-    let origin = reference.origin;
-    let name = reference.name;
-    match origin {
+fn emit_reference(reference: &Reference, symbols: &SymbolTable, class_type: ClassType) -> String {
+    let name = symbols.resolve(reference.symbol);
+    match reference.origin {
         Origin::LogicalId { conditional, .. } => {
             if conditional {
                 format!(
                     "Optional.of({}.isPresent() ? {}.get().getRef()\n{DOUBLE_INDENT}: Optional.empty())",
-                    camel_case(&name),
-                    camel_case(&name)
+                    camel_case(name),
+                    camel_case(name)
                 )
             } else {
-                format!("{}.getRef()", camel_case(&name))
+                format!("{}.getRef()", camel_case(name))
             }
         }
         Origin::GetAttribute {
             conditional,
-            attribute,
+            ref attribute,
             is_custom_resource,
         } => {
             if is_custom_resource && conditional {
                 format!(
                     "Optional.of({}.isPresent() ? {}.get().getAtt(\"{attribute}\").toString()\n{DOUBLE_INDENT}: Optional.empty())",
-                    camel_case(&name),
-                    camel_case(&name),
+                    camel_case(name),
+                    camel_case(name),
                 )
             } else if is_custom_resource {
-                format!("{}.getAtt(\"{attribute}\").toString()", camel_case(&name),)
+                format!("{}.getAtt(\"{attribute}\").toString()", camel_case(name),)
             } else if conditional {
                 format!(
                     "Optional.of({}.isPresent() ? {}.get().getAttr{}()\n{DOUBLE_INDENT}: Optional.empty())",
-                    camel_case(&name),
-                    camel_case(&name),
+                    camel_case(name),
+                    camel_case(name),
                     pascal_case(&attribute.replace('.', ""))
                 )
             } else {
                 format!(
                     "{}.getAttr{}()",
-                    camel_case(&name),
+                    camel_case(name),
                     pascal_case(&attribute.replace('.', ""))
                 )
             }
         }
         Origin::PseudoParameter(param) => get_pseudo_param(param, class_type),
-        Origin::CfnParameter | Origin::Parameter => camel_case(&name),
-        Origin::Condition => name,
+        Origin::CfnParameter | Origin::Parameter => camel_case(name),
+        Origin::Condition => name.to_string(),
     }
 }
 
@@ -802,25 +879,35 @@ fn get_pseudo_param(param: PseudoParameter, class_type: ClassType) -> String {
     }
 }
 
-fn get_condition(list: Vec<ConditionIr>, sep: &str, class_type: ClassType) -> String {
-    list.into_iter()
-        .map(|c| emit_conditions(c, class_type))
+fn get_condition(
+    list: &[ConditionIr],
+    sep: &str,
+    symbols: &SymbolTable,
+    class_type: ClassType,
+) -> String {
+    list.iter()
+        .map(|c| emit_conditions(c, symbols, class_type))
         .collect::<Vec<_>>()
         .join(sep)
 }
 
 fn emit_tag_value(
-    this: ResourceIr,
+    this: &ResourceIr,
     output: &CodeBuffer,
     class: Option<&str>,
     schema: &Schema,
+    symbols: &SymbolTable,
+    types: &TypeTable,
+    nodes: &NodeTable,
     class_type: ClassType,
 ) -> Result<(), Error> {
     match this {
         ResourceIr::Bool(bool) => Ok(output.text(format!("String.valueOf({bool})"))),
         ResourceIr::Double(number) => Ok(output.text(format!("String.valueOf({number})"))),
         ResourceIr::Number(number) => Ok(output.text(format!("String.valueOf({number})"))),
-        other => Ok(emit_java(other, output, class, schema, class_type)?),
+        other => emit_java(
+            other, output, class, schema, symbols, types, nodes, class_type,
+        ),
     }
 }
 
@@ -828,6 +915,9 @@ fn emit_custom_resource(
     resource: &ResourceInstruction,
     writer: &Rc<CodeBuffer>,
     schema: &Schema,
+    symbols: &SymbolTable,
+    types: &TypeTable,
+    nodes: &NodeTable,
     class_type: ClassType,
 ) -> Result<(), Error> {
     use crate::ir::resources::ResourceType;
@@ -851,7 +941,16 @@ fn emit_custom_resource(
         let properties = writer.indent(DOUBLE_INDENT);
         if let Some(token) = service_token {
             properties.text(".serviceToken(");
-            emit_java(token.clone(), &properties, None, schema, class_type)?;
+            emit_java(
+                token,
+                &properties,
+                None,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             properties.text(")\n");
         }
         properties.line(".build()) : Optional.empty();");
@@ -864,7 +963,16 @@ fn emit_custom_resource(
         let properties = writer.indent(DOUBLE_INDENT);
         if let Some(token) = service_token {
             properties.text(".serviceToken(");
-            emit_java(token.clone(), &properties, None, schema, class_type)?;
+            emit_java(
+                token,
+                &properties,
+                None,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             properties.text(")\n");
         }
         properties.line(".build();");
@@ -896,7 +1004,9 @@ fn emit_custom_resource(
     for (prop_name, value) in &resource.properties {
         if prop_name != "ServiceToken" {
             writer.text(format!("{res_name}.addPropertyOverride(\"{prop_name}\", "));
-            emit_java(value.clone(), writer, None, schema, class_type)?;
+            emit_java(
+                value, writer, None, schema, symbols, types, nodes, class_type,
+            )?;
             writer.text(format!("){trailer}"));
         }
     }
@@ -905,14 +1015,16 @@ fn emit_custom_resource(
     if let Some(metadata) = &resource.metadata {
         match metadata {
             ResourceIr::Object(_, entries) => {
-                for (meta_name, value) in entries {
+                for (meta_name, value) in nodes.entries(*entries) {
                     writer.text(format!("{res_name}.addMetadata(\"{meta_name}\", "));
-                    emit_java(value.clone(), writer, None, schema, class_type)?;
+                    emit_java(
+                        value, writer, None, schema, symbols, types, nodes, class_type,
+                    )?;
                     writer.text(format!("){trailer}"));
                 }
             }
             unsupported => {
-                writer.line(format!("/* {unsupported:?} */"));
+                writer.line(format!("/* {:?} */", nodes.resolve(unsupported)));
             }
         }
     }
@@ -921,7 +1033,7 @@ fn emit_custom_resource(
     for dependency in &resource.dependencies {
         writer.text(format!(
             "{res_name}.addDependency({}){trailer}",
-            camel_case(dependency),
+            camel_case(symbols.resolve(*dependency)),
         ));
     }
 
@@ -949,7 +1061,16 @@ fn emit_custom_resource(
     // Handle UpdatePolicy
     if let Some(update_policy) = &resource.update_policy {
         writer.text(format!("{res_name}.getCfnOptions().setUpdatePolicy("));
-        emit_java(update_policy.clone(), writer, None, schema, class_type)?;
+        emit_java(
+            update_policy,
+            writer,
+            None,
+            schema,
+            symbols,
+            types,
+            nodes,
+            class_type,
+        )?;
         writer.text(format!("){trailer}"));
     }
 
@@ -958,10 +1079,13 @@ fn emit_custom_resource(
 }
 
 fn emit_java(
-    this: ResourceIr,
+    this: &ResourceIr,
     output: &CodeBuffer,
     class: Option<&str>,
     schema: &Schema,
+    symbols: &SymbolTable,
+    types: &TypeTable,
+    nodes: &NodeTable,
     class_type: ClassType,
 ) -> Result<(), Error> {
     match this {
@@ -974,13 +1098,13 @@ fn emit_java(
             output.text(bool.to_string());
             Ok(())
         }
-        ResourceIr::Double(number) => Ok(output.text(format!("{number}"))),
-        ResourceIr::Number(number) => Ok(output.text(format!("{number}"))),
+        ResourceIr::Double(number) => Ok(output.text_fmt(format_args!("{number}"))),
+        ResourceIr::Number(number) => Ok(output.text_fmt(format_args!("{number}"))),
         ResourceIr::String(text) => {
             if text.lines().count() > 1 {
-                output.text(format!("\"\"\"\n{text}\"\"\""))
+                output.text_fmt(format_args!("\"\"\"\n{text}\"\"\""))
             } else {
-                output.text(format!("\"{text}\""))
+                output.text_fmt(format_args!("\"{text}\""))
             }
             Ok(())
         }
@@ -993,19 +1117,37 @@ fn emit_java(
                 trailing: None,
                 trailing_newline: false,
             });
-            let mut arr = array.iter().peekable();
+            let mut arr = nodes.list(*array).iter().peekable();
             while let Some(resource) = arr.next() {
                 if arr.peek().is_none() {
-                    emit_java(resource.clone(), &arr_writer, class, schema, class_type)?;
+                    emit_java(
+                        resource,
+                        &arr_writer,
+                        class,
+                        schema,
+                        symbols,
+                        types,
+                        nodes,
+                        class_type,
+                    )?;
                     arr_writer.text(")");
                 } else {
-                    emit_java(resource.clone(), &arr_writer, class, schema, class_type)?;
+                    emit_java(
+                        resource,
+                        &arr_writer,
+                        class,
+                        schema,
+                        symbols,
+                        types,
+                        nodes,
+                        class_type,
+                    )?;
                     arr_writer.text(",\n");
                 }
             }
             Ok(())
         }
-        ResourceIr::Object(structure, entries) => match &structure {
+        ResourceIr::Object(structure, entries) => match &types[*structure] {
             TypeReference::Named(property)
             | TypeReference::List(ItemType::Static(TypeReference::Named(property))) => {
                 match property.as_ref() {
@@ -1016,15 +1158,19 @@ fn emit_java(
                             trailing: Some(format!("{DOUBLE_INDENT}.build()").into()),
                             trailing_newline: false,
                         });
-                        for (key, value) in &entries {
+                        for (key, value) in nodes.entries(*entries) {
                             if key.eq_ignore_ascii_case("Key") {
                                 obj.text(".key(");
-                                emit_java(value.clone(), &obj, class, schema, class_type)?;
+                                emit_java(
+                                    value, &obj, class, schema, symbols, types, nodes, class_type,
+                                )?;
                                 obj.text(")\n");
                             }
                             if key.eq_ignore_ascii_case("Value") {
                                 obj.text(".value(");
-                                emit_tag_value(value.clone(), &obj, class, schema, class_type)?;
+                                emit_tag_value(
+                                    value, &obj, class, schema, symbols, types, nodes, class_type,
+                                )?;
                                 obj.text(")\n")
                             }
                         }
@@ -1038,9 +1184,11 @@ fn emit_java(
                             trailing: Some(format!("{DOUBLE_INDENT}.build()").into()),
                             trailing_newline: false,
                         });
-                        for (key, value) in &entries {
-                            obj.text(format!(".{}(", camel_case(key)));
-                            emit_java(value.clone(), &obj, class, schema, class_type)?;
+                        for (key, value) in nodes.entries(*entries) {
+                            obj.text_fmt(format_args!(".{}(", camel_case(key)));
+                            emit_java(
+                                value, &obj, class, schema, symbols, types, nodes, class_type,
+                            )?;
                             obj.text(")\n");
                         }
                         Ok(())
@@ -1049,10 +1197,12 @@ fn emit_java(
             }
             TypeReference::Primitive(_) | TypeReference::Map(_) => {
                 output.text("Map.of(");
-                let mut map = entries.iter().peekable();
+                let mut map = nodes.entries(*entries).iter().peekable();
                 while let Some((key, value)) = map.next() {
-                    output.text(format!("\"{key}\", "));
-                    emit_java(value.clone(), output, class, schema, class_type)?;
+                    output.text_fmt(format_args!("\"{key}\", "));
+                    emit_java(
+                        value, output, class, schema, symbols, types, nodes, class_type,
+                    )?;
                     if map.peek().is_some() {
                         output.text(",\n");
                     } else {
@@ -1069,9 +1219,9 @@ fn emit_java(
         },
 
         // Intrinsics
-        ResourceIr::Base64(base64) => match base64.as_ref() {
+        ResourceIr::Base64(base64) => match &nodes[*base64] {
             ResourceIr::String(b64) => {
-                output.text(format!(
+                output.text_fmt(format_args!(
                     "new String(Base64.getDecoder().decode(\"{}\"))",
                     b64.escape_debug()
                 ));
@@ -1079,45 +1229,101 @@ fn emit_java(
             }
             other => {
                 output.text("Fn.base64(");
-                emit_java(other.clone(), output, class, schema, class_type)?;
+                emit_java(
+                    other, output, class, schema, symbols, types, nodes, class_type,
+                )?;
                 output.text(")");
                 Ok(())
             }
         },
         ResourceIr::Cidr(cidr_block, count, mask) => {
             output.text("Fn.cidr(");
-            emit_java(*cidr_block, output, class, schema, class_type)?;
+            emit_java(
+                &nodes[*cidr_block],
+                output,
+                class,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             output.text(", ");
-            emit_java(*count, output, class, schema, class_type)?;
+            emit_java(
+                &nodes[*count],
+                output,
+                class,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             output.text(", ");
-            match mask.as_ref() {
+            match &nodes[*mask] {
                 ResourceIr::Number(mask) => {
-                    output.text(format!("\"{mask}\""));
+                    output.text_fmt(format_args!("\"{mask}\""));
                 }
                 ResourceIr::String(mask) => {
-                    output.text(format!("{mask:?}"));
+                    output.text_fmt(format_args!("{mask:?}"));
                 }
-                mask => output.text(format!("String.valueOf({mask:?})")),
+                mask => output.text_fmt(format_args!("String.valueOf({:?})", nodes.resolve(mask))),
             }
             output.text(")");
             Ok(())
         }
         ResourceIr::GetAZs(region) => {
             output.text("Fn.getAzs(");
-            emit_java(*region, output, None, schema, class_type)?;
+            emit_java(
+                &nodes[*region],
+                output,
+                None,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             output.text(")");
             Ok(())
         }
         ResourceIr::If(cond_name, if_true, if_false) => {
-            output.text(format!("{} ? ", camel_case(&cond_name)));
-            emit_java(*if_true, output, class, schema, class_type)?;
-            output.text(format!("\n{DOUBLE_INDENT}: "));
-            emit_java(*if_false, output, class, schema, class_type)?;
+            output.text_fmt(format_args!("{} ? ", camel_case(cond_name)));
+            emit_java(
+                &nodes[*if_true],
+                output,
+                class,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
+            output.text_fmt(format_args!("\n{DOUBLE_INDENT}: "));
+            emit_java(
+                &nodes[*if_false],
+                output,
+                class,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             Ok(())
         }
         ResourceIr::ImportValue(import) => {
             output.text("Fn.importValue(");
-            emit_java(*import, output, None, schema, class_type)?;
+            emit_java(
+                &nodes[*import],
+                output,
+                None,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             output.text(")");
             Ok(())
         }
@@ -1128,9 +1334,11 @@ fn emit_java(
                 trailing: Some(")".into()),
                 trailing_newline: false,
             });
-            let mut l = list.iter().peekable();
+            let mut l = nodes.list(*list).iter().peekable();
             while let Some(item) = l.next() {
-                emit_java(item.clone(), &items, class, schema, class_type)?;
+                emit_java(
+                    item, &items, class, schema, symbols, types, nodes, class_type,
+                )?;
                 if l.peek().is_some() {
                     items.text(",\n");
                 }
@@ -1138,47 +1346,73 @@ fn emit_java(
             Ok(())
         }
         ResourceIr::Map(name, tlk, slk) => {
-            output.text(format!("{}.findInMap(", camel_case(&name)));
-            emit_java(*tlk, output, class, schema, class_type)?;
+            output.text_fmt(format_args!("{}.findInMap(", camel_case(name)));
+            emit_java(
+                &nodes[*tlk],
+                output,
+                class,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             output.text(", ");
-            emit_java(*slk, output, class, schema, class_type)?;
+            emit_java(
+                &nodes[*slk],
+                output,
+                class,
+                schema,
+                symbols,
+                types,
+                nodes,
+                class_type,
+            )?;
             output.text(")");
             Ok(())
         }
-        ResourceIr::Select(idx, list) => match list.as_ref() {
+        ResourceIr::Select(idx, list) => match &nodes[*list] {
             ResourceIr::Array(_, array) => {
-                if idx <= array.len() {
-                    emit_java(array[idx].clone(), output, class, schema, class_type)?;
+                if let Some(item) = nodes.list(*array).get(*idx) {
+                    emit_java(
+                        item, output, class, schema, symbols, types, nodes, class_type,
+                    )?;
                 } else {
                     output.text("null");
                 }
                 Ok(())
             }
             list => {
-                output.text(format!("Fn.select({idx}, "));
-                emit_java(list.clone(), output, class, schema, class_type)?;
+                output.text_fmt(format_args!("Fn.select({idx}, "));
+                emit_java(
+                    list, output, class, schema, symbols, types, nodes, class_type,
+                )?;
                 output.text(")");
                 Ok(())
             }
         },
-        ResourceIr::Split(separator, resource) => match resource.as_ref() {
+        ResourceIr::Split(separator, resource) => match &nodes[*resource] {
             ResourceIr::String(str) => {
-                output.text(format!("{str}.split(\"{separator}\")"));
+                output.text_fmt(format_args!("{str}.split(\"{separator}\")"));
                 Ok(())
             }
             other => {
-                output.text(format!("Fn.split({separator}, "));
-                emit_java(other.clone(), output, class, schema, class_type)?;
+                output.text_fmt(format_args!("Fn.split({separator}, "));
+                emit_java(
+                    other, output, class, schema, symbols, types, nodes, class_type,
+                )?;
                 output.text(")");
                 Ok(())
             }
         },
         ResourceIr::Sub(parts) => {
-            let mut part = parts.iter().peekable();
+            let mut part = nodes.list(*parts).iter().peekable();
             while let Some(p) = part.next() {
                 match p {
-                    ResourceIr::String(lit) => output.text(format!("\"{}\"", lit.clone())),
-                    other => emit_java(other.clone(), output, class, schema, class_type)?,
+                    ResourceIr::String(lit) => output.text_fmt(format_args!("\"{lit}\"")),
+                    other => emit_java(
+                        other, output, class, schema, symbols, types, nodes, class_type,
+                    )?,
                 }
                 if part.peek().is_some() {
                     output.text(" + ");
@@ -1187,7 +1421,7 @@ fn emit_java(
             Ok(())
         }
         ResourceIr::Ref(reference) => {
-            output.text(emit_reference(reference, class_type));
+            output.text(emit_reference(reference, symbols, class_type));
             Ok(())
         }
     }
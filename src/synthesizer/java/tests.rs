@@ -1,7 +1,5 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
-use indexmap::IndexMap;
-
 use super::*;
 
 use std::borrow::Cow;
@@ -10,6 +8,7 @@ use std::str::FromStr;
 use crate::cdk::{Schema, TypeUnion};
 use crate::code::CodeBuffer;
 use crate::ir::importer::ImportInstruction;
+use crate::ir::nodes::NodeTable;
 use crate::ir::resources::ResourceIr;
 use crate::primitives::WrapperF64;
 
@@ -42,12 +41,18 @@ fn test_alexa_organization() {
 fn test_resource_ir_bool() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let nodes = NodeTable::default();
     let resource_ir = ResourceIr::Bool(true);
     let result = emit_java(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -57,12 +62,18 @@ fn test_resource_ir_bool() {
 fn test_resource_ir_number() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let nodes = NodeTable::default();
     let resource_ir = ResourceIr::Number(10);
     let result = emit_java(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -72,12 +83,18 @@ fn test_resource_ir_number() {
 fn test_resource_ir_double() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let nodes = NodeTable::default();
     let resource_ir = ResourceIr::Double(WrapperF64::new(2.0));
     let result = emit_java(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -87,12 +104,18 @@ fn test_resource_ir_double() {
 fn test_tag_value_resource_ir_bool() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let nodes = NodeTable::default();
     let resource_ir = ResourceIr::Bool(true);
     let result = emit_tag_value(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -102,12 +125,18 @@ fn test_tag_value_resource_ir_bool() {
 fn test_tag_value_resource_ir_double() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let nodes = NodeTable::default();
     let resource_ir = ResourceIr::Double(WrapperF64::new(2.0));
     let result = emit_tag_value(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -117,12 +146,18 @@ fn test_tag_value_resource_ir_double() {
 fn test_tag_value_resource_ir_number() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let nodes = NodeTable::default();
     let resource_ir = ResourceIr::Number(10);
     let result = emit_tag_value(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -132,15 +167,21 @@ fn test_tag_value_resource_ir_number() {
 fn test_resource_ir_object_type_reference_error() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let resource_ir = ResourceIr::Object(
-        TypeReference::Union(TypeUnion::Static(&[])),
-        IndexMap::new(),
+        types.intern(&TypeReference::Union(TypeUnion::Static(&[]))),
+        nodes.push_entries([]),
     );
     let result = emit_tag_value(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     )
     .unwrap_err();
@@ -154,19 +195,23 @@ fn test_resource_ir_object_type_reference_error() {
 fn test_resource_ir_select_idx_greater_than_list_len() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let mut types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let named_type = TypeReference::Named("AWS::Service::Resource".into());
-    let resource_ir = ResourceIr::Select(
-        1,
-        Box::new(ResourceIr::Array(
-            TypeReference::List(ItemType::Boxed(Box::new(named_type))),
-            vec![],
-        )),
+    let array = ResourceIr::Array(
+        types.intern(&TypeReference::List(ItemType::Boxed(Box::new(named_type)))),
+        nodes.push_list([]),
     );
+    let resource_ir = ResourceIr::Select(1, nodes.push(array));
     let result = emit_java(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -176,12 +221,18 @@ fn test_resource_ir_select_idx_greater_than_list_len() {
 fn test_resource_ir_split_non_string() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
-    let resource_ir = ResourceIr::Split("-".to_string(), Box::new(ResourceIr::Null));
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let mut nodes = NodeTable::default();
+    let resource_ir = ResourceIr::Split("-".to_string(), nodes.push(ResourceIr::Null));
     let result = emit_java(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -191,16 +242,22 @@ fn test_resource_ir_split_non_string() {
 fn test_resource_ir_cidr_null_mask() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let resource_ir = ResourceIr::Cidr(
-        Box::new(ResourceIr::String("0.0.0.0".into())),
-        Box::new(ResourceIr::String("16".into())),
-        Box::new(ResourceIr::Null),
+        nodes.push(ResourceIr::String("0.0.0.0".into())),
+        nodes.push(ResourceIr::String("16".into())),
+        nodes.push(ResourceIr::Null),
     );
     let result = emit_java(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -210,16 +267,22 @@ fn test_resource_ir_cidr_null_mask() {
 fn test_resource_ir_cidr_string_mask() {
     let output = CodeBuffer::default();
     let schema = Cow::Borrowed(Schema::builtin());
+    let symbols = SymbolTable::default();
+    let types = TypeTable::default();
+    let mut nodes = NodeTable::default();
     let resource_ir = ResourceIr::Cidr(
-        Box::new(ResourceIr::String("0.0.0.0".into())),
-        Box::new(ResourceIr::String("16".into())),
-        Box::new(ResourceIr::String("255.255.255.0".into())),
+        nodes.push(ResourceIr::String("0.0.0.0".into())),
+        nodes.push(ResourceIr::String("16".into())),
+        nodes.push(ResourceIr::String("255.255.255.0".into())),
     );
     let result = emit_java(
-        resource_ir,
+        &resource_ir,
         &output,
         Option::None,
         &schema,
+        &symbols,
+        &types,
+        &nodes,
         ClassType::Stack,
     );
     assert_eq!((), result.unwrap());
@@ -733,29 +796,31 @@ fn test_custom_resource_construct_mode() {
 
 #[test]
 fn test_emit_reference_custom_resource_getatt() {
+    let mut symbols = SymbolTable::default();
     let reference = Reference::new(
-        "MyCustom",
+        symbols.intern("MyCustom"),
         Origin::GetAttribute {
             attribute: "Endpoint".to_string(),
             conditional: false,
             is_custom_resource: true,
         },
     );
-    let result = emit_reference(reference, ClassType::Stack);
+    let result = emit_reference(&reference, &symbols, ClassType::Stack);
     assert_eq!(result, "myCustom.getAtt(\"Endpoint\").toString()");
 }
 
 #[test]
 fn test_emit_reference_custom_resource_getatt_conditional() {
+    let mut symbols = SymbolTable::default();
     let reference = Reference::new(
-        "MyCustom",
+        symbols.intern("MyCustom"),
         Origin::GetAttribute {
             attribute: "Endpoint".to_string(),
             conditional: true,
             is_custom_resource: true,
         },
     );
-    let result = emit_reference(reference, ClassType::Stack);
+    let result = emit_reference(&reference, &symbols, ClassType::Stack);
     assert!(
         result.contains("myCustom.isPresent() ? myCustom.get().getAtt(\"Endpoint\").toString()")
     );
@@ -27,6 +27,9 @@ impl FromStr for ClassType {
     }
 }
 
+#[cfg(any(feature = "golang", feature = "python", feature = "typescript"))]
+mod helpers;
+
 #[cfg(feature = "csharp")]
 mod csharp;
 #[cfg(feature = "csharp")]
@@ -60,7 +63,7 @@ pub use python::*;
 pub trait Synthesizer {
     fn synthesize(
         &self,
-        ir: CloudformationProgramIr,
+        ir: &CloudformationProgramIr,
         into: &mut dyn io::Write,
         class_name: &str,
         class_type: ClassType,
@@ -70,7 +73,7 @@ pub trait Synthesizer {
 impl CloudformationProgramIr {
     #[inline(always)]
     pub fn synthesize(
-        self,
+        &self,
         language: &str,
         into: &mut impl io::Write,
         class_name: &str,
@@ -95,6 +98,31 @@ impl CloudformationProgramIr {
         };
         synthesizer.synthesize(self, into, class_name, class_type)
     }
+
+    /// Synthesizes this program in several languages at once, running each
+    /// synthesizer on its own thread. Results are returned in the same order as
+    /// `targets`.
+    #[cfg(not(target_family = "wasm"))]
+    pub fn synthesize_concurrently<W: io::Write + Send>(
+        &self,
+        targets: &mut [(&str, W)],
+        class_name: &str,
+        class_type: ClassType,
+    ) -> Vec<Result<(), Error>> {
+        std::thread::scope(|scope| {
+            let handles: Vec<_> = targets
+                .iter_mut()
+                .map(|(language, into)| {
+                    let language = *language;
+                    scope.spawn(move || self.synthesize(language, into, class_name, class_type))
+                })
+                .collect();
+            handles
+                .into_iter()
+                .map(|handle| handle.join().expect("synthesizer thread panicked"))
+                .collect()
+        })
+    }
 }
 
 #[cfg(test)]
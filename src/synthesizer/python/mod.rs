@@ -6,9 +6,12 @@ use crate::ir::conditions::ConditionIr;
 use crate::ir::constructor::ConstructorParameter;
 use crate::ir::importer::ImportInstruction;
 use crate::ir::mappings::MappingInstruction;
+use crate::ir::nodes::NodeTable;
 use crate::ir::outputs::OutputInstruction;
 use crate::ir::reference::{Origin, PseudoParameter, Reference};
 use crate::ir::resources::{ResourceInstruction, ResourceIr, ResourceType, CFN_CUSTOM_RESOURCE};
+use crate::ir::symbols::SymbolTable;
+use crate::ir::types::TypeTable;
 use crate::ir::CloudformationProgramIr;
 use crate::parser::lookup_table::MappingInnerValue;
 use crate::Error;
@@ -19,6 +22,7 @@ use std::rc::Rc;
 use voca_rs::case::{camel_case, pascal_case, snake_case};
 use voca_rs::Voca;
 
+use super::helpers::Helpers;
 use super::{ClassType, Synthesizer};
 
 impl ClassType {
@@ -60,7 +64,7 @@ pub struct Python {}
 impl Synthesizer for Python {
     fn synthesize(
         &self,
-        ir: CloudformationProgramIr,
+        ir: &CloudformationProgramIr,
         output: &mut dyn io::Write,
         class_name: &str,
         class_type: super::ClassType,
@@ -73,8 +77,11 @@ impl Synthesizer for Python {
             imports.line(import.to_python()?);
         }
         imports.line("from constructs import Construct");
+        if Helpers::of(ir).decoded_base64 {
+            imports.line("import base64");
+        }
 
-        let context = &mut PythonContext::with_imports(imports, class_type);
+        let context = &mut PythonContext::new(ir, class_type);
 
         if let Some(description) = &ir.description {
             let comment = code.pydoc();
@@ -191,7 +198,7 @@ impl Synthesizer for Python {
             ctor.line("# Conditions");
 
             for cond in &ir.conditions {
-                let synthed = synthesize_condition_recursive(&cond.value, class_type);
+                let synthed = synthesize_condition_recursive(&cond.value, &ir.symbols, class_type);
                 ctor.line(format!("{} = {}", snake_case(&cond.name), synthed));
             }
         }
@@ -211,6 +218,7 @@ impl Synthesizer for Python {
             } else {
                 emit_resource(context, &ctor, reference);
             }
+            ctor.stream(output)?;
         }
 
         if !ir.outputs.is_empty() {
@@ -245,6 +253,7 @@ impl Synthesizer for Python {
                     emit_cfn_output(context, &ctor, op, &var_name);
                 }
                 ctor.newline();
+                ctor.stream(output)?;
             }
         }
 
@@ -304,28 +313,22 @@ impl ImportInstruction {
     }
 }
 
-struct PythonContext {
-    imports: Rc<CodeBuffer>,
-    imports_base64: bool,
+struct PythonContext<'a> {
+    symbols: &'a SymbolTable,
+    types: &'a TypeTable,
+    nodes: &'a NodeTable,
     class_type: ClassType,
 }
 
-impl PythonContext {
-    const fn with_imports(imports: Rc<CodeBuffer>, class_type: ClassType) -> Self {
+impl<'a> PythonContext<'a> {
+    const fn new(ir: &'a CloudformationProgramIr, class_type: ClassType) -> Self {
         Self {
-            imports,
-            imports_base64: false,
+            symbols: &ir.symbols,
+            types: &ir.types,
+            nodes: &ir.nodes,
             class_type,
         }
     }
-
-    fn import_base64(&mut self) {
-        if self.imports_base64 {
-            return;
-        }
-        self.imports.line("import base64");
-        self.imports_base64 = true;
-    }
 }
 
 trait PythonCodeBuffer {
@@ -389,12 +392,16 @@ fn emit_inner_mapping(output: Rc<CodeBuffer>, inner_mapping: &IndexMap<String, M
     }
 }
 
-fn synthesize_condition_recursive(val: &ConditionIr, class_type: ClassType) -> String {
+fn synthesize_condition_recursive(
+    val: &ConditionIr,
+    symbols: &SymbolTable,
+    class_type: ClassType,
+) -> String {
     match val {
         ConditionIr::And(x) => {
             let a: Vec<String> = x
                 .iter()
-                .map(|v| synthesize_condition_recursive(v, class_type))
+                .map(|v| synthesize_condition_recursive(v, symbols, class_type))
                 .map(|condition| snake_case(&condition))
                 .collect();
 
@@ -404,27 +411,35 @@ fn synthesize_condition_recursive(val: &ConditionIr, class_type: ClassType) -> S
         ConditionIr::Equals(a, b) => {
             format!(
                 "{} == {}",
-                synthesize_condition_recursive(a.as_ref(), class_type),
-                synthesize_condition_recursive(b.as_ref(), class_type)
+                synthesize_condition_recursive(a.as_ref(), symbols, class_type),
+                synthesize_condition_recursive(b.as_ref(), symbols, class_type)
             )
         }
         ConditionIr::Not(x) => {
             if x.is_simple() {
                 format!(
                     "not {}",
-                    snake_case(&synthesize_condition_recursive(x.as_ref(), class_type))
+                    snake_case(&synthesize_condition_recursive(
+                        x.as_ref(),
+                        symbols,
+                        class_type
+                    ))
                 )
             } else {
                 format!(
                     "not ({})",
-                    snake_case(&synthesize_condition_recursive(x.as_ref(), class_type))
+                    snake_case(&synthesize_condition_recursive(
+                        x.as_ref(),
+                        symbols,
+                        class_type
+                    ))
                 )
             }
         }
         ConditionIr::Or(x) => {
             let a: Vec<String> = x
                 .iter()
-                .map(|v| synthesize_condition_recursive(v, class_type))
+                .map(|v| synthesize_condition_recursive(v, symbols, class_type))
                 .collect();
 
             let inner = a.join(" or ");
@@ -434,17 +449,17 @@ fn synthesize_condition_recursive(val: &ConditionIr, class_type: ClassType) -> S
             format!("'{x}'")
         }
         ConditionIr::Condition(x) => snake_case(x),
-        ConditionIr::Ref(x) => x.to_python(class_type).into(),
+        ConditionIr::Ref(x) => x.to_python(symbols, class_type).into(),
         ConditionIr::Map(named_resource, l1, l2) => {
             format!(
                 "{}[{}][{}]",
                 snake_case(named_resource),
-                synthesize_condition_recursive(l1.as_ref(), class_type),
-                synthesize_condition_recursive(l2.as_ref(), class_type)
+                synthesize_condition_recursive(l1.as_ref(), symbols, class_type),
+                synthesize_condition_recursive(l2.as_ref(), symbols, class_type)
             )
         }
         ConditionIr::Split(sep, l1) => {
-            let str = synthesize_condition_recursive(l1.as_ref(), class_type);
+            let str = synthesize_condition_recursive(l1.as_ref(), symbols, class_type);
             format!(
                 "{str}.split('{sep}')",
                 str = str.escape_debug(),
@@ -452,23 +467,22 @@ fn synthesize_condition_recursive(val: &ConditionIr, class_type: ClassType) -> S
             )
         }
         ConditionIr::Select(index, l1) => {
-            let str = synthesize_condition_recursive(l1.as_ref(), class_type);
+            let str = synthesize_condition_recursive(l1.as_ref(), symbols, class_type);
             format!("cdk.Fn.select({index}, {str})")
         }
     }
 }
 
 impl Reference {
-    fn to_python(&self, class_type: ClassType) -> Cow<'static, str> {
+    fn to_python(&self, symbols: &SymbolTable, class_type: ClassType) -> Cow<'static, str> {
+        let name = symbols.resolve(self.symbol);
         match &self.origin {
-            Origin::CfnParameter => {
-                format!("props['{}'].value_as_string", camel_case(&self.name)).into()
-            }
-            Origin::Parameter => format!("props['{}']", camel_case(&self.name)).into(),
+            Origin::CfnParameter => format!("props['{}'].value_as_string", camel_case(name)).into(),
+            Origin::Parameter => format!("props['{}']", camel_case(name)).into(),
             Origin::LogicalId { .. } => {
-                format!("{var}{chain}ref", var = camel_case(&self.name), chain = ".").into()
+                format!("{var}{chain}ref", var = camel_case(name), chain = ".").into()
             }
-            Origin::Condition => camel_case(&self.name).into(),
+            Origin::Condition => camel_case(name).into(),
             Origin::PseudoParameter(x) => {
                 let prefix = if class_type == ClassType::Construct {
                     "Stack.of(self)."
@@ -495,13 +509,13 @@ impl Reference {
                 if *is_custom_resource {
                     format!(
                         "{var_name}{chain}get_att('{attribute}').to_string()",
-                        var_name = camel_case(&self.name),
+                        var_name = camel_case(name),
                         chain = ".",
                     )
                 } else {
                     format!(
                         "{var_name}{chain}attr_{name}",
-                        var_name = camel_case(&self.name),
+                        var_name = camel_case(name),
                         chain = ".",
                         name = snake_case(attribute)
                     )
@@ -674,7 +688,7 @@ fn emit_resource_attributes(
         for dependency in &reference.dependencies {
             output.line(format!(
                 "{var_name}.add_dependency({})",
-                camel_case(dependency)
+                camel_case(context.symbols.resolve(*dependency))
             ));
         }
     }
@@ -685,14 +699,15 @@ fn emit_resource_metadata(
     output: Rc<CodeBuffer>,
     metadata: &ResourceIr,
 ) {
+    let nodes = context.nodes;
     match metadata {
         ResourceIr::Object(_, entries) => {
-            for (name, value) in entries {
+            for (name, value) in nodes.entries(*entries) {
                 output.text(format!("'{name}': "));
                 emit_resource_ir(context, &output, value, Some(",\n"));
             }
         }
-        unsupported => output.line(format!("\"\"\" {unsupported:?} \"\"\"")),
+        unsupported => output.line(format!("\"\"\" {:?} \"\"\"", nodes.resolve(unsupported))),
     }
 }
 
@@ -713,13 +728,14 @@ fn emit_resource_ir(
     value: &ResourceIr,
     trailer: Option<&str>,
 ) {
+    let nodes = context.nodes;
     match value {
         // Literal values
         ResourceIr::Null => output.text("None"),
         ResourceIr::Bool(bool) => output.text(capitalize(&bool.to_string())),
-        ResourceIr::Double(float) => output.text(format!("{float}")),
+        ResourceIr::Double(float) => output.text_fmt(format_args!("{float}")),
         ResourceIr::Number(int) => output.text(int.to_string()),
-        ResourceIr::String(str) => output.text(format!("'{}'", str.escape_debug())),
+        ResourceIr::String(str) => output.text_fmt(format_args!("'{}'", str.escape_debug())),
 
         // Collection values
         ResourceIr::Array(_, array) => {
@@ -729,7 +745,7 @@ fn emit_resource_ir(
                 trailing: Some("]".into()),
                 trailing_newline: false,
             });
-            for item in array {
+            for item in nodes.list(*array) {
                 emit_resource_ir(context, &arr, item, Some(",\n"));
             }
         }
@@ -740,13 +756,13 @@ fn emit_resource_ir(
                 trailing: Some("}".into()),
                 trailing_newline: false,
             });
-            for (name, value) in entries {
-                match structure {
+            for (name, value) in nodes.entries(*entries) {
+                match &context.types[*structure] {
                     TypeReference::Primitive(_) | TypeReference::Map(_) => {
-                        obj.text(format!("'{name}': "));
+                        obj.text_fmt(format_args!("'{name}': "));
                     }
                     _ => {
-                        obj.text(format!("'{key}': ", key = camel_case(name)));
+                        obj.text_fmt(format_args!("'{key}': ", key = camel_case(name)));
                     }
                 }
                 emit_resource_ir(context, &obj, value, Some(",\n"));
@@ -754,10 +770,9 @@ fn emit_resource_ir(
         }
 
         // Intrinsics
-        ResourceIr::Base64(base64) => match base64.as_ref() {
+        ResourceIr::Base64(base64) => match &nodes[*base64] {
             ResourceIr::String(b64) => {
-                context.import_base64();
-                output.text(format!("base64.b64decode('{}')", b64.escape_debug()))
+                output.text_fmt(format_args!("base64.b64decode('{}')", b64.escape_debug()))
             }
             other => {
                 output.text("cdk.Fn.base64(");
@@ -767,26 +782,26 @@ fn emit_resource_ir(
         },
         ResourceIr::Cidr(ip_range, count, mask) => {
             output.text("cdk.Fn.cidr(");
-            emit_resource_ir(context, output, ip_range, None);
+            emit_resource_ir(context, output, &nodes[*ip_range], None);
             output.text(", ");
-            emit_resource_ir(context, output, count, None);
+            emit_resource_ir(context, output, &nodes[*count], None);
             output.text(", str(");
-            emit_resource_ir(context, output, mask, None);
+            emit_resource_ir(context, output, &nodes[*mask], None);
             output.text("))")
         }
         ResourceIr::GetAZs(region) => {
             output.text("cdk.Fn.get_azs(");
-            emit_resource_ir(context, output, region, None);
+            emit_resource_ir(context, output, &nodes[*region], None);
             output.text(")")
         }
         ResourceIr::If(cond_name, if_true, if_false) => {
-            emit_resource_ir(context, output, if_true, None);
-            output.text(format!(" if {} else ", snake_case(cond_name)));
-            emit_resource_ir(context, output, if_false, None)
+            emit_resource_ir(context, output, &nodes[*if_true], None);
+            output.text_fmt(format_args!(" if {} else ", snake_case(cond_name)));
+            emit_resource_ir(context, output, &nodes[*if_false], None)
         }
         ResourceIr::ImportValue(import) => {
             output.text("cdk.Fn.import_value(");
-            emit_resource_ir(context, output, import, None);
+            emit_resource_ir(context, output, &nodes[*import], None);
             output.text(")");
         }
         ResourceIr::Join(sep, list) => {
@@ -796,19 +811,20 @@ fn emit_resource_ir(
                 trailing: Some("])".into()),
                 trailing_newline: false,
             });
-            for item in list {
+            for item in nodes.list(*list) {
                 emit_resource_ir(context, &items, item, Some(",\n"));
             }
         }
         ResourceIr::Map(name, tlk, slk) => {
-            output.text(format!("{}[", camel_case(name)));
-            emit_resource_ir(context, output, tlk, None);
+            output.text_fmt(format_args!("{}[", camel_case(name)));
+            emit_resource_ir(context, output, &nodes[*tlk], None);
             output.text("][");
-            emit_resource_ir(context, output, slk, None);
+            emit_resource_ir(context, output, &nodes[*slk], None);
             output.text("]")
         }
-        ResourceIr::Select(idx, list) => match list.as_ref() {
+        ResourceIr::Select(idx, list) => match &nodes[*list] {
             ResourceIr::Array(_, array) => {
+                let array = nodes.list(*array);
                 if *idx <= array.len() {
                     emit_resource_ir(context, output, &array[*idx], None)
                 } else {
@@ -823,20 +839,23 @@ fn emit_resource_ir(
                 output.text(")")
             }
         },
-        ResourceIr::Split(sep, str) => match str.as_ref() {
+        ResourceIr::Split(sep, str) => match &nodes[*str] {
             ResourceIr::String(str) => {
-                output.text(format!("'{str}'", str = str.escape_debug()));
-                output.text(format!(".split('{sep}')", sep = sep.escape_debug()))
+                output.text_fmt(format_args!("'{str}'", str = str.escape_debug()));
+                output.text_fmt(format_args!(".split('{sep}')", sep = sep.escape_debug()))
             }
             other => {
-                output.text(format!("cdk.Fn.split('{sep}', ", sep = sep.escape_debug()));
+                output.text_fmt(format_args!(
+                    "cdk.Fn.split('{sep}', ",
+                    sep = sep.escape_debug()
+                ));
                 emit_resource_ir(context, output, other, None);
                 output.text(")")
             }
         },
         ResourceIr::Sub(parts) => {
             output.text("f\"\"\"");
-            for part in parts {
+            for part in nodes.list(*parts) {
                 match part {
                     ResourceIr::String(lit) => {
                         let escaped_lit = lit.replace('{', "{{").replace('}', "}}");
@@ -853,7 +872,9 @@ fn emit_resource_ir(
         }
 
         // References
-        ResourceIr::Ref(reference) => output.text(reference.to_python(context.class_type)),
+        ResourceIr::Ref(reference) => {
+            output.text(reference.to_python(context.symbols, context.class_type))
+        }
     }
     if let Some(trailer) = trailer {
         output.text(trailer.to_owned())
@@ -1,6 +1,7 @@
 // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 // SPDX-License-Identifier: Apache-2.0 OR MIT
 use crate::cdk::Schema;
+use crate::ir::symbols::SymbolTable;
 use crate::ir::CloudformationProgramIr;
 use crate::ir::{conditions::ConditionIr, importer::ImportInstruction};
 use crate::synthesizer::ClassType;
@@ -34,7 +35,8 @@ fn test_alexa_org() {
 #[test]
 fn test_condition_ir_not_simple() {
     let condition_ir = ConditionIr::Not(Box::new(ConditionIr::Condition("condition".into())));
-    let result = synthesize_condition_recursive(&condition_ir, ClassType::Stack);
+    let result =
+        synthesize_condition_recursive(&condition_ir, &SymbolTable::default(), ClassType::Stack);
     assert_eq!("not (condition)", result);
 }
 
@@ -45,7 +47,8 @@ fn test_condition_ir_map() {
         Box::new(ConditionIr::Str("FirstLevelKey".into())),
         Box::new(ConditionIr::Str("SecondLevelKey".into())),
     );
-    let result = synthesize_condition_recursive(&condition_ir, ClassType::Stack);
+    let result =
+        synthesize_condition_recursive(&condition_ir, &SymbolTable::default(), ClassType::Stack);
     assert_eq!(
         "condition_ir_map['FirstLevelKey']['SecondLevelKey']",
         result
@@ -447,3 +450,67 @@ fn test_cfn_custom_resource_no_type_override() {
     assert!(!code.contains("aws_cloudformation"));
     assert!(code.contains("myCustomResource.get_att('Endpoint').to_string()"));
 }
+
+// --- Helper Tests ---
+
+fn synthesize_python(template: &str) -> String {
+    let cfn: CloudformationParseTree = serde_json::from_str(template).unwrap();
+    let ir = CloudformationProgramIr::from(cfn, Schema::builtin()).unwrap();
+
+    let mut output = Vec::new();
+    ir.synthesize("python", &mut output, "TestStack", ClassType::Stack)
+        .unwrap();
+    String::from_utf8(output).unwrap()
+}
+
+#[test]
+fn test_base64_import_for_selected_item() {
+    let code = synthesize_python(
+        r#"{
+        "Resources": { "Bucket": { "Type": "AWS::S3::Bucket" } },
+        "Outputs": {
+            "Selected": { "Value": { "Fn::Select": [1, ["plain", { "Fn::Base64": "3q2+7w==" }]] } }
+        }
+    }"#,
+    );
+    assert!(code.contains("import base64"));
+
+    let code = synthesize_python(
+        r#"{
+        "Resources": { "Bucket": { "Type": "AWS::S3::Bucket" } },
+        "Outputs": {
+            "Selected": { "Value": { "Fn::Select": [0, ["plain", { "Fn::Base64": "3q2+7w==" }]] } }
+        }
+    }"#,
+    );
+    assert!(!code.contains("import base64"));
+}
+
+#[test]
+fn test_base64_import_for_metadata() {
+    // Metadata that is not an object is left out as a comment.
+    let code = synthesize_python(
+        r#"{
+        "Resources": {
+            "Bucket": {
+                "Type": "AWS::S3::Bucket",
+                "Metadata": [{ "Fn::Base64": "3q2+7w==" }]
+            }
+        }
+    }"#,
+    );
+    assert!(!code.contains("import base64"));
+
+    let code = synthesize_python(
+        r#"{
+        "Resources": {
+            "Setup": {
+                "Type": "Custom::Setup",
+                "Metadata": { "Script": { "Fn::Base64": "3q2+7w==" } },
+                "Properties": { "ServiceToken": "arn:aws:lambda:us-east-1:123456789:function:handler" }
+            }
+        }
+    }"#,
+    );
+    assert!(code.contains("import base64"));
+}
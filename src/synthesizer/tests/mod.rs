@@ -12,3 +12,43 @@ mod test;
 use class::IrClass;
 
 generate_ir_tests!();
+
+#[test]
+fn synthesize_concurrently_matches_sequential_synthesis() {
+    use crate::cdk::Schema;
+    use crate::ir::CloudformationProgramIr;
+    use crate::synthesizer::ClassType;
+    use crate::CloudformationParseTree;
+
+    let template = include_str!("../../../cdk-from-cfn-testing/cases/simple/template.json");
+    let cfn: CloudformationParseTree = serde_json::from_str(template).unwrap();
+    let ir = CloudformationProgramIr::from(cfn, Schema::builtin()).unwrap();
+
+    let languages = [
+        #[cfg(feature = "csharp")]
+        "csharp",
+        #[cfg(feature = "golang")]
+        "go",
+        #[cfg(feature = "java")]
+        "java",
+        #[cfg(feature = "python")]
+        "python",
+        #[cfg(feature = "typescript")]
+        "typescript",
+    ];
+    let mut outputs: Vec<(&str, Vec<u8>)> = languages
+        .iter()
+        .map(|&language| (language, Vec::new()))
+        .collect();
+
+    for result in ir.synthesize_concurrently(&mut outputs, "SimpleStack", ClassType::Stack) {
+        result.unwrap();
+    }
+
+    for (language, output) in outputs {
+        let mut expected = Vec::new();
+        ir.synthesize(language, &mut expected, "SimpleStack", ClassType::Stack)
+            .unwrap();
+        assert_eq!(output, expected, "{language} output differs");
+    }
+}
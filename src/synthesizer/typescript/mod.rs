@@ -13,14 +13,18 @@ use crate::ir::conditions::ConditionIr;
 use crate::ir::constructor::ConstructorParameter;
 use crate::ir::importer::ImportInstruction;
 use crate::ir::mappings::{MappingInstruction, OutputType};
+use crate::ir::nodes::NodeTable;
 use crate::ir::outputs::OutputInstruction;
 use crate::ir::reference::{Origin, PseudoParameter, Reference};
 use crate::ir::resources::{ResourceInstruction, ResourceIr, ResourceType, CFN_CUSTOM_RESOURCE};
+use crate::ir::symbols::SymbolTable;
+use crate::ir::types::TypeTable;
 use crate::ir::CloudformationProgramIr;
 use crate::parser::lookup_table::MappingInnerValue;
 use crate::util::Hasher;
 use crate::Error;
 
+use super::helpers::Helpers;
 use super::{ClassType, Synthesizer};
 
 impl ClassType {
@@ -71,7 +75,7 @@ pub struct Typescript {}
 impl Synthesizer for Typescript {
     fn synthesize(
         &self,
-        ir: CloudformationProgramIr,
+        ir: &CloudformationProgramIr,
         output: &mut dyn io::Write,
         class_name: &str,
         class_type: ClassType,
@@ -86,8 +90,11 @@ impl Synthesizer for Typescript {
         if class_type.needs_construct_import() {
             imports.line("import { Construct } from 'constructs';");
         }
+        if Helpers::of(ir).decoded_base64 {
+            imports.line("import { Buffer } from 'buffer';");
+        }
 
-        let context = &mut TypescriptContext::with_imports(imports, class_type);
+        let context = &mut TypescriptContext::new(ir, class_type);
 
         let iface_props = code.indent_with_options(IndentOptions {
             indent: INDENT,
@@ -285,7 +292,7 @@ impl Synthesizer for Typescript {
             ctor.line("// Conditions");
 
             for cond in &ir.conditions {
-                let synthed = synthesize_condition_recursive(&cond.value, class_type);
+                let synthed = synthesize_condition_recursive(&cond.value, &ir.symbols, class_type);
                 ctor.line(format!("const {} = {};", pretty_name(&cond.name), synthed));
             }
         }
@@ -305,6 +312,7 @@ impl Synthesizer for Typescript {
             } else {
                 emit_resource(context, &ctor, reference);
             }
+            ctor.stream(output)?;
         }
 
         if !ir.outputs.is_empty() {
@@ -340,6 +348,7 @@ impl Synthesizer for Typescript {
                 } else {
                     emit_cfn_output(context, &ctor, op, &var_name);
                 }
+                ctor.stream(output)?;
             }
         }
 
@@ -378,42 +387,37 @@ impl ImportInstruction {
     }
 }
 
-struct TypescriptContext {
-    imports: Rc<CodeBuffer>,
-    imports_buffer: bool,
+struct TypescriptContext<'a> {
+    symbols: &'a SymbolTable,
+    types: &'a TypeTable,
+    nodes: &'a NodeTable,
     class_type: ClassType,
 }
-impl TypescriptContext {
-    const fn with_imports(imports: Rc<CodeBuffer>, class_type: ClassType) -> Self {
+impl<'a> TypescriptContext<'a> {
+    const fn new(ir: &'a CloudformationProgramIr, class_type: ClassType) -> Self {
         Self {
-            imports,
-            imports_buffer: false,
+            symbols: &ir.symbols,
+            types: &ir.types,
+            nodes: &ir.nodes,
             class_type,
         }
     }
-
-    fn import_buffer(&mut self) {
-        if self.imports_buffer {
-            return;
-        }
-        self.imports.line("import { Buffer } from 'buffer';");
-        self.imports_buffer = true;
-    }
 }
 
 impl Reference {
-    fn to_typescript(&self, class_type: ClassType) -> Cow<'static, str> {
+    fn to_typescript(&self, symbols: &SymbolTable, class_type: ClassType) -> Cow<'static, str> {
+        let name = symbols.resolve(self.symbol);
         match &self.origin {
             Origin::CfnParameter | Origin::Parameter => {
-                format!("props.{}!", camel_case(&self.name)).into()
+                format!("props.{}!", camel_case(name)).into()
             }
             Origin::LogicalId { conditional, .. } => format!(
                 "{var}{chain}ref",
-                var = camel_case(&self.name),
+                var = camel_case(name),
                 chain = if *conditional { "?." } else { "." }
             )
             .into(),
-            Origin::Condition => camel_case(&self.name).into(),
+            Origin::Condition => camel_case(name).into(),
             Origin::PseudoParameter(x) => {
                 let prefix = if class_type == ClassType::Construct {
                     "cdk.Stack.of(this)."
@@ -440,13 +444,13 @@ impl Reference {
                 if *is_custom_resource {
                     format!(
                         "{var_name}{chain}getAtt('{attribute}').toString()",
-                        var_name = camel_case(&self.name),
+                        var_name = camel_case(name),
                         chain = if *conditional { "?." } else { "." },
                     )
                 } else {
                     format!(
                         "{var_name}{chain}attr{name}",
-                        var_name = camel_case(&self.name),
+                        var_name = camel_case(name),
                         chain = if *conditional { "?." } else { "." },
                         name = pascal_case(&attribute.replace('.', ""))
                     )
@@ -651,7 +655,7 @@ fn emit_resource_attributes(
         for dependency in &reference.dependencies {
             output.line(format!(
                 "{var_name}.addDependency({});",
-                pretty_name(dependency)
+                pretty_name(context.symbols.resolve(*dependency))
             ));
         }
     }
@@ -662,14 +666,15 @@ fn emit_resource_metadata(
     output: Rc<CodeBuffer>,
     metadata: &ResourceIr,
 ) {
+    let nodes = context.nodes;
     match metadata {
         ResourceIr::Object(_, entries) => {
-            for (name, value) in entries {
+            for (name, value) in nodes.entries(*entries) {
                 output.text(format!("{name}: "));
                 emit_resource_ir(context, &output, value, Some(",\n"));
             }
         }
-        unsupported => output.line(format!("/* {unsupported:?} */")),
+        unsupported => output.line(format!("/* {:?} */", nodes.resolve(unsupported))),
     }
 }
 
@@ -690,13 +695,14 @@ fn emit_resource_ir(
     value: &ResourceIr,
     trailer: Option<&str>,
 ) {
+    let nodes = context.nodes;
     match value {
         // Literal values
         ResourceIr::Null => output.text("undefined"),
         ResourceIr::Bool(bool) => output.text(bool.to_string()),
-        ResourceIr::Double(float) => output.text(format!("{float}")),
+        ResourceIr::Double(float) => output.text_fmt(format_args!("{float}")),
         ResourceIr::Number(int) => output.text(int.to_string()),
-        ResourceIr::String(str) => output.text(format!("'{}'", str.escape_debug())),
+        ResourceIr::String(str) => output.text_fmt(format_args!("'{}'", str.escape_debug())),
 
         // Collection values
         ResourceIr::Array(_, array) => {
@@ -706,7 +712,7 @@ fn emit_resource_ir(
                 trailing: Some("]".into()),
                 trailing_newline: false,
             });
-            for item in array {
+            for item in nodes.list(*array) {
                 emit_resource_ir(context, &arr, item, Some(",\n"));
             }
         }
@@ -717,19 +723,19 @@ fn emit_resource_ir(
                 trailing: Some("}".into()),
                 trailing_newline: false,
             });
-            for (name, value) in entries {
-                match structure {
+            for (name, value) in nodes.entries(*entries) {
+                match &context.types[*structure] {
                     TypeReference::Primitive(_) | TypeReference::Map(_) => {
                         if name.chars().all(|c| c.is_alphanumeric())
                             && name.chars().next().unwrap().is_alphabetic()
                         {
-                            obj.text(format!("{name}: "));
+                            obj.text_fmt(format_args!("{name}: "));
                         } else {
-                            obj.text(format!("'{name}': "));
+                            obj.text_fmt(format_args!("'{name}': "));
                         }
                     }
                     _ => {
-                        obj.text(format!("{key}: ", key = pretty_name(name)));
+                        obj.text_fmt(format_args!("{key}: ", key = pretty_name(name)));
                     }
                 }
                 emit_resource_ir(context, &obj, value, Some(",\n"));
@@ -737,14 +743,11 @@ fn emit_resource_ir(
         }
 
         // Intrinsics
-        ResourceIr::Base64(base64) => match base64.as_ref() {
-            ResourceIr::String(b64) => {
-                context.import_buffer();
-                output.text(format!(
-                    "Buffer.from('{}', 'base64').toString('binary')",
-                    b64.escape_debug()
-                ))
-            }
+        ResourceIr::Base64(base64) => match &nodes[*base64] {
+            ResourceIr::String(b64) => output.text_fmt(format_args!(
+                "Buffer.from('{}', 'base64').toString('binary')",
+                b64.escape_debug()
+            )),
             other => {
                 output.text("cdk.Fn.base64(");
                 emit_resource_ir(context, output, other, None);
@@ -753,27 +756,27 @@ fn emit_resource_ir(
         },
         ResourceIr::Cidr(ip_range, count, mask) => {
             output.text("cdk.Fn.cidr(");
-            emit_resource_ir(context, output, ip_range, None);
+            emit_resource_ir(context, output, &nodes[*ip_range], None);
             output.text(", ");
-            emit_resource_ir(context, output, count, None);
+            emit_resource_ir(context, output, &nodes[*count], None);
             output.text(", String(");
-            emit_resource_ir(context, output, mask, None);
+            emit_resource_ir(context, output, &nodes[*mask], None);
             output.text("))")
         }
         ResourceIr::GetAZs(region) => {
             output.text("cdk.Fn.getAzs(");
-            emit_resource_ir(context, output, region, None);
+            emit_resource_ir(context, output, &nodes[*region], None);
             output.text(")")
         }
         ResourceIr::If(cond_name, if_true, if_false) => {
-            output.text(format!("{} ? ", pretty_name(cond_name)));
-            emit_resource_ir(context, output, if_true, None);
+            output.text_fmt(format_args!("{} ? ", pretty_name(cond_name)));
+            emit_resource_ir(context, output, &nodes[*if_true], None);
             output.text(" : ");
-            emit_resource_ir(context, output, if_false, None)
+            emit_resource_ir(context, output, &nodes[*if_false], None)
         }
         ResourceIr::ImportValue(import) => {
             output.text("cdk.Fn.importValue(");
-            emit_resource_ir(context, output, import, None);
+            emit_resource_ir(context, output, &nodes[*import], None);
             output.text(")");
         }
         ResourceIr::Join(sep, list) => {
@@ -783,19 +786,20 @@ fn emit_resource_ir(
                 trailing: Some(format!("].join('{sep}')", sep = sep.escape_debug()).into()),
                 trailing_newline: false,
             });
-            for item in list {
+            for item in nodes.list(*list) {
                 emit_resource_ir(context, &items, item, Some(",\n"));
             }
         }
         ResourceIr::Map(name, tlk, slk) => {
-            output.text(format!("{}[", pretty_name(name)));
-            emit_resource_ir(context, output, tlk, None);
+            output.text_fmt(format_args!("{}[", pretty_name(name)));
+            emit_resource_ir(context, output, &nodes[*tlk], None);
             output.text("][");
-            emit_resource_ir(context, output, slk, None);
+            emit_resource_ir(context, output, &nodes[*slk], None);
             output.text("]")
         }
-        ResourceIr::Select(idx, list) => match list.as_ref() {
+        ResourceIr::Select(idx, list) => match &nodes[*list] {
             ResourceIr::Array(_, array) => {
+                let array = nodes.list(*array);
                 if *idx <= array.len() {
                     emit_resource_ir(context, output, &array[*idx], None)
                 } else {
@@ -810,20 +814,23 @@ fn emit_resource_ir(
                 output.text(")")
             }
         },
-        ResourceIr::Split(sep, str) => match str.as_ref() {
+        ResourceIr::Split(sep, str) => match &nodes[*str] {
             ResourceIr::String(str) => {
-                output.text(format!("'{str}'", str = str.escape_debug()));
-                output.text(format!(".split('{sep}')", sep = sep.escape_debug()))
+                output.text_fmt(format_args!("'{str}'", str = str.escape_debug()));
+                output.text_fmt(format_args!(".split('{sep}')", sep = sep.escape_debug()))
             }
             other => {
-                output.text(format!("cdk.Fn.split('{sep}', ", sep = sep.escape_debug()));
+                output.text_fmt(format_args!(
+                    "cdk.Fn.split('{sep}', ",
+                    sep = sep.escape_debug()
+                ));
                 emit_resource_ir(context, output, other, None);
                 output.text(")")
             }
         },
         ResourceIr::Sub(parts) => {
             output.text("`");
-            for part in parts {
+            for part in nodes.list(*parts) {
                 match part {
                     ResourceIr::String(lit) => output.text(lit.clone()),
                     other => {
@@ -837,7 +844,9 @@ fn emit_resource_ir(
         }
 
         // References
-        ResourceIr::Ref(reference) => output.text(reference.to_typescript(context.class_type)),
+        ResourceIr::Ref(reference) => {
+            output.text(reference.to_typescript(context.symbols, context.class_type))
+        }
     }
 
     if let Some(trailer) = trailer {
@@ -881,12 +890,16 @@ fn emit_mappings(output: &CodeBuffer, mappings: &[MappingInstruction]) {
     }
 }
 
-fn synthesize_condition_recursive(val: &ConditionIr, class_type: ClassType) -> String {
+fn synthesize_condition_recursive(
+    val: &ConditionIr,
+    symbols: &SymbolTable,
+    class_type: ClassType,
+) -> String {
     match val {
         ConditionIr::And(x) => {
             let a: Vec<String> = x
                 .iter()
-                .map(|v| synthesize_condition_recursive(v, class_type))
+                .map(|v| synthesize_condition_recursive(v, symbols, class_type))
                 .collect();
 
             let inner = a.join(" && ");
@@ -895,27 +908,27 @@ fn synthesize_condition_recursive(val: &ConditionIr, class_type: ClassType) -> S
         ConditionIr::Equals(a, b) => {
             format!(
                 "{} === {}",
-                synthesize_condition_recursive(a.as_ref(), class_type),
-                synthesize_condition_recursive(b.as_ref(), class_type)
+                synthesize_condition_recursive(a.as_ref(), symbols, class_type),
+                synthesize_condition_recursive(b.as_ref(), symbols, class_type)
             )
         }
         ConditionIr::Not(x) => {
             if x.is_simple() {
                 format!(
                     "!{}",
-                    synthesize_condition_recursive(x.as_ref(), class_type)
+                    synthesize_condition_recursive(x.as_ref(), symbols, class_type)
                 )
             } else {
                 format!(
                     "!({})",
-                    synthesize_condition_recursive(x.as_ref(), class_type)
+                    synthesize_condition_recursive(x.as_ref(), symbols, class_type)
                 )
             }
         }
         ConditionIr::Or(x) => {
             let a: Vec<String> = x
                 .iter()
-                .map(|v| synthesize_condition_recursive(v, class_type))
+                .map(|v| synthesize_condition_recursive(v, symbols, class_type))
                 .collect();
 
             let inner = a.join(" || ");
@@ -925,17 +938,17 @@ fn synthesize_condition_recursive(val: &ConditionIr, class_type: ClassType) -> S
             format!("'{x}'")
         }
         ConditionIr::Condition(x) => pretty_name(x),
-        ConditionIr::Ref(x) => x.to_typescript(class_type).into(),
+        ConditionIr::Ref(x) => x.to_typescript(symbols, class_type).into(),
         ConditionIr::Map(named_resource, l1, l2) => {
             format!(
                 "{}[{}][{}]",
                 pretty_name(named_resource),
-                synthesize_condition_recursive(l1.as_ref(), class_type),
-                synthesize_condition_recursive(l2.as_ref(), class_type)
+                synthesize_condition_recursive(l1.as_ref(), symbols, class_type),
+                synthesize_condition_recursive(l2.as_ref(), symbols, class_type)
             )
         }
         ConditionIr::Split(sep, l1) => {
-            let str = synthesize_condition_recursive(l1.as_ref(), class_type);
+            let str = synthesize_condition_recursive(l1.as_ref(), symbols, class_type);
             format!(
                 "{str}.split('{sep}')",
                 str = str.escape_debug(),
@@ -943,7 +956,7 @@ fn synthesize_condition_recursive(val: &ConditionIr, class_type: ClassType) -> S
             )
         }
         ConditionIr::Select(index, l1) => {
-            let str = synthesize_condition_recursive(l1.as_ref(), class_type);
+            let str = synthesize_condition_recursive(l1.as_ref(), symbols, class_type);
             format!("cdk.Fn.select({index}, {str})")
         }
     }
@@ -471,3 +471,67 @@ fn test_cfn_custom_resource_no_type_override() {
     // DeletionPolicy should still work
     assert!(code.contains("cfnOptions.deletionPolicy = cdk.CfnDeletionPolicy.RETAIN"));
 }
+
+// --- Helper Tests ---
+
+fn synthesize_typescript(template: &str) -> String {
+    let cfn: CloudformationParseTree = serde_json::from_str(template).unwrap();
+    let ir = CloudformationProgramIr::from(cfn, Schema::builtin()).unwrap();
+
+    let mut output = Vec::new();
+    ir.synthesize("typescript", &mut output, "TestStack", ClassType::Stack)
+        .unwrap();
+    String::from_utf8(output).unwrap()
+}
+
+#[test]
+fn test_base64_import_for_selected_item() {
+    let code = synthesize_typescript(
+        r#"{
+        "Resources": { "Bucket": { "Type": "AWS::S3::Bucket" } },
+        "Outputs": {
+            "Selected": { "Value": { "Fn::Select": [1, ["plain", { "Fn::Base64": "3q2+7w==" }]] } }
+        }
+    }"#,
+    );
+    assert!(code.contains("import { Buffer } from 'buffer';"));
+
+    let code = synthesize_typescript(
+        r#"{
+        "Resources": { "Bucket": { "Type": "AWS::S3::Bucket" } },
+        "Outputs": {
+            "Selected": { "Value": { "Fn::Select": [0, ["plain", { "Fn::Base64": "3q2+7w==" }]] } }
+        }
+    }"#,
+    );
+    assert!(!code.contains("import { Buffer } from 'buffer';"));
+}
+
+#[test]
+fn test_base64_import_for_metadata() {
+    // Metadata that is not an object is left out as a comment.
+    let code = synthesize_typescript(
+        r#"{
+        "Resources": {
+            "Bucket": {
+                "Type": "AWS::S3::Bucket",
+                "Metadata": [{ "Fn::Base64": "3q2+7w==" }]
+            }
+        }
+    }"#,
+    );
+    assert!(!code.contains("import { Buffer } from 'buffer';"));
+
+    let code = synthesize_typescript(
+        r#"{
+        "Resources": {
+            "Setup": {
+                "Type": "Custom::Setup",
+                "Metadata": { "Script": { "Fn::Base64": "3q2+7w==" } },
+                "Properties": { "ServiceToken": "arn:aws:lambda:us-east-1:123456789:function:handler" }
+            }
+        }
+    }"#,
+    );
+    assert!(code.contains("import { Buffer } from 'buffer';"));
+}
@@ -0,0 +1,98 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+
+//! Wall time and item counts of the phases of a conversion.
+//!
+//! Durations are measured with [`std::time::Instant`], which is not available
+//! on `wasm32-unknown-unknown`; the WebAssembly bindings never record timings.
+
+use serde_json::{json, Value};
+use std::io;
+use std::time::{Duration, Instant};
+
+/// A single measured phase of a conversion.
+#[derive(Clone, Debug)]
+pub struct Phase {
+    /// The name of the phase, such as `parse` or `ResourceInstruction::from`.
+    pub name: &'static str,
+    /// The wall time spent in the phase.
+    pub elapsed: Duration,
+    /// The number of items the phase produced: entries for the translation
+    /// phases, resources for `parse`, and bytes for `synthesize` and `write`.
+    pub items: usize,
+}
+
+/// The phases recorded during a conversion, in the order they ran.
+#[derive(Clone, Debug, Default)]
+pub struct Timings {
+    phases: Vec<Phase>,
+}
+
+impl Timings {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Runs `phase`, recording its wall time under `name` along with the item
+    /// count `items` computes from its result.
+    pub fn time<T>(
+        &mut self,
+        name: &'static str,
+        phase: impl FnOnce() -> T,
+        items: impl FnOnce(&T) -> usize,
+    ) -> T {
+        let start = Instant::now();
+        let result = phase();
+        let elapsed = start.elapsed();
+        self.phases.push(Phase {
+            name,
+            elapsed,
+            items: items(&result),
+        });
+        result
+    }
+
+    pub fn phases(&self) -> &[Phase] {
+        &self.phases
+    }
+
+    /// The sum of the wall time of every recorded phase.
+    pub fn total(&self) -> Duration {
+        self.phases.iter().map(|phase| phase.elapsed).sum()
+    }
+
+    /// Writes the phases as a table meant to be read by humans.
+    pub fn write_table(&self, into: &mut dyn io::Write) -> io::Result<()> {
+        writeln!(into, "{:<28} {:>12} {:>10}", "phase", "time", "items")?;
+        for phase in &self.phases {
+            writeln!(
+                into,
+                "{:<28} {:>12.3?} {:>10}",
+                phase.name, phase.elapsed, phase.items
+            )?;
+        }
+        writeln!(into, "{:<28} {:>12.3?}", "total", self.total())
+    }
+
+    /// Returns the phases as a JSON object, with times in milliseconds.
+    pub fn to_json(&self) -> Value {
+        let phases: Vec<Value> = self
+            .phases
+            .iter()
+            .map(|phase| {
+                json!({
+                    "phase": phase.name,
+                    "ms": phase.elapsed.as_secs_f64() * 1000.0,
+                    "items": phase.items,
+                })
+            })
+            .collect();
+        json!({
+            "phases": phases,
+            "total_ms": self.total().as_secs_f64() * 1000.0,
+        })
+    }
+}
+
+#[cfg(test)]
+mod tests;
@@ -0,0 +1,89 @@
+// Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+// SPDX-License-Identifier: Apache-2.0 OR MIT
+use super::*;
+
+#[test]
+fn test_time_records_phases_in_order() {
+    let mut timings = Timings::new();
+    let value = timings.time("first", || vec![1, 2, 3], Vec::len);
+    timings.time("second", || (), |_| 0);
+
+    assert_eq!(value, vec![1, 2, 3]);
+    let phases: Vec<_> = timings
+        .phases()
+        .iter()
+        .map(|phase| (phase.name, phase.items))
+        .collect();
+    assert_eq!(phases, vec![("first", 3), ("second", 0)]);
+    assert_eq!(
+        timings.total(),
+        timings.phases()[0].elapsed + timings.phases()[1].elapsed
+    );
+}
+
+#[test]
+fn test_timings_report() {
+    let timings = Timings {
+        phases: vec![Phase {
+            name: "parse",
+            elapsed: Duration::from_micros(1500),
+            items: 42,
+        }],
+    };
+
+    let json = timings.to_json();
+    assert_eq!(json["phases"][0]["phase"], "parse");
+    assert_eq!(json["phases"][0]["ms"], 1.5);
+    assert_eq!(json["phases"][0]["items"], 42);
+    assert_eq!(json["total_ms"], 1.5);
+
+    let mut table = Vec::new();
+    timings.write_table(&mut table).unwrap();
+    let table = String::from_utf8(table).unwrap();
+    assert!(table.lines().nth(1).unwrap().starts_with("parse"));
+    assert!(table.lines().nth(1).unwrap().ends_with(" 42"));
+    assert!(table.lines().nth(2).unwrap().starts_with("total"));
+}
+
+#[test]
+fn test_from_timed_matches_from() {
+    use crate::cdk::Schema;
+    use crate::ir::CloudformationProgramIr;
+    use crate::CloudformationParseTree;
+    use std::fs;
+    use std::path::Path;
+
+    let template = fs::read(
+        Path::new(env!("CARGO_MANIFEST_DIR")).join("cdk-from-cfn-testing/cases/vpc/template.json"),
+    )
+    .unwrap();
+    let mut timings = Timings::new();
+    let timed = CloudformationProgramIr::from_timed(
+        CloudformationParseTree::from_slice(&template).unwrap(),
+        Schema::builtin(),
+        &mut timings,
+    )
+    .unwrap();
+    let plain = CloudformationProgramIr::from(
+        CloudformationParseTree::from_slice(&template).unwrap(),
+        Schema::builtin(),
+    )
+    .unwrap();
+
+    assert_eq!(format!("{timed:?}"), format!("{plain:?}"));
+    let phases: Vec<_> = timings.phases().iter().map(|phase| phase.name).collect();
+    assert_eq!(
+        phases,
+        vec![
+            "ReferenceOrigins::new",
+            "ConditionInstruction::from",
+            "ImportInstruction::from",
+            "ResourceInstruction::from",
+            "OutputInstruction::from",
+            "order",
+            "NodeTable::compact",
+            "TypeTable::compact",
+        ]
+    );
+    assert_eq!(timings.phases()[5].items, timed.resources.len());
+}
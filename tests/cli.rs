@@ -8,8 +8,15 @@
 //! - Explicit --as stack mode
 //! - Explicit --as construct mode
 //! - Invalid command handling
+//! - Batch mode
+//! - Server mode
+//! - Timing reports
+//! - Conversion cache
+//! - IR files
+//! - Watch mode
 
 use cdk_from_cfn_testing::{run_cli_with_args, CdkFromCfnConstruct, CdkFromCfnStack, Stack};
+use std::fs;
 
 const TEST_TEMPLATE: &str = r#"{
     "AWSTemplateFormatVersion": "2010-09-09",
@@ -267,3 +274,325 @@ fn test_cdk_from_cfn_construct_trait() {
         code
     );
 }
+
+/// Test that batch mode converts every template of a directory tree and
+/// reports the templates that failed without aborting the run
+#[test]
+fn test_cli_batch_mode() {
+    let root = std::env::temp_dir().join(format!("cdk-from-cfn-batch-{}", std::process::id()));
+    let input = root.join("templates");
+    let output = root.join("out");
+    fs::create_dir_all(input.join("nested")).expect("Failed to create input directory");
+    fs::write(input.join("valid.json"), TEST_TEMPLATE).expect("Failed to write template");
+    fs::write(input.join("nested").join("also-valid.json"), TEST_TEMPLATE)
+        .expect("Failed to write template");
+    fs::write(input.join("invalid.yaml"), "Resources: [").expect("Failed to write template");
+
+    let (exit_code, _stdout, stderr) = run_cli_with_args(
+        &[
+            "batch",
+            input.to_str().unwrap(),
+            "--out-dir",
+            output.to_str().unwrap(),
+            "--language",
+            "python",
+        ],
+        None,
+    );
+
+    let report = String::from_utf8(stderr).expect("Stderr should be valid UTF-8");
+    assert_ne!(
+        exit_code,
+        Some(0),
+        "CLI should fail when a template cannot be converted"
+    );
+    assert!(
+        report.contains("Converted 2 of 3 templates"),
+        "Report should count converted templates. Stderr:\n{}",
+        report
+    );
+    assert!(
+        report.contains("invalid.yaml"),
+        "Report should name the failed template. Stderr:\n{}",
+        report
+    );
+    assert!(output.join("valid.py").is_file());
+    assert!(output.join("nested").join("also-valid.py").is_file());
+
+    let _ = fs::remove_dir_all(&root);
+}
+
+/// Test that batch mode fails templates whose code would be written to the
+/// same file, rather than letting one overwrite the other
+#[test]
+fn test_cli_batch_mode_conflicting_outputs() {
+    let root = std::env::temp_dir().join(format!(
+        "cdk-from-cfn-batch-conflict-{}",
+        std::process::id()
+    ));
+    let input = root.join("templates");
+    let output = root.join("out");
+    fs::create_dir_all(&input).expect("Failed to create input directory");
+    fs::write(input.join("stack.json"), TEST_TEMPLATE).expect("Failed to write template");
+    fs::write(input.join("stack.yaml"), TEST_TEMPLATE).expect("Failed to write template");
+    fs::write(input.join("other.json"), TEST_TEMPLATE).expect("Failed to write template");
+
+    let (exit_code, _stdout, stderr) = run_cli_with_args(
+        &[
+            "batch",
+            input.to_str().unwrap(),
+            input.join("other.json").to_str().unwrap(),
+            "--out-dir",
+            output.to_str().unwrap(),
+            "--language",
+            "python",
+        ],
+        None,
+    );
+
+    let report = String::from_utf8(stderr).expect("Stderr should be valid UTF-8");
+    assert_ne!(
+        exit_code,
+        Some(0),
+        "CLI should fail when templates are generated into the same file"
+    );
+    assert!(
+        report.contains("Converted 1 of 3 templates"),
+        "Both conflicting templates should fail, and a template listed twice \
+         should be converted once. Stderr:\n{}",
+        report
+    );
+    assert!(
+        report.contains("stack.py would also be generated from"),
+        "Report should name the conflicting output. Stderr:\n{}",
+        report
+    );
+    assert!(!output.join("stack.py").exists());
+    assert!(output.join("other.py").is_file());
+
+    let _ = fs::remove_dir_all(&root);
+}
+
+/// Test that serve mode answers every JSON-lines request read from STDIN
+#[test]
+fn test_cli_serve_mode() {
+    let requests: String = [
+        serde_json::json!({
+            "id": 1,
+            "template": TEST_TEMPLATE,
+            "language": "typescript",
+            "class_name": "TestStack",
+        }),
+        serde_json::json!({ "id": 2, "template": "Resources: [" }),
+        serde_json::json!({ "id": 3, "stats": true }),
+    ]
+    .iter()
+    .map(|request| format!("{request}\n"))
+    .collect();
+
+    let (exit_code, stdout, _stderr) = run_cli_with_args(&["serve"], Some(&requests));
+
+    assert_eq!(exit_code, Some(0), "CLI should exit successfully");
+
+    let responses: Vec<serde_json::Value> = String::from_utf8(stdout)
+        .expect("Output should be valid UTF-8")
+        .lines()
+        .map(|line| serde_json::from_str(line).expect("Responses should be JSON"))
+        .collect();
+    let response = |id: i64| {
+        responses
+            .iter()
+            .find(|response| response["id"] == id)
+            .unwrap_or_else(|| panic!("Missing response to request {id}: {responses:?}"))
+    };
+
+    assert_eq!(responses.len(), 3, "Every request should be answered");
+    assert!(
+        response(1)["output"]
+            .as_str()
+            .is_some_and(|output| output.contains("class TestStack extends cdk.Stack")),
+        "Conversion should return the generated code: {:?}",
+        response(1)
+    );
+    assert!(
+        response(2)["error"].is_string(),
+        "Invalid templates should be answered with an error"
+    );
+    assert!(
+        response(3)["stats"]["requests"].is_u64(),
+        "Stats should include the request counter"
+    );
+}
+
+/// Test that --timings-json reports every phase of the conversion on STDERR
+#[test]
+fn test_cli_timings_json() {
+    let (exit_code, stdout, stderr) = run_cli_with_args(
+        &["-", "--language", "typescript", "--timings-json"],
+        Some(TEST_TEMPLATE),
+    );
+
+    assert_eq!(exit_code, Some(0), "CLI should exit successfully");
+    assert!(
+        String::from_utf8(stdout)
+            .expect("Output should be valid UTF-8")
+            .contains("extends cdk.Stack"),
+        "Generated code should still be written to STDOUT"
+    );
+
+    let timings: serde_json::Value =
+        serde_json::from_slice(&stderr).expect("Timings should be JSON");
+    let phases: Vec<&str> = timings["phases"]
+        .as_array()
+        .expect("Timings should list phases")
+        .iter()
+        .map(|phase| phase["phase"].as_str().unwrap())
+        .collect();
+    assert_eq!(
+        phases,
+        [
+            "parse",
+            "ReferenceOrigins::new",
+            "ConditionInstruction::from",
+            "ImportInstruction::from",
+            "ResourceInstruction::from",
+            "OutputInstruction::from",
+            "order",
+            "NodeTable::compact",
+            "TypeTable::compact",
+            // Without a cache, the code is written out as it is synthesized.
+            "synthesize",
+        ]
+    );
+    assert_eq!(
+        timings["phases"][6]["items"], 2,
+        "Both resources are ordered"
+    );
+    assert!(timings["total_ms"].is_f64());
+}
+
+/// Test that --cache-dir stores generated code and serves it back
+#[test]
+fn test_cli_cache() {
+    let cache = std::env::temp_dir().join(format!("cdk-from-cfn-cache-{}", std::process::id()));
+    let _ = fs::remove_dir_all(&cache);
+    let args = [
+        "-",
+        "--language",
+        "python",
+        "--cache-dir",
+        cache.to_str().unwrap(),
+    ];
+
+    let (exit_code, first, _stderr) = run_cli_with_args(&args, Some(TEST_TEMPLATE));
+    assert_eq!(exit_code, Some(0), "CLI should exit successfully");
+    let entries: Vec<_> = fs::read_dir(&cache)
+        .expect("Cache directory should be created")
+        .collect();
+    assert_eq!(entries.len(), 1, "The generated code should be cached");
+
+    let (exit_code, second, stderr) = run_cli_with_args(
+        &[&args[..], &["--timings-json"]].concat(),
+        Some(TEST_TEMPLATE),
+    );
+    assert_eq!(exit_code, Some(0), "CLI should exit successfully");
+    assert_eq!(first, second, "Cached code should match the generated code");
+    let timings: serde_json::Value =
+        serde_json::from_slice(&stderr).expect("Timings should be JSON");
+    assert_eq!(
+        timings["phases"][0]["phase"], "cache",
+        "The cache should be looked up first"
+    );
+    assert_eq!(
+        timings["phases"][1]["phase"], "write",
+        "A cache hit should skip the conversion"
+    );
+
+    let _ = fs::remove_dir_all(&cache);
+}
+
+/// Test that --emit-ir writes IR that --from-ir generates the same code from
+#[test]
+fn test_cli_emit_and_read_ir() {
+    let (exit_code, expected, _stderr) =
+        run_cli_with_args(&["-", "--language", "python"], Some(TEST_TEMPLATE));
+    assert_eq!(exit_code, Some(0), "CLI should exit successfully");
+
+    let dir = std::env::temp_dir().join(format!("cdk-from-cfn-ir-{}", std::process::id()));
+    fs::create_dir_all(&dir).expect("Failed to create IR directory");
+    for file in ["stack.ir", "stack.json"] {
+        let ir = dir.join(file);
+        let ir = ir.to_str().unwrap();
+
+        let (exit_code, stdout, _stderr) =
+            run_cli_with_args(&["-", "--emit-ir", ir], Some(TEST_TEMPLATE));
+        assert_eq!(exit_code, Some(0), "CLI should exit successfully");
+        assert!(stdout.is_empty(), "No code should be generated");
+        assert_eq!(
+            fs::read(ir).unwrap().starts_with(b"CFNIR\0"),
+            file.ends_with(".ir"),
+            "The format should follow the file extension"
+        );
+
+        let (exit_code, code, _stderr) =
+            run_cli_with_args(&[ir, "--from-ir", "--language", "python"], None);
+        assert_eq!(exit_code, Some(0), "CLI should exit successfully");
+        assert_eq!(code, expected, "Code generated from the IR should match");
+    }
+
+    let (exit_code, _stdout, stderr) = run_cli_with_args(&["-", "--from-ir"], Some(TEST_TEMPLATE));
+    assert_ne!(exit_code, Some(0), "A template is not IR");
+    assert!(!stderr.is_empty(), "The error should be reported");
+
+    let _ = fs::remove_dir_all(&dir);
+}
+
+/// Test that watch mode converts templates, and converts them again once they
+/// change
+#[test]
+fn test_cli_watch_mode() {
+    use std::process::{Command, Stdio};
+    use std::time::{Duration, Instant};
+
+    let root = std::env::temp_dir().join(format!("cdk-from-cfn-watch-{}", std::process::id()));
+    let input = root.join("templates");
+    let output = root.join("out");
+    fs::create_dir_all(&input).expect("Failed to create input directory");
+    fs::write(input.join("stack.json"), TEST_TEMPLATE).expect("Failed to write template");
+
+    let mut child = Command::new(env!("CARGO_BIN_EXE_cdk-from-cfn"))
+        .args(["watch", input.to_str().unwrap(), "--out-dir"])
+        .arg(&output)
+        .args(["--language", "python"])
+        .stderr(Stdio::null())
+        .spawn()
+        .expect("Failed to execute cdk-from-cfn");
+    let generated = output.join("stack.py");
+    let wait_for = |predicate: &dyn Fn(&str) -> bool| {
+        let start = Instant::now();
+        while start.elapsed() < Duration::from_secs(30) {
+            if fs::read_to_string(&generated).is_ok_and(|code| predicate(&code)) {
+                return true;
+            }
+            std::thread::sleep(Duration::from_millis(10));
+        }
+        false
+    };
+
+    let converted = wait_for(&|code| code.contains("MyBucket"));
+    fs::write(
+        input.join("stack.json"),
+        TEST_TEMPLATE.replace("MyBucket", "RenamedBucket"),
+    )
+    .expect("Failed to write template");
+    let reconverted = converted && wait_for(&|code| code.contains("RenamedBucket"));
+
+    let _ = child.kill();
+    let _ = child.wait();
+    let _ = fs::remove_dir_all(&root);
+    assert!(
+        converted,
+        "Templates should be converted when watching starts"
+    );
+    assert!(reconverted, "Changed templates should be converted again");
+}